@@ -5,6 +5,8 @@ from django.views.decorators.csrf import csrf_exempt
 from django.conf import settings
 import os
 
+from apps.dataprocessor import llm_clients
+
 # --- (THIS IS THE MOST IMPORTANT PART) ---
 # This prompt defines the AI's personality and rules.
 AI_INSIGHTS_SYSTEM_PROMPT = """
@@ -44,9 +46,9 @@ def ai_insights_view(request):
         if not api_key:
             return JsonResponse({'error': 'GEMINI_API_KEY not set on server.'}, status=500)
 
-        # Configure SDK with resolved key
+        # Configure SDK with resolved key (once per key for the whole process)
         try:
-            genai.configure(api_key=api_key)
+            llm_clients.configure_gemini(api_key, sdk=genai)
         except Exception as e:
             return JsonResponse({'error': f'Gemini configuration error: {e}'}, status=500)
 
@@ -70,7 +72,8 @@ def ai_insights_view(request):
         model_init_errors = {}
         tried_models_list = [] # To see which models were actually attempted
         
-        for mn in candidates:
+        # Models that failed recently go to the back of the queue
+        for mn in llm_clients.healthy_candidates("gemini", candidates, api_key):
             # Avoid trying the same model name twice if 'preferred' was one of them
             if mn in tried_models_list:
                 continue
@@ -80,15 +83,15 @@ def ai_insights_view(request):
                 # --- (MODIFIED) ---
                 # Initialize the model *without* system_instruction
                 # This is more compatible and less likely to time out.
-                model = genai.GenerativeModel(
-                    model_name=mn
-                )
+                # The model object is shared across requests.
+                model = llm_clients.get_gemini_model(mn, api_key, sdk=genai)
                 model_name = mn
                 # --- (NEW) Print the successful model name to the console ---
                 print(f"AI Insights: Successfully initialized model: {model_name}")
                 break # Success!
             except Exception as me:
                 model_init_errors[mn] = str(me)
+                llm_clients.record_failure("gemini", mn, me, api_key=api_key)
 
         if model is None:
             # No candidate worked — return actionable error
@@ -131,7 +134,13 @@ def ai_insights_view(request):
         chat = model.start_chat(history=gemini_history)
         
         # 6. Send the new question (with prepended context if it was the first)
-        response = chat.send_message(final_question)
+        try:
+            response = chat.send_message(final_question)
+        except Exception as se:
+            # Let the next request start with another candidate
+            llm_clients.record_failure("gemini", model_name, se, api_key=api_key)
+            raise
+        llm_clients.record_success("gemini", model_name, api_key=api_key)
 
         return JsonResponse({'answer': response.text})
 
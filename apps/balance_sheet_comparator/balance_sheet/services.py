@@ -10,6 +10,13 @@ import pdfplumber
 import pytesseract
 from pydantic import BaseModel, Field
 
+try:
+    from apps.dataprocessor import context_builder
+except ImportError:  # standalone_compare.py puts apps/ itself on sys.path
+    from dataprocessor import context_builder
+
+BALANCE_SHEET_MODEL = "gemini-2.5-flash"
+
 
 # --- PDF Loading Functions (Following dataprocessor pattern) ---
 
@@ -66,34 +73,18 @@ def load_pdf_robust(pdf_path: str) -> List[Document]:
         return []
 
 
+# Balance sheet terms on top of the shared financial keywords
+BALANCE_SHEET_KEYWORDS = {
+    'cash': 1.0, 'inventory': 2.0, 'accounts receivable': 2.0, 'fixed assets': 2.0,
+    'intangible assets': 2.0, 'debt': 1.0, 'non-current assets': 2.0,
+}
+
+
 def prepare_context_smart(documents: List[Document]) -> str:
     """Prepare context with financial focus."""
-    all_text = "\n".join([doc.page_content for doc in documents])
-    financial_keywords = [
-        'balance sheet', 'assets', 'liabilities', 'equity', 'share capital', 
-        'reserves', 'current assets', 'non-current assets', 'profit', 'loss', 
-        'revenue', 'sales', 'income', 'expenses', 'total', 'crores', 'lakhs', 
-        'financial statements', 'consolidated', 'standalone', 'cash', 'inventory',
-        'accounts receivable', 'fixed assets', 'intangible assets', 'debt'
-    ]
-    
-    context_text = all_text
-    
-    if len(all_text) > 30000:
-        chunks = []
-        chunk_size = 4000
-        for i in range(0, len(all_text), chunk_size):
-            chunk = all_text[i:i+chunk_size]
-            score = sum(1 for keyword in financial_keywords if keyword.lower() in chunk.lower())
-            if score > 2:
-                chunks.append(chunk)
-        
-        if chunks:
-            context_text = "\n".join(chunks[:10])
-        else:
-            context_text = all_text[:25000]
-
-    return context_text
+    return context_builder.build_context(
+        documents, model=BALANCE_SHEET_MODEL, extra_keywords=BALANCE_SHEET_KEYWORDS
+    )
 
 
 # --- Pydantic Schema for Balance Sheet Extraction ---
@@ -159,7 +150,7 @@ def extract_balance_sheet_data(context_text: str, api_key: str) -> Dict[str, Any
     
     try:
         llm = ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash",
+            model=BALANCE_SHEET_MODEL,
             temperature=0,
             max_retries=3,
             timeout=300,
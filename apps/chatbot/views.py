@@ -6,6 +6,7 @@ from django.views.decorators.csrf import csrf_exempt
 from django.shortcuts import get_object_or_404
 from django.conf import settings
 from langchain_groq import ChatGroq
+from apps.dataprocessor import llm_clients
 from apps.dataprocessor.models import FinancialReport
 
 GROQ_DEFAULT_MODEL = getattr(settings, 'GROQ_CHAT_MODEL', None) or os.environ.get('GROQ_CHAT_MODEL') or 'llama-3.1-8b-instant'
@@ -57,9 +58,9 @@ def chatbot_api_view(request):
         purpose = data.get('purpose', 'analysis')
         model = model_selection.get(purpose, GROQ_DEFAULT_MODEL)
 
-        llm = ChatGroq(
-            model=model,
-            groq_api_key=api_key,
+        # Reused across requests, keeps its HTTP connections alive
+        llm = llm_clients.get_groq_chat(
+            api_key, model, purpose=purpose, chat_cls=ChatGroq,
             temperature=temperature,
             max_tokens=4096,  # Reduce token usage
             timeout=60,
@@ -118,6 +119,7 @@ Overall Financial Health Summary:
         response = llm.invoke(prompt)
         answer = getattr(response, 'content', None) or getattr(response, 'text', None) or str(response)
     except Exception as e:
+        llm_clients.record_failure("groq", model, e, api_key=api_key)
         return JsonResponse({'error': f'Groq generation failed: {e}'}, status=500)
 
     return JsonResponse({
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import CompanySearch, FinancialStatementCache
+from .models import CompanySearch, FinancialStatementCache, PriceSeries
 
 @admin.register(CompanySearch)
 class CompanySearchAdmin(admin.ModelAdmin):
@@ -15,4 +15,12 @@ class FinancialStatementCacheAdmin(admin.ModelAdmin):
     list_filter = ('statement_type', 'last_updated')
     search_fields = ('symbol',)
     ordering = ('-last_updated',)
-    readonly_fields = ('last_updated',)
\ No newline at end of file
+    readonly_fields = ('last_updated',)
+
+@admin.register(PriceSeries)
+class PriceSeriesAdmin(admin.ModelAdmin):
+    list_display = ('symbol', 'interval', 'covered_from', 'full_history', 'last_fetched')
+    list_filter = ('interval', 'full_history')
+    search_fields = ('symbol',)
+    ordering = ('symbol', 'interval')
+    readonly_fields = ('last_fetched',)
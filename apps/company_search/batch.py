@@ -0,0 +1,247 @@
+"""
+Multi-symbol quotes and fundamentals in one request.
+
+A watchlist used to call the stock-price endpoint once per ticker. Here
+the whole list is answered together: whatever the ticker snapshots
+already hold comes from the cache, and price-only misses share a single
+yf.download call. The result is columnar - one list per field, aligned
+with the symbol list.
+
+Only the price fields (the default) come from that one round trip.
+Yahoo has no bulk endpoint for fundamentals, so asking for any of
+INFO_FIELDS costs one .info call per symbol not already cached; those
+run concurrently, and metadata['info_fetches'] reports how many.
+"""
+import concurrent.futures
+import logging
+import re
+
+import pandas as pd
+import yfinance as yf
+from django.conf import settings
+
+from . import single_flight, snapshot
+
+logger = logging.getLogger(__name__)
+
+MAX_SYMBOLS = 100
+DEFAULT_WORKERS = 8
+# Answered by the bulk download alone; fundamentals must be asked for
+DEFAULT_FIELDS = ['price', 'change', 'change_pct', 'volume']
+
+# Field -> .info key for everything that needs fundamentals
+INFO_FIELDS = {
+    'name': 'longName',
+    'sector': 'sector',
+    'industry': 'industry',
+    'currency': 'currency',
+    'market_cap': 'marketCap',
+    'pe': 'trailingPE',
+    'forward_pe': 'forwardPE',
+    'beta': 'beta',
+    'dividend_yield': 'dividendYield',
+    'fifty_two_week_high': 'fiftyTwoWeekHigh',
+    'fifty_two_week_low': 'fiftyTwoWeekLow',
+}
+# Fields a daily price bar can answer
+PRICE_FIELDS = ('price', 'previous_close', 'change', 'change_pct', 'volume')
+VALID_FIELDS = PRICE_FIELDS + tuple(INFO_FIELDS)
+
+_SYMBOL_RE = re.compile(r'^[A-Z0-9.^&=-]{1,20}$')
+
+
+def price_cache_key(symbol):
+    return f"batch_price_{symbol}"
+
+
+def parse_symbols(raw):
+    """Comma separated symbols -> (unique upper-case symbols in order, rejected)."""
+    symbols, rejected = [], []
+    for part in (raw or '').split(','):
+        symbol = part.strip().upper()
+        if not symbol:
+            continue
+        if not _SYMBOL_RE.match(symbol):
+            rejected.append(part.strip())
+        elif symbol not in symbols:
+            symbols.append(symbol)
+    return symbols, rejected
+
+
+def parse_fields(raw):
+    """Comma separated fields -> (fields in order, unknown); defaults when none given."""
+    fields, unknown = [], []
+    for part in (raw or '').split(','):
+        field = part.strip().lower()
+        if not field:
+            continue
+        if field not in VALID_FIELDS:
+            unknown.append(field)
+        elif field not in fields:
+            fields.append(field)
+    if not fields and not unknown:
+        return list(DEFAULT_FIELDS), []
+    return fields, unknown
+
+
+def _number(value):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if pd.isna(number) or number in (float('inf'), float('-inf')) else number
+
+
+def _price_from_info(info):
+    price = _number(info.get('currentPrice') or info.get('regularMarketPrice'))
+    previous = _number(info.get('previousClose') or info.get('regularMarketPreviousClose'))
+    return _price_row(price, previous, _number(info.get('volume')))
+
+
+def _price_row(price, previous, volume):
+    change = price - previous if price is not None and previous else None
+    return {
+        'price': price,
+        'previous_close': previous,
+        'change': round(change, 4) if change is not None else None,
+        'change_pct': round(change / previous * 100, 4) if change is not None else None,
+        'volume': volume,
+    }
+
+
+def _bars_for(data, symbol, single):
+    if isinstance(data.columns, pd.MultiIndex):
+        if symbol not in data.columns.get_level_values(0):
+            return None
+        return data[symbol]
+    return data if single else None
+
+
+def download_prices(symbols):
+    """Last two daily bars for all symbols in one yf.download call."""
+    if not symbols:
+        return {}
+    data = yf.download(
+        tickers=symbols,
+        period='5d',
+        interval='1d',
+        group_by='ticker',
+        progress=False,
+        threads=True,
+        auto_adjust=False,
+    )
+    prices = {}
+    if data is None or data.empty:
+        return prices
+    for symbol in symbols:
+        bars = _bars_for(data, symbol, len(symbols) == 1)
+        if bars is None or 'Close' not in bars:
+            continue
+        bars = bars.dropna(subset=['Close'])
+        if bars.empty:
+            continue
+        closes = bars['Close']
+        previous = _number(closes.iloc[-2]) if len(closes) > 1 else None
+        volume = _number(bars['Volume'].iloc[-1]) if 'Volume' in bars else None
+        prices[symbol] = _price_row(_number(closes.iloc[-1]), previous, volume)
+    return prices
+
+
+def fetch_infos(symbols, workers=None):
+    """.info for symbols through their ticker snapshots, a few at a time."""
+    if not symbols:
+        return {}, {}
+    workers = workers or getattr(settings, 'BATCH_QUOTE_WORKERS', DEFAULT_WORKERS)
+    infos, errors = {}, {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(workers, len(symbols))) as executor:
+        futures = {executor.submit(lambda s: snapshot.TickerSnapshot(s).info, s): s for s in symbols}
+        for future in concurrent.futures.as_completed(futures):
+            symbol = futures[future]
+            try:
+                info = future.result()
+            except Exception as e:
+                logger.warning(f"Batch info fetch failed for {symbol}: {str(e)}")
+                errors[symbol] = str(e)
+                continue
+            if info:
+                infos[symbol] = info
+            else:
+                errors[symbol] = 'not found'
+    return infos, errors
+
+
+def get_batch(symbols, fields):
+    """
+    Columnar quotes/fundamentals: {'symbols', 'fields', 'data': {field: [...]},
+    'errors', 'metadata'}.
+    """
+    need_info = any(field in INFO_FIELDS for field in fields)
+    need_price = any(field in PRICE_FIELDS for field in fields)
+
+    # 1. Whatever the snapshots already hold
+    infos = {}
+    for symbol in symbols:
+        info = single_flight.read(snapshot.cache_key(symbol, 'quote'))
+        if info:
+            infos[symbol] = info
+    cached_infos = len(infos)
+
+    # 2. Fundamentals for the rest, concurrently
+    errors = {}
+    missing = [s for s in symbols if s not in infos]
+    if need_info and missing:
+        fetched, errors = fetch_infos(missing)
+        infos.update(fetched)
+
+    # 3. Prices: from .info where we have it, else cached bars, else one bulk download
+    prices = {s: _price_from_info(infos[s]) for s in symbols if s in infos} if need_price else {}
+    downloaded = []
+    if need_price:
+        pending = []
+        for symbol in symbols:
+            if symbol in prices or symbol in errors:
+                continue
+            cached = single_flight.read(price_cache_key(symbol))
+            if cached:
+                prices[symbol] = cached
+            else:
+                pending.append(symbol)
+        if pending:
+            try:
+                fresh = download_prices(pending)
+            except Exception as e:
+                logger.error(f"Bulk price download failed for {len(pending)} symbols: {str(e)}")
+                fresh = {}
+            ttl, _ = single_flight.swr_ttls('quote')
+            for symbol in pending:
+                if symbol in fresh:
+                    prices[symbol] = fresh[symbol]
+                    single_flight.store(price_cache_key(symbol), fresh[symbol], ttl)
+                else:
+                    errors.setdefault(symbol, 'no price data')
+            downloaded = pending
+
+    data = {}
+    for field in fields:
+        if field in PRICE_FIELDS:
+            data[field] = [prices.get(s, {}).get(field) for s in symbols]
+        else:
+            key = INFO_FIELDS[field]
+            column = []
+            for s in symbols:
+                value = infos.get(s, {}).get(key)
+                column.append(value if isinstance(value, str) else _number(value))
+            data[field] = column
+
+    return {
+        'symbols': symbols,
+        'fields': fields,
+        'data': data,
+        'errors': errors,
+        'metadata': {
+            'count': len(symbols),
+            'cached_quotes': cached_infos,
+            'info_fetches': len(missing) if need_info else 0,
+            'bulk_download_symbols': len(downloaded),
+        },
+    }
@@ -0,0 +1,231 @@
+"""
+Vectorized technical indicators.
+
+Every function takes numpy arrays and returns a float64 array of the same
+length as its input, aligned index-for-index with the price timestamps.
+Positions inside an indicator's warm-up window are NaN; warmup() gives
+their count, and trim() drops them for the compact lists the API sends.
+
+Moving sums use cumulative sums, so a rolling window costs O(n) whatever
+its width. Missing prices (yfinance emits partial rows) only null the
+windows that contain them: the sums skip NaNs and a cumsum of the NaN
+mask marks the windows with a gap. Recursive averages (EMA, Wilder smoothing) run through pandas'
+compiled ewm instead of a Python loop. compute() works out several
+indicators for one series and shares the intermediate arrays between
+them: the 12/26 EMAs serve both 'ema' and 'macd', and the close-price
+cumsum serves every SMA window and the Bollinger bands.
+"""
+import numpy as np
+import pandas as pd
+
+# Indicator name -> output series it produces
+INDICATORS = {
+    'sma': ('sma_20', 'sma_50'),
+    'ema': ('ema_12', 'ema_26'),
+    'rsi': ('rsi_14',),
+    'macd': ('macd', 'macd_signal', 'macd_histogram'),
+    'bollinger': ('bollinger_upper', 'bollinger_middle', 'bollinger_lower'),
+    'atr': ('atr_14',),
+    'vwap': ('vwap',),
+}
+
+
+def as_float_array(values):
+    return np.asarray(values, dtype=np.float64)
+
+
+def _empty(n):
+    return np.full(n, np.nan)
+
+
+def _rolling(csum, window):
+    sums = csum[window - 1:].copy()
+    sums[1:] -= csum[:-window]
+    return sums
+
+
+def _window_sums(values, window):
+    """Sums of each full window, ending at index window-1 .. n-1; NaN for windows with a gap."""
+    missing = np.isnan(values)
+    sums = _rolling(np.cumsum(np.where(missing, 0.0, values)), window)
+    sums[_rolling(np.cumsum(missing), window) > 0] = np.nan
+    return sums
+
+
+def _base(values):
+    """First non-NaN value, used to shift prices so cumulative sums stay small."""
+    finite = values[~np.isnan(values)]
+    return finite[0] if len(finite) else 0.0
+
+
+def _ewm(values, alpha):
+    """y[0] = x[0], y[t] = alpha * x[t] + (1 - alpha) * y[t-1]."""
+    return pd.Series(values).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+
+
+def _wilder(values, window, start):
+    """
+    Wilder smoothing of values[start:]: seeded with the mean of the first
+    window values, then alpha = 1 / window. Result is aligned to values.
+    """
+    out = _empty(len(values))
+    seed_at = start + window - 1
+    if seed_at >= len(values):
+        return out
+    tail = values[seed_at:].copy()
+    tail[0] = values[start:seed_at + 1].mean()
+    out[seed_at:] = _ewm(tail, 1.0 / window)
+    return out
+
+
+def sma(values, window):
+    values = as_float_array(values)
+    out = _empty(len(values))
+    if window <= 0 or len(values) < window:
+        return out
+    # Shift by the first price so cumulative sums stay small for large prices
+    base = _base(values)
+    out[window - 1:] = _window_sums(values - base, window) / window + base
+    return out
+
+
+def ema(values, window):
+    """EMA with span=window seeded at the first value; the first window-1 points are warm-up."""
+    values = as_float_array(values)
+    out = _empty(len(values))
+    if window <= 0 or len(values) < window:
+        return out
+    smoothed = _ewm(values, 2.0 / (window + 1))
+    out[window - 1:] = smoothed[window - 1:]
+    return out
+
+
+def rsi(values, window=14):
+    """Wilder RSI; 100 when there were no losses, 0 when there were no gains."""
+    values = as_float_array(values)
+    out = _empty(len(values))
+    if len(values) <= window:
+        return out
+    deltas = np.diff(values)
+    avg_gain = _wilder(np.clip(deltas, 0, None), window, 0)[window - 1:]
+    avg_loss = _wilder(np.clip(-deltas, 0, None), window, 0)[window - 1:]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    result[avg_loss == 0] = 100.0
+    result[(avg_gain == 0) & (avg_loss == 0)] = 50.0
+    out[window:] = result
+    return out
+
+
+def macd(values, fast=12, slow=26, signal=9, fast_ema=None, slow_ema=None):
+    """(macd, signal, histogram); pass precomputed EMAs to reuse them."""
+    values = as_float_array(values)
+    n = len(values)
+    line, sig = _empty(n), _empty(n)
+    if n < slow:
+        return line, sig, _empty(n)
+    fast_ema = ema(values, fast) if fast_ema is None else fast_ema
+    slow_ema = ema(values, slow) if slow_ema is None else slow_ema
+    line[slow - 1:] = fast_ema[slow - 1:] - slow_ema[slow - 1:]
+    sig[slow - 1:] = ema(line[slow - 1:], signal)
+    return line, sig, line - sig
+
+
+def bollinger(values, window=20, num_std=2.0, middle=None):
+    """(upper, middle, lower) bands from the population standard deviation."""
+    values = as_float_array(values)
+    n = len(values)
+    if n < window:
+        return _empty(n), _empty(n), _empty(n)
+    middle = sma(values, window) if middle is None else middle
+    shifted = values - _base(values)
+    mean = _window_sums(shifted, window) / window
+    variance = np.maximum(_window_sums(shifted * shifted, window) / window - mean * mean, 0.0)
+    std = _empty(n)
+    std[window - 1:] = np.sqrt(variance)
+    return middle + num_std * std, middle, middle - num_std * std
+
+
+def true_range(high, low, close):
+    high, low, close = as_float_array(high), as_float_array(low), as_float_array(close)
+    tr = high - low
+    if len(close) > 1:
+        previous = close[:-1]
+        tr[1:] = np.maximum(tr[1:], np.maximum(np.abs(high[1:] - previous), np.abs(low[1:] - previous)))
+    return tr
+
+
+def atr(high, low, close, window=14):
+    """Average True Range with Wilder smoothing, first value at index `window`."""
+    tr = true_range(high, low, close)
+    if len(tr) <= window:
+        return _empty(len(tr))
+    # True range needs a previous close, so smoothing starts at index 1
+    return _wilder(tr, window, 1)
+
+
+def vwap(high, low, close, volume):
+    """Volume-weighted average of the typical price, anchored at the first bar; partial bars are skipped."""
+    typical = (as_float_array(high) + as_float_array(low) + as_float_array(close)) / 3.0
+    volume = as_float_array(volume)
+    missing = np.isnan(typical) | np.isnan(volume)
+    volume = np.where(missing, 0.0, volume)
+    cum_volume = np.cumsum(volume)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = np.cumsum(np.where(missing, 0.0, typical) * volume) / cum_volume
+    result[(cum_volume == 0) | missing] = np.nan
+    return result
+
+
+def warmup(series):
+    """Number of leading NaNs."""
+    valid = np.flatnonzero(~np.isnan(series))
+    return int(valid[0]) if len(valid) else len(series)
+
+
+def trim(series):
+    """Drop the warm-up window and return a list of floats (None for gaps)."""
+    tail = series[warmup(series):]
+    return [None if np.isnan(x) else float(x) for x in tail.tolist()]
+
+
+def compute(close, names, high=None, low=None, volume=None):
+    """
+    Aligned arrays for the requested indicator names (keys of INDICATORS).
+
+    Unknown names are ignored. 'atr' needs high/low and 'vwap' needs
+    high/low/volume; they are skipped when those are missing.
+    """
+    close = as_float_array(close)
+    memo = {}
+
+    def cached(key, build):
+        if key not in memo:
+            memo[key] = build()
+        return memo[key]
+
+    result = {}
+    for name in dict.fromkeys(names):
+        if name == 'sma':
+            result['sma_20'] = cached('sma_20', lambda: sma(close, 20))
+            result['sma_50'] = sma(close, 50)
+        elif name == 'ema':
+            result['ema_12'] = cached('ema_12', lambda: ema(close, 12))
+            result['ema_26'] = cached('ema_26', lambda: ema(close, 26))
+        elif name == 'rsi':
+            result['rsi_14'] = rsi(close, 14)
+        elif name == 'macd':
+            line, sig, hist = macd(
+                close,
+                fast_ema=cached('ema_12', lambda: ema(close, 12)),
+                slow_ema=cached('ema_26', lambda: ema(close, 26)),
+            )
+            result.update(macd=line, macd_signal=sig, macd_histogram=hist)
+        elif name == 'bollinger':
+            upper, middle, lower = bollinger(close, 20, middle=cached('sma_20', lambda: sma(close, 20)))
+            result.update(bollinger_upper=upper, bollinger_middle=middle, bollinger_lower=lower)
+        elif name == 'atr' and high is not None and low is not None:
+            result['atr_14'] = atr(high, low, close, 14)
+        elif name == 'vwap' and high is not None and low is not None and volume is not None:
+            result['vwap'] = vwap(high, low, close, volume)
+    return result
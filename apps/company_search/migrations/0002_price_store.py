@@ -0,0 +1,53 @@
+# Generated by Django 5.1.2 on 2026-10-17 05:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('company_search', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceSeries',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('symbol', models.CharField(help_text='Stock ticker symbol', max_length=20)),
+                ('interval', models.CharField(help_text='Bar interval (e.g., 1d, 5m)', max_length=10)),
+                ('covered_from', models.DateTimeField(blank=True, help_text='Every bar from this time on is in the store', null=True)),
+                ('full_history', models.BooleanField(default=False, help_text="Whether the store holds the full ('max') history")),
+                ('timezone', models.CharField(blank=True, default='', help_text='Exchange timezone of the bars; empty for naive timestamps', max_length=50)),
+                ('columns', models.JSONField(default=list, help_text='Columns the provider returned, in order')),
+                ('last_fetched', models.DateTimeField(blank=True, help_text='When the store was last synced with the provider', null=True)),
+            ],
+            options={
+                'verbose_name': 'Price Series',
+                'verbose_name_plural': 'Price Series',
+                'db_table': 'price_series',
+                'unique_together': {('symbol', 'interval')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PriceBar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField(help_text='Bar open time (UTC)')),
+                ('open', models.FloatField(blank=True, null=True)),
+                ('high', models.FloatField(blank=True, null=True)),
+                ('low', models.FloatField(blank=True, null=True)),
+                ('close', models.FloatField(blank=True, null=True)),
+                ('volume', models.FloatField(blank=True, null=True)),
+                ('dividends', models.FloatField(blank=True, null=True)),
+                ('stock_splits', models.FloatField(blank=True, null=True)),
+                ('series', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bars', to='company_search.priceseries')),
+            ],
+            options={
+                'db_table': 'price_bars',
+                'ordering': ['series', 'timestamp'],
+                'unique_together': {('series', 'timestamp')},
+            },
+        ),
+    ]
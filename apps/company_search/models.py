@@ -246,6 +246,46 @@ class FinancialStatementCache(models.Model):
             expires_at__lt=timezone.now()
         ).order_by('-period').first()
     
+    @classmethod
+    def get_periods(cls, symbol, statement_type, start=None, end=None, include_expired=False):
+        """Valid entries for a symbol and statement type, newest period first, optionally within [start, end]"""
+        queryset = cls.objects.filter(symbol=symbol, statement_type=statement_type, is_valid=True)
+        if start:
+            queryset = queryset.filter(period__gte=start)
+        if end:
+            queryset = queryset.filter(period__lte=end)
+        if not include_expired:
+            queryset = queryset.exclude(expires_at__lt=timezone.now())
+        return queryset.order_by('-period')
+
+    @classmethod
+    def upsert_periods(cls, symbol, statement_type, periods, ttl_seconds=None, data_source='yfinance'):
+        """
+        Insert or update one entry per period in a single statement.
+        periods maps period (date) -> data dict. Returns the number of rows written.
+        """
+        if not periods:
+            return 0
+        now = timezone.now()
+        expires_at = now + timezone.timedelta(seconds=ttl_seconds) if ttl_seconds else now + timezone.timedelta(hours=24)
+        entries = [
+            cls(
+                symbol=symbol, statement_type=statement_type, period=period, data=data,
+                is_valid=True, expires_at=expires_at, last_updated=now, created_at=now,
+                data_source=data_source,
+            )
+            for period, data in periods.items()
+        ]
+        # bulk_create skips save() and post_save, so refresh time is set here as well
+        cls.objects.bulk_create(
+            entries,
+            update_conflicts=True,
+            unique_fields=['symbol', 'statement_type', 'period'],
+            update_fields=['data', 'is_valid', 'expires_at', 'last_updated', 'data_source'],
+        )
+        CompanySearch.objects.filter(symbol=symbol).update(last_data_refresh=now)
+        return len(entries)
+
     @classmethod
     def cleanup_expired_entries(cls):
         """Remove or invalidate expired cache entries"""
@@ -270,6 +310,76 @@ class FinancialStatementCache(models.Model):
         return count
 
 
+class PriceSeries(models.Model):
+    """
+    Bookkeeping for one symbol's stored OHLCV bars at one interval
+    """
+    symbol = models.CharField(max_length=20, help_text="Stock ticker symbol")
+
+    interval = models.CharField(max_length=10, help_text="Bar interval (e.g., 1d, 5m)")
+
+    covered_from = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Every bar from this time on is in the store"
+    )
+
+    full_history = models.BooleanField(
+        default=False,
+        help_text="Whether the store holds the full ('max') history"
+    )
+
+    timezone = models.CharField(
+        max_length=50,
+        blank=True,
+        default='',
+        help_text="Exchange timezone of the bars; empty for naive timestamps"
+    )
+
+    columns = models.JSONField(
+        default=list,
+        help_text="Columns the provider returned, in order"
+    )
+
+    last_fetched = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When the store was last synced with the provider"
+    )
+
+    class Meta:
+        db_table = 'price_series'
+        unique_together = ['symbol', 'interval']
+        verbose_name = 'Price Series'
+        verbose_name_plural = 'Price Series'
+
+    def __str__(self):
+        return f"{self.symbol} - {self.interval}"
+
+
+class PriceBar(models.Model):
+    """
+    One OHLCV bar of a PriceSeries
+    """
+    series = models.ForeignKey(PriceSeries, on_delete=models.CASCADE, related_name='bars')
+    timestamp = models.DateTimeField(help_text="Bar open time (UTC)")
+    open = models.FloatField(null=True, blank=True)
+    high = models.FloatField(null=True, blank=True)
+    low = models.FloatField(null=True, blank=True)
+    close = models.FloatField(null=True, blank=True)
+    volume = models.FloatField(null=True, blank=True)
+    dividends = models.FloatField(null=True, blank=True)
+    stock_splits = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'price_bars'
+        unique_together = ['series', 'timestamp']
+        ordering = ['series', 'timestamp']
+
+    def __str__(self):
+        return f"{self.series} - {self.timestamp}"
+
+
 # Optional: Additional model for API usage tracking
 class APIUsageLog(models.Model):
     """
@@ -0,0 +1,372 @@
+"""
+Incremental per-symbol OHLCV store.
+
+The chart and history endpoints used to download their whole period (up to
+10y or max) on every cache miss, once for each (period, interval) pair. The
+bars now live in the database instead: one PriceSeries per (symbol,
+interval) plus its PriceBars. get_history() serves every period as a slice
+of that series, so:
+
+* the first request for a symbol/interval downloads its period once;
+* later requests for the same or a shorter period only fetch the missing
+  tail. That uses the smallest Yahoo period reaching back to the last
+  stored bar ('1d', '5d', ...), and only once the series is older than
+  its refresh interval;
+* a request for a longer period than the store covers downloads that
+  period and replaces the stored bars.
+
+Yahoo's prices are split/dividend adjusted, so a new split or dividend
+changes the whole back history. When a tail fetch reports either one, or
+the bars it overlaps no longer match the stored ones, the series is
+downloaded again in full. Every loader must therefore return the same
+adjusted prices: Ticker.history and yf.download with auto_adjust=True.
+
+Callers pass their own loaders, and some fall back to other sources
+(e.g. a Close-only chart API). Frames without the Open/High/Low/Close
+columns are returned to their caller but never stored, so one caller's
+fallback can't strip the OHLC columns from everyone else's reads.
+
+Store errors (no database, unexpected frames) never fail the request:
+they are logged and the provider's frame is returned directly.
+"""
+import logging
+import re
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import single_flight
+from .models import PriceBar, PriceSeries
+
+logger = logging.getLogger(__name__)
+
+INTRADAY_INTERVALS = ('1m', '2m', '5m', '15m', '30m', '60m', '90m', '1h')
+# Seconds a series counts as current before a tail fetch; override with OHLCV_REFRESH_SECONDS
+DEFAULT_REFRESH_SECONDS = {'intraday': 60, 'daily': 900, 'long': 3600}
+# Periods tried, smallest first, when fetching the tail
+TAIL_PERIODS = ('1d', '5d', '1mo', '3mo', '6mo', '1y', '2y', '5y', '10y')
+# Overlapping closes further apart than this mean Yahoo re-adjusted the history
+RESTATEMENT_RTOL = 1e-4
+
+# Columns a frame needs before it may be stored
+PRICE_COLUMNS = ('Open', 'High', 'Low', 'Close')
+# PriceBar field -> provider column
+COLUMNS = {
+    'open': 'Open',
+    'high': 'High',
+    'low': 'Low',
+    'close': 'Close',
+    'volume': 'Volume',
+    'dividends': 'Dividends',
+    'stock_splits': 'Stock Splits',
+}
+
+_PERIOD_RE = re.compile(r'^(\d+)(d|wk|mo|y)$')
+
+
+def is_intraday(interval):
+    return interval in INTRADAY_INTERVALS
+
+
+def refresh_seconds(interval):
+    overrides = getattr(settings, 'OHLCV_REFRESH_SECONDS', {}) or {}
+    if is_intraday(interval):
+        group = 'intraday'
+    elif interval in ('1d', '5d'):
+        group = 'daily'
+    else:
+        group = 'long'
+    return overrides.get(group, DEFAULT_REFRESH_SECONDS[group])
+
+
+def period_start(period, now):
+    """
+    Earliest time a Yahoo period reaches back to from now (a UTC
+    Timestamp); None for 'max'. Raises ValueError for unknown periods.
+    """
+    if period == 'max':
+        return None
+    if period == 'ytd':
+        return pd.Timestamp(year=now.year, month=1, day=1, tz=now.tz)
+    match = _PERIOD_RE.match(period or '')
+    if not match:
+        raise ValueError(f"Unsupported period: {period}")
+    count, unit = int(match.group(1)), match.group(2)
+    if unit == 'd':
+        return now - pd.Timedelta(days=count)
+    if unit == 'wk':
+        return now - pd.Timedelta(weeks=count)
+    if unit == 'mo':
+        return now - pd.DateOffset(months=count)
+    return now - pd.DateOffset(years=count)
+
+
+def _sessions(period):
+    """Trading sessions in a day-based period ('5d' -> 5), else None."""
+    match = _PERIOD_RE.match(period or '')
+    return int(match.group(1)) if match and match.group(2) == 'd' else None
+
+
+def _now():
+    return pd.Timestamp(timezone.now()).tz_convert('UTC')
+
+
+# --- FRAMES ---
+
+def _flatten(frame):
+    """yf.download puts the ticker in a second column level; drop it."""
+    if isinstance(frame.columns, pd.MultiIndex):
+        frame = frame.copy()
+        frame.columns = frame.columns.get_level_values(0)
+    return frame
+
+
+def _utc_index(index):
+    return index.tz_localize('UTC') if index.tz is None else index.tz_convert('UTC')
+
+
+def _bars_from_frame(series, frame):
+    timestamps = _utc_index(frame.index).to_pydatetime()
+    columns = {}
+    for field, column in COLUMNS.items():
+        if column in frame.columns:
+            values = pd.to_numeric(frame[column], errors='coerce').astype(float).to_numpy()
+            columns[field] = [None if np.isnan(v) else float(v) for v in values]
+        else:
+            columns[field] = [None] * len(frame)
+    return [
+        PriceBar(series=series, timestamp=ts, **{field: columns[field][i] for field in COLUMNS})
+        for i, ts in enumerate(timestamps)
+    ]
+
+
+def _frame_from_bars(series, rows):
+    columns = [c for c in series.columns if c in COLUMNS.values()] or ['Open', 'High', 'Low', 'Close', 'Volume']
+    fields = {column: field for field, column in COLUMNS.items()}
+    index = pd.DatetimeIndex([row[0] for row in rows])
+    index = _utc_index(index)
+    if series.timezone:
+        index = index.tz_convert(series.timezone)
+    else:
+        index = index.tz_localize(None)
+    index.name = 'Datetime' if is_intraday(series.interval) else 'Date'
+    position = {field: i + 1 for i, field in enumerate(COLUMNS)}
+    data = {
+        column: np.array([row[position[fields[column]]] for row in rows], dtype=float)
+        for column in columns
+    }
+    frame = pd.DataFrame(data, index=index)
+    if 'Volume' in frame and not frame['Volume'].isna().any():
+        frame['Volume'] = frame['Volume'].astype('int64')
+    return frame
+
+
+def _is_usable(frame):
+    return isinstance(frame, pd.DataFrame) and isinstance(frame.index, pd.DatetimeIndex) and not frame.empty
+
+
+def _is_storable(frame):
+    return _is_usable(frame) and all(column in _flatten(frame).columns for column in PRICE_COLUMNS)
+
+
+# --- STORE ---
+
+def _replace(series, frame, period, now):
+    """Store frame as the whole series (cold fetch or restatement)."""
+    frame = _flatten(frame)
+    with transaction.atomic():
+        series.bars.all().delete()
+        PriceBar.objects.bulk_create(_bars_from_frame(series, frame), batch_size=1000)
+        start = period_start(period, now)
+        series.covered_from = start.to_pydatetime() if start is not None else None
+        series.full_history = period == 'max'
+        series.timezone = str(frame.index.tz) if frame.index.tz is not None else ''
+        series.columns = [c for c in frame.columns if c in COLUMNS.values()]
+        series.last_fetched = now.to_pydatetime()
+        series.save()
+
+
+def _append(series, frame, now):
+    frame = _flatten(frame)
+    PriceBar.objects.bulk_create(
+        _bars_from_frame(series, frame),
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['series', 'timestamp'],
+        update_fields=list(COLUMNS),
+    )
+    series.last_fetched = now.to_pydatetime()
+    series.save(update_fields=['last_fetched'])
+
+
+def _is_restated(series, tail, last_bar):
+    """True when the tail shows Yahoo re-adjusted the stored history."""
+    tail = _flatten(tail)
+    index = _utc_index(tail.index)
+    newer = index > last_bar
+    for column in ('Dividends', 'Stock Splits'):
+        if column in tail and (pd.to_numeric(tail[column], errors='coerce').fillna(0)[newer] != 0).any():
+            return True
+    if 'Close' not in tail:
+        return False
+    # The last stored bar may have been in progress, so only earlier bars must match
+    overlap = index < last_bar
+    if not overlap.any():
+        return False
+    stored = dict(
+        series.bars.filter(timestamp__in=index[overlap].to_pydatetime()).values_list('timestamp', 'close')
+    )
+    for ts, close in zip(index[overlap], tail['Close'].to_numpy()[overlap]):
+        old = stored.get(ts.to_pydatetime())
+        if old is not None and not np.isnan(close) and not np.isclose(old, close, rtol=RESTATEMENT_RTOL):
+            return True
+    return False
+
+
+def _tail_period(last_bar, now):
+    for period in TAIL_PERIODS:
+        if period_start(period, now) <= last_bar:
+            return period
+    return 'max'
+
+
+def _covers(series, period, start):
+    if not all(column in series.columns for column in PRICE_COLUMNS):
+        # Nothing stored yet, or a partial series stored before frames were checked
+        return False
+    if series.full_history:
+        return True
+    return start is not None and series.covered_from is not None and series.covered_from <= start
+
+
+def _sync(symbol, period, interval, loader, now):
+    """
+    Bring the stored series up to date for period. Returns the provider
+    frame when it was downloaded in full (the caller can use it as is),
+    otherwise None.
+    """
+    start = period_start(period, now)
+    series, _ = PriceSeries.objects.get_or_create(symbol=symbol, interval=interval)
+    if not _covers(series, period, start):
+        frame = loader(period=period, interval=interval)
+        if _is_storable(frame):
+            _replace(series, frame, period, now)
+        return frame
+
+    if series.last_fetched and (now - pd.Timestamp(series.last_fetched)).total_seconds() < refresh_seconds(interval):
+        return None
+    last_bar = series.bars.order_by('-timestamp').values_list('timestamp', flat=True).first()
+    if last_bar is None:
+        frame = loader(period=period, interval=interval)
+        if _is_storable(frame):
+            _replace(series, frame, period, now)
+        return frame
+
+    last_bar = pd.Timestamp(last_bar).tz_convert('UTC')
+    tail_period = _tail_period(last_bar, now)
+    if tail_period == 'max' or (start is not None and period_start(tail_period, now) < start):
+        # The gap is longer than what was asked for: just download the period again
+        frame = loader(period=period, interval=interval)
+        if _is_storable(frame):
+            _replace(series, frame, period, now)
+        return frame
+
+    tail = loader(period=tail_period, interval=interval)
+    if not _is_usable(tail):
+        # Nothing new (market closed) - don't ask again until the next refresh
+        series.last_fetched = now.to_pydatetime()
+        series.save(update_fields=['last_fetched'])
+        return None
+    if not _is_storable(tail):
+        # A fallback source without OHLC columns; keep the stored bars and try again next time
+        return None
+    if _is_restated(series, tail, last_bar):
+        logger.info(f"{symbol} {interval} history was re-adjusted, downloading {period} again")
+        frame = loader(period=period, interval=interval)
+        if _is_storable(frame):
+            _replace(series, frame, period, now)
+        return frame
+    _append(series, tail, now)
+    return None
+
+
+def read(symbol, period, interval, now=None):
+    """The stored bars for period as a provider-shaped DataFrame (None if not stored)."""
+    now = now or _now()
+    series = PriceSeries.objects.filter(symbol=symbol, interval=interval).first()
+    if series is None:
+        return None
+    start = period_start(period, now)
+    queryset = series.bars.order_by('timestamp')
+    sessions = _sessions(period)
+    if sessions:
+        # Generous calendar window for the sessions (weekends, holidays)
+        queryset = queryset.filter(timestamp__gte=(now - pd.Timedelta(days=sessions * 2 + 7)).to_pydatetime())
+    elif start is not None:
+        queryset = queryset.filter(timestamp__gte=start.to_pydatetime())
+    rows = list(queryset.values_list('timestamp', *COLUMNS))
+    if not rows:
+        return None
+    frame = _frame_from_bars(series, rows)
+    if sessions:
+        days = frame.index.normalize()
+        keep = days.unique()[-sessions:]
+        frame = frame[days.isin(keep)]
+    return frame
+
+
+def get_history(symbol, period, interval, loader=None):
+    """
+    OHLCV bars for symbol over a Yahoo period ('5d', '1y', 'max', ...).
+
+    loader(period=..., interval=...) downloads from the provider; the
+    default is yf.Ticker(symbol).history (auto-adjusted). A freshly downloaded period is
+    returned as the loader gave it. Otherwise the result is rebuilt from
+    the store, with the same columns and exchange-timezone index.
+    """
+    symbol = symbol.upper().strip()
+    if loader is None:
+        loader = lambda **params: yf.Ticker(symbol).history(auto_adjust=True, **params)
+    try:
+        period_start(period, _now())
+    except ValueError:
+        return loader(period=period, interval=interval)
+
+    result = {}
+
+    def load(**params):
+        result['loaded'] = True
+        frame = loader(**params)
+        if params['period'] == period:
+            result['frame'] = frame
+        return frame
+
+    def sync():
+        _sync(symbol, period, interval, load, _now())
+        return None
+
+    try:
+        # One sync per series at a time; the store is the cache, so nothing is kept here
+        single_flight.get_or_fetch(
+            f"ohlcv_sync_{symbol}_{interval}", sync, 1, beta=0, cacheable=lambda value: False
+        )
+        if _is_usable(result.get('frame')):
+            return result['frame']
+        stored = read(symbol, period, interval)
+        if stored is not None:
+            return stored
+        # Nothing stored either: hand back what the provider said (empty frame, None, ...)
+        return result['frame'] if 'frame' in result else pd.DataFrame()
+    except Exception as e:
+        if 'frame' in result:
+            logger.warning(f"Could not store {symbol} {interval} bars: {str(e)}")
+            return result['frame']
+        if result.get('loaded'):
+            # The provider itself failed; don't ask it twice
+            raise
+        logger.warning(f"OHLCV store unavailable for {symbol} {interval}, downloading directly: {str(e)}")
+        return loader(period=period, interval=interval)
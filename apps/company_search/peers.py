@@ -0,0 +1,139 @@
+"""
+Concurrent peer lookups for the peer analysis views.
+
+get_peer_data used to run in a sequential loop with time.sleep(0.2)
+between peers, so six peers cost several seconds even when they were
+already cached. fetch_peers() runs the lookups on a small thread pool
+instead and paces only real upstream calls through a process-wide token
+bucket. Peers already held by a ticker snapshot skip the bucket, and
+because the views read peer .info through the snapshots, a peer fetched
+for one company is reused for every other company in its sector.
+
+The caller gets results as soon as `limit` peers have arrived, and a peer
+that has not answered within the per-peer timeout is dropped instead of
+holding up the response.
+"""
+import concurrent.futures
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+from . import single_flight, snapshot
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATE = 5.0          # upstream peer lookups per second
+DEFAULT_BURST = 5
+DEFAULT_WORKERS = 4
+DEFAULT_PEER_TIMEOUT = 8.0  # seconds to wait for the next peer to arrive
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, at most `capacity` banked."""
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, timeout=None):
+        """Take one token, waiting for it up to timeout seconds. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+_bucket = None
+_bucket_lock = threading.Lock()
+
+
+def get_bucket():
+    global _bucket
+    with _bucket_lock:
+        if _bucket is None:
+            _bucket = TokenBucket(
+                getattr(settings, 'PEER_FETCH_RATE', DEFAULT_RATE),
+                getattr(settings, 'PEER_FETCH_BURST', DEFAULT_BURST),
+            )
+        return _bucket
+
+
+def reset_bucket():
+    global _bucket
+    with _bucket_lock:
+        _bucket = None
+
+
+def is_cached(symbol):
+    return single_flight.read(snapshot.cache_key(symbol.upper(), 'quote')) is not None
+
+
+def fetch_peers(symbols, get_peer_data, limit=None, workers=None, peer_timeout=None):
+    """
+    Run get_peer_data(symbol) for symbols concurrently.
+
+    Returns the non-empty results in the order of `symbols`, stopping
+    early once `limit` of them have arrived. Lookups that raise are
+    logged and skipped.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols or limit == 0:
+        return []
+    workers = workers or getattr(settings, 'PEER_FETCH_WORKERS', DEFAULT_WORKERS)
+    peer_timeout = peer_timeout or getattr(settings, 'PEER_FETCH_TIMEOUT', DEFAULT_PEER_TIMEOUT)
+    bucket = get_bucket()
+
+    def lookup(symbol):
+        # Only upstream calls are paced; cached peers answer immediately
+        if not is_cached(symbol) and not bucket.acquire(timeout=peer_timeout):
+            logger.warning(f"Peer fetch for {symbol} skipped: rate limit wait exceeded {peer_timeout}s")
+            return None
+        return get_peer_data(symbol)
+
+    results = {}
+    executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=min(workers, len(symbols)), thread_name_prefix='peer-fetch'
+    )
+    try:
+        pending = {executor.submit(lookup, symbol): symbol for symbol in symbols}
+        while pending:
+            done, _ = concurrent.futures.wait(
+                pending, timeout=peer_timeout, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            if not done:
+                logger.warning(f"Peer fetch timed out waiting for {', '.join(pending.values())}")
+                break
+            for future in done:
+                symbol = pending.pop(future)
+                try:
+                    data = future.result()
+                except Exception as e:
+                    logger.warning(f"Error fetching data for peer {symbol}: {str(e)}")
+                    continue
+                if data:
+                    results[symbol] = data
+            if limit is not None and len(results) >= limit:
+                break
+    finally:
+        # Don't wait for stragglers; queued lookups are cancelled
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    ordered = [results[symbol] for symbol in symbols if symbol in results]
+    return ordered[:limit] if limit is not None else ordered
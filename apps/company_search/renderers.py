@@ -1,8 +1,14 @@
 import logging
+from rest_framework.negotiation import DefaultContentNegotiation
 from rest_framework.renderers import JSONRenderer
 from rest_framework import status
 from .utils import SafeJSONEncoder, clean_financial_data
 
+try:
+    import orjson  # Optional fast JSON backend
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 
@@ -22,12 +28,15 @@ class SafeJSONRenderer(JSONRenderer):
             response = renderer_context.get('response') if renderer_context else None
             status_code = response.status_code if response else None
             
-            # Clean the data before rendering
+            # Clean the data before rendering (free if the view already cleaned it)
             cleaned_data = clean_financial_data(data)
             
             # Apply consistent response formatting for success/error responses
             formatted_data = self.format_response(cleaned_data, status_code)
             
+            fast = self.render_fast(formatted_data, renderer_context)
+            if fast is not None:
+                return fast
             return super().render(formatted_data, accepted_media_type, renderer_context)
             
         except Exception as e:
@@ -39,6 +48,20 @@ class SafeJSONRenderer(JSONRenderer):
                 renderer_context
             )
     
+    def render_fast(self, data, renderer_context=None):
+        """
+        Encode with orjson when it is installed and no indentation was asked
+        for; None means use the standard encoder. The output matches the
+        standard path: the same single sanitize pass, then a C encoder.
+        """
+        if orjson is None or (renderer_context or {}).get('indent'):
+            return None
+        try:
+            return orjson.dumps(self.encoder_class().sanitize(data))
+        except (TypeError, orjson.JSONEncodeError) as e:
+            logger.warning(f"orjson could not serialize response, using standard encoder: {str(e)}")
+            return None
+    
     def format_response(self, data, status_code):
         """
         Apply consistent formatting to API responses
@@ -206,4 +229,20 @@ class FinancialDataRenderer(SafeJSONRenderer):
         if isinstance(data, dict):
             return {**metadata, **data}
         else:
-            return data
\ No newline at end of file
+            return data
+
+
+# Values of ?format= that choose a payload layout rather than a renderer
+PAYLOAD_FORMATS = ('rows', 'columnar')
+
+
+class PayloadFormatNegotiation(DefaultContentNegotiation):
+    """
+    Content negotiation for views where ?format=columnar selects the
+    payload layout; DRF would otherwise look for a 'columnar' renderer
+    and answer 404
+    """
+    def select_renderer(self, request, renderers, format_suffix=None):
+        if not format_suffix and request.query_params.get(self.settings.URL_FORMAT_OVERRIDE) in PAYLOAD_FORMATS:
+            format_suffix = 'json'
+        return super().select_renderer(request, renderers, format_suffix)
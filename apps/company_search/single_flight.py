@@ -0,0 +1,360 @@
+"""
+Request coalescing for cache-backed yfinance fetches.
+
+The views used to do cache.get(key) -> yfinance -> cache.set(key). When a
+hot key (RELIANCE.NS, AAPL, the market summary) expired, every request in
+that moment missed together and hit Yahoo at once, which is what gets us
+rate limited. get_or_fetch() instead lets one caller per key fetch while
+the others wait for its result:
+
+* within a process, waiters block on a per-key lock and re-read the cache
+  once the leader is done;
+* across processes (gunicorn workers), the leader holds a short cache.add()
+  lock and the other workers poll the cache until the value appears.
+
+Entries also record how long the fetch took, and are refreshed early with
+a probability that rises as expiry approaches (XFetch, Vattani et al.):
+one lucky request recomputes a hot key shortly before it expires while
+everyone else keeps getting the cached value, so the key never expires
+under load in the first place.
+
+get_stale_while_revalidate() goes one step further for market data: past
+its soft TTL an entry is still served (flagged is_stale, with its age)
+while a background worker refreshes it, and only past the hard TTL does a
+request wait for Yahoo.
+"""
+import concurrent.futures
+import logging
+import math
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+# XFetch beta: >1 refreshes earlier, 0 disables early refresh
+DEFAULT_BETA = 1.0
+# Upper bound for a fetch; the cross-process lock expires after this
+DEFAULT_LOCK_TIMEOUT = 30
+# How long a follower waits for the leader before fetching itself
+DEFAULT_WAIT_TIMEOUT = 10
+POLL_INTERVAL = 0.05
+
+# (soft, hard) TTLs per data class for stale-while-revalidate; override
+# entries with STALE_WHILE_REVALIDATE_TTLS
+DEFAULT_SWR_TTLS = {
+    'market_summary': (300, 3600),
+    'quote': (300, 3600),
+    'chart_intraday': (900, 7200),
+    'chart': (3600, 86400),
+    'sector_overview': (6000, 86400),
+}
+DEFAULT_REFRESH_WORKERS = 4
+
+_ENVELOPE_KEYS = frozenset(('value', 'delta', 'expires_at'))
+
+_registry_lock = threading.Lock()
+_flights = {}
+_stats_lock = threading.Lock()
+_stats = {
+    'hits': 0, 'misses': 0, 'fetches': 0, 'coalesced': 0, 'early_refreshes': 0,
+    'stale_served': 0, 'background_refreshes': 0, 'background_failures': 0,
+}
+_refreshing = {}
+_executor = None
+
+
+class _Flight:
+    """Per-key lock plus the number of threads currently using it."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.users = 0
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _count(name, amount=1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def get_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    with _registry_lock:
+        stats['in_flight'] = len(_flights)
+        stats['refreshing'] = len(_refreshing)
+    return stats
+
+
+def reset_stats():
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0
+
+
+def lock_key(key):
+    return f"{key}:fetching"
+
+
+# --- ENVELOPES ---
+
+def is_envelope(entry):
+    return isinstance(entry, dict) and _ENVELOPE_KEYS.issubset(entry)
+
+
+def store(key, value, ttl, delta=0.0, stale_ttl=0):
+    """
+    Write value under key as an envelope that get_or_fetch understands.
+
+    The entry counts as fresh for ttl seconds and is kept stale_ttl
+    seconds longer for stale-while-revalidate readers.
+    """
+    now = time.time()
+    entry = {'value': value, 'delta': float(delta), 'stored_at': now, 'expires_at': now + ttl}
+    cache.set(key, entry, ttl + stale_ttl)
+    return entry
+
+
+def read(key):
+    """Cached value for key, or None; never fetches."""
+    entry = cache.get(key)
+    return entry['value'] if is_envelope(entry) else None
+
+
+def should_refresh_early(entry, beta=DEFAULT_BETA, now=None):
+    """XFetch: refresh when now - delta * beta * ln(rand) passes the expiry."""
+    now = time.time() if now is None else now
+    if now >= entry['expires_at']:
+        # Kept past expiry for stale readers - always due
+        return True
+    if beta <= 0 or not entry['delta']:
+        return False
+    # 1 - random() is in (0, 1], so the log is defined
+    return now - entry['delta'] * beta * math.log(1.0 - random.random()) >= entry['expires_at']
+
+
+# --- LOCKING ---
+
+def _enter(key):
+    with _registry_lock:
+        flight = _flights.get(key)
+        if flight is None:
+            flight = _flights[key] = _Flight()
+        flight.users += 1
+    return flight
+
+
+def _leave(key, flight):
+    with _registry_lock:
+        flight.users -= 1
+        if flight.users == 0 and _flights.get(key) is flight:
+            del _flights[key]
+
+
+def _wait_for_value(key, timeout):
+    """Poll the cache while another process fetches key."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        entry = cache.get(key)
+        if is_envelope(entry):
+            return entry
+        if cache.get(lock_key(key)) is None:
+            # Leader gave up (error or uncacheable result) - stop waiting
+            return None
+        time.sleep(POLL_INTERVAL)
+    return None
+
+
+def _fetch_and_store(key, fetch, ttl, cacheable, stale_ttl=0):
+    started = time.monotonic()
+    value = fetch()
+    _count('fetches')
+    if cacheable(value):
+        store(key, value, ttl, time.monotonic() - started, stale_ttl)
+    return value
+
+
+def _lead(key, fetch, ttl, cacheable, lock_timeout, stale_ttl=0):
+    """Fetch under the cross-process lock. Returns (fetched, value)."""
+    if not cache.add(lock_key(key), 1, lock_timeout):
+        return False, None
+    try:
+        return True, _fetch_and_store(key, fetch, ttl, cacheable, stale_ttl)
+    finally:
+        cache.delete(lock_key(key))
+
+
+def get_or_fetch(key, fetch, ttl, beta=None, cacheable=None,
+                 lock_timeout=None, wait_timeout=None, stale_ttl=0):
+    """
+    Return the cached value for key, calling fetch() on a miss with at
+    most one fetch in flight per key.
+
+    Values rejected by cacheable (default: None) are returned to the
+    caller that fetched them but not stored, so followers fetch for
+    themselves. Exceptions from fetch() propagate to the leader only.
+    """
+    beta = _setting('SINGLE_FLIGHT_BETA', DEFAULT_BETA) if beta is None else beta
+    cacheable = cacheable or (lambda value: value is not None)
+    lock_timeout = lock_timeout or _setting('SINGLE_FLIGHT_LOCK_TIMEOUT', DEFAULT_LOCK_TIMEOUT)
+    wait_timeout = wait_timeout or _setting('SINGLE_FLIGHT_WAIT_TIMEOUT', DEFAULT_WAIT_TIMEOUT)
+
+    entry = cache.get(key)
+    if is_envelope(entry):
+        if not should_refresh_early(entry, beta):
+            _count('hits')
+            return entry['value']
+        # Early refresh: whoever gets the lock recomputes, the rest keep the current value
+        flight = _enter(key)
+        try:
+            if flight.lock.acquire(blocking=False):
+                try:
+                    fetched, value = _lead(key, fetch, ttl, cacheable, lock_timeout, stale_ttl)
+                    if fetched:
+                        _count('early_refreshes')
+                        return value
+                except Exception as e:
+                    logger.warning(f"Early refresh of {key} failed, serving cached value: {str(e)}")
+                finally:
+                    flight.lock.release()
+        finally:
+            _leave(key, flight)
+        _count('hits')
+        return entry['value']
+
+    _count('misses')
+    flight = _enter(key)
+    try:
+        acquired = flight.lock.acquire(timeout=wait_timeout)
+        try:
+            # The thread we waited for may have filled the cache
+            entry = cache.get(key)
+            if is_envelope(entry):
+                _count('coalesced')
+                return entry['value']
+
+            fetched, value = _lead(key, fetch, ttl, cacheable, lock_timeout, stale_ttl)
+            if fetched:
+                return value
+
+            entry = _wait_for_value(key, wait_timeout)
+            if entry is not None:
+                _count('coalesced')
+                return entry['value']
+            # Leader elsewhere failed or is too slow - fetch ourselves
+            return _fetch_and_store(key, fetch, ttl, cacheable, stale_ttl)
+        finally:
+            if acquired:
+                flight.lock.release()
+    finally:
+        _leave(key, flight)
+
+
+# --- STALE-WHILE-REVALIDATE ---
+
+def swr_ttls(data_class):
+    """(soft, hard) TTLs in seconds for a data class."""
+    overrides = _setting('STALE_WHILE_REVALIDATE_TTLS', {}) or {}
+    return tuple(overrides.get(data_class, DEFAULT_SWR_TTLS[data_class]))
+
+
+def _refresh_executor():
+    global _executor
+    with _registry_lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=_setting('SWR_REFRESH_WORKERS', DEFAULT_REFRESH_WORKERS),
+                thread_name_prefix='swr-refresh',
+            )
+        return _executor
+
+
+def schedule_refresh(key, fetch, soft_ttl, hard_ttl, cacheable=None, lock_timeout=None):
+    """
+    Refresh key in the background unless a refresh is already running.
+
+    Returns False when one is (in this process); the cross-process lock
+    keeps other workers from refreshing the same key at the same time.
+    """
+    cacheable = cacheable or (lambda value: value is not None)
+    lock_timeout = lock_timeout or _setting('SINGLE_FLIGHT_LOCK_TIMEOUT', DEFAULT_LOCK_TIMEOUT)
+
+    def run():
+        # Pool threads live long and may reach the ORM (statement and OHLCV
+        # stores): drop connections that are broken or past CONN_MAX_AGE
+        close_old_connections()
+        try:
+            fetched, _ = _lead(key, fetch, soft_ttl, cacheable, lock_timeout, hard_ttl - soft_ttl)
+            if fetched:
+                _count('background_refreshes')
+        except Exception as e:
+            _count('background_failures')
+            logger.warning(f"Background refresh of {key} failed, keeping stale value: {str(e)}")
+        finally:
+            close_old_connections()
+            with _registry_lock:
+                _refreshing.pop(key, None)
+
+    with _registry_lock:
+        if key in _refreshing:
+            return False
+        _refreshing[key] = None
+    try:
+        future = _refresh_executor().submit(run)
+    except RuntimeError as e:
+        # Executor shut down (interpreter exit)
+        logger.warning(f"Could not schedule refresh of {key}: {str(e)}")
+        with _registry_lock:
+            _refreshing.pop(key, None)
+        return False
+    with _registry_lock:
+        if key in _refreshing:
+            _refreshing[key] = future
+    return True
+
+
+def wait_for_refreshes(timeout=None):
+    """Block until running background refreshes finish (tests, shutdown)."""
+    with _registry_lock:
+        futures = [f for f in _refreshing.values() if f is not None]
+    concurrent.futures.wait(futures, timeout=timeout)
+
+
+def get_stale_while_revalidate(key, fetch, soft_ttl, hard_ttl, cacheable=None, refresh=None):
+    """
+    Return (value, cache_meta) for key.
+
+    Fresh entries are returned as they are. Entries past soft_ttl but
+    younger than hard_ttl are returned with is_stale=True while one
+    background refresh runs (refresh(), default fetch()). A miss fetches
+    synchronously through get_or_fetch, so concurrent misses still share
+    one fetch.
+    """
+    entry = cache.get(key)
+    now = time.time()
+    if is_envelope(entry):
+        age = now - entry.get('stored_at', now)
+        is_stale = now >= entry['expires_at']
+        if is_stale:
+            _count('stale_served')
+            schedule_refresh(key, refresh or fetch, soft_ttl, hard_ttl, cacheable)
+        else:
+            _count('hits')
+        return entry['value'], {
+            'is_stale': is_stale,
+            'age_seconds': round(age, 1),
+            'soft_ttl': soft_ttl,
+            'hard_ttl': hard_ttl,
+        }
+
+    value = get_or_fetch(key, fetch, soft_ttl, beta=0, cacheable=cacheable,
+                         stale_ttl=hard_ttl - soft_ttl)
+    return value, {'is_stale': False, 'age_seconds': 0.0, 'soft_ttl': soft_ttl, 'hard_ttl': hard_ttl}
@@ -0,0 +1,314 @@
+"""
+Per-symbol snapshot of the upstream yfinance datasets.
+
+A company page fires the statement, price, info, ratio and analysis
+endpoints together, and each of them used to build its own yf.Ticker and
+download .info and the statements again. TickerSnapshot fetches every
+dataset at most once, keeps it in the Django cache in a plain
+(picklable, NaN-free) form under a per-symbol key, and hands it back to
+the views through the same attributes a yf.Ticker has, so the
+FinancialDataService extractors work on it unchanged. Misses go through
+single_flight, so concurrent requests for one symbol share a download.
+
+.info is stored twice from a single download: as the short-lived
+"quote" (prices) and the long-lived "profile" (name, sector, summary).
+
+Annual statements have a second, persistent tier underneath: a miss in
+the Django cache reads FinancialStatementCache before going to Yahoo, and
+every download is written through to it (one row per period, kept for
+FINANCIAL_STATEMENT_STORE_TTL seconds), so statements survive restarts
+and are downloaded a few times a week instead of every few hours.
+"""
+import logging
+import math
+import re
+import threading
+
+import pandas as pd
+import yfinance as yf
+from django.conf import settings
+from django.core.cache import cache
+
+from . import single_flight
+
+logger = logging.getLogger(__name__)
+
+# Seconds each dataset stays in the cache; override with TICKER_SNAPSHOT_TTLS
+DEFAULT_TTLS = {
+    'quote': 300,
+    'profile': 86400,
+    'balance_sheet': 21600,
+    'income_stmt': 21600,
+    'cashflow': 21600,
+    'quarterly_financials': 21600,
+    'quarterly_balance_sheet': 21600,
+    'quarterly_cashflow': 21600,
+}
+
+# Annual statements also kept in FinancialStatementCache (snapshot dataset -> statement_type)
+STORED_STATEMENTS = {
+    'balance_sheet': 'balance_sheet',
+    'income_stmt': 'income_statement',
+    'cashflow': 'cash_flow',
+}
+DEFAULT_STORE_TTL = 3 * 86400
+_STORABLE_SYMBOL_RE = re.compile(r'^[A-Z0-9.-]{1,20}$')
+
+INFO_DATASETS = ('quote', 'profile')
+FRAME_DATASETS = tuple(name for name in DEFAULT_TTLS if name not in INFO_DATASETS)
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'fetches': 0}
+
+
+def dataset_ttl(dataset):
+    overrides = getattr(settings, 'TICKER_SNAPSHOT_TTLS', {}) or {}
+    return overrides.get(dataset, DEFAULT_TTLS[dataset])
+
+
+def cache_key(symbol, dataset):
+    return f"ticker_snapshot_{symbol}_{dataset}"
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def get_stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.update(hits=0, fetches=0)
+
+
+def invalidate(symbol, datasets=None):
+    """Drop cached datasets for a symbol (all of them by default)."""
+    symbol = symbol.upper().strip()
+    cache.delete_many([cache_key(symbol, name) for name in (datasets or DEFAULT_TTLS)])
+
+
+# --- NORMALISATION ---
+
+def _clean_value(value):
+    if value is None:
+        return None
+    if isinstance(value, float) and (math.isnan(value) or math.isinf(value)):
+        return None
+    try:
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError):
+        pass
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+
+def _label(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+def normalize_frame(frame):
+    """Statement DataFrame (rows = line items, columns = periods) to plain lists."""
+    if frame is None or not isinstance(frame, pd.DataFrame) or frame.empty:
+        return {'index': [], 'columns': [], 'values': []}
+    return {
+        'index': [str(label) for label in frame.index],
+        'columns': [_label(column) for column in frame.columns],
+        'values': [[_clean_value(v) for v in row] for row in frame.itertuples(index=False, name=None)],
+    }
+
+
+def denormalize_frame(stored):
+    if not stored or not stored.get('columns'):
+        return pd.DataFrame()
+    try:
+        columns = pd.to_datetime(stored['columns'])
+    except (TypeError, ValueError):
+        columns = stored['columns']
+    return pd.DataFrame(stored['values'], index=stored['index'], columns=columns)
+
+
+def frame_to_periods(stored):
+    """Normalized statement -> {period date: {line item: value}}, one entry per column."""
+    periods = {}
+    for col, column in enumerate(stored.get('columns', [])):
+        try:
+            period = pd.Timestamp(column).date()
+        except (TypeError, ValueError):
+            return {}
+        periods[period] = {label: row[col] for label, row in zip(stored['index'], stored['values'])}
+    return periods
+
+
+def periods_to_frame(entries):
+    """FinancialStatementCache rows (newest first) -> normalized statement."""
+    index = []
+    for entry in entries:
+        index.extend(label for label in entry.data if label not in index)
+    return {
+        'index': index,
+        'columns': [entry.period.isoformat() for entry in entries],
+        'values': [[entry.data.get(label) for entry in entries] for label in index],
+    }
+
+
+def normalize_info(info):
+    if not info:
+        return {}
+    return {str(k): _clean_value(v) for k, v in dict(info).items()}
+
+
+class TickerSnapshot:
+    """
+    Cached stand-in for yf.Ticker(symbol).
+
+    Datasets are read from the cache on first access and downloaded only
+    on a miss; the yf.Ticker itself is built lazily, so a fully cached
+    snapshot never touches Yahoo. Other attributes (history,
+    recommendations, options) are passed through to the yf.Ticker. An
+    empty .info (unknown symbol) is not cached, and upstream errors
+    propagate to the caller.
+    """
+
+    def __init__(self, symbol, ticker_factory=None):
+        self.symbol = symbol.upper().strip()
+        self._ticker_factory = ticker_factory
+        self._ticker = None
+        self._stored = {}
+        self._frames = {}
+        self.fetched = []
+        self.store_hits = []
+
+    @property
+    def ticker(self):
+        """The underlying yf.Ticker, for datasets the snapshot does not hold."""
+        if self._ticker is None:
+            factory = self._ticker_factory or yf.Ticker
+            self._ticker = factory(self.symbol)
+        return self._ticker
+
+    def _load(self, dataset):
+        if dataset in self._stored:
+            return self._stored[dataset]
+        stored = single_flight.get_or_fetch(
+            cache_key(self.symbol, dataset),
+            lambda: self._fetch(dataset),
+            dataset_ttl(dataset),
+            cacheable=bool,
+        )
+        if dataset not in self.fetched:
+            _count('hits')
+        self._stored[dataset] = stored
+        return stored
+
+    def reload(self, dataset):
+        """Download dataset now and replace the cached copy."""
+        stored = self._fetch(dataset)
+        if stored:
+            single_flight.store(cache_key(self.symbol, dataset), stored, dataset_ttl(dataset))
+        self._stored[dataset] = stored
+        self._frames.pop(dataset, None)
+        return stored
+
+    def _fetch(self, dataset):
+        _count('fetches')
+        self.fetched.append(dataset)
+        if dataset in INFO_DATASETS:
+            info = normalize_info(self.ticker.info)
+            # One .info download refreshes both the quote and the profile
+            for name in INFO_DATASETS:
+                if name != dataset and info:
+                    single_flight.store(cache_key(self.symbol, name), info, dataset_ttl(name))
+            return info
+        stored = self._load_from_store(dataset)
+        if stored is not None:
+            return stored
+        stored = normalize_frame(getattr(self.ticker, dataset))
+        self._save_to_store(dataset, stored)
+        return stored
+
+    # --- SQL TIER ---
+
+    def _storable(self, dataset):
+        return dataset in STORED_STATEMENTS and bool(_STORABLE_SYMBOL_RE.match(self.symbol))
+
+    def _load_from_store(self, dataset):
+        """Statement from FinancialStatementCache if it holds unexpired periods."""
+        if not self._storable(dataset):
+            return None
+        from .models import FinancialStatementCache
+        try:
+            entries = list(FinancialStatementCache.get_periods(self.symbol, STORED_STATEMENTS[dataset]))
+        except Exception as e:
+            logger.warning(f"Statement store read failed for {self.symbol} {dataset}: {str(e)}")
+            return None
+        if not entries:
+            return None
+        self.store_hits.append(dataset)
+        return periods_to_frame(entries)
+
+    def _save_to_store(self, dataset, stored):
+        """Write-through: every period of a fresh download in one bulk upsert."""
+        if not self._storable(dataset):
+            return
+        periods = frame_to_periods(stored)
+        if not periods:
+            return
+        from .models import FinancialStatementCache
+        try:
+            FinancialStatementCache.upsert_periods(
+                self.symbol, STORED_STATEMENTS[dataset], periods,
+                ttl_seconds=getattr(settings, 'FINANCIAL_STATEMENT_STORE_TTL', DEFAULT_STORE_TTL),
+            )
+        except Exception as e:
+            logger.warning(f"Statement store write failed for {self.symbol} {dataset}: {str(e)}")
+
+    def _frame(self, dataset):
+        if dataset not in self._frames:
+            self._frames[dataset] = denormalize_frame(self._load(dataset))
+        return self._frames[dataset]
+
+    @property
+    def info(self):
+        """Quote-fresh .info (prices, market cap)."""
+        return self._load('quote')
+
+    @property
+    def profile(self):
+        """.info as cached for company details; may be older than info."""
+        return self._load('profile')
+
+    @property
+    def balance_sheet(self):
+        return self._frame('balance_sheet')
+
+    @property
+    def income_stmt(self):
+        return self._frame('income_stmt')
+
+    @property
+    def cashflow(self):
+        return self._frame('cashflow')
+
+    @property
+    def quarterly_financials(self):
+        return self._frame('quarterly_financials')
+
+    @property
+    def quarterly_balance_sheet(self):
+        return self._frame('quarterly_balance_sheet')
+
+    @property
+    def quarterly_cashflow(self):
+        return self._frame('quarterly_cashflow')
+
+    def __getattr__(self, name):
+        # Anything not snapshotted (history, recommendations, options...) goes upstream
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.ticker, name)
@@ -0,0 +1,110 @@
+import pytest
+import pandas as pd
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.company_search import batch, single_flight, snapshot
+
+pytestmark = pytest.mark.django_db
+
+SYMBOLS = ['BATCHA', 'BATCHB', 'BATCHC']
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    for symbol in SYMBOLS:
+        snapshot.invalidate(symbol)
+        cache.delete(batch.price_cache_key(symbol))
+    yield
+    for symbol in SYMBOLS:
+        snapshot.invalidate(symbol)
+        cache.delete(batch.price_cache_key(symbol))
+
+
+def bulk_frame(symbols):
+    dates = pd.to_datetime(['2024-01-02', '2024-01-03'])
+    columns = pd.MultiIndex.from_product([symbols, ['Close', 'Volume']])
+    rows = []
+    for day, close in enumerate((100.0, 110.0)):
+        row = []
+        for _ in symbols:
+            row.extend([close, 1000.0 + day])
+        rows.append(row)
+    return pd.DataFrame(rows, index=dates, columns=columns)
+
+
+def test_parse_symbols_and_fields():
+    assert batch.parse_symbols('aapl, MSFT,,aapl,BAD SYM') == (['AAPL', 'MSFT'], ['BAD SYM'])
+    assert batch.parse_fields('') == (batch.DEFAULT_FIELDS, [])
+    assert batch.parse_fields('price,PE,bogus') == (['price', 'pe'], ['bogus'])
+
+
+def test_price_only_batch_uses_one_download(mocker):
+    download = mocker.patch('apps.company_search.batch.yf.download', return_value=bulk_frame(SYMBOLS))
+    ticker = mocker.patch('apps.company_search.views.yf.Ticker')
+
+    result = batch.get_batch(SYMBOLS, ['price', 'change_pct'])
+
+    download.assert_called_once()
+    assert download.call_args.kwargs['tickers'] == SYMBOLS
+    ticker.assert_not_called()
+    assert result['data']['price'] == [110.0, 110.0, 110.0]
+    assert result['data']['change_pct'] == [10.0, 10.0, 10.0]
+    assert result['metadata']['bulk_download_symbols'] == 3
+
+    # Second call is served from the per-symbol price cache
+    download.reset_mock()
+    again = batch.get_batch(SYMBOLS, ['price'])
+    download.assert_not_called()
+    assert again['data']['price'] == [110.0, 110.0, 110.0]
+
+
+def test_default_fields_need_no_per_symbol_calls(mocker):
+    download = mocker.patch('apps.company_search.batch.yf.download', return_value=bulk_frame(SYMBOLS))
+    ticker = mocker.patch('apps.company_search.views.yf.Ticker')
+
+    result = batch.get_batch(SYMBOLS, batch.parse_fields('')[0])
+
+    download.assert_called_once()
+    ticker.assert_not_called()
+    assert result['metadata']['info_fetches'] == 0
+    assert result['data']['volume'] == [1001.0, 1001.0, 1001.0]
+
+
+def test_cached_snapshot_quotes_are_not_refetched(mocker):
+    single_flight.store(snapshot.cache_key('BATCHA', 'quote'),
+                        {'currentPrice': 50.0, 'previousClose': 40.0, 'trailingPE': 12.0}, 300)
+    ticker = mocker.patch('apps.company_search.views.yf.Ticker')
+    ticker.return_value.info = {'currentPrice': 20.0, 'previousClose': 20.0, 'trailingPE': 8.0}
+    download = mocker.patch('apps.company_search.batch.yf.download')
+
+    result = batch.get_batch(SYMBOLS, ['price', 'pe', 'change_pct'])
+
+    assert ticker.call_count == 2  # only BATCHB and BATCHC
+    download.assert_not_called()
+    assert result['data']['pe'] == [12.0, 8.0, 8.0]
+    assert result['data']['change_pct'] == [25.0, 0.0, 0.0]
+    assert result['metadata']['cached_quotes'] == 1
+
+
+def test_unknown_symbol_is_reported_in_errors(mocker):
+    ticker = mocker.patch('apps.company_search.views.yf.Ticker')
+    ticker.return_value.info = {}
+    result = batch.get_batch(['BATCHA'], ['market_cap'])
+    assert result['data']['market_cap'] == [None]
+    assert result['errors'] == {'BATCHA': 'not found'}
+
+
+def test_batch_endpoint_validation_and_response(mocker):
+    mocker.patch('apps.company_search.batch.yf.download', return_value=bulk_frame(SYMBOLS))
+    client = APIClient()
+    url = reverse('company_search:batch-quotes')
+
+    assert client.get(url).status_code == 400
+    assert client.get(url, {'symbols': 'BATCHA', 'fields': 'nope'}).status_code == 400
+
+    response = client.get(url, {'symbols': ','.join(SYMBOLS), 'fields': 'price,volume'})
+    assert response.status_code == 200
+    assert response.data['symbols'] == SYMBOLS
+    assert response.data['data']['volume'] == [1001.0, 1001.0, 1001.0]
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from apps.company_search import indicators
+
+rng = np.random.default_rng(42)
+PRICES = 100 + np.cumsum(rng.normal(size=300))
+
+
+def test_sma_matches_rolling_mean_and_is_aligned():
+    result = indicators.sma(PRICES, 20)
+
+    assert len(result) == len(PRICES)
+    assert indicators.warmup(result) == 19
+    expected = pd.Series(PRICES).rolling(20).mean().to_numpy()
+    np.testing.assert_allclose(result[19:], expected[19:])
+
+
+def test_gap_only_nulls_the_windows_that_contain_it():
+    prices = PRICES.copy()
+    prices[30] = np.nan
+    prices[0] = np.nan
+
+    result = indicators.sma(prices, 5)
+    upper, middle, lower = indicators.bollinger(prices, 20)
+
+    expected = pd.Series(prices).rolling(5).mean().to_numpy()
+    np.testing.assert_allclose(result, expected)
+    assert np.isnan(result[30:35]).all() and not np.isnan(result[35:]).any()
+    assert not np.isnan(result[5:30]).any()
+    std = pd.Series(prices).rolling(20).std(ddof=0).to_numpy()
+    np.testing.assert_allclose(upper - middle, 2 * std, rtol=1e-6)
+    assert not np.isnan(upper[50:]).any()
+
+    volume = np.full(len(prices), 1000.0)
+    vwap = indicators.vwap(prices, prices, prices, volume)
+    assert np.isnan(vwap[[0, 30]]).all() and not np.isnan(vwap[31:]).any()
+
+
+def test_short_series_gives_empty_lists():
+    assert indicators.trim(indicators.sma(PRICES[:10], 20)) == []
+    assert indicators.trim(indicators.rsi(PRICES[:14], 14)) == []
+    line, signal, _ = indicators.macd(PRICES[:20])
+    assert indicators.trim(line) == [] and indicators.trim(signal) == []
+
+
+def test_rsi_uses_wilder_smoothing():
+    deltas = np.diff(PRICES)
+    gains, losses = np.clip(deltas, 0, None), np.clip(-deltas, 0, None)
+    avg_gain, avg_loss = gains[:14].mean(), losses[:14].mean()
+    expected = [100 - 100 / (1 + avg_gain / avg_loss)]
+    for gain, loss in zip(gains[14:], losses[14:]):
+        avg_gain = (avg_gain * 13 + gain) / 14
+        avg_loss = (avg_loss * 13 + loss) / 14
+        expected.append(100 - 100 / (1 + avg_gain / avg_loss))
+
+    np.testing.assert_allclose(indicators.trim(indicators.rsi(PRICES, 14)), expected)
+
+
+def test_rsi_flat_series_is_neutral():
+    assert indicators.trim(indicators.rsi([50.0] * 20, 14)) == [50.0] * 6
+
+
+def test_macd_signal_is_ema_of_macd_line():
+    line, signal, histogram = indicators.macd(PRICES)
+
+    assert indicators.warmup(line) == 25
+    assert indicators.warmup(signal) == 33
+    expected = pd.Series(line[25:]).ewm(span=9, adjust=False).mean().to_numpy()
+    np.testing.assert_allclose(signal[33:], expected[8:])
+    np.testing.assert_allclose(histogram[33:], line[33:] - signal[33:])
+
+
+def test_bollinger_bands_survive_large_prices():
+    prices = PRICES + 1e7
+    upper, middle, lower = indicators.bollinger(prices, 20)
+
+    std = pd.Series(prices).rolling(20).std(ddof=0).to_numpy()
+    np.testing.assert_allclose(upper[19:] - middle[19:], 2 * std[19:], rtol=1e-6)
+    np.testing.assert_allclose(middle[19:] - lower[19:], 2 * std[19:], rtol=1e-6)
+
+
+def test_atr_and_vwap():
+    high, low = PRICES + 1, PRICES - 1
+
+    atr = indicators.atr(high, low, PRICES, 14)
+    assert indicators.warmup(atr) == 14
+    assert np.all(atr[14:] >= 2.0)
+
+    volume = np.array([0.0] + [10.0] * (len(PRICES) - 1))
+    vwap = indicators.vwap(high, low, PRICES, volume)
+    assert np.isnan(vwap[0])
+    assert vwap[1] == pytest.approx(PRICES[1])
+    assert vwap[-1] == pytest.approx(PRICES[1:].mean())
+
+
+def test_compute_shares_emas_between_ema_and_macd():
+    result = indicators.compute(PRICES, ['ema', 'macd', 'bogus'])
+
+    assert set(result) == {'ema_12', 'ema_26', 'macd', 'macd_signal', 'macd_histogram'}
+    np.testing.assert_allclose(result['macd'][25:], result['ema_12'][25:] - result['ema_26'][25:])
+    # atr/vwap need high, low and volume
+    assert indicators.compute(PRICES, ['atr', 'vwap']) == {}
@@ -237,4 +237,36 @@ class TestFinancialStatementCacheModel:
         cache = FinancialStatementCache.objects.create(
             symbol="MANUAL", statement_type="balance_sheet", period="2024-06-01", data={}, expires_at=custom_expiry
         )
-        assert abs((cache.expires_at - custom_expiry).total_seconds()) < 1, "expires_at overridden unexpectedly"
\ No newline at end of file
+        assert abs((cache.expires_at - custom_expiry).total_seconds()) < 1, "expires_at overridden unexpectedly"
+
+    def test_23_upsert_periods_inserts_then_updates(self):
+        """upsert_periods writes one row per period and updates existing rows in place."""
+        from datetime import date
+        periods = {date(2023, 3, 31): {"Total Assets": 100.0}, date(2022, 3, 31): {"Total Assets": 90.0}}
+        assert FinancialStatementCache.upsert_periods("UPS", "balance_sheet", periods, ttl_seconds=3600) == 2
+
+        FinancialStatementCache.upsert_periods("UPS", "balance_sheet", {date(2023, 3, 31): {"Total Assets": 110.0}})
+        rows = list(FinancialStatementCache.get_periods("UPS", "balance_sheet"))
+        assert [r.period for r in rows] == [date(2023, 3, 31), date(2022, 3, 31)]
+        assert rows[0].data == {"Total Assets": 110.0}
+        assert FinancialStatementCache.objects.filter(symbol="UPS").count() == 2
+
+    def test_24_upsert_periods_updates_company_refresh(self):
+        from datetime import date
+        company = CompanySearch.objects.create(symbol="UPSR", name="Upsert Co")
+        FinancialStatementCache.upsert_periods("UPSR", "cash_flow", {date(2023, 3, 31): {}})
+        company.refresh_from_db()
+        assert company.last_data_refresh is not None
+
+    def test_25_get_periods_range_and_expiry(self):
+        from datetime import date
+        FinancialStatementCache.upsert_periods("RNG", "income_statement", {
+            date(2021, 3, 31): {}, date(2022, 3, 31): {}, date(2023, 3, 31): {},
+        }, ttl_seconds=3600)
+        in_range = FinancialStatementCache.get_periods("RNG", "income_statement",
+                                                       start=date(2022, 1, 1), end=date(2022, 12, 31))
+        assert [r.period for r in in_range] == [date(2022, 3, 31)]
+
+        FinancialStatementCache.objects.filter(symbol="RNG").update(expires_at=timezone.now() - timezone.timedelta(minutes=1))
+        assert not FinancialStatementCache.get_periods("RNG", "income_statement").exists()
+        assert FinancialStatementCache.get_periods("RNG", "income_statement", include_expired=True).count() == 3
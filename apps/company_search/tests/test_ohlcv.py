@@ -0,0 +1,170 @@
+import pandas as pd
+import pytest
+
+from apps.company_search import ohlcv
+from apps.company_search.models import PriceBar, PriceSeries
+
+pytestmark = pytest.mark.django_db
+
+NOW = pd.Timestamp('2024-06-14 21:00', tz='UTC')  # Friday, after the close
+
+
+def daily_frame(start, end, close_offset=0.0):
+    index = pd.bdate_range(start, end, tz='America/New_York', name='Date')
+    closes = [100.0 + i + close_offset for i in range(len(index))]
+    return pd.DataFrame({
+        'Open': closes, 'High': [c + 1 for c in closes], 'Low': [c - 1 for c in closes],
+        'Close': closes, 'Volume': [1000 + i for i in range(len(index))],
+        'Dividends': 0.0, 'Stock Splits': 0.0,
+    }, index=index)
+
+
+class Provider:
+    """Serves slices of one full history the way Ticker.history(period=...) does."""
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.calls = []
+
+    def __call__(self, period, interval):
+        self.calls.append(period)
+        start = ohlcv.period_start(period, ohlcv._now())
+        return self.frame if start is None else self.frame[self.frame.index >= start]
+
+
+@pytest.fixture
+def clock(mocker):
+    now = {'value': NOW}
+    mocker.patch.object(ohlcv, '_now', side_effect=lambda: now['value'])
+    return now
+
+
+def test_cold_fetch_is_stored_and_reused(clock):
+    provider = Provider(daily_frame('2023-01-02', '2024-06-14'))
+
+    first = ohlcv.get_history('aapl', '1y', '1d', loader=provider)
+    second = ohlcv.get_history('AAPL', '1y', '1d', loader=provider)
+
+    assert provider.calls == ['1y']
+    assert PriceSeries.objects.get(symbol='AAPL', interval='1d').bars.count() == len(first)
+    pd.testing.assert_frame_equal(second, first, check_freq=False)
+    assert str(second.index.tz) == 'America/New_York'
+
+
+def test_shorter_period_is_a_slice_of_the_store(clock):
+    provider = Provider(daily_frame('2023-01-02', '2024-06-14'))
+    ohlcv.get_history('AAPL', '1y', '1d', loader=provider)
+
+    month = ohlcv.get_history('AAPL', '1mo', '1d', loader=provider)
+    week = ohlcv.get_history('AAPL', '5d', '1d', loader=provider)
+
+    assert provider.calls == ['1y']
+    assert month.index[0] >= NOW - pd.DateOffset(months=1)
+    assert list(week.index.strftime('%Y-%m-%d')) == [
+        '2024-06-10', '2024-06-11', '2024-06-12', '2024-06-13', '2024-06-14'
+    ]
+
+
+def test_stale_series_fetches_only_the_tail(clock):
+    provider = Provider(daily_frame('2023-01-02', '2024-06-14'))
+    ohlcv.get_history('AAPL', '1y', '1d', loader=provider)
+
+    clock['value'] = NOW + pd.Timedelta(days=3)  # Monday evening
+    provider.frame = daily_frame('2023-01-02', '2024-06-17')
+    result = ohlcv.get_history('AAPL', '1y', '1d', loader=provider)
+
+    assert provider.calls == ['1y', '5d']
+    assert result.index[-1].strftime('%Y-%m-%d') == '2024-06-17'
+    assert result['Close'].iloc[-1] == provider.frame['Close'].iloc[-1]
+
+
+def test_longer_period_downloads_again(clock):
+    provider = Provider(daily_frame('2020-01-01', '2024-06-14'))
+    ohlcv.get_history('AAPL', '6mo', '1d', loader=provider)
+
+    result = ohlcv.get_history('AAPL', '2y', '1d', loader=provider)
+    ohlcv.get_history('AAPL', '1y', '1d', loader=provider)
+
+    assert provider.calls == ['6mo', '2y']
+    assert result.index[0] < NOW - pd.DateOffset(years=1)
+
+
+def test_readjusted_history_is_downloaded_again(clock):
+    provider = Provider(daily_frame('2023-01-02', '2024-06-14'))
+    ohlcv.get_history('AAPL', '1y', '1d', loader=provider)
+
+    clock['value'] = NOW + pd.Timedelta(days=3)
+    provider.frame = daily_frame('2023-01-02', '2024-06-17', close_offset=-5.0)
+    result = ohlcv.get_history('AAPL', '1y', '1d', loader=provider)
+
+    assert provider.calls == ['1y', '5d', '1y']
+    assert result['Close'].iloc[0] == provider.frame[provider.frame.index >= result.index[0]]['Close'].iloc[0]
+    stored = ohlcv.read('AAPL', '1y', '1d')
+    assert stored['Close'].iloc[-2] == provider.frame['Close'].iloc[-2]
+
+
+def test_store_errors_fall_back_to_provider(clock, mocker):
+    provider = Provider(daily_frame('2024-01-02', '2024-06-14'))
+    mocker.patch.object(PriceSeries.objects, 'get_or_create', side_effect=RuntimeError('db down'))
+
+    result = ohlcv.get_history('AAPL', '1mo', '1d', loader=provider)
+
+    assert provider.calls == ['1mo']
+    assert not result.empty
+    assert PriceBar.objects.count() == 0
+
+
+def test_unknown_period_and_empty_results_pass_through(clock):
+    empty = pd.DataFrame()
+
+    assert ohlcv.get_history('AAPL', 'bogus', '1d', loader=lambda **params: empty) is empty
+    assert ohlcv.get_history('AAPL', '1mo', '1d', loader=lambda **params: empty) is empty
+    assert not PriceBar.objects.exists()
+
+
+def test_close_only_loader_never_replaces_the_stored_ohlc(clock):
+    full = Provider(daily_frame('2023-01-02', '2024-06-14'))
+
+    def close_only(period, interval):
+        frame = full(period, interval)[['Close']]
+        return frame.set_axis(frame.index.tz_localize(None), axis=0)
+
+    # Cold fetch from a Close-only fallback: returned as is, not stored
+    first = ohlcv.get_history('AAPL', '1y', '1d', loader=close_only)
+    assert list(first.columns) == ['Close']
+    assert not PriceBar.objects.exists()
+
+    result = ohlcv.get_history('AAPL', '1y', '1d', loader=full)
+    assert list(result.columns[:5]) == ['Open', 'High', 'Low', 'Close', 'Volume']
+
+    # A Close-only tail leaves the stored series (and its columns) alone
+    clock['value'] = NOW + pd.Timedelta(days=3)
+    full.frame = daily_frame('2023-01-02', '2024-06-17')
+    ohlcv.get_history('AAPL', '1y', '1d', loader=close_only)
+    stored = ohlcv.get_history('AAPL', '1y', '1d', loader=full)
+
+    assert list(stored.columns[:4]) == list(ohlcv.PRICE_COLUMNS)
+    assert stored.index[-1].strftime('%Y-%m-%d') == '2024-06-17'
+    assert full.calls == ['1y', '1y', '5d', '5d']
+
+
+def test_failing_provider_is_called_once(clock):
+    calls = []
+
+    def failing(period, interval):
+        calls.append(period)
+        raise RuntimeError('rate limited')
+
+    with pytest.raises(RuntimeError):
+        ohlcv.get_history('AAPL', '1mo', '1d', loader=failing)
+    assert calls == ['1mo']
+
+
+def test_empty_download_falls_back_to_stored_bars(clock):
+    provider = Provider(daily_frame('2023-01-02', '2024-06-14'))
+    stored = ohlcv.get_history('AAPL', '1y', '1d', loader=provider)
+
+    # A longer period is downloaded again; an empty answer keeps what is stored
+    result = ohlcv.get_history('AAPL', '2y', '1d', loader=lambda **params: pd.DataFrame())
+
+    assert len(result) == len(stored)
@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+
+from apps.company_search import peers, single_flight, snapshot
+
+SYMBOLS = ['PEERA', 'PEERB', 'PEERC', 'PEERD']
+
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    peers.reset_bucket()
+    for symbol in SYMBOLS:
+        snapshot.invalidate(symbol)
+    yield
+    peers.reset_bucket()
+    for symbol in SYMBOLS:
+        snapshot.invalidate(symbol)
+
+
+def test_token_bucket_paces_after_burst():
+    bucket = peers.TokenBucket(rate=20, capacity=2)
+    assert bucket.acquire(timeout=0) and bucket.acquire(timeout=0)
+    assert bucket.acquire(timeout=0) is False
+
+    started = time.monotonic()
+    assert bucket.acquire(timeout=1)
+    assert time.monotonic() - started >= 0.03
+
+
+def test_fetch_peers_runs_concurrently_and_keeps_order():
+    barrier = threading.Barrier(3, timeout=2)
+
+    def load(symbol):
+        barrier.wait()  # only passes if three lookups are in flight together
+        return {'symbol': symbol}
+
+    result = peers.fetch_peers(SYMBOLS[:3], load, workers=3)
+
+    assert [p['symbol'] for p in result] == SYMBOLS[:3]
+
+
+def test_fetch_peers_skips_failures_and_empty_results():
+    def load(symbol):
+        if symbol == 'PEERA':
+            raise RuntimeError('boom')
+        return None if symbol == 'PEERB' else {'symbol': symbol}
+
+    assert [p['symbol'] for p in peers.fetch_peers(SYMBOLS, load)] == ['PEERC', 'PEERD']
+
+
+def test_fetch_peers_returns_once_limit_reached():
+    release = threading.Event()
+
+    def load(symbol):
+        if symbol == 'PEERA':
+            release.wait(2)
+        return {'symbol': symbol}
+
+    started = time.monotonic()
+    result = peers.fetch_peers(SYMBOLS, load, limit=2, workers=4)
+    release.set()
+
+    assert len(result) == 2
+    assert 'PEERA' not in [p['symbol'] for p in result]
+    assert time.monotonic() - started < 1
+
+
+def test_fetch_peers_drops_peers_past_timeout():
+    release = threading.Event()
+
+    def load(symbol):
+        if symbol == 'PEERB':
+            release.wait(2)
+        return {'symbol': symbol}
+
+    result = peers.fetch_peers(SYMBOLS[:2], load, workers=2, peer_timeout=0.2)
+    release.set()
+
+    assert [p['symbol'] for p in result] == ['PEERA']
+
+
+def test_cached_peers_bypass_rate_limit(settings):
+    settings.PEER_FETCH_RATE = 0.01
+    settings.PEER_FETCH_BURST = 1
+    single_flight.store(snapshot.cache_key('PEERA', 'quote'), {'symbol': 'PEERA'}, 60)
+    single_flight.store(snapshot.cache_key('PEERB', 'quote'), {'symbol': 'PEERB'}, 60)
+
+    # One token, one uncached peer: all three succeed without waiting
+    result = peers.fetch_peers(SYMBOLS[:3], lambda s: {'symbol': s}, peer_timeout=0.5)
+
+    assert [p['symbol'] for p in result] == SYMBOLS[:3]
+    assert peers.get_bucket().acquire(timeout=0) is False
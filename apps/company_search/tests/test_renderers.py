@@ -203,4 +203,42 @@ class TestFinancialDataRendererBranches:
         result = renderer.render({"x": 2}, renderer_context=ctx)
         parsed = json.loads(result)
         # Fallback should just output cleaned original data
-        assert parsed.get('x') == 2
\ No newline at end of file
+        assert parsed.get('x') == 2
+
+    def test_19_clean_data_is_not_cleaned_again(self, mocker):
+        """Data the view already cleaned skips the renderer's cleaning walk."""
+        from apps.company_search import renderers
+        cleaned = renderers.clean_financial_data({"a": [1.0, float('nan')], "b": None})
+        spy = mocker.spy(renderers, 'clean_financial_data')
+        result = json.loads(SafeJSONRenderer().render(cleaned))
+        assert result == {"a": [1.0, None]}
+        assert spy.spy_return is cleaned
+
+    def test_20_fast_backend_matches_standard(self, monkeypatch):
+        """With orjson available the output is the same as the standard encoder's."""
+        from datetime import date
+        import pandas as pd
+        from apps.company_search import renderers
+        orjson = pytest.importorskip('orjson')
+        data = {
+            "bad": float('nan'), "list": [1, None], 2: "int key",
+            "by_date": {date(2024, 3, 31): 1.5, pd.Timestamp('2024-06-30'): 2.5},
+        }
+        monkeypatch.setattr(renderers, 'orjson', None)
+        standard = json.loads(SafeJSONRenderer().render(data))
+        assert standard["by_date"] == {"2024-03-31": 1.5, "2024-06-30 00:00:00": 2.5}
+
+        calls = []
+        spy_orjson = type('SpyOrjson', (), {
+            'JSONEncodeError': orjson.JSONEncodeError,
+            'dumps': staticmethod(lambda obj: calls.append(obj) or orjson.dumps(obj)),
+        })
+        monkeypatch.setattr(renderers, 'orjson', spy_orjson)
+        fast = SafeJSONRenderer().render(data)
+        assert calls and json.loads(fast) == standard
+        assert orjson.loads(fast) == standard
+        # Indented output still goes through the standard renderer
+        calls.clear()
+        PrettyJSONRenderer().render(data)
+        assert calls == []
+
@@ -0,0 +1,156 @@
+import threading
+import time
+
+import pytest
+from django.core.cache import cache
+
+from apps.company_search import single_flight
+
+
+@pytest.fixture
+def key():
+    name = 'single_flight_test_key'
+    cache.delete_many([name, single_flight.lock_key(name)])
+    yield name
+    cache.delete_many([name, single_flight.lock_key(name)])
+
+
+def test_hit_does_not_fetch(key):
+    single_flight.store(key, {'v': 1}, 60)
+    calls = []
+    assert single_flight.get_or_fetch(key, lambda: calls.append(1), 60, beta=0) == {'v': 1}
+    assert calls == []
+
+
+def test_concurrent_misses_share_one_fetch(key):
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.2)
+        return 'fresh'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(single_flight.get_or_fetch(key, fetch, 60)))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == ['fresh'] * 8
+
+
+def test_uncacheable_result_is_returned_but_not_stored(key):
+    assert single_flight.get_or_fetch(key, lambda: None, 60) is None
+    assert cache.get(key) is None
+    assert cache.get(single_flight.lock_key(key)) is None
+
+
+def test_fetch_error_propagates_and_releases_lock(key):
+    def boom():
+        raise RuntimeError('upstream down')
+
+    with pytest.raises(RuntimeError):
+        single_flight.get_or_fetch(key, boom, 60)
+    assert cache.get(single_flight.lock_key(key)) is None
+    assert single_flight.get_or_fetch(key, lambda: 'ok', 60) == 'ok'
+
+
+def test_follower_waits_for_leader_in_another_process(key):
+    # Simulate another worker holding the fetch lock
+    cache.add(single_flight.lock_key(key), 1, 30)
+    timer = threading.Timer(0.1, lambda: single_flight.store(key, 'from-leader', 60))
+    timer.start()
+    calls = []
+    try:
+        value = single_flight.get_or_fetch(key, lambda: calls.append(1) or 'own', 60)
+    finally:
+        timer.join()
+    assert value == 'from-leader'
+    assert calls == []
+
+
+def test_early_refresh_probability_follows_expiry():
+    now = 1000.0
+    fresh = {'value': 1, 'delta': 0.5, 'expires_at': now + 3600}
+    expired = {'value': 1, 'delta': 0.5, 'expires_at': now}
+    assert not single_flight.should_refresh_early(fresh, 1.0, now=now)
+    assert single_flight.should_refresh_early(expired, 1.0, now=now)
+    # beta=0 turns off early refresh, but an expired entry is always due
+    assert not single_flight.should_refresh_early({**fresh, 'expires_at': now + 1}, 0, now=now)
+    assert single_flight.should_refresh_early(expired, 0, now=now)
+
+
+def test_early_refresh_replaces_value_before_expiry(key, mocker):
+    single_flight.store(key, 'old', 60, delta=1.0)
+    mocker.patch.object(single_flight, 'should_refresh_early', return_value=True)
+    assert single_flight.get_or_fetch(key, lambda: 'new', 60) == 'new'
+    assert single_flight.read(key) == 'new'
+
+
+def test_failed_early_refresh_serves_cached_value(key, mocker):
+    single_flight.store(key, 'old', 60, delta=1.0)
+    mocker.patch.object(single_flight, 'should_refresh_early', return_value=True)
+
+    def boom():
+        raise RuntimeError('upstream down')
+
+    assert single_flight.get_or_fetch(key, boom, 60) == 'old'
+
+
+def test_swr_fresh_entry_is_not_stale(key):
+    value, meta = single_flight.get_stale_while_revalidate(key, lambda: 'v1', 60, 600)
+    assert value == 'v1'
+    assert meta['is_stale'] is False
+    value, meta = single_flight.get_stale_while_revalidate(key, lambda: 'v2', 60, 600)
+    assert value == 'v1'
+    assert meta['is_stale'] is False
+
+
+def test_swr_serves_stale_and_refreshes_in_background(key):
+    single_flight.store(key, 'old', 60, stale_ttl=600)
+    entry = cache.get(key)
+    entry['stored_at'] -= 120
+    entry['expires_at'] -= 120
+    cache.set(key, entry, 600)
+
+    calls = []
+    value, meta = single_flight.get_stale_while_revalidate(
+        key, lambda: 'unused', 60, 660, refresh=lambda: calls.append(1) or 'new')
+    assert value == 'old'
+    assert meta['is_stale'] is True
+    assert meta['age_seconds'] >= 120
+
+    single_flight.wait_for_refreshes(timeout=5)
+    assert calls == [1]
+    value, meta = single_flight.get_stale_while_revalidate(key, lambda: 'unused', 60, 660)
+    assert value == 'new'
+    assert meta['is_stale'] is False
+
+
+def test_swr_failed_refresh_keeps_stale_value(key):
+    single_flight.store(key, 'old', 0, stale_ttl=600)
+
+    def boom():
+        raise RuntimeError('upstream down')
+
+    value, meta = single_flight.get_stale_while_revalidate(key, boom, 60, 600)
+    single_flight.wait_for_refreshes(timeout=5)
+    assert value == 'old' and meta['is_stale']
+    assert single_flight.read(key) == 'old'
+
+
+def test_swr_ttls_setting_override(settings):
+    settings.STALE_WHILE_REVALIDATE_TTLS = {'quote': (30, 90)}
+    assert single_flight.swr_ttls('quote') == (30, 90)
+    assert single_flight.swr_ttls('chart') == single_flight.DEFAULT_SWR_TTLS['chart']
+
+
+def test_swr_refresh_recycles_db_connections(key, mocker):
+    recycle = mocker.patch.object(single_flight, 'close_old_connections')
+    single_flight.store(key, 'old', 0, stale_ttl=600)
+    single_flight.get_stale_while_revalidate(key, lambda: 'new', 60, 600)
+    single_flight.wait_for_refreshes(timeout=5)
+    assert recycle.call_count == 2
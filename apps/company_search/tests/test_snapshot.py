@@ -0,0 +1,144 @@
+import pytest
+import numpy as np
+import pandas as pd
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+from unittest.mock import MagicMock, PropertyMock
+
+from apps.company_search import single_flight, snapshot
+from apps.company_search.snapshot import TickerSnapshot
+
+pytestmark = pytest.mark.django_db
+
+SYMBOL = 'SNAPTEST'
+
+
+@pytest.fixture
+def upstream(mocker):
+    """yf.Ticker with counted .info / .balance_sheet / .income_stmt reads."""
+    snapshot.invalidate(SYMBOL)
+    for key in ('balance_sheet', 'income_statement', 'financial_ratios', 'stock_price', 'company_info'):
+        cache.delete(f"{key}_{SYMBOL}")
+
+    mock = mocker.patch("apps.company_search.views.yf.Ticker")
+    dates = pd.to_datetime(['2023-03-31', '2022-03-31'])
+    statements = pd.DataFrame({
+        'Total Assets': [1000.0, 900.0],
+        'Total Stockholder Equity': [500.0, np.nan],
+        'Long Term Debt': [200.0, 150.0],
+        'Short Long Term Debt': [0.0, 0.0],
+        'Total Revenue': [1000.0, 800.0],
+        'Net Income': [100.0, 80.0],
+    }, index=dates).transpose()
+
+    ticker_cls = type(mock.return_value)
+    counters = {}
+    for name, value in (
+        ('info', {'longName': 'Snap Ltd', 'currentPrice': 10.0, 'marketCap': 5000.0}),
+        ('balance_sheet', statements),
+        ('income_stmt', statements),
+    ):
+        counters[name] = PropertyMock(return_value=value)
+        setattr(ticker_cls, name, counters[name])
+    yield mock, counters
+    snapshot.invalidate(SYMBOL)
+
+
+def test_company_page_endpoints_share_one_fetch_per_dataset(upstream):
+    mock, counters = upstream
+    client = APIClient()
+    for name in ('balance-sheet', 'income-statement', 'financial-ratios', 'stock-price', 'company-info'):
+        response = client.get(reverse(f'company_search:{name}', kwargs={'symbol': SYMBOL}))
+        assert response.status_code == 200, name
+
+    assert counters['info'].call_count == 1
+    assert counters['balance_sheet'].call_count == 1
+    assert counters['income_stmt'].call_count == 1
+
+
+def test_cached_snapshot_never_builds_a_ticker(upstream):
+    mock, counters = upstream
+    TickerSnapshot(SYMBOL).balance_sheet
+    mock.reset_mock()
+
+    again = TickerSnapshot(SYMBOL)
+    frame = again.balance_sheet
+    assert not mock.called
+    assert again.fetched == []
+    assert frame.loc['Total Assets'].tolist() == [1000.0, 900.0]
+    assert frame.columns[0] == pd.Timestamp('2023-03-31')
+
+
+def test_statement_nan_is_stored_as_none(upstream):
+    TickerSnapshot(SYMBOL).balance_sheet
+    stored = single_flight.read(snapshot.cache_key(SYMBOL, 'balance_sheet'))
+    row = stored['index'].index('Total Stockholder Equity')
+    assert stored['values'][row] == [500.0, None]
+
+
+def test_empty_info_is_not_cached(mocker):
+    snapshot.invalidate('NOSUCH')
+    mock = mocker.patch("apps.company_search.views.yf.Ticker")
+    mock.return_value.info = {}
+    assert TickerSnapshot('nosuch').info == {}
+    assert cache.get(snapshot.cache_key('NOSUCH', 'quote')) is None
+
+
+def test_info_download_fills_quote_and_profile(upstream):
+    mock, counters = upstream
+    snap = TickerSnapshot(SYMBOL)
+    assert snap.info['longName'] == 'Snap Ltd'
+    assert snap.profile['longName'] == 'Snap Ltd'
+    assert counters['info'].call_count == 1
+    assert cache.get(snapshot.cache_key(SYMBOL, 'profile')) is not None
+
+
+def test_dataset_ttl_setting_override(settings):
+    settings.TICKER_SNAPSHOT_TTLS = {'quote': 60}
+    assert snapshot.dataset_ttl('quote') == 60
+    assert snapshot.dataset_ttl('profile') == snapshot.DEFAULT_TTLS['profile']
+
+
+def test_unsnapshotted_attributes_pass_through():
+    ticker = MagicMock()
+    snap = TickerSnapshot('x', ticker_factory=lambda symbol: ticker)
+    snap.history(period='1y')
+    ticker.history.assert_called_once_with(period='1y')
+
+
+def test_normalize_frame_empty_roundtrip():
+    assert snapshot.denormalize_frame(snapshot.normalize_frame(None)).empty
+    assert snapshot.denormalize_frame(snapshot.normalize_frame(pd.DataFrame())).empty
+
+
+def test_statement_download_is_written_through_to_store(upstream):
+    from apps.company_search.models import FinancialStatementCache
+    TickerSnapshot(SYMBOL).balance_sheet
+
+    rows = list(FinancialStatementCache.get_periods(SYMBOL, 'balance_sheet'))
+    assert [str(r.period) for r in rows] == ['2023-03-31', '2022-03-31']
+    assert rows[0].data['Total Assets'] == 1000.0
+    assert rows[1].data['Total Stockholder Equity'] is None
+
+
+def test_store_answers_when_memory_cache_is_cold(upstream):
+    mock, counters = upstream
+    TickerSnapshot(SYMBOL).balance_sheet
+    # Process restart: the Django cache is gone, SQL is not
+    snapshot.invalidate(SYMBOL)
+
+    snap = TickerSnapshot(SYMBOL)
+    frame = snap.balance_sheet
+    assert counters['balance_sheet'].call_count == 1
+    assert snap.store_hits == ['balance_sheet']
+    assert frame.loc['Total Assets'].tolist() == [1000.0, 900.0]
+    assert frame.columns[0] == pd.Timestamp('2023-03-31')
+
+
+def test_quarterly_statements_are_not_stored(upstream):
+    from apps.company_search.models import FinancialStatementCache
+    mock, counters = upstream
+    mock.return_value.quarterly_financials = pd.DataFrame()
+    TickerSnapshot(SYMBOL).quarterly_financials
+    assert not FinancialStatementCache.objects.filter(symbol=SYMBOL).exists()
@@ -4,8 +4,10 @@ from decimal import Decimal
 from datetime import datetime
 from apps.company_search.utils import (
     clean_financial_data, format_currency, format_percentage,
-    validate_financial_value, SafeJSONEncoder, safe_json_loads
+    validate_financial_value, SafeJSONEncoder, safe_json_loads, frame_to_columns,
+    frame_to_records, is_clean
 )
+import pandas as pd
 from collections import namedtuple
 
 class TestUtils:
@@ -191,4 +193,76 @@ class TestUtils:
     def test_24_format_currency_math_error(self):
         """Test math.isnan exception path."""
         # This should trigger the isnan check and potentially the except block
-        assert format_currency(5.0) == '$5.00'
\ No newline at end of file
+        assert format_currency(5.0) == '$5.00'
+
+    def test_25_frame_to_columns(self):
+        """OHLCV frame becomes aligned arrays with NaN as None and int volumes."""
+        index = pd.DatetimeIndex(['2024-01-02', '2024-01-03'], tz='America/New_York')
+        frame = pd.DataFrame({
+            'Open': [1.5, float('nan')], 'Close': [2.0, float('inf')], 'Volume': [10.0, 20.0]
+        }, index=index)
+        result = frame_to_columns(frame)
+        assert result['timestamps'] == [int(ts.timestamp() * 1000) for ts in index]
+        assert result['timestamp_encoding'] == 'absolute'
+        assert result['open'] == [1.5, None]
+        assert result['close'] == [2.0, None]
+        assert result['volume'] == [10, 20]
+        assert 'high' not in result
+        json.dumps(result, allow_nan=False)
+
+    def test_26_frame_to_columns_delta_timestamps(self):
+        """Delta encoding keeps the first timestamp and the gaps after it."""
+        index = pd.date_range('2024-01-02 09:30', periods=3, freq='5min')
+        result = frame_to_columns(pd.DataFrame({'Close': [1.0, 2.0, 3.0]}, index=index), delta_timestamps=True)
+        assert result['timestamp_encoding'] == 'delta'
+        assert result['timestamps'][1:] == [300000, 300000]
+        assert result['timestamps'][0] == int(index[0].timestamp() * 1000)
+
+    def test_27_frame_to_records_matches_clean_financial_data(self):
+        """Column-wise cleaning gives the same records as cleaning to_dict output."""
+        from decimal import Decimal as D
+        index = pd.date_range('2024-03-08 15:50', periods=4, freq='1D', tz='America/New_York', name='Date')
+        frame = pd.DataFrame({
+            'Close': [1.0, float('nan'), float('inf'), 4.0],
+            'Volume': [1, 2, 3, 4],
+            'note': [None, 'x', D('1.5'), None],
+        }, index=index).reset_index()
+        records = frame_to_records(frame)
+        assert records == clean_financial_data(frame.to_dict('records'))
+        assert records[1] == {'Date': '2024-03-09T15:50:00-05:00', 'Close': None, 'Volume': 2, 'note': 'x'}
+        assert records[3]['Date'].endswith('-04:00')  # after the DST switch
+        assert is_clean(records) and is_clean(records[0])
+
+    def test_28_cleaned_data_is_returned_as_is(self):
+        """Cleaning is done once; cleaning the result again is a no-op."""
+        cleaned = clean_financial_data({'a': [1.0, float('nan')]})
+        assert is_clean(cleaned)
+        assert clean_financial_data(cleaned) is cleaned
+        assert clean_financial_data({'wrapped': cleaned})['wrapped'] is cleaned
+
+    def test_29_encoder_only_revisits_cleaned_data_with_null_fields(self, monkeypatch):
+        """Marked payloads are not sanitized again; only None fields are still dropped."""
+        from apps.company_search.renderers import SafeJSONRenderer
+        complete = clean_financial_data({'rows': [{'close': 1.5, 'volume': 5}]})
+        gappy = clean_financial_data({'rows': [{'close': float('nan'), 'volume': 5}, {'close': 2.0}]})
+        encoder = SafeJSONEncoder()
+        assert encoder.sanitize({'wrapped': complete})['wrapped'] is complete
+        assert encoder.sanitize(gappy) == {'rows': [{'volume': 5}, {'close': 2.0}]}
+
+        calls = []
+        original = SafeJSONEncoder.sanitize
+        monkeypatch.setattr(SafeJSONEncoder, 'sanitize', lambda self, obj: calls.append(obj) or original(self, obj))
+        assert json.loads(SafeJSONRenderer().render(gappy))['rows'] == [{'volume': 5}, {'close': 2.0}]
+        assert all(not isinstance(c, (list, int, float)) for c in calls)
+
+    def test_30_cleaned_data_keys_are_stringified_on_encode(self):
+        """Date and Timestamp keys survive cleaning and encode as strings, nested or not."""
+        from datetime import date
+        cleaned = clean_financial_data({date(2024, 3, 31): 1.5, 'x': float('nan')})
+        assert json.loads(json.dumps(cleaned, cls=SafeJSONEncoder)) == {'2024-03-31': 1.5}
+        nested = clean_financial_data({'k': {pd.Timestamp('2024-06-30'): 1}, 'rows': [{'a': 1}]})
+        assert json.loads(json.dumps(nested, cls=SafeJSONEncoder)) == {
+            'k': {'2024-06-30 00:00:00': 1}, 'rows': [{'a': 1}]
+        }
+        frame = pd.DataFrame({0: [1.0], 'close': [2.0]})
+        assert json.loads(json.dumps(frame_to_records(frame), cls=SafeJSONEncoder)) == [{'0': 1.0, 'close': 2.0}]
@@ -10,6 +10,7 @@ from unittest.mock import MagicMock, PropertyMock
 from apps.company_search.views import (
     FinancialRatioService, FinancialDataService, SearchSuggestionsView
 )
+from apps.company_search import snapshot
 
 # Enable DB access for all tests
 pytestmark = pytest.mark.django_db
@@ -25,6 +26,8 @@ def mock_ticker(mocker):
     Critically, we set .info to a real dict to avoid pickling errors when Django caches the response.
     """
     mock = mocker.patch("apps.company_search.views.yf.Ticker")
+    # Each test defines its own upstream data; drop datasets snapshotted by earlier tests
+    snapshot.invalidate('AAPL')
     # Setup a default valid ticker instance
     instance = mock.return_value
     instance.info = {
@@ -279,6 +282,23 @@ class TestHistoricalData:
         assert response.status_code == 200
         assert response.data['count'] == 1
 
+    def test_chart_historical_columnar(self, client, mock_ticker):
+        dates = pd.to_datetime(['2023-01-02', '2023-01-03'])
+        mock_ticker.return_value.history.return_value = pd.DataFrame({
+            'Close': [100.0, 101.0], 'Open': [90.0, 95.0], 'High': [110.0, 111.0],
+            'Low': [80.0, 81.0], 'Volume': [1000, 1100]
+        }, index=dates)
+
+        url = reverse('company_search:chart-historical-data', kwargs={'symbol': 'AAPL'})
+        response = client.get(url, {'format': 'columnar', 'timestamps': 'delta'})
+        assert response.status_code == 200
+        assert response.data['format'] == 'columnar'
+        assert response.data['count'] == 2
+        data = response.data['data']
+        assert data['close'] == [100.0, 101.0]
+        assert data['volume'] == [1000, 1100]
+        assert data['timestamps'][1] == 86400000
+
     def test_financial_metrics_chart_success(self, client, mock_ticker):
         # Use DatetimeIndex so .strftime works in the view; align columns across frames
         dates = pd.to_datetime(['2023-01-01', '2024-01-01'])
@@ -328,6 +348,23 @@ class TestHistoricalData:
         assert response.status_code == 200
         assert 'sma_20' in response.data['indicators']
 
+    def test_technical_indicators_volatility_and_offsets(self, client, mock_ticker):
+        dates = pd.date_range(start='2023-01-01', periods=60)
+        close = np.linspace(100, 160, 60)
+        df = pd.DataFrame({
+            'Close': close, 'High': close + 1, 'Low': close - 1, 'Volume': np.full(60, 1000.0)
+        }, index=dates)
+        mock_ticker.return_value.history.return_value = df
+
+        url = reverse('company_search:technical-indicators', kwargs={'symbol': 'AAPL'})
+        response = client.get(url, {'indicators': 'bollinger,atr,vwap'})
+        assert response.status_code == 200
+        data = response.data['indicators']
+        offsets = response.data['metadata']['indicator_offsets']
+        assert offsets['bollinger_upper'] == 19 and len(data['bollinger_upper']) == 41
+        assert offsets['atr_14'] == 14
+        assert offsets['vwap'] == 0 and len(data['vwap']) == 60
+
 
 # -----------------------------------------------------------------------------
 # 6. PEER ANALYSIS
@@ -7,6 +7,9 @@ urlpatterns = [
     # Search endpoints
     path('search/', views.SearchCompanyView.as_view(), name='search-company'),
     
+    # Many symbols at once - must come before company/<symbol>/
+    path('company/batch/', views.BatchQuoteView.as_view(), name='batch-quotes'),
+
     # Comprehensive financial data - main endpoint
     path('company/<str:symbol>/', views.ComprehensiveFinancialDataView.as_view(), name='company-financial-data'),
     
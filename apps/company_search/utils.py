@@ -3,7 +3,10 @@ import math
 import logging
 from decimal import Decimal
 from datetime import date, datetime
-from typing import Any, Union, Dict, List
+from typing import Any, Union, Dict, List, Iterable
+
+import numpy as np
+import pandas as pd
 
 logger = logging.getLogger(__name__)
 
@@ -31,8 +34,15 @@ class SafeJSONEncoder(json.JSONEncoder):
             Sanitized object safe for JSON serialization
         """
         try:
-            if obj is None:
-                return None
+            kind = type(obj)
+            # Exact-type checks first: these cover nearly every value in a response
+            if obj is None or kind is str or kind is int or kind is bool:
+                return obj
+            elif kind is float:
+                return None if math.isnan(obj) or math.isinf(obj) else obj
+            elif kind is CleanData or kind is CleanList:
+                # Leaves are already sanitized; only None fields and non-str keys may remain
+                return _finish_clean(obj)
             elif isinstance(obj, (bool, int, str)):
                 return obj
             elif isinstance(obj, float):
@@ -69,6 +79,67 @@ class SafeJSONEncoder(json.JSONEncoder):
             return None
 
 
+class CleanData(dict):
+    """A dict that clean_financial_data has already sanitized"""
+    # Whether a dict at or below holds a None value or a non-str key (which
+    # the encoder drops / stringifies); unknown, so assumed, unless
+    # clean_financial_data worked it out
+    unfinished = True
+
+
+class CleanList(list):
+    """A list that clean_financial_data has already sanitized"""
+    unfinished = True
+
+
+def _is_unfinished(values: Any, keys: Any = None) -> bool:
+    if keys is not None and (None in values or any(type(key) is not str for key in keys)):
+        return True
+    return any(value.unfinished for value in values if type(value) is CleanData or type(value) is CleanList)
+
+
+def _finish_clean(data: Any) -> Any:
+    """
+    Drop None-valued dict entries and stringify keys, as SafeJSONEncoder.sanitize
+    does, in sanitized data; only containers are visited, and only those that need it
+    """
+    if not getattr(data, 'unfinished', True):
+        return data
+    if isinstance(data, dict):
+        return {
+            key if type(key) is str else str(key): _finish_clean(value)
+            for key, value in data.items() if value is not None
+        }
+    if isinstance(data, (list, tuple)):
+        return [_finish_clean(item) for item in data]
+    return data
+
+
+def mark_clean(data: Any) -> Any:
+    """
+    Mark sanitized data so later clean_financial_data passes (nested
+    cleaning in the view, the renderer) return it without walking it again
+    
+    Args:
+        data: Data that is already free of NaN/Inf and non-JSON types
+        
+    Returns:
+        The same data as CleanData/CleanList (other values unchanged)
+    """
+    if isinstance(data, (CleanData, CleanList)):
+        return data
+    if isinstance(data, dict):
+        return CleanData(data)
+    if isinstance(data, list):
+        return CleanList(data)
+    return data
+
+
+def is_clean(data: Any) -> bool:
+    """Whether data was produced (or marked) by clean_financial_data"""
+    return isinstance(data, (CleanData, CleanList))
+
+
 def clean_financial_data(data: Any) -> Any:
     """
     Recursively clean financial data by replacing NaN/Inf values with None
@@ -77,11 +148,20 @@ def clean_financial_data(data: Any) -> Any:
         data: Financial data to clean (can be dict, list, or primitive)
         
     Returns:
-        Cleaned data with NaN/Inf values replaced by None
+        Cleaned data with NaN/Inf values replaced by None; dicts and lists
+        come back marked clean, so cleaning them again is free
     """
     try:
-        if data is None:
-            return None
+        kind = type(data)
+        # Exact-type checks first: these cover nearly every value in a response
+        if data is None or kind is str or kind is int or kind is bool:
+            return data
+        elif kind is float:
+            if math.isnan(data) or math.isinf(data):
+                return None
+            return data
+        elif kind is CleanData or kind is CleanList:
+            return data
         elif isinstance(data, (bool, int, str)):
             return data
         elif isinstance(data, float):
@@ -93,13 +173,17 @@ def clean_financial_data(data: Any) -> Any:
         elif isinstance(data, (date, datetime)):
             return data.isoformat()
         elif isinstance(data, dict):
-            return {
-                key: clean_financial_data(value) 
+            cleaned = CleanData(
+                (key, clean_financial_data(value))
                 for key, value in data.items() 
                 if value is not None  # Remove None values to reduce payload size
-            }
+            )
+            cleaned.unfinished = _is_unfinished(cleaned.values(), cleaned.keys())
+            return cleaned
         elif isinstance(data, (list, tuple, set)):
-            return [clean_financial_data(item) for item in data]
+            cleaned = CleanList(clean_financial_data(item) for item in data)
+            cleaned.unfinished = _is_unfinished(cleaned)
+            return cleaned
         else:
             # For other types, try to convert to string or return as-is
             try:
@@ -112,6 +196,97 @@ def clean_financial_data(data: Any) -> Any:
         return None
 
 
+# Marks original None values, which clean_financial_data drops from records
+_DROPPED = object()
+
+
+def _isoformat(index: Any) -> List[Any]:
+    """Timestamp.isoformat() for a whole DatetimeIndex (NaT -> None)"""
+    missing = index.isna()
+    wall = index.tz_localize(None) if index.tz is not None else index
+    wall_values = wall.values.astype('datetime64[ns]')
+    if (wall_values[~missing].astype(np.int64) % 1_000_000_000).any():
+        # Sub-second timestamps: rare enough to format one by one
+        return [None if value is pd.NaT else value.isoformat() for value in index]
+    text = np.datetime_as_string(wall_values, unit='s')
+    if index.tz is not None:
+        utc = index.tz_convert('UTC').tz_localize(None).values.astype('datetime64[ns]')
+        offsets = (wall_values - utc).astype('timedelta64[m]').astype(np.int64)
+        offsets[missing] = 0
+        # Few distinct offsets (DST), so format each once
+        unique, inverse = np.unique(offsets, return_inverse=True)
+        labels = np.array([
+            f"{'-' if minutes < 0 else '+'}{abs(minutes) // 60:02d}:{abs(minutes) % 60:02d}" for minutes in unique
+        ])
+        text = np.char.add(text, labels[inverse])
+    result = text.tolist()
+    if missing.any():
+        for position in np.flatnonzero(missing):
+            result[position] = None
+    return result
+
+
+def _clean_column(values: np.ndarray) -> List[Any]:
+    """One DataFrame column as JSON-ready Python values"""
+    kind = values.dtype.kind
+    if kind == 'f':
+        values = np.where(np.isinf(values), np.nan, values)
+        out = values.astype(object)
+        out[np.isnan(values)] = None
+        return out.tolist()
+    if kind in 'iub':
+        return values.tolist()
+    if kind == 'M':
+        return _isoformat(pd.DatetimeIndex(values))
+    if kind == 'O':
+        return [_DROPPED if value is None else clean_financial_data(value) for value in values.tolist()]
+    return [clean_financial_data(value) for value in values.astype(object).tolist()]
+
+
+def frame_to_records(frame: Any) -> List[Dict[str, Any]]:
+    """
+    Convert a DataFrame to cleaned records in one pass
+    
+    Equivalent to clean_financial_data(frame.to_dict('records')), but NaN/Inf
+    and dates are handled per column with numpy instead of per value, and
+    the result is marked clean.
+    
+    Args:
+        frame: DataFrame (call reset_index() first to keep the index)
+        
+    Returns:
+        List of dicts, one per row
+    """
+    columns = list(frame.columns)
+    cleaned = []
+    for position in range(len(columns)):
+        column = frame.iloc[:, position]
+        if isinstance(column.dtype, pd.DatetimeTZDtype):
+            cleaned.append(_isoformat(pd.DatetimeIndex(column)))
+        else:
+            cleaned.append(_clean_column(column.to_numpy()))
+    has_dropped = any(
+        frame.iloc[:, position].dtype == object for position in range(len(columns))
+    )
+    if has_dropped:
+        records = [
+            CleanData((key, value) for key, value in zip(columns, row) if value is not _DROPPED)
+            for row in zip(*cleaned)
+        ]
+    else:
+        records = [CleanData(zip(columns, row)) for row in zip(*cleaned)]
+    str_columns = all(type(column) is str for column in columns)
+    for record in records:
+        # Only object columns can hold nested containers
+        if has_dropped:
+            record.unfinished = _is_unfinished(record.values(), record.keys())
+        else:
+            record.unfinished = not str_columns or None in record.values()
+    result = CleanList(records)
+    result.unfinished = _is_unfinished(records)
+    return result
+
+
 def safe_json_dumps(obj: Any, **kwargs) -> str:
     """
     Safely convert Python object to JSON string
@@ -220,6 +395,56 @@ def validate_financial_value(value: Any) -> Union[float, None]:
         return None
 
 
+
+def column_to_list(values: Any, integer: bool = False) -> List[Any]:
+    """
+    Convert a numeric column to a JSON-ready list without a per-item loop
+    
+    Args:
+        values: Array-like of numbers (pandas Series, numpy array, list)
+        integer: Emit ints instead of floats (e.g. volumes)
+        
+    Returns:
+        List of numbers with NaN/Inf replaced by None
+    """
+    array = np.asarray(values, dtype=np.float64)
+    finite = np.isfinite(array)
+    if finite.all():
+        return array.astype(np.int64).tolist() if integer else array.tolist()
+    out = (np.where(finite, array, 0).astype(np.int64) if integer else array).astype(object)
+    out[~finite] = None
+    return out.tolist()
+
+
+def frame_to_columns(frame: Any,
+                     columns: Iterable[str] = ('Open', 'High', 'Low', 'Close', 'Volume'),
+                     delta_timestamps: bool = False) -> Dict[str, Any]:
+    """
+    Convert an OHLCV DataFrame into parallel arrays for charting
+    
+    Args:
+        frame: DataFrame with a DatetimeIndex (e.g. from Ticker.history)
+        columns: Provider columns to include; missing ones are skipped
+        delta_timestamps: Encode timestamps as the first value followed by
+            the difference to the previous bar (all in milliseconds)
+        
+    Returns:
+        Dict with 'timestamps', 'timestamp_encoding' and one lower-case
+        list per column, all aligned index-for-index
+    """
+    # .values is UTC for tz-aware indexes; the cast handles any datetime64 unit
+    timestamps = frame.index.values.astype('datetime64[ms]').astype(np.int64)
+    if delta_timestamps and len(timestamps):
+        timestamps = np.concatenate((timestamps[:1], np.diff(timestamps)))
+    result = {
+        'timestamps': timestamps.tolist(),
+        'timestamp_encoding': 'delta' if delta_timestamps else 'absolute',
+    }
+    for column in columns:
+        if column in frame.columns:
+            result[column.lower()] = column_to_list(frame[column].to_numpy(), integer=column == 'Volume')
+    return result
+
 # Example usage and testing
 if __name__ == "__main__":
     # Test data with problematic values
@@ -17,7 +17,13 @@ from .serializers import (
     BalanceSheetSerializer, IncomeStatementSerializer, CashFlowSerializer,
     StockPriceSerializer, CompanyInfoSerializer
 )
-from .utils import clean_financial_data
+from .renderers import PayloadFormatNegotiation
+from .utils import clean_financial_data, frame_to_columns, frame_to_records
+from . import batch, single_flight
+from . import indicators as technical
+from . import ohlcv
+from . import peers as peer_fetcher
+from .snapshot import TickerSnapshot
 
 # Set up logger
 logger = logging.getLogger(__name__)
@@ -395,7 +401,7 @@ class ComprehensiveFinancialDataView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            ticker = yf.Ticker(symbol)
+            ticker = TickerSnapshot(symbol)
             info = ticker.info
             
             if not info:
@@ -426,10 +432,11 @@ class ComprehensiveFinancialDataView(APIView):
                 'balance_sheet': balance_sheet,
                 'income_statement': income_statement,
                 'cash_flow': cash_flow,
-                'recommendations': clean_financial_data(recommendations),
-                'historical_data': clean_financial_data(historical_data),
-                'earnings_dates': clean_financial_data(earnings_dates),
-                'options_chain': clean_financial_data(options_chain),
+                # Already cleaned (and marked clean) by the helpers below
+                'recommendations': recommendations,
+                'historical_data': historical_data,
+                'earnings_dates': earnings_dates,
+                'options_chain': options_chain,
                 'metadata': {
                     'symbol': symbol,
                     'last_updated': timezone.now().isoformat(),
@@ -438,7 +445,7 @@ class ComprehensiveFinancialDataView(APIView):
                 }
             }
             
-            # Clean the entire response data
+            # Clean the entire response data; the pre-cleaned sections are skipped
             cleaned_response = clean_financial_data(response_data)
             
             # Cache for 1 hour (3600 seconds)
@@ -471,8 +478,7 @@ class ComprehensiveFinancialDataView(APIView):
         try:
             recommendations = ticker.recommendations
             if recommendations is not None and not recommendations.empty:
-                data = recommendations.tail(10).reset_index().to_dict('records')
-                return clean_financial_data(data)
+                return frame_to_records(recommendations.tail(10).reset_index())
             return []
         except Exception as e:
             logger.warning(f"Error getting recommendations: {str(e)}")
@@ -482,8 +488,7 @@ class ComprehensiveFinancialDataView(APIView):
         try:
             hist = ticker.history(period=period)
             if hist is not None and not hist.empty:
-                data = hist.reset_index().to_dict('records')
-                return clean_financial_data(data)
+                return frame_to_records(hist.reset_index())
             return []
         except Exception as e:
             logger.warning(f"Error getting historical data: {str(e)}")
@@ -493,8 +498,7 @@ class ComprehensiveFinancialDataView(APIView):
         try:
             earnings = ticker.earnings_dates
             if earnings is not None and not earnings.empty:
-                data = earnings.tail(8).reset_index().to_dict('records')
-                return clean_financial_data(data)
+                return frame_to_records(earnings.tail(8).reset_index())
             return []
         except Exception as e:
             logger.warning(f"Error getting earnings dates: {str(e)}")
@@ -507,8 +511,8 @@ class ComprehensiveFinancialDataView(APIView):
                 exp_date = options[0]
                 opt_chain = ticker.option_chain(exp_date)
                 data = {
-                    'calls': opt_chain.calls.head(5).to_dict('records'),
-                    'puts': opt_chain.puts.head(5).to_dict('records'),
+                    'calls': frame_to_records(opt_chain.calls.head(5)),
+                    'puts': frame_to_records(opt_chain.puts.head(5)),
                     'expiration_date': exp_date
                 }
                 return clean_financial_data(data)
@@ -592,7 +596,7 @@ class BalanceSheetView(APIView):
         
         try:
             symbol = symbol.upper().strip()
-            ticker = yf.Ticker(symbol)
+            ticker = TickerSnapshot(symbol)
             info = ticker.info
             
             if not info:
@@ -638,7 +642,7 @@ class IncomeStatementView(APIView):
         
         try:
             symbol = symbol.upper().strip()
-            ticker = yf.Ticker(symbol)
+            ticker = TickerSnapshot(symbol)
             info = ticker.info
             
             if not info:
@@ -684,7 +688,7 @@ class CashFlowView(APIView):
         
         try:
             symbol = symbol.upper().strip()
-            ticker = yf.Ticker(symbol)
+            ticker = TickerSnapshot(symbol)
             info = ticker.info
             
             if not info:
@@ -742,7 +746,7 @@ class IndividualStatementView(APIView):
         
         try:
             symbol = symbol.upper().strip()
-            ticker = yf.Ticker(symbol)
+            ticker = TickerSnapshot(symbol)
             info = ticker.info
             
             if not info:
@@ -781,30 +785,33 @@ class IndividualStatementView(APIView):
 class StockPriceView(APIView):
     def get(self, request, symbol):
         cache_key = f"stock_price_{symbol}"
-        cached_data = cache.get(cache_key)
-        
-        if cached_data:
-            return Response(cached_data)
-        
+
         try:
             symbol = symbol.upper().strip()
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
-            
-            if not info:
+
+            def build(info):
+                if not info:
+                    return None
+                service = FinancialDataService()
+                stock_data = service.get_stock_price_data(info, symbol)
+                return dict(StockPriceSerializer(stock_data).data)
+
+            # Past the soft TTL the last price is served (is_stale) while a fresh
+            # quote is downloaded in the background
+            data, cache_meta = single_flight.get_stale_while_revalidate(
+                cache_key,
+                lambda: build(TickerSnapshot(symbol).info),
+                *single_flight.swr_ttls('quote'),
+                refresh=lambda: build(TickerSnapshot(symbol).reload('quote')),
+            )
+
+            if data is None:
                 return Response(
                     {"error": f"Company with symbol '{symbol}' not found"}, 
                     status=status.HTTP_404_NOT_FOUND
                 )
-            
-            service = FinancialDataService()
-            stock_data = service.get_stock_price_data(info, symbol)
-            serializer = StockPriceSerializer(stock_data)
-            
-            # Cache for 5 minutes (300 seconds) - stock prices change frequently
-            cache.set(cache_key, serializer.data, 300)
-            
-            return Response(serializer.data)
+
+            return Response({**data, 'cache': cache_meta})
             
         except Exception as e:
             logger.error(f"Error fetching stock price for {symbol}: {str(e)}")
@@ -814,6 +821,44 @@ class StockPriceView(APIView):
             )
 
 
+class BatchQuoteView(APIView):
+    """Quotes and fundamentals for many symbols in one request, as columns"""
+
+    def get(self, request):
+        symbols, rejected = batch.parse_symbols(request.GET.get('symbols', ''))
+        fields, unknown = batch.parse_fields(request.GET.get('fields', ''))
+
+        if not symbols:
+            return Response(
+                {"error": "Query parameter 'symbols' is required (comma separated)"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(symbols) > batch.MAX_SYMBOLS:
+            return Response(
+                {"error": f"At most {batch.MAX_SYMBOLS} symbols per request"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if unknown:
+            return Response(
+                {"error": f"Unknown fields: {', '.join(unknown)}. Valid fields: {', '.join(batch.VALID_FIELDS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            result = batch.get_batch(symbols, fields)
+            if rejected:
+                result['rejected_symbols'] = rejected
+            result['metadata']['last_updated'] = timezone.now().isoformat()
+            return Response(result)
+
+        except Exception as e:
+            logger.error(f"Error fetching batch quotes for {len(symbols)} symbols: {str(e)}")
+            return Response(
+                {"error": f"Error fetching batch quotes: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
 class CompanyInfoView(APIView):
     def get(self, request, symbol):
         cache_key = f"company_info_{symbol}"
@@ -824,8 +869,8 @@ class CompanyInfoView(APIView):
         
         try:
             symbol = symbol.upper().strip()
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
+            ticker = TickerSnapshot(symbol)
+            info = ticker.profile
             
             if not info:
                 return Response(
@@ -889,21 +934,18 @@ class HistoricalDataView(APIView):
             )
         
         cache_key = f"historical_data_{symbol}_{period}_{interval}"
-        cached_data = cache.get(cache_key)
-        
-        if cached_data:
-            return Response(cached_data)
-        
+
         try:
             symbol = symbol.upper().strip()
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(period=period, interval=interval)
-            
-            if hist is not None and not hist.empty:
-                historical_data = hist.reset_index().to_dict('records')
-                cleaned_data = clean_financial_data(historical_data)
-                
-                response_data = {
+
+            def fetch():
+                hist = ohlcv.get_history(symbol, period, interval)
+                if hist is None or hist.empty:
+                    return None
+
+                cleaned_data = frame_to_records(hist.reset_index())
+
+                return {
                     'symbol': symbol,
                     'period': period,
                     'interval': interval,
@@ -911,10 +953,11 @@ class HistoricalDataView(APIView):
                     'data': cleaned_data,
                     'last_updated': timezone.now().isoformat()
                 }
-                
-                # Cache for 1 hour
-                cache.set(cache_key, response_data, 3600)
-                
+
+            # Cache for 1 hour; concurrent misses share one download
+            response_data = single_flight.get_or_fetch(cache_key, fetch, 3600)
+
+            if response_data is not None:
                 return Response(response_data)
             else:
                 return Response({
@@ -1015,84 +1058,84 @@ class MarketSummaryView(APIView):
     
     def get(self, request):
         cache_key = "market_summary"
-        cached_data = cache.get(cache_key)
-        
-        if cached_data:
-            return Response(cached_data)
-        
+
         try:
-            # Major US indices
-            indices = {
-                '^GSPC': 'S&P 500',
-                '^DJI': 'Dow Jones Industrial Average', 
-                '^IXIC': 'NASDAQ Composite',
-                '^RUT': 'Russell 2000',
-                '^VIX': 'CBOE Volatility Index'
-            }
+            def fetch():
+                # Major US indices
+                indices = {
+                    '^GSPC': 'S&P 500',
+                    '^DJI': 'Dow Jones Industrial Average', 
+                    '^IXIC': 'NASDAQ Composite',
+                    '^RUT': 'Russell 2000',
+                    '^VIX': 'CBOE Volatility Index'
+                }
             
-            summary = {}
+                summary = {}
             
-            for symbol, name in indices.items():
-                try:
-                    ticker = yf.Ticker(symbol)
-                    info = ticker.info
-                    hist = ticker.history(period='1d')
+                for symbol, name in indices.items():
+                    try:
+                        ticker = yf.Ticker(symbol)
+                        info = ticker.info
+                        hist = ticker.history(period='1d')
                     
-                    if info and not hist.empty:
-                        current_price = FinancialDataService.safe_float(info.get('regularMarketPrice'))
-                        previous_close = FinancialDataService.safe_float(info.get('previousClose'))
+                        if info and not hist.empty:
+                            current_price = FinancialDataService.safe_float(info.get('regularMarketPrice'))
+                            previous_close = FinancialDataService.safe_float(info.get('previousClose'))
                         
-                        if current_price and previous_close:
-                            change = current_price - previous_close
-                            change_percent = (change / previous_close) * 100
+                            if current_price and previous_close:
+                                change = current_price - previous_close
+                                change_percent = (change / previous_close) * 100
+                            else:
+                                change = None
+                                change_percent = None
+                        
+                            summary[symbol] = {
+                                'name': name,
+                                'symbol': symbol,
+                                'current_price': current_price,
+                                'previous_close': previous_close,
+                                'change': change,
+                                'change_percent': change_percent,
+                                'day_high': FinancialDataService.safe_float(info.get('dayHigh')),
+                                'day_low': FinancialDataService.safe_float(info.get('dayLow')),
+                                'volume': FinancialDataService.safe_float(info.get('volume')),
+                            }
                         else:
-                            change = None
-                            change_percent = None
+                            summary[symbol] = {
+                                'name': name,
+                                'symbol': symbol,
+                                'error': 'Data not available'
+                            }
                         
+                    except Exception as e:
+                        logger.warning(f"Error fetching data for {symbol}: {str(e)}")
                         summary[symbol] = {
                             'name': name,
                             'symbol': symbol,
-                            'current_price': current_price,
-                            'previous_close': previous_close,
-                            'change': change,
-                            'change_percent': change_percent,
-                            'day_high': FinancialDataService.safe_float(info.get('dayHigh')),
-                            'day_low': FinancialDataService.safe_float(info.get('dayLow')),
-                            'volume': FinancialDataService.safe_float(info.get('volume')),
+                            'error': f'Failed to fetch data: {str(e)}'
                         }
-                    else:
-                        summary[symbol] = {
-                            'name': name,
-                            'symbol': symbol,
-                            'error': 'Data not available'
-                        }
-                        
-                except Exception as e:
-                    logger.warning(f"Error fetching data for {symbol}: {str(e)}")
-                    summary[symbol] = {
-                        'name': name,
-                        'symbol': symbol,
-                        'error': f'Failed to fetch data: {str(e)}'
-                    }
             
-            # Add some market metadata
-            response_data = {
-                'summary': summary,
-                'last_updated': timezone.now().isoformat(),
-                'market_status': self.get_market_status(),
-                'metadata': {
-                    'data_source': 'yfinance',
-                    'indices_count': len(summary)
+                # Add some market metadata
+                response_data = {
+                    'summary': summary,
+                    'last_updated': timezone.now().isoformat(),
+                    'market_status': self.get_market_status(),
+                    'metadata': {
+                        'data_source': 'yfinance',
+                        'indices_count': len(summary)
+                    }
                 }
-            }
-            
-            # Clean the data
-            cleaned_data = clean_financial_data(response_data)
             
-            # Cache for 5 minutes (market data changes frequently)
-            cache.set(cache_key, cleaned_data, 300)
-            
-            return Response(cleaned_data)
+                # Clean the data
+                return clean_financial_data(response_data)
+
+            # Fresh for 5 minutes (market data changes frequently), then served
+            # as stale while it is refreshed in the background
+            cleaned_data, cache_meta = single_flight.get_stale_while_revalidate(
+                cache_key, fetch, *single_flight.swr_ttls('market_summary')
+            )
+
+            return Response({**cleaned_data, 'cache': cache_meta})
             
         except Exception as e:
             logger.error(f"Error fetching market summary: {str(e)}")
@@ -1377,12 +1420,10 @@ class QuarterlyResultsView(APIView):
     def get(self, request, symbol):
         try:
             symbol = symbol.upper().strip()
-            ticker = yf.Ticker(symbol)
+            ticker = TickerSnapshot(symbol)
             
             # Get quarterly financials
             quarterly_income = ticker.quarterly_financials
-            quarterly_balance = ticker.quarterly_balance_sheet
-            quarterly_cashflow = ticker.quarterly_cashflow
             
             quarters = []
             
@@ -1424,7 +1465,7 @@ class FinancialRatiosView(APIView):
         
         try:
             symbol = symbol.upper().strip()
-            ticker = yf.Ticker(symbol)
+            ticker = TickerSnapshot(symbol)
             info = ticker.info
             
             if not info:
@@ -1480,7 +1521,7 @@ class CompanyAnalysisView(APIView):
         
         try:
             symbol = symbol.upper().strip()
-            ticker = yf.Ticker(symbol)
+            ticker = TickerSnapshot(symbol)
             info = ticker.info
             
             if not info:
@@ -1490,7 +1531,7 @@ class CompanyAnalysisView(APIView):
                 )
             
             # Get all financial data
-            comprehensive_data = self.get_comprehensive_data(symbol)
+            comprehensive_data = self.get_comprehensive_data(symbol, ticker)
             
             if comprehensive_data.get('error'):
                 return Response(
@@ -1524,10 +1565,11 @@ class CompanyAnalysisView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
-    def get_comprehensive_data(self, symbol):
+    def get_comprehensive_data(self, symbol, ticker=None):
         """Get all required data for analysis"""
         try:
-            ticker = yf.Ticker(symbol)
+            if ticker is None:
+                ticker = TickerSnapshot(symbol)
             info = ticker.info
             
             service = FinancialDataService()
@@ -1697,12 +1739,17 @@ class CompanyAnalysisView(APIView):
 class ChartHistoricalDataView(APIView):
     """
     Enhanced historical data endpoint specifically for charts
-    Returns formatted data ready for chart rendering
+    Returns formatted data ready for chart rendering; ?format=columnar returns
+    parallel arrays instead of one object per bar (&timestamps=delta to
+    delta-encode the timestamps)
     """
+    content_negotiation_class = PayloadFormatNegotiation
     
     def get(self, request, symbol):
         period = request.GET.get('period', '1y')
         interval = request.GET.get('interval', '1d')
+        columnar = request.GET.get('format') == 'columnar'
+        delta_timestamps = columnar and request.GET.get('timestamps') == 'delta'
         
         # Validate period and interval
         valid_periods = ['1d', '5d', '1mo', '3mo', '6mo', '1y', '2y', '5y', '10y', 'ytd', 'max']
@@ -1721,39 +1768,48 @@ class ChartHistoricalDataView(APIView):
             )
         
         cache_key = f"chart_historical_{symbol}_{period}_{interval}"
-        cached_data = cache.get(cache_key)
-        
-        if cached_data:
-            return Response(cached_data)
-        
+        if columnar:
+            cache_key += '_columnar_delta' if delta_timestamps else '_columnar'
+
         try:
             symbol = symbol.upper().strip()
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(period=period, interval=interval)
-            
-            if hist is not None and not hist.empty:
+
+            def fetch():
+                ticker = TickerSnapshot(symbol)
+                hist = ohlcv.get_history(symbol, period, interval)
+                if hist is None or hist.empty:
+                    return None
+
                 # Format data specifically for charts
-                chart_data = self.format_chart_data(hist, symbol)
-                
-                response_data = {
+                if columnar:
+                    chart_data = frame_to_columns(hist, delta_timestamps=delta_timestamps)
+                else:
+                    chart_data = self.format_chart_data(hist, symbol)
+
+                return {
                     'symbol': symbol,
                     'period': period,
                     'interval': interval,
-                    'count': len(chart_data),
+                    'format': 'columnar' if columnar else 'rows',
+                    'count': len(hist),
                     'data': chart_data,
                     'metadata': {
-                        'currency': ticker.info.get('currency', 'USD'),
+                        'currency': ticker.profile.get('currency', 'USD'),
                         'timezone': 'UTC',
                         'data_source': 'yfinance',
                         'last_updated': timezone.now().isoformat()
                     }
                 }
-                
-                # Cache for 15 minutes for intraday, 1 hour for longer periods
-                cache_time = 900 if interval in ['1m', '2m', '5m', '15m', '30m', '60m', '1h'] else 3600
-                cache.set(cache_key, response_data, cache_time)
-                
-                return Response(response_data)
+
+            # Fresh for 15 minutes for intraday, 1 hour for longer periods; older
+            # data is served as stale while it is refreshed in the background
+            data_class = 'chart_intraday' if interval in ['1m', '2m', '5m', '15m', '30m', '60m', '1h'] else 'chart'
+            response_data, cache_meta = single_flight.get_stale_while_revalidate(
+                cache_key, fetch, *single_flight.swr_ttls(data_class)
+            )
+
+            if response_data is not None:
+                return Response({**response_data, 'cache': cache_meta})
             else:
                 return Response({
                     'symbol': symbol,
@@ -1969,47 +2025,58 @@ class FinancialMetricsChartView(APIView):
     
 class TechnicalIndicatorsView(APIView):
     """
-    Calculate technical indicators for charts
+    Calculate technical indicators for charts; ?format=columnar returns
+    price_data as parallel arrays
     """
+    content_negotiation_class = PayloadFormatNegotiation
     
     def get(self, request, symbol):
         period = request.GET.get('period', '6mo')
         indicators = request.GET.get('indicators', 'sma,ema,rsi').split(',')
+        columnar = request.GET.get('format') == 'columnar'
         
         cache_key = f"technical_indicators_{symbol}_{period}_{'_'.join(indicators)}"
-        cached_data = cache.get(cache_key)
-        
-        if cached_data:
-            return Response(cached_data)
-        
+        if columnar:
+            cache_key += '_columnar'
+
         try:
             symbol = symbol.upper().strip()
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(period=period, interval='1d')
-            
-            if hist is None or hist.empty:
+
+            def fetch():
+                hist = ohlcv.get_history(symbol, period, '1d')
+                if hist is None or hist.empty:
+                    return None
+
+                # Calculate requested indicators
+                indicator_data = self.calculate_indicators(hist, indicators)
+
+                return {
+                    'symbol': symbol,
+                    'period': period,
+                    'price_data': (
+                        frame_to_columns(hist, columns=('Close', 'High', 'Low', 'Volume'))
+                        if columnar else self.format_price_data(hist)
+                    ),
+                    'indicators': indicator_data,
+                    'metadata': {
+                        # Index into price_data of each indicator's first value
+                        'indicator_offsets': {
+                            name: len(hist) - len(values) for name, values in indicator_data.items()
+                        },
+                        'last_updated': timezone.now().isoformat()
+                    }
+                }
+
+            # Cache for 1 hour
+            response_data = single_flight.get_or_fetch(cache_key, fetch, 3600)
+
+            if response_data is None:
                 return Response({
                     'symbol': symbol,
                     'indicators': [],
                     'message': 'No historical data available for technical analysis'
                 })
-            
-            # Calculate requested indicators
-            indicator_data = self.calculate_indicators(hist, indicators)
-            
-            response_data = {
-                'symbol': symbol,
-                'period': period,
-                'price_data': self.format_price_data(hist),
-                'indicators': indicator_data,
-                'metadata': {
-                    'last_updated': timezone.now().isoformat()
-                }
-            }
-            
-            # Cache for 1 hour
-            cache.set(cache_key, response_data, 3600)
-            
+
             return Response(response_data)
             
         except Exception as e:
@@ -2036,133 +2103,73 @@ class TechnicalIndicatorsView(APIView):
         return price_data
     
     def calculate_indicators(self, hist_data, indicators):
-        """Calculate technical indicators"""
-        indicator_data = {}
-        closes = hist_data['Close'].values
-        
-        for indicator in indicators:
-            if indicator == 'sma':
-                indicator_data['sma_20'] = self.calculate_sma(closes, 20)
-                indicator_data['sma_50'] = self.calculate_sma(closes, 50)
-            elif indicator == 'ema':
-                indicator_data['ema_12'] = self.calculate_ema(closes, 12)
-                indicator_data['ema_26'] = self.calculate_ema(closes, 26)
-            elif indicator == 'rsi':
-                indicator_data['rsi_14'] = self.calculate_rsi(closes, 14)
-            elif indicator == 'macd':
-                macd, signal = self.calculate_macd(closes)
-                indicator_data['macd'] = macd
-                indicator_data['macd_signal'] = signal
-        
-        return indicator_data
+        """Calculate technical indicators as compact lists (warm-up window dropped)"""
+        series = technical.compute(
+            hist_data['Close'].values,
+            [name.strip().lower() for name in indicators],
+            high=hist_data['High'].values if 'High' in hist_data else None,
+            low=hist_data['Low'].values if 'Low' in hist_data else None,
+            volume=hist_data['Volume'].values if 'Volume' in hist_data else None,
+        )
+        return {name: technical.trim(values) for name, values in series.items()}
     
     def calculate_sma(self, data, window):
         """Calculate Simple Moving Average"""
-        if len(data) < window:
-            return []
-        
-        sma = []
-        for i in range(len(data) - window + 1):
-            sma.append(float(np.mean(data[i:i+window])))
-        
-        return sma
+        return technical.trim(technical.sma(data, window))
     
     def calculate_ema(self, data, window):
         """Calculate Exponential Moving Average"""
-        if len(data) < window:
-            return []
-        
-        try:
-            import pandas as pd
-            series = pd.Series(data)
-            ema = series.ewm(span=window, adjust=False).mean().tolist()
-            return [float(x) for x in ema[window-1:]]
-        except:
-            # Fallback calculation
-            ema = []
-            multiplier = 2 / (window + 1)
-            ema.append(float(data[0]))
-            
-            for i in range(1, len(data)):
-                ema.append(float(data[i] * multiplier + ema[i-1] * (1 - multiplier)))
-            
-            return ema[window-1:]
+        return technical.trim(technical.ema(data, window))
     
     def calculate_rsi(self, data, window=14):
-        """Calculate Relative Strength Index"""
-        if len(data) <= window:
-            return []
-        
-        deltas = np.diff(data)
-        gains = np.where(deltas > 0, deltas, 0)
-        losses = np.where(deltas < 0, -deltas, 0)
-        
-        avg_gains = np.convolve(gains, np.ones(window)/window, mode='valid')
-        avg_losses = np.convolve(losses, np.ones(window)/window, mode='valid')
-        
-        rs = avg_gains / avg_losses
-        rsi = 100 - (100 / (1 + rs))
-        
-        return [float(x) for x in rsi]
+        """Calculate Relative Strength Index (Wilder smoothing)"""
+        return technical.trim(technical.rsi(data, window))
     
     def calculate_macd(self, data):
         """Calculate MACD"""
-        if len(data) < 26:
-            return [], []
-        
-        ema_12 = self.calculate_ema(data, 12)
-        ema_26 = self.calculate_ema(data, 26)
-        
-        # Align lengths
-        min_len = min(len(ema_12), len(ema_26))
-        ema_12 = ema_12[-min_len:]
-        ema_26 = ema_26[-min_len:]
-        
-        macd = [ema_12[i] - ema_26[i] for i in range(min_len)]
-        signal = self.calculate_ema(macd, 9) if len(macd) >= 9 else []
-        
-        return macd, signal
+        macd, signal, _ = technical.macd(data)
+        return technical.trim(macd), technical.trim(signal)
+
 
 class PeerAnalysisView(APIView):
     """Get peer companies and comparative analysis"""
     
     def get(self, request, symbol):
         cache_key = f"peer_analysis_{symbol}"
-        cached_data = cache.get(cache_key)
-        
-        if cached_data:
-            return Response(cached_data)
-        
+
         try:
             symbol = symbol.upper().strip()
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
-            
-            if not info:
+
+            def fetch():
+                info = TickerSnapshot(symbol).info
+                if not info:
+                    return None
+
+                # Get peer companies dynamically from Yahoo Finance
+                peers = self.get_dynamic_peers(symbol, info)
+
+                # Get comparative analysis
+                comparative_analysis = self.get_comparative_analysis(symbol, peers)
+
+                return {
+                    'symbol': symbol,
+                    'company_name': info.get('longName', info.get('shortName', 'N/A')),
+                    'sector': info.get('sector', 'N/A'),
+                    'industry': info.get('industry', 'N/A'),
+                    'peers': peers,
+                    'comparative_analysis': comparative_analysis,
+                    'last_updated': timezone.now().isoformat()
+                }
+
+            # Cache for 2 hours; a peer set fans out to many tickers, so never fetch it twice at once
+            response_data = single_flight.get_or_fetch(cache_key, fetch, 7200)
+
+            if response_data is None:
                 return Response(
                     {"error": f"Company with symbol '{symbol}' not found"}, 
                     status=status.HTTP_404_NOT_FOUND
                 )
-            
-            # Get peer companies dynamically from Yahoo Finance
-            peers = self.get_dynamic_peers(symbol, info)
-            
-            # Get comparative analysis
-            comparative_analysis = self.get_comparative_analysis(symbol, peers)
-            
-            response_data = {
-                'symbol': symbol,
-                'company_name': info.get('longName', info.get('shortName', 'N/A')),
-                'sector': info.get('sector', 'N/A'),
-                'industry': info.get('industry', 'N/A'),
-                'peers': peers,
-                'comparative_analysis': comparative_analysis,
-                'last_updated': timezone.now().isoformat()
-            }
-            
-            # Cache for 2 hours
-            cache.set(cache_key, response_data, 7200)
-            
+
             return Response(response_data)
             
         except Exception as e:
@@ -2190,35 +2197,18 @@ class PeerAnalysisView(APIView):
             if not yf_peers:
                 yf_peers = self.get_enhanced_sector_peers(info.get('sector'), symbol)
             
-            # Limit to top 6 peers for performance
+            # Limit to top 6 peers for performance; fetched concurrently, rate limited per upstream call
             peer_symbols = yf_peers[:6] if yf_peers else []
-            
-            # Fetch detailed data for each peer
-            for peer_symbol in peer_symbols:
-                try:
-                    peer_data = self.get_peer_data(peer_symbol)
-                    if peer_data:
-                        peers.append(peer_data)
-                        # Small delay to avoid rate limiting
-                        time.sleep(0.2)
-                except Exception as e:
-                    logger.warning(f"Error fetching data for peer {peer_symbol}: {str(e)}")
-                    continue
+            peers = peer_fetcher.fetch_peers(peer_symbols, self.get_peer_data)
             
             # If we still don't have enough peers, add some popular ones from the same sector
             if len(peers) < 4:
-                additional_peers = self.get_popular_sector_peers(info.get('sector'), symbol)
-                for peer_symbol in additional_peers:
-                    if len(peers) >= 6:
-                        break
-                    if peer_symbol not in [p['symbol'] for p in peers]:
-                        try:
-                            peer_data = self.get_peer_data(peer_symbol)
-                            if peer_data:
-                                peers.append(peer_data)
-                                time.sleep(0.2)
-                        except Exception:
-                            continue
+                seen = {p['symbol'] for p in peers}
+                additional_peers = [
+                    s for s in self.get_popular_sector_peers(info.get('sector'), symbol) if s not in seen
+                ]
+                # Stop as soon as we have 6 instead of waiting for every candidate
+                peers += peer_fetcher.fetch_peers(additional_peers, self.get_peer_data, limit=6 - len(peers))
                     
         except Exception as e:
             logger.error(f"Error getting dynamic peers for {symbol}: {str(e)}")
@@ -2230,8 +2220,7 @@ class PeerAnalysisView(APIView):
     def get_peer_data(self, symbol):
         """Get detailed data for a peer company"""
         try:
-            peer_ticker = yf.Ticker(symbol)
-            peer_info = peer_ticker.info
+            peer_info = TickerSnapshot(symbol).info
             
             if not peer_info or not peer_info.get('symbol'):
                 return None
@@ -2324,8 +2313,7 @@ class PeerAnalysisView(APIView):
     def get_comparative_analysis(self, symbol, peers):
         """Generate comparative analysis between company and peers"""
         try:
-            main_ticker = yf.Ticker(symbol)
-            main_info = main_ticker.info
+            main_info = TickerSnapshot(symbol).info
             
             analysis = {
                 'valuation_metrics': self.compare_valuation(main_info, peers),
@@ -2451,8 +2439,7 @@ class CustomPeerSearchView(APIView):
                 )
             
             # Get main company data
-            main_ticker = yf.Ticker(symbol)
-            main_info = main_ticker.info
+            main_info = TickerSnapshot(symbol).info
             
             if not main_info:
                 return Response(
@@ -2461,20 +2448,11 @@ class CustomPeerSearchView(APIView):
                 )
             
             # Get data for searched companies
-            new_peers = []
-            for search_symbol in search_symbols[:8]:  # Increased limit
-                try:
-                    # Skip if already in existing peers
-                    if merge_with_existing and any(p.get('symbol') == search_symbol for p in existing_peers):
-                        continue
-                        
-                    peer_data = self.get_peer_data(search_symbol)
-                    if peer_data:
-                        new_peers.append(peer_data)
-                        time.sleep(0.2)  # Rate limiting
-                except Exception as e:
-                    logger.warning(f"Error fetching data for {search_symbol}: {str(e)}")
-                    continue
+            skip = {p.get('symbol') for p in existing_peers} if merge_with_existing else set()
+            new_peers = peer_fetcher.fetch_peers(
+                [s for s in search_symbols[:8] if s not in skip],  # Increased limit
+                self.get_peer_data,
+            )
             
             # Merge with existing peers if requested
             if merge_with_existing and existing_peers:
@@ -2507,8 +2485,7 @@ class CustomPeerSearchView(APIView):
     def get_peer_data(self, symbol):
         """Get detailed data for a peer company"""
         try:
-            peer_ticker = yf.Ticker(symbol)
-            peer_info = peer_ticker.info
+            peer_info = TickerSnapshot(symbol).info
             
             if not peer_info or not peer_info.get('symbol'):
                 return None
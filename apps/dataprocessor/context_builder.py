@@ -0,0 +1,293 @@
+# dataprocessor/context_builder.py
+"""
+Token-budgeted context for the extraction prompts.
+
+The document text is cut into blocks - runs of table rows are kept
+together, prose is grouped into short paragraphs - and every block is
+scored in one pass: all keywords are matched by a single trie-compiled
+pattern (the Aho-Corasick idea, run by the C regex engine), then numeric
+density and the statement section the block sits in are added. The best
+blocks are packed into the token budget of the target model and emitted
+in document order.
+
+Shared by dataprocessor.services and balance_sheet_comparator so both
+apps build their LLM context the same way. No Django imports here - the
+standalone balance sheet script uses it too.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+from . import page_locator
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:  # tiktoken is optional - fall back to the estimator below
+    _ENCODING = None
+
+# Context budget per model, in tokens. The prompt and the completion are
+# counted separately by token_budget_for(); these caps keep calls fast.
+MODEL_TOKEN_BUDGETS = {
+    "llama-3.1-8b-instant": 12000,
+    "gemini-2.5-flash": 16000,
+}
+MODEL_CONTEXT_WINDOWS = {
+    "llama-3.1-8b-instant": 131072,
+    "gemini-2.5-flash": 1048576,
+}
+DEFAULT_TOKEN_BUDGET = 12000
+
+# Prose paragraphs and tables are split into blocks of at most this many lines
+MAX_BLOCK_LINES = 25
+
+KEYWORD_WEIGHTS: Dict[str, float] = {}
+for _titles in page_locator.STATEMENT_TITLES.values():
+    KEYWORD_WEIGHTS.update({t: 6.0 for t in _titles})
+KEYWORD_WEIGHTS.update({t: 3.0 for t in page_locator.LINE_ITEMS})
+KEYWORD_WEIGHTS.update({t: 1.0 for t in [
+    "assets", "liabilities", "equity", "share capital", "reserves", "profit", "loss",
+    "revenue", "sales", "income", "expenses", "total", "crores", "lakhs", "consolidated",
+    "standalone", "cash flow", "fiscal year", "financial statements",
+]})
+KEYWORD_WEIGHTS.update({t: -2.0 for t in page_locator.NARRATIVE_TERMS})
+
+NUMBER_RE = page_locator.NUMBER_RE
+# Rough BPE shape: short letter runs, digit groups, single symbols
+_TOKEN_ESTIMATE_RE = re.compile(r"[A-Za-z]{1,6}|\d{1,3}|[^\sA-Za-z\d]")
+
+
+def count_tokens(text: str) -> int:
+    """Token count with tiktoken when installed, otherwise a BPE-shaped estimate."""
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return len(_TOKEN_ESTIMATE_RE.findall(text))
+
+
+def token_budget_for(model: Optional[str] = None, prompt: str = "",
+                     max_output_tokens: int = 0) -> int:
+    """Tokens left for the document once the prompt and the completion are reserved."""
+    cap = MODEL_TOKEN_BUDGETS.get(model, DEFAULT_TOKEN_BUDGET)
+    window = MODEL_CONTEXT_WINDOWS.get(model)
+    if window is None:
+        return cap
+    return max(0, min(cap, window - count_tokens(prompt) - max_output_tokens))
+
+
+# --- KEYWORD MATCHING ---
+
+def _trie_pattern(node: Dict) -> str:
+    # Turn a character trie into a regex without alternatives that share a prefix
+    end = "" in node
+    branches = [re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items()) if ch]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    return f"(?:{body})?" if end else body
+
+
+class KeywordMatcher:
+    """
+    Match many keywords in one left-to-right scan.
+
+    The keywords are folded into a character trie and compiled into a
+    single regex, so every position is tried once against the trie instead
+    of once per keyword. Longer keywords win over their prefixes
+    ("current assets" over "assets").
+    """
+
+    def __init__(self, weights: Dict[str, float]):
+        self.weights = {k.lower(): w for k, w in weights.items()}
+        trie: Dict = {}
+        for word in self.weights:
+            node = trie
+            for ch in word:
+                node = node.setdefault(ch, {})
+            node[""] = True
+        self.pattern = re.compile(r"(?<![a-z])" + _trie_pattern(trie) + r"(?![a-z])")
+
+    def find_all(self, text: str) -> List[str]:
+        return self.pattern.findall(text.lower())
+
+    def score(self, text: str) -> float:
+        return sum(self.weights.get(m, 0.0) for m in self.find_all(text))
+
+
+_default_matcher = KeywordMatcher(KEYWORD_WEIGHTS)
+
+
+def get_matcher(extra_keywords: Optional[Dict[str, float]] = None) -> KeywordMatcher:
+    if not extra_keywords:
+        return _default_matcher
+    return KeywordMatcher({**KEYWORD_WEIGHTS, **extra_keywords})
+
+
+# --- BLOCKS ---
+
+@dataclass
+class Block:
+    index: int
+    lines: List[str]
+    is_table: bool
+    section: Optional[str] = None
+    score: float = 0.0
+    tokens: int = 0
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.lines)
+
+
+@dataclass
+class ContextPack:
+    text: str
+    tokens: int
+    budget: int
+    blocks_total: int
+    blocks_kept: int
+    sections: Dict[str, int] = field(default_factory=dict)
+
+
+def _is_table_line(line: str) -> bool:
+    return len(NUMBER_RE.findall(line)) >= 1 and len(line) < 200
+
+
+def split_blocks(lines: Iterable[str]) -> List[Block]:
+    """Group lines into table runs and prose paragraphs of at most MAX_BLOCK_LINES."""
+    blocks: List[Block] = []
+    current: List[str] = []
+    current_table = False
+
+    def flush():
+        if current:
+            blocks.append(Block(index=len(blocks), lines=list(current), is_table=current_table))
+            current.clear()
+
+    for raw in lines:
+        line = raw.rstrip()
+        if not line.strip():
+            if not current_table:
+                flush()
+            continue
+        is_table = _is_table_line(line)
+        if current and (is_table != current_table or len(current) >= MAX_BLOCK_LINES):
+            flush()
+        current_table = is_table
+        current.append(line)
+    flush()
+    return blocks
+
+
+def _detect_title(text: str) -> Optional[str]:
+    lower = text.lower()
+    for section, titles in page_locator.STATEMENT_TITLES.items():
+        if any(t in lower for t in titles):
+            return section
+    return None
+
+
+def score_blocks(blocks: Sequence[Block], matcher: Optional[KeywordMatcher] = None) -> None:
+    """Set score, section and token count on every block in place."""
+    matcher = matcher or _default_matcher
+    section = None
+    for block in blocks:
+        text = block.text
+        keyword_score = matcher.score(text)
+        title = _detect_title(text[:300])
+        if title:
+            section = title
+        elif not block.is_table and keyword_score < 0:
+            # Narrative heading - we have left the statement
+            section = None
+        block.section = section
+
+        numbers = len(NUMBER_RE.findall(text))
+        words = max(len(text.split()), 1)
+        block.score = keyword_score
+        block.score += min(numbers / words, 1.0) * 10
+        if block.is_table:
+            block.score += 2
+        if section:
+            block.score += 8
+        block.tokens = count_tokens(text) + 1  # +1 for the joining newline
+
+
+def pack_blocks(blocks: Sequence[Block], budget: int,
+                max_chars: Optional[int] = None) -> List[Block]:
+    """Best-scoring blocks that fit the budget, returned in document order."""
+    chosen = []
+    used = 0
+    used_chars = 0
+    ranked = sorted(blocks, key=lambda b: (-b.score, b.index))
+    for block in ranked:
+        chars = len(block.text) + 1
+        if used + block.tokens > budget:
+            continue
+        if max_chars is not None and used_chars + chars > max_chars:
+            continue
+        chosen.append(block)
+        used += block.tokens
+        used_chars += chars
+    return sorted(chosen, key=lambda b: b.index)
+
+
+# --- PUBLIC API ---
+
+Source = Union[str, Sequence]
+
+
+def _page_texts(documents: Source) -> List[str]:
+    if isinstance(documents, str):
+        return [documents]
+    return [getattr(d, "page_content", d) or "" for d in documents]
+
+
+def build_context_pack(documents: Source, token_budget: Optional[int] = None,
+                       model: Optional[str] = None,
+                       extra_keywords: Optional[Dict[str, float]] = None,
+                       max_chars: Optional[int] = None) -> ContextPack:
+    """
+    Rank and pack document text (Documents, strings or one string) into a token budget.
+
+    max_chars is an extra hard ceiling for callers that also cap the prompt size.
+    """
+    if token_budget is None:
+        token_budget = token_budget_for(model)
+
+    all_text = "\n".join(_page_texts(documents))
+    total_tokens = count_tokens(all_text)
+    if total_tokens <= token_budget and (max_chars is None or len(all_text) <= max_chars):
+        # Everything fits - keep the document untouched
+        return ContextPack(all_text, total_tokens, token_budget, 1, 1)
+
+    blocks = split_blocks(all_text.split("\n"))
+    score_blocks(blocks, get_matcher(extra_keywords))
+    chosen = pack_blocks(blocks, token_budget, max_chars)
+
+    sections: Dict[str, int] = {}
+    for block in chosen:
+        if block.section:
+            sections[block.section] = sections.get(block.section, 0) + 1
+
+    text = "\n".join(block.text for block in chosen)
+    return ContextPack(
+        text=text,
+        tokens=sum(block.tokens for block in chosen),
+        budget=token_budget,
+        blocks_total=len(blocks),
+        blocks_kept=len(chosen),
+        sections=sections,
+    )
+
+
+def build_context(documents: Source, token_budget: Optional[int] = None,
+                  model: Optional[str] = None,
+                  extra_keywords: Optional[Dict[str, float]] = None,
+                  max_chars: Optional[int] = None) -> str:
+    pack = build_context_pack(documents, token_budget, model, extra_keywords, max_chars)
+    if pack.blocks_total > 1:
+        print(f"Context packed: {pack.blocks_kept}/{pack.blocks_total} blocks, "
+              f"{pack.tokens}/{pack.budget} tokens")
+    return pack.text
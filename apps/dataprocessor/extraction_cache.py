@@ -0,0 +1,184 @@
+# dataprocessor/extraction_cache.py
+"""
+Content-addressed cache for the financial statement pipeline.
+
+Entries are keyed by the SHA-256 of the uploaded file bytes plus the
+pipeline version (prompts + models), so re-uploading the same annual
+report returns the stored extraction, summary and ratios without any
+LLM calls. Changing a prompt or model automatically invalidates old
+entries because the version no longer matches.
+"""
+import hashlib
+import threading
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ExtractionCache
+
+# Defaults can be overridden from settings.py
+DEFAULT_MAX_ENTRIES = 500
+DEFAULT_TTL_DAYS = 30
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "errors": 0}
+
+
+def _bump(counter: str, amount: int = 1) -> None:
+    with _stats_lock:
+        _stats[counter] += amount
+
+
+def _max_entries() -> int:
+    return int(getattr(settings, "EXTRACTION_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+
+
+def _ttl() -> timedelta:
+    return timedelta(days=int(getattr(settings, "EXTRACTION_CACHE_TTL_DAYS", DEFAULT_TTL_DAYS)))
+
+
+def is_enabled() -> bool:
+    return bool(getattr(settings, "EXTRACTION_CACHE_ENABLED", True))
+
+
+def hash_file(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file on disk, read in chunks to keep memory flat."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def lookup(content_hash: str, pipeline_version: str) -> Optional[Dict[str, Any]]:
+    """
+    Return the cached stage outputs for this file, or None on a miss.
+    Cache failures never break processing - they count as a miss.
+    """
+    if not is_enabled() or not content_hash:
+        return None
+
+    try:
+        entry = ExtractionCache.objects.filter(
+            content_hash=content_hash,
+            pipeline_version=pipeline_version,
+            created_at__gte=timezone.now() - _ttl(),
+        ).first()
+
+        if entry is None:
+            _bump("misses")
+            return None
+
+        ExtractionCache.objects.filter(pk=entry.pk).update(
+            hit_count=F("hit_count") + 1,
+            last_accessed=timezone.now(),
+        )
+        _bump("hits")
+        print(f"⚡ Extraction cache hit: {content_hash[:12]} ({entry.company_name})")
+
+        return {
+            "extracted_data": entry.extracted_data,
+            "summary": entry.summary,
+            "ratios": entry.ratios,
+            "content_length": entry.content_length,
+        }
+    except Exception as e:
+        _bump("errors")
+        print(f"Extraction cache lookup failed: {e}")
+        return None
+
+
+def store(content_hash: str, pipeline_version: str, extracted_data: Dict[str, Any],
+          summary: Dict[str, Any], ratios: Dict[str, Any], content_length: int = 0) -> bool:
+    """
+    Save a successful pipeline run. Partial results (failed summary or
+    ratios) are not cached so the next upload gets a fresh attempt.
+    """
+    if not is_enabled() or not content_hash:
+        return False
+    if not (extracted_data.get("success") and summary.get("success") and ratios.get("success")):
+        return False
+    return _save(content_hash, pipeline_version, extracted_data, summary, ratios, content_length)
+
+
+def store_extraction(content_hash: str, pipeline_version: str, extracted_data: Dict[str, Any],
+                     content_length: int = 0) -> bool:
+    """Save an extraction on its own, for pipelines that run no summary or ratio stage."""
+    if not is_enabled() or not content_hash or not extracted_data.get("success"):
+        return False
+    return _save(content_hash, pipeline_version, extracted_data, {}, {}, content_length)
+
+
+def _save(content_hash: str, pipeline_version: str, extracted_data: Dict[str, Any],
+          summary: Dict[str, Any], ratios: Dict[str, Any], content_length: int) -> bool:
+    try:
+        ExtractionCache.objects.update_or_create(
+            content_hash=content_hash,
+            pipeline_version=pipeline_version,
+            defaults={
+                "company_name": extracted_data.get("company_name"),
+                "ticker_symbol": extracted_data.get("ticker_symbol"),
+                "extracted_data": extracted_data,
+                "summary": summary,
+                "ratios": ratios,
+                "content_length": content_length,
+                "last_accessed": timezone.now(),
+            },
+        )
+        _bump("stores")
+        evict()
+        return True
+    except Exception as e:
+        _bump("errors")
+        print(f"Extraction cache store failed: {e}")
+        return False
+
+
+def evict() -> int:
+    """Drop expired entries, then the least recently used ones above the size limit."""
+    removed, _ = ExtractionCache.objects.filter(
+        created_at__lt=timezone.now() - _ttl()
+    ).delete()
+
+    overflow_ids = list(
+        ExtractionCache.objects.order_by("-last_accessed")
+        .values_list("pk", flat=True)[_max_entries():]
+    )
+    if overflow_ids:
+        extra, _ = ExtractionCache.objects.filter(pk__in=overflow_ids).delete()
+        removed += extra
+
+    if removed:
+        _bump("evictions", removed)
+    return removed
+
+
+def clear() -> int:
+    deleted, _ = ExtractionCache.objects.all().delete()
+    return deleted
+
+
+def get_stats() -> Dict[str, Any]:
+    """Process-local hit/miss counters plus the current table size."""
+    with _stats_lock:
+        stats = dict(_stats)
+
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    stats["enabled"] = is_enabled()
+    stats["max_entries"] = _max_entries()
+    stats["ttl_days"] = _ttl().days
+    try:
+        stats["entries"] = ExtractionCache.objects.count()
+    except Exception:
+        stats["entries"] = None
+    return stats
+
+
+def reset_stats() -> None:
+    with _stats_lock:
+        for key in _stats:
+            _stats[key] = 0
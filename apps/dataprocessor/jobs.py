@@ -0,0 +1,197 @@
+# dataprocessor/jobs.py
+"""
+In-process job runner for the upload pipeline.
+
+Jobs are stored in the ProcessingJob table so any web worker can answer
+status polls, while the work itself runs on a small local thread pool -
+no external broker is needed. The heavy stages (PDF/OCR, LLM calls) spend
+most of their time waiting on I/O or subprocesses, so threads are enough
+to keep the WSGI workers free for read endpoints.
+
+A job dies with the process running it (worker restart, deploy). Every
+stage transition bumps ProcessingJob.updated_at, which serves as the
+job's heartbeat: polling a queued or running job that has been silent
+for PROCESSING_JOB_TIMEOUT seconds marks it failed, so clients always
+reach a terminal state.
+"""
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Callable, List, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from .models import ProcessingJob
+
+DEFAULT_WORKERS = 2
+# Longer than any single stage (OCR of a long report, LLM_ANALYSIS_TIMEOUT)
+DEFAULT_JOB_TIMEOUT = 30 * 60
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+class JobError(Exception):
+    """Pipeline failure with the HTTP status the sync endpoint would have returned."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = int(getattr(settings, "PROCESSING_JOB_WORKERS", DEFAULT_WORKERS))
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fingenie-job")
+        return _executor
+
+
+class StageTracker:
+    """
+    Records per-stage timings. Without a job it only keeps timings in
+    memory, so the synchronous endpoint can use the same pipeline code.
+    """
+
+    def __init__(self, stage_names: List[str], job: Optional[ProcessingJob] = None):
+        self.job = job
+        self.stages = {name: {"status": "pending"} for name in stage_names}
+
+    def _save(self, current_stage: str) -> None:
+        if self.job is None:
+            return
+        self.job.current_stage = current_stage
+        self.job.stages = self.stages
+        self.job.save(update_fields=["current_stage", "stages", "updated_at"])
+
+    @contextmanager
+    def stage(self, name: str):
+        entry = self.stages.setdefault(name, {})
+        entry.update({"status": "running", "started_at": timezone.now().isoformat()})
+        self._save(name)
+        start = time.perf_counter()
+        try:
+            yield entry
+        except Exception:
+            entry["status"] = "failed"
+            raise
+        else:
+            entry["status"] = "completed"
+        finally:
+            entry["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            self._save(name)
+
+    def mark_running(self, *names: str) -> None:
+        """Flag stages that run concurrently; finish each with record()."""
+        now = timezone.now().isoformat()
+        for name in names:
+            self.stages.setdefault(name, {}).update({"status": "running", "started_at": now})
+        self._save(",".join(names))
+
+    def record(self, name: str, duration_ms: Optional[float], ok: bool = True, error: str = "") -> None:
+        entry = self.stages.setdefault(name, {})
+        entry["status"] = "completed" if ok else "failed"
+        entry["duration_ms"] = duration_ms
+        if error:
+            entry["error"] = error
+        self._save(name)
+
+    def skip(self, *names: str) -> None:
+        for name in names:
+            self.stages.setdefault(name, {})["status"] = "skipped"
+        if self.job is not None:
+            self._save(self.job.current_stage)
+
+    def timings(self):
+        return {name: info.get("duration_ms") for name, info in self.stages.items() if info.get("duration_ms") is not None}
+
+
+def _run_job(job_id, task: Callable, args: tuple) -> None:
+    job = ProcessingJob.objects.get(job_id=job_id)
+    job.status = ProcessingJob.RUNNING
+    job.save(update_fields=["status", "updated_at"])
+
+    try:
+        report = task(job, *args)
+        job.report = report
+        job.status = ProcessingJob.COMPLETED
+    except JobError as e:
+        job.status = ProcessingJob.FAILED
+        job.error = e.message
+        job.http_status = e.status
+    except Exception as e:
+        print(f"❌ Job {job_id} failed: {e}")
+        print(traceback.format_exc())
+        job.status = ProcessingJob.FAILED
+        job.error = f"Internal server error: {str(e)}"
+        job.http_status = 500
+
+    job.finished_at = timezone.now()
+    job.save()
+
+
+def _run_job_in_worker(job_id, task: Callable, args: tuple) -> None:
+    # Worker threads get their own DB connection; release it when done
+    close_old_connections()
+    try:
+        _run_job(job_id, task, args)
+    except Exception as e:
+        print(f"❌ Job runner crashed for {job_id}: {e}")
+    finally:
+        connection.close()
+
+
+def submit(task: Callable, *args, file_name: str = "", upload_path: str = "") -> ProcessingJob:
+    """
+    Create a job and run task(job, *args) on the worker pool.
+    The task returns the FinancialReport it created or raises JobError;
+    upload_path is removed if the job is expired without finishing.
+    """
+    job = ProcessingJob.objects.create(file_name=file_name, upload_path=upload_path)
+
+    if getattr(settings, "PROCESSING_JOBS_EAGER", False):
+        # Inline execution for tests and single-process debugging
+        _run_job(job.job_id, task, args)
+    else:
+        _get_executor().submit(_run_job_in_worker, job.job_id, task, args)
+
+    job.refresh_from_db()
+    return job
+
+
+def expire_if_stale(job: ProcessingJob) -> ProcessingJob:
+    """
+    Fail a queued or running job whose heartbeat is older than
+    PROCESSING_JOB_TIMEOUT (its worker is gone) and remove its upload.
+    """
+    if job.is_finished:
+        return job
+    timeout = int(getattr(settings, "PROCESSING_JOB_TIMEOUT", DEFAULT_JOB_TIMEOUT))
+    now = timezone.now()
+    if job.updated_at > now - timedelta(seconds=timeout):
+        return job
+
+    # Conditional update: a worker that finishes meanwhile keeps its result
+    expired = ProcessingJob.objects.filter(
+        job_id=job.job_id, status__in=[ProcessingJob.QUEUED, ProcessingJob.RUNNING], updated_at=job.updated_at
+    ).update(
+        status=ProcessingJob.FAILED,
+        error=f"Job stopped responding (no progress for {timeout} seconds); please upload the file again",
+        http_status=500,
+        finished_at=now,
+        updated_at=now,
+    )
+    if expired:
+        print(f"⚠️ Expired stale job {job.job_id} (stage: {job.current_stage or job.status})")
+        if job.upload_path and os.path.exists(job.upload_path):
+            os.remove(job.upload_path)
+    job.refresh_from_db()
+    return job
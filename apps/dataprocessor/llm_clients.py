@@ -0,0 +1,234 @@
+# dataprocessor/llm_clients.py
+"""
+Process-wide registry of LLM clients.
+
+Building a ChatGroq per call opens a fresh HTTP connection pool (and TLS
+handshake) every time, and genai.configure() replaces the Gemini
+transport on every request. Clients are instead built lazily, once per
+(provider, api key, model, purpose/config), and reused. Groq clients
+share one keep-alive httpx pool. Keys come from the callers, so the
+registry is an LRU holding at most LLM_CLIENT_CACHE_SIZE clients.
+
+The registry also remembers which models failed recently for each key.
+The Gemini fallback loops in ai_insights and learning skip a model that
+is cooling down instead of probing it again on every request. Health is
+per key so that one user's invalid or exhausted key doesn't push models
+to the back for everyone else.
+
+Callers pass in the SDK entry point they imported themselves (ChatGroq,
+the genai module), so tests that patch those names keep working.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_COOLDOWN_SECONDS = 300
+MAX_COOLDOWN_SECONDS = 3600
+KEEPALIVE_CONNECTIONS = 20
+KEEPALIVE_EXPIRY_SECONDS = 60
+DEFAULT_MAX_CLIENTS = 32
+# Health records per (provider, key, model); the oldest are forgotten first
+MAX_HEALTH_ENTRIES = 256
+
+_lock = threading.RLock()
+_clients: "OrderedDict[Tuple, Any]" = OrderedDict()
+_configured_gemini_keys: Dict[int, str] = {}
+_health: "OrderedDict[Tuple[str, str, str], Dict[str, Any]]" = OrderedDict()
+_http_client = None
+_stats = {"created": 0, "reused": 0, "evicted": 0}
+
+
+def _setting(name: str, default: Any) -> Any:
+    try:
+        from django.conf import settings
+        if settings.configured:
+            return getattr(settings, name, default)
+    except Exception:
+        pass
+    return default
+
+
+def _fingerprint(api_key: Optional[str]) -> str:
+    # Never keep raw keys in registry keys or stats
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:12]
+
+
+def _shared_http_client():
+    global _http_client
+    if _http_client is None:
+        try:
+            import httpx
+            _http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_keepalive_connections=KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS,
+                ),
+            )
+        except Exception as e:
+            print(f"Shared HTTP pool unavailable ({e}) - clients use their own")
+            return None
+    return _http_client
+
+
+def get_client(key: Tuple, factory: Callable[[], Any]) -> Any:
+    """Return the client registered under key, building it with factory on first use."""
+    with _lock:
+        client = _clients.get(key)
+        if client is not None:
+            _clients.move_to_end(key)
+            _stats["reused"] += 1
+            return client
+    client = factory()
+    with _lock:
+        # Another thread may have won the race - keep the first one
+        client = _clients.setdefault(key, client)
+        _clients.move_to_end(key)
+        _stats["created"] += 1
+        limit = max(1, int(_setting("LLM_CLIENT_CACHE_SIZE", DEFAULT_MAX_CLIENTS)))
+        while len(_clients) > limit:
+            _clients.popitem(last=False)
+            _stats["evicted"] += 1
+    return client
+
+
+# --- GROQ ---
+
+def get_groq_chat(api_key: str, model: str, purpose: str = "default", chat_cls=None,
+                  temperature: float = 0.1, max_tokens: int = 4096,
+                  timeout: int = 60, max_retries: int = 1) -> Any:
+    """Shared ChatGroq for this key/model/purpose, on the process keep-alive pool."""
+    if chat_cls is None:
+        from langchain_groq import ChatGroq as chat_cls
+
+    key = ("groq", _fingerprint(api_key), model, purpose, temperature, max_tokens, timeout, max_retries)
+
+    def build():
+        kwargs = dict(
+            model=model,
+            groq_api_key=api_key,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=timeout,
+            max_retries=max_retries,
+        )
+        http_client = _shared_http_client()
+        if http_client is not None:
+            kwargs["http_client"] = http_client
+        return chat_cls(**kwargs)
+
+    return get_client(key, build)
+
+
+# --- GEMINI ---
+
+def configure_gemini(api_key: str, sdk=None) -> None:
+    """genai.configure() once per key; it rebuilds the transport every time it runs."""
+    if sdk is None:
+        import google.generativeai as sdk
+
+    # Keyed by the configure function itself so a swapped SDK is configured afresh
+    sdk_id = id(sdk.configure)
+    fingerprint = _fingerprint(api_key)
+    with _lock:
+        if _configured_gemini_keys.get(sdk_id) == fingerprint:
+            return
+        sdk.configure(api_key=api_key)
+        _configured_gemini_keys.clear()
+        _configured_gemini_keys[sdk_id] = fingerprint
+
+
+def get_gemini_model(model_name: str, api_key: str, sdk=None,
+                     generation_config: Optional[Dict[str, Any]] = None) -> Any:
+    """Shared GenerativeModel for this key/model/config."""
+    if sdk is None:
+        import google.generativeai as sdk
+
+    config_key = repr(sorted((generation_config or {}).items()))
+    key = ("gemini", _fingerprint(api_key), model_name, config_key, id(sdk.GenerativeModel))
+
+    def build():
+        if generation_config:
+            return sdk.GenerativeModel(model_name=model_name, generation_config=generation_config)
+        return sdk.GenerativeModel(model_name=model_name)
+
+    return get_client(key, build)
+
+
+# --- MODEL HEALTH ---
+
+def record_failure(provider: str, model: str, error: Any = None, api_key: Optional[str] = None) -> None:
+    """Put a model on cooldown for this key; repeated failures double the wait up to an hour."""
+    base = _setting("LLM_MODEL_COOLDOWN_SECONDS", DEFAULT_COOLDOWN_SECONDS)
+    fingerprint = _fingerprint(api_key)
+    with _lock:
+        entry = _health.setdefault((provider, fingerprint, model), {"failures": 0})
+        _health.move_to_end((provider, fingerprint, model))
+        while len(_health) > MAX_HEALTH_ENTRIES:
+            _health.popitem(last=False)
+        entry["failures"] += 1
+        cooldown = min(base * 2 ** (entry["failures"] - 1), MAX_COOLDOWN_SECONDS)
+        entry["retry_after"] = time.time() + cooldown
+        entry["last_error"] = str(error)[:300] if error is not None else ""
+        # A client that failed may hold a broken connection - rebuild it next time
+        for key in [k for k in _clients if k[:2] == (provider, fingerprint) and model in k]:
+            _clients.pop(key, None)
+
+
+def record_success(provider: str, model: str, api_key: Optional[str] = None) -> None:
+    with _lock:
+        _health.pop((provider, _fingerprint(api_key), model), None)
+
+
+def is_healthy(provider: str, model: str, api_key: Optional[str] = None) -> bool:
+    with _lock:
+        entry = _health.get((provider, _fingerprint(api_key), model))
+        return entry is None or entry["retry_after"] <= time.time()
+
+
+def healthy_candidates(provider: str, candidates: Sequence[str], api_key: Optional[str] = None) -> List[str]:
+    """
+    Candidates in order with models cooling down for this key moved to the back.
+
+    They are kept rather than dropped so a request still has something to
+    try when every model failed recently.
+    """
+    seen = list(dict.fromkeys(candidates))
+    healthy = [m for m in seen if is_healthy(provider, m, api_key)]
+    return healthy + [m for m in seen if m not in healthy]
+
+
+def model_health() -> Dict[str, Dict[str, Any]]:
+    """Cooldowns as "provider:key fingerprint:model" -> state."""
+    now = time.time()
+    with _lock:
+        return {
+            f"{provider}:{fingerprint}:{model}": {
+                "failures": entry["failures"],
+                "retry_in_seconds": max(0, round(entry["retry_after"] - now)),
+                "last_error": entry["last_error"],
+            }
+            for (provider, fingerprint, model), entry in _health.items()
+        }
+
+
+def get_stats() -> Dict[str, Any]:
+    with _lock:
+        return {"clients": len(_clients), **_stats, "model_health": model_health()}
+
+
+def reset() -> None:
+    """Drop every client and health record (tests, key rotation)."""
+    global _http_client
+    with _lock:
+        _clients.clear()
+        _configured_gemini_keys.clear()
+        _health.clear()
+        _stats.update(created=0, reused=0, evicted=0)
+        if _http_client is not None:
+            try:
+                _http_client.close()
+            except Exception:
+                pass
+            _http_client = None
@@ -0,0 +1,112 @@
+"""
+Compare per-line and batch normalisation of OCR labels.
+
+    python manage.py benchmark_term_matcher --dump ocr_dump.txt
+    python manage.py benchmark_term_matcher --pages 100
+
+The dump is plain OCR text with pages separated by form feeds (the
+tesseract default). Without one, a synthetic report of --pages pages is
+generated from the canonical vocabulary with typical OCR misreads.
+"""
+import random
+import re
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rapidfuzz import fuzz, process
+
+from apps.dataprocessor.rule_extractor import CANONICAL_TERMS
+from apps.dataprocessor.term_matcher import CanonicalMatcher, OCR_REPLACEMENTS, Replacer
+
+NUMBER_RE = re.compile(r"\(?-?\d{1,3}(?:,\d{3})*(?:\.\d+)?\)?")
+NOISE = ["Notes to accounts", "Registered office", "Total", "Sub-total", "As at 31 March",
+         "Particulars", "Chairman's statement", "curent maturities", "come tac expense"]
+
+
+def legacy_clean_particular(text):
+    # The per-line implementation this module replaced, kept for comparison
+    text = text.lower()
+    for wrong, right in OCR_REPLACEMENTS.items():
+        if wrong in text:
+            text = text.replace(wrong, right)
+    result = process.extractOne(text, CANONICAL_TERMS, scorer=fuzz.token_sort_ratio)
+    if result and result[1] > 80:
+        return result[0]
+    return text.title()
+
+
+def synthetic_dump(pages, seed=7):
+    rng = random.Random(seed)
+    out = []
+    for _ in range(pages):
+        lines = []
+        for _ in range(45):
+            label = rng.choice(CANONICAL_TERMS + NOISE)
+            if rng.random() < 0.3:
+                # drop or swap a character, like tesseract does
+                i = rng.randrange(len(label))
+                label = label[:i] + label[i + 1:]
+            lines.append(f"{label} {rng.randint(1, 99999):,} {rng.randint(1, 99999):,}")
+        out.append("\n".join(lines))
+    return "\f".join(out)
+
+
+def labels_from_dump(text):
+    labels = []
+    for line in text.split("\n"):
+        line = line.strip("\f ")
+        if NUMBER_RE.search(line):
+            labels.append(NUMBER_RE.split(line, 1)[0].strip())
+    return labels
+
+
+class Command(BaseCommand):
+    help = "Benchmark the batch canonical-term matcher against the per-line version"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dump", help="OCR text dump, pages separated by form feeds")
+        parser.add_argument("--pages", type=int, default=100, help="Synthetic pages when no dump is given")
+        parser.add_argument("--workers", type=int, default=-1, help="rapidfuzz cdist workers (-1 = all cores)")
+
+    def handle(self, *args, **options):
+        if options["dump"]:
+            try:
+                with open(options["dump"], encoding="utf-8", errors="ignore") as fh:
+                    text = fh.read()
+            except OSError as e:
+                raise CommandError(f"Cannot read dump: {e}")
+        else:
+            text = synthetic_dump(options["pages"])
+
+        labels = labels_from_dump(text)
+        pages = text.count("\f") + 1
+        self.stdout.write(f"📄 {pages} pages, {len(labels)} labelled lines, {len(set(labels))} distinct")
+
+        start = time.perf_counter()
+        legacy = [legacy_clean_particular(label) for label in labels]
+        legacy_s = time.perf_counter() - start
+
+        replacer = Replacer(OCR_REPLACEMENTS)
+        matcher = CanonicalMatcher(CANONICAL_TERMS, threshold=80)
+
+        def batch():
+            texts = [replacer.apply(label.lower()) for label in labels]
+            matches = matcher.match_many(texts, workers=options["workers"])
+            return [m if m else t.title() for t, m in zip(texts, matches)]
+
+        start = time.perf_counter()
+        cold = batch()
+        cold_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batch()
+        warm_s = time.perf_counter() - start
+
+        mismatches = sum(1 for a, b in zip(legacy, cold) if a != b)
+        self.stdout.write(f"per-line extractOne : {legacy_s * 1000:8.1f} ms")
+        self.stdout.write(f"batch cdist (cold)  : {cold_s * 1000:8.1f} ms  x{legacy_s / max(cold_s, 1e-9):.1f}")
+        self.stdout.write(f"batch cdist (cached): {warm_s * 1000:8.1f} ms  x{legacy_s / max(warm_s, 1e-9):.1f}")
+        if mismatches:
+            self.stdout.write(self.style.WARNING(f"⚠️ {mismatches} labels normalised differently"))
+        else:
+            self.stdout.write(self.style.SUCCESS("✅ Identical output"))
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.2 on 2026-10-17 04:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dataprocessor', '0006_financialreport_pdf_original_name_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExtractionCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(help_text='SHA-256 of the uploaded file bytes', max_length=64)),
+                ('pipeline_version', models.CharField(help_text='Hash of the prompts and models used to build this entry', max_length=64)),
+                ('company_name', models.CharField(blank=True, max_length=255, null=True)),
+                ('ticker_symbol', models.CharField(blank=True, max_length=50, null=True)),
+                ('extracted_data', models.JSONField(blank=True, default=dict)),
+                ('summary', models.JSONField(blank=True, default=dict)),
+                ('ratios', models.JSONField(blank=True, default=dict)),
+                ('content_length', models.IntegerField(default=0)),
+                ('hit_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_accessed', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Extraction Cache Entry',
+                'verbose_name_plural': 'Extraction Cache Entries',
+                'db_table': 'extraction_cache',
+                'ordering': ['-last_accessed'],
+                'indexes': [models.Index(fields=['content_hash', 'pipeline_version'], name='extraction__content_03786c_idx'), models.Index(fields=['last_accessed'], name='extraction__last_ac_1f7547_idx')],
+                'unique_together': {('content_hash', 'pipeline_version')},
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.2 on 2026-10-17 04:55
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dataprocessor', '0007_extractioncache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessingJob',
+            fields=[
+                ('job_id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('current_stage', models.CharField(blank=True, default='', max_length=50)),
+                ('stages', models.JSONField(blank=True, default=dict)),
+                ('file_name', models.CharField(blank=True, default='', max_length=255)),
+                ('error', models.TextField(blank=True, default='')),
+                ('http_status', models.IntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('report', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='processing_jobs', to='dataprocessor.financialreport')),
+            ],
+            options={
+                'verbose_name': 'Processing Job',
+                'verbose_name_plural': 'Processing Jobs',
+                'db_table': 'processing_jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status'], name='processing__status_96bb49_idx'), models.Index(fields=['created_at'], name='processing__created_7e276e_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-17 06:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dataprocessor', '0008_processingjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='processingjob',
+            name='upload_path',
+            field=models.CharField(blank=True, default='', max_length=500),
+        ),
+    ]
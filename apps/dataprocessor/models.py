@@ -208,6 +208,120 @@ class FinancialReport(models.Model):
         }
 
 
+class ExtractionCache(models.Model):
+    """
+    Stores the pipeline output for an uploaded statement so that
+    re-uploading the exact same file skips the LLM calls.
+    """
+    content_hash = models.CharField(
+        max_length=64,
+        help_text="SHA-256 of the uploaded file bytes"
+    )
+    pipeline_version = models.CharField(
+        max_length=64,
+        help_text="Hash of the prompts and models used to build this entry"
+    )
+
+    company_name = models.CharField(max_length=255, blank=True, null=True)
+    ticker_symbol = models.CharField(max_length=50, blank=True, null=True)
+
+    extracted_data = models.JSONField(default=dict, blank=True)
+    summary = models.JSONField(default=dict, blank=True)
+    ratios = models.JSONField(default=dict, blank=True)
+    content_length = models.IntegerField(default=0)
+
+    hit_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_accessed = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'extraction_cache'
+        unique_together = ['content_hash', 'pipeline_version']
+        ordering = ['-last_accessed']
+        verbose_name = 'Extraction Cache Entry'
+        verbose_name_plural = 'Extraction Cache Entries'
+        indexes = [
+            models.Index(fields=['content_hash', 'pipeline_version']),
+            models.Index(fields=['last_accessed']),
+        ]
+
+    def __str__(self):
+        name = self.company_name or "Unknown Company"
+        return f"{name} - {self.content_hash[:12]} ({self.hit_count} hits)"
+
+
+class ProcessingJob(models.Model):
+    """
+    Background run of the /api/process/ pipeline. The upload endpoint
+    returns the job id immediately and clients poll for stage progress.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (COMPLETED, 'Completed'),
+        (FAILED, 'Failed'),
+    ]
+
+    job_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    current_stage = models.CharField(max_length=50, blank=True, default="")
+    stages = models.JSONField(default=dict, blank=True)
+    file_name = models.CharField(max_length=255, blank=True, default="")
+    # Saved upload the job reads; removed by the task, or when the job is expired
+    upload_path = models.CharField(max_length=500, blank=True, default="")
+    report = models.ForeignKey(
+        FinancialReport,
+        on_delete=models.SET_NULL,
+        related_name='processing_jobs',
+        null=True,
+        blank=True
+    )
+    error = models.TextField(blank=True, default="")
+    http_status = models.IntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'processing_jobs'
+        ordering = ['-created_at']
+        verbose_name = 'Processing Job'
+        verbose_name_plural = 'Processing Jobs'
+        indexes = [
+            models.Index(fields=['status']),
+            models.Index(fields=['created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.file_name or self.job_id} - {self.status}"
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (self.COMPLETED, self.FAILED)
+
+    def to_api_response(self) -> Dict[str, Any]:
+        """Status payload returned by the polling endpoint"""
+        data = {
+            "success": self.status != self.FAILED,
+            "job_id": str(self.job_id),
+            "status": self.status,
+            "current_stage": self.current_stage,
+            "stages": self.stages,
+            "file_name": self.file_name,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+        if self.error:
+            data["error"] = self.error
+        if self.report_id:
+            data["report"] = self.report.to_api_response()
+        return data
+
+
 # ============================================
 # ACTIVITY LOGGING SIGNAL
 # ============================================
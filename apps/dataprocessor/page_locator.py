@@ -0,0 +1,232 @@
+# dataprocessor/page_locator.py
+"""
+Cheap first pass that finds the financial statement pages of a report.
+
+Annual reports are mostly narrative (chairman's letter, governance,
+sustainability). Each page is scored from its embedded text layer -
+statement titles, canonical line items, numeric density, table-like
+lines - plus ruling lines/rectangles from the page layout. Only the
+likely balance sheet, P&L and cash flow pages go on to OCR and into the
+LLM context.
+
+Pages without a text layer cannot be scored; they are kept when they sit
+next to a statement page, and every page is kept when the document has
+no text layer at all.
+"""
+import io
+import json
+import re
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional, Sequence
+
+import pdfplumber
+
+STATEMENT_TITLES = {
+    "balance": [
+        "balance sheet", "statement of financial position", "statement of assets and liabilities",
+    ],
+    "pl": [
+        "profit and loss", "statement of profit", "income statement", "statement of operations",
+        "statement of comprehensive income",
+    ],
+    "cash_flow": [
+        "cash flow statement", "statement of cash flows", "cash flows from operating",
+    ],
+}
+
+LINE_ITEMS = [
+    "share capital", "reserves and surplus", "other equity", "borrowings", "trade payables",
+    "trade receivables", "inventories", "cash and cash equivalents", "property, plant and equipment",
+    "total assets", "total equity and liabilities", "total liabilities", "current liabilities",
+    "current assets", "revenue from operations", "other income", "total income", "total expenses",
+    "finance costs", "depreciation", "profit before tax", "tax expense", "profit for the year",
+    "earnings per share", "net cash", "operating activities", "investing activities",
+    "financing activities",
+]
+
+NARRATIVE_TERMS = [
+    "chairman", "director's report", "directors' report", "corporate governance", "sustainability",
+    "our vision", "message from", "csr", "board of directors", "management discussion",
+    "independent auditor", "key audit matters", "notice is hereby",
+]
+
+NUMBER_RE = re.compile(r"\(?-?\d{1,3}(?:,\d{2,3})+(?:\.\d+)?\)?|\(?-?\d+\.\d+\)?|\b\d{4,}\b")
+WORD_RE = re.compile(r"[A-Za-z]{2,}")
+
+# Pages scoring at least this are treated as statement pages
+DEFAULT_MIN_SCORE = 35
+# Short documents are read in full - filtering would save little and risks dropping content
+MIN_PAGES_TO_FILTER = 8
+
+# Bump when scoring or selection changes - part of the extraction cache key
+LOCATOR_VERSION = "1"
+
+
+@dataclass
+class PageScore:
+    page: int
+    score: float = 0.0
+    section: Optional[str] = None
+    has_text_layer: bool = True
+    numeric_density: float = 0.0
+    table_lines: int = 0
+    kept: bool = False
+    reasons: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def score_page_text(text: str, page: int, layout_objects: int = 0) -> PageScore:
+    """Score one page from its text layer and the number of ruling lines/rects."""
+    text = text or ""
+    stripped = text.strip()
+    if len(stripped) < 20:
+        return PageScore(page=page, has_text_layer=False, reasons=["no text layer"])
+
+    lower = stripped.lower()
+    lines = [l for l in stripped.split("\n") if l.strip()]
+    numbers = NUMBER_RE.findall(stripped)
+    words = WORD_RE.findall(stripped)
+
+    result = PageScore(page=page)
+    result.numeric_density = round(len(numbers) / max(len(words), 1), 3)
+    result.table_lines = sum(1 for l in lines if len(NUMBER_RE.findall(l)) >= 2)
+
+    # 1. Statement titles (strongest signal)
+    head = "\n".join(lines[:12]).lower()
+    for section, titles in STATEMENT_TITLES.items():
+        if any(t in head for t in titles):
+            result.section = section
+            result.score += 40
+            result.reasons.append(f"{section} title")
+            break
+
+    # 2. Canonical line items
+    item_hits = sum(1 for term in LINE_ITEMS if term in lower)
+    if item_hits:
+        result.score += min(item_hits * 4, 30)
+        result.reasons.append(f"{item_hits} line items")
+
+    # 3. Numeric density and table-like lines
+    if result.numeric_density >= 0.15:
+        result.score += min(result.numeric_density * 60, 25)
+        result.reasons.append(f"numeric density {result.numeric_density}")
+    if lines and result.table_lines / len(lines) >= 0.3:
+        result.score += 15
+        result.reasons.append(f"{result.table_lines} table rows")
+
+    # 4. Layout: statements are usually ruled tables
+    if layout_objects >= 10:
+        result.score += 5
+        result.reasons.append("ruled layout")
+
+    # 5. Narrative pages
+    narrative_hits = sum(1 for term in NARRATIVE_TERMS if term in lower)
+    avg_words = len(words) / max(len(lines), 1)
+    if narrative_hits and result.section is None:
+        result.score -= 10 * narrative_hits
+        result.reasons.append(f"narrative terms ({narrative_hits})")
+    if avg_words > 14 and result.table_lines < 5:
+        result.score -= 10
+        result.reasons.append("prose layout")
+
+    result.score = round(result.score, 1)
+    return result
+
+
+def select_pages(scores: Sequence[PageScore], min_score: float = DEFAULT_MIN_SCORE,
+                 neighbors: int = 1) -> List[int]:
+    """
+    Mark the pages to keep and return their numbers in order.
+
+    Statement pages pull in the next `neighbors` pages because long
+    statements spill over; untexted neighbours are always kept as they may
+    be scanned continuation pages.
+    """
+    by_page = {s.page: s for s in scores}
+
+    if not any(s.has_text_layer for s in scores):
+        for s in scores:
+            s.kept = True
+            s.reasons.append("document has no text layer")
+        return [s.page for s in scores]
+
+    for s in scores:
+        if s.has_text_layer and s.score >= min_score:
+            s.kept = True
+
+    anchors = [s for s in scores if s.kept]
+    if not anchors:
+        # Nothing looked like a statement - safer to keep everything
+        for s in scores:
+            s.kept = True
+            s.reasons.append("no statement pages found")
+        return [s.page for s in scores]
+
+    for anchor in anchors:
+        for offset in range(1, neighbors + 1):
+            for page in (anchor.page - offset, anchor.page + offset):
+                other = by_page.get(page)
+                if other is None or other.kept:
+                    continue
+                if not other.has_text_layer or (offset == 1 and anchor.section and page > anchor.page):
+                    other.kept = True
+                    other.reasons.append(f"next to statement page {anchor.page}")
+
+    return [s.page for s in scores if s.kept]
+
+
+def score_texts(texts: Sequence[str]) -> List[PageScore]:
+    """Score pages already extracted elsewhere (e.g. by PyPDFLoader)."""
+    return [score_page_text(text, page) for page, text in enumerate(texts, 1)]
+
+
+def locate_financial_pages(pdf, min_score: float = DEFAULT_MIN_SCORE,
+                           neighbors: int = 1) -> Optional[List[PageScore]]:
+    """
+    Score every page of a PDF (path, bytes or file object) from its text layer.
+
+    Returns the scores with `kept` set, or None when the file cannot be
+    read - callers then fall back to processing every page.
+    """
+    if isinstance(pdf, (bytes, bytearray)):
+        pdf = io.BytesIO(pdf)
+
+    try:
+        scores = []
+        with pdfplumber.open(pdf) as doc:
+            for page_num, page in enumerate(doc.pages, 1):
+                text = page.extract_text() or ""
+                layout = len(page.lines) + len(page.rects)
+                scores.append(score_page_text(text, page_num, layout_objects=layout))
+    except Exception as e:
+        print(f"Page locator could not read PDF: {e}")
+        return None
+
+    select_pages(scores, min_score=min_score, neighbors=neighbors)
+    return scores
+
+
+def kept_pages(scores: Optional[Sequence[PageScore]]) -> Optional[List[int]]:
+    if scores is None:
+        return None
+    return [s.page for s in scores if s.kept]
+
+
+def rules_fingerprint() -> str:
+    """Everything that decides which pages are kept, for the extraction cache key."""
+    return json.dumps({
+        "version": LOCATOR_VERSION,
+        "titles": STATEMENT_TITLES,
+        "line_items": LINE_ITEMS,
+        "narrative": NARRATIVE_TERMS,
+        "number_re": NUMBER_RE.pattern,
+        "min_score": DEFAULT_MIN_SCORE,
+        "min_pages": MIN_PAGES_TO_FILTER,
+    }, sort_keys=True)
+
+
+def format_diagnostics(scores: Sequence[PageScore]) -> List[Dict]:
+    """Per-page report of what was kept and why."""
+    return [s.to_dict() for s in scores]
@@ -0,0 +1,327 @@
+# dataprocessor/pdf_engine.py
+"""
+Page-parallel PDF text extraction.
+
+OCR is CPU-bound and holds the GIL, so pages are spread over a process
+pool instead of threads. Work is sent as (pdf_path, page_numbers) chunks
+so each worker opens the file itself - only small strings cross the
+process boundary - and results are put back in page order.
+
+Used by services.load_pdf_robust (text layer + OCR fallback) and by
+utils.process_financial_file (image OCR). The OCR path streams: the
+upload is spooled to a temp file and imap_bounded() keeps only a few
+pages in flight, so peak memory follows the worker count rather than
+the page count.
+"""
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import pdfplumber
+import pytesseract
+from langchain_core.documents import Document
+
+# Pages with less embedded text than this are sent to OCR
+OCR_MIN_CHARS = 100
+# Copy uploads to disk in blocks of this size
+SPOOL_CHUNK_SIZE = 1024 * 1024
+DEFAULT_MAX_WORKERS = 4
+# Below this many tasks the pool start-up costs more than it saves
+MIN_TASKS_FOR_POOL = 3
+# The pool starts lazily, after the job queue and analysis threads are running;
+# forking a multithreaded process can leave children stuck on locks held at fork
+# time, so workers come from a clean server process. Override with PDF_POOL_START_METHOD.
+DEFAULT_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+PageRange = Union[str, Tuple[int, int], Sequence[int], None]
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _setting(name: str, default: Any) -> Any:
+    """Read a Django setting without making this module depend on Django being configured."""
+    try:
+        from django.conf import settings
+        if settings.configured:
+            return getattr(settings, name, default)
+    except Exception:
+        pass
+    return default
+
+
+def get_worker_count(workers: Optional[int] = None) -> int:
+    if workers is None:
+        workers = _setting("PDF_EXTRACTION_WORKERS", None)
+    if workers is None:
+        workers = min(DEFAULT_MAX_WORKERS, os.cpu_count() or 1)
+    return max(1, int(workers))
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            start_method = _setting("PDF_POOL_START_METHOD", None) or DEFAULT_START_METHOD
+            ctx = multiprocessing.get_context(start_method)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=ctx)
+            _pool_workers = workers
+        return _pool
+
+
+def _reset_pool() -> None:
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+        _pool_workers = 0
+
+
+def shutdown_pool() -> None:
+    _reset_pool()
+
+
+def _is_picklable(func: Callable) -> bool:
+    # Local functions/lambdas cannot reach a worker process
+    try:
+        pickle.dumps(func)
+        return True
+    except Exception:
+        return False
+
+
+def map_ordered(func: Callable, tasks: Iterable, workers: Optional[int] = None,
+                min_tasks_for_pool: int = MIN_TASKS_FOR_POOL) -> List[Any]:
+    """
+    Apply func to every task on the process pool and return results in task order.
+
+    func and the tasks must be picklable (top-level functions, plain data).
+    Small batches, workers=1 and a broken/unpicklable pool all fall back to
+    running inline, so callers never need a separate serial code path.
+    """
+    tasks = list(tasks)
+    workers = get_worker_count(workers)
+
+    if workers <= 1 or len(tasks) < min_tasks_for_pool or not _is_picklable(func):
+        return [func(task) for task in tasks]
+
+    try:
+        pool = _get_pool(workers)
+        chunksize = max(1, len(tasks) // (workers * 4))
+        return list(pool.map(func, tasks, chunksize=chunksize))
+    except (BrokenProcessPool, pickle.PicklingError, OSError) as e:
+        print(f"Process pool unavailable ({e}) - extracting pages inline")
+        _reset_pool()
+        return [func(task) for task in tasks]
+
+
+def imap_bounded(func: Callable, tasks: Iterable, workers: Optional[int] = None,
+                 max_in_flight: Optional[int] = None) -> Iterator[Any]:
+    """
+    Lazily apply func to tasks on the process pool, yielding results in task order.
+
+    At most max_in_flight tasks (default 2 per worker) are submitted at a
+    time, so a long document never has more than a handful of rendered
+    pages alive. Falls back to running inline like map_ordered().
+    """
+    workers = get_worker_count(workers)
+    if max_in_flight is None:
+        max_in_flight = workers * 2
+    max_in_flight = max(1, int(max_in_flight))
+
+    if workers <= 1 or not _is_picklable(func):
+        for task in tasks:
+            yield func(task)
+        return
+
+    tasks = iter(tasks)
+    pending = deque()
+    try:
+        pool = _get_pool(workers)
+        for task in tasks:
+            pending.append((task, pool.submit(func, task)))
+            if len(pending) >= max_in_flight:
+                yield pending.popleft()[1].result()
+        while pending:
+            yield pending.popleft()[1].result()
+    except (BrokenProcessPool, pickle.PicklingError, OSError) as e:
+        print(f"Process pool unavailable ({e}) - extracting pages inline")
+        _reset_pool()
+        # Redo whatever was still queued, then carry on with the rest inline
+        for task, future in pending:
+            future.cancel()
+            yield func(task)
+        for task in tasks:
+            yield func(task)
+
+
+@contextmanager
+def spooled_pdf(file) -> Iterator[str]:
+    """
+    Give a filesystem path for an uploaded PDF without reading it into memory.
+
+    Django's TemporaryUploadedFile is used in place; anything else (in-memory
+    uploads, plain file objects, raw bytes) is copied to a temp file in
+    SPOOL_CHUNK_SIZE blocks and removed afterwards.
+    """
+    if hasattr(file, "temporary_file_path"):
+        yield file.temporary_file_path()
+        return
+
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            if isinstance(file, (bytes, bytearray)):
+                out.write(file)
+            elif hasattr(file, "chunks"):
+                for chunk in file.chunks(SPOOL_CHUNK_SIZE):
+                    out.write(chunk)
+            else:
+                shutil.copyfileobj(file, out, SPOOL_CHUNK_SIZE)
+        yield path
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+# --- PAGE SELECTION ---
+
+def parse_page_range(page_range: PageRange, total_pages: int) -> List[int]:
+    """
+    Normalise a page selection to sorted 1-based page numbers.
+
+    Accepts "1-5,9", a (start, end) tuple (inclusive) or a list of pages.
+    Out-of-range pages are dropped.
+    """
+    if page_range is None or page_range == "":
+        return list(range(1, total_pages + 1))
+
+    pages = set()
+    if isinstance(page_range, str):
+        for part in page_range.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            if "-" in part:
+                start, end = part.split("-", 1)
+                start = int(start) if start.strip() else 1
+                end = int(end) if end.strip() else total_pages
+                pages.update(range(start, end + 1))
+            else:
+                pages.add(int(part))
+    elif isinstance(page_range, tuple) and len(page_range) == 2:
+        pages.update(range(int(page_range[0]), int(page_range[1]) + 1))
+    else:
+        pages.update(int(p) for p in page_range)
+
+    return sorted(p for p in pages if 1 <= p <= total_pages)
+
+
+def select_pages(total_pages: int, page_range: PageRange = None,
+                 max_pages: Optional[int] = None) -> List[int]:
+    """Apply the page range, then the per-document page budget."""
+    pages = parse_page_range(page_range, total_pages)
+    budget = page_budget(max_pages)
+    if budget is not None:
+        pages = pages[:budget]
+    return pages
+
+
+def page_budget(max_pages: Optional[int] = None) -> Optional[int]:
+    """Pages to read per document: max_pages, else PDF_MAX_PAGES; None (or <= 0) = no limit."""
+    if max_pages is None:
+        max_pages = _setting("PDF_MAX_PAGES", None)
+    if max_pages is not None and max_pages > 0:
+        return int(max_pages)
+    return None
+
+
+def _stripe(pages: List[int], n_chunks: int) -> List[List[int]]:
+    # Round-robin so text pages and scanned pages spread evenly over workers
+    n_chunks = max(1, min(n_chunks, len(pages)))
+    return [pages[i::n_chunks] for i in range(n_chunks)]
+
+
+# --- WORKER FUNCTIONS (must stay top-level so they pickle) ---
+
+def ocr_pdf_page(page) -> str:
+    pil_image = page.to_image().original
+    return pytesseract.image_to_string(pil_image)
+
+
+def extract_page_chunk(task: Tuple[str, List[int], int]) -> List[Tuple[int, str]]:
+    """Text layer first, OCR when the page has less than ocr_min_chars of text."""
+    pdf_path, page_numbers, ocr_min_chars = task
+    results = []
+    try:
+        with pdfplumber.open(pdf_path) as pdf:
+            for page_num in page_numbers:
+                page = pdf.pages[page_num - 1]
+                text = page.extract_text() or ""
+
+                if len(text.strip()) < ocr_min_chars:
+                    try:
+                        ocr_text = ocr_pdf_page(page)
+                        if len(ocr_text.strip()) > len(text.strip()):
+                            text = ocr_text
+                    except Exception as ocr_e:
+                        print(f"OCR failed on page {page_num}: {ocr_e}")
+
+                results.append((page_num, text))
+    except Exception as e:
+        print(f"Page extraction failed for pages {page_numbers[:3]}...: {e}")
+    return results
+
+
+# --- PUBLIC API ---
+
+def count_pages(pdf_path: str) -> int:
+    with pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages)
+
+
+def extract_pdf_pages(pdf_path: str, workers: Optional[int] = None,
+                      page_range: PageRange = None, max_pages: Optional[int] = None,
+                      ocr_min_chars: int = OCR_MIN_CHARS) -> List[Document]:
+    """
+    Extract text from the selected pages in parallel.
+
+    Returns one Document per non-empty page, in page order, with the same
+    metadata ({"page", "source"}) the serial pdfplumber loop produced.
+    """
+    pages = select_pages(count_pages(pdf_path), page_range, max_pages)
+    if not pages:
+        return []
+
+    workers = get_worker_count(workers)
+    chunks = _stripe(pages, workers * 2)
+    chunk_results = map_ordered(
+        extract_page_chunk,
+        [(pdf_path, chunk, ocr_min_chars) for chunk in chunks],
+        workers=workers,
+        min_tasks_for_pool=2,
+    )
+
+    page_texts = sorted(
+        (item for chunk in chunk_results for item in chunk),
+        key=lambda item: item[0],
+    )
+    return [
+        Document(page_content=text, metadata={"page": page_num, "source": pdf_path})
+        for page_num, text in page_texts
+        if text.strip()
+    ]
@@ -0,0 +1,273 @@
+# dataprocessor/rule_extractor.py
+"""
+Deterministic extraction of statement line items without an LLM.
+
+Text-layer PDFs and Excel/CSV uploads usually carry the statements as
+clean tables: a label followed by the current and previous year figures.
+These are parsed line by line, labels are matched against the canonical
+line items with rapidfuzz, and the result gets a confidence score from
+how many of the core balance sheet / P&L items were found and whether
+the balance sheet balances.
+
+services.extract_financial_data() runs this first and only calls the LLM
+when the confidence is below the threshold.
+"""
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+from rapidfuzz import fuzz, process
+
+# Bump when parsing or scoring changes - part of the extraction cache key
+RULES_VERSION = "1"
+
+DEFAULT_MIN_CONFIDENCE = 0.6
+FUZZY_CUTOFF = 85
+
+CANONICAL_TERMS = [
+    "Share capital", "Reserves and surplus", "Money received against share warrants",
+    "Share application money pending allotment", "Long-term borrowings",
+    "Deferred tax liabilities (net)", "Other long-term liabilities", "Long-term provisions",
+    "Short-term borrowings", "Trade payables", "Other current liabilities", "Short-term provisions",
+    "Total equity and liabilities", "Total liabilities", "Total assets", "Fixed assets",
+    "Property, plant and equipment", "Tangible assets", "Intangible assets",
+    "Capital work in progress", "Non-current investments", "Deferred tax assets (net)",
+    "Long-term loans and advances", "Other non-current assets", "Inventories",
+    "Trade receivables", "Cash and cash equivalents", "Bank balances",
+    "Current investments", "Other current assets", "Revenue from operations",
+    "Other income", "Total revenue", "Cost of materials consumed",
+    "Employee benefit expense", "Finance costs", "Depreciation and amortisation expense",
+    "Other expenses", "Total expenses", "Profit before tax", "Tax expense",
+    "Profit for the period", "Earnings per equity share - Basic", "Earnings per equity share - Diluted"
+]
+
+# Extra spellings of canonical items seen in Ind-AS / IFRS filings
+ALIASES = {
+    "other equity": "Reserves and surplus",
+    "total equity and liabilities": "Total equity and liabilities",
+    "total income": "Total revenue",
+    "revenue": "Revenue from operations",
+    "total revenue from operations": "Revenue from operations",
+    "employee benefits expense": "Employee benefit expense",
+    "depreciation and amortization expense": "Depreciation and amortisation expense",
+    "profit for the year": "Profit for the period",
+    "net profit": "Profit for the period",
+    "total tax expense": "Tax expense",
+    "borrowings": "Long-term borrowings",
+}
+
+# Items a complete filing is expected to show, per statement
+CORE_ITEMS = {
+    "balance": ["Share capital", "Reserves and surplus", "Trade payables", "Trade receivables",
+                "Cash and cash equivalents", "Total assets", "Total equity and liabilities"],
+    "pl": ["Revenue from operations", "Other income", "Total expenses", "Profit before tax",
+           "Tax expense", "Profit for the period"],
+}
+
+HEADER_WORDS = {"particulars", "note", "notes", "note no", "as at", "year ended", "for the year ended"}
+GENERIC_LABELS = {"total", "sub total", "sub-total", "subtotal", "others", "net"}
+
+_VALUE_RE = re.compile(r"^\(?-?(?:\d{1,3}(?:,\d{2,3})+|\d+)(?:\.\d+)?\)?$")
+_PLACEHOLDERS = {"-", "--", "–", "—", "nil", "na", "n/a"}
+_BULLET_RE = re.compile(r"^(?:\(?[a-z]{1,4}\)|\(?[ivx]{1,4}[.)]|\d{1,2}[.)])\s+", re.IGNORECASE)
+_COMPANY_RE = re.compile(r"\b(limited|ltd\.?|inc\.?|corporation|corp\.?|plc)\b", re.IGNORECASE)
+
+_CANONICAL_LOWER = [t.lower() for t in CANONICAL_TERMS]
+
+
+# --- LINE PARSING ---
+
+def parse_value(token: str) -> Tuple[bool, Optional[float]]:
+    """(is_value, number) for one cell; dashes and 'nil' are values without a number."""
+    token = token.strip().replace("₹", "")
+    if token.lower() in _PLACEHOLDERS:
+        return True, None
+    if not _VALUE_RE.match(token):
+        return False, None
+    negative = token.startswith("(") and token.endswith(")")
+    number = float(token.strip("()").replace(",", ""))
+    return True, -number if negative else number
+
+
+def _is_note_ref(token: str) -> bool:
+    return token.isdigit() and int(token) < 100
+
+
+def clean_label(label: str) -> str:
+    label = unicodedata.normalize("NFKC", label)
+    label = _BULLET_RE.sub("", label.strip())
+    label = re.sub(r"\s+", " ", label).strip(" :.-")
+    return label
+
+
+def parse_statement_line(line: str) -> Optional[Dict[str, Any]]:
+    """
+    Split "Trade payables 12 1,23,456.00 (2,345)" into label and figures.
+
+    Figures are read from the right so labels may contain digits; a small
+    integer right after the label is treated as the note reference.
+    Returns None for lines without figures.
+    """
+    tokens = line.split()
+    values: List[Tuple[str, Optional[float]]] = []
+    while tokens:
+        is_value, number = parse_value(tokens[-1])
+        if not is_value:
+            break
+        values.insert(0, (tokens.pop(), number))
+
+    if not values or not tokens:
+        return None
+    if len(values) >= 3 and _is_note_ref(values[0][0]):
+        values = values[1:]
+
+    label = clean_label(" ".join(tokens))
+    if len(label) < 3 or not re.search(r"[A-Za-z]{3,}", label):
+        return None
+    return {"label": label, "values": [number for _, number in values]}
+
+
+def _is_header(label: str, values: Sequence[Optional[float]]) -> bool:
+    if label.lower() in HEADER_WORDS:
+        return True
+    return all(v is not None and float(v).is_integer() and 1990 <= v <= 2100 for v in values)
+
+
+def match_canonical(label: str) -> Optional[str]:
+    key = label.lower()
+    if key in ALIASES:
+        return ALIASES[key]
+    result = process.extractOne(key, _CANONICAL_LOWER, scorer=fuzz.token_sort_ratio,
+                                score_cutoff=FUZZY_CUTOFF)
+    if result:
+        return CANONICAL_TERMS[result[2]]
+    return None
+
+
+# --- EXTRACTION ---
+
+def _find_company_name(lines: Sequence[str]) -> Optional[str]:
+    for line in lines[:40]:
+        text = line.strip()
+        if 5 < len(text) < 120 and _COMPANY_RE.search(text) and not parse_value(text.split()[-1])[0]:
+            return re.sub(r"\s+", " ", text)
+    return None
+
+
+def extract_from_lines(lines: Iterable[str]) -> Dict[str, Any]:
+    """Parse statement lines into the extract_raw_financial_data result shape."""
+    lines = [l for l in lines if l and l.strip()]
+    items = []
+    seen = set()
+    found: Dict[str, Dict[str, Any]] = {}
+    heading = None
+
+    for line in lines:
+        parsed = parse_statement_line(line)
+        if parsed is None:
+            label = clean_label(line)
+            if 3 <= len(label) <= 80 and not _COMPANY_RE.search(label):
+                heading = label
+            continue
+        if _is_header(parsed["label"], parsed["values"]):
+            continue
+
+        label = parsed["label"]
+        if label.lower() in GENERIC_LABELS and heading:
+            label = f"{heading}: {label}"
+
+        values = parsed["values"]
+        item = {
+            "particulars": label,
+            "current_year": values[0] if values else None,
+            "previous_year": values[1] if len(values) > 1 else None,
+        }
+        key = (label.lower(), item["current_year"], item["previous_year"])
+        if key in seen:
+            continue
+        seen.add(key)
+        items.append(item)
+
+        canonical = match_canonical(parsed["label"])
+        if canonical and canonical not in found:
+            found[canonical] = item
+
+    confidence, coverage = score_extraction(found, len(items))
+    return {
+        "company_name": _find_company_name(lines),
+        "ticker_symbol": None,
+        "financial_items": items,
+        "success": bool(items),
+        "extraction_method": "rules",
+        "confidence": confidence,
+        "coverage": coverage,
+    }
+
+
+def score_extraction(found: Dict[str, Dict[str, Any]], item_count: int) -> Tuple[float, Dict[str, Any]]:
+    """
+    Confidence in [0, 1]: 70% core item coverage, 20% balance sheet
+    balances, 10% number of rows (saturating at 30).
+    """
+    core = [term for terms in CORE_ITEMS.values() for term in terms]
+    matched = [term for term in core if term in found]
+    core_share = len(matched) / len(core)
+
+    balances = False
+    assets = found.get("Total assets", {}).get("current_year")
+    equity_liab = found.get("Total equity and liabilities", {}).get("current_year")
+    if assets and equity_liab:
+        balances = abs(assets - equity_liab) <= 0.01 * abs(assets)
+
+    confidence = 0.7 * core_share + (0.2 if balances else 0.0) + 0.1 * min(item_count, 30) / 30
+    coverage = {
+        "core_items_found": len(matched),
+        "core_items_total": len(core),
+        "missing": [term for term in core if term not in found],
+        "balance_check": balances,
+    }
+    return round(confidence, 3), coverage
+
+
+def extract_from_documents(documents: Sequence) -> Dict[str, Any]:
+    lines: List[str] = []
+    for doc in documents:
+        text = getattr(doc, "page_content", doc)
+        if isinstance(text, str):
+            lines.extend(text.split("\n"))
+    return extract_from_lines(lines)
+
+
+def extract_from_dataframe(df: pd.DataFrame) -> Dict[str, Any]:
+    """Rows of a spreadsheet: first text cell is the label, numeric cells the figures."""
+    lines = []
+    for row in df.itertuples(index=False):
+        label, figures = None, []
+        for cell in row:
+            if pd.isna(cell):
+                continue
+            text = str(cell).strip()
+            if not text:
+                continue
+            if pd.api.types.is_number(cell) or parse_value(text)[0]:
+                if label is not None:
+                    figures.append(text)
+            elif label is None:
+                label = text
+        if label:
+            lines.append(" ".join([label] + figures))
+    return extract_from_lines(lines)
+
+
+def extract_from_file(file_path: str, documents: Optional[Sequence] = None) -> Dict[str, Any]:
+    """Spreadsheets are read as tables; everything else from the loaded documents."""
+    lower = file_path.lower()
+    try:
+        if lower.endswith(".csv"):
+            return extract_from_dataframe(pd.read_csv(file_path))
+        if lower.endswith((".xlsx", ".xls")):
+            return extract_from_dataframe(pd.read_excel(file_path))
+    except Exception as e:
+        print(f"Rule extraction could not read spreadsheet: {e}")
+    return extract_from_documents(documents or [])
@@ -1,17 +1,22 @@
 import os
 import json
 import re
+import hashlib
+import itertools
 import logging
+import time
 import pandas as pd
-import pdfplumber
-import pytesseract
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 from typing import List, Optional, Dict, Any, Literal
 
+from django.conf import settings
 from langchain_community.document_loaders import PyPDFLoader, UnstructuredExcelLoader
 from langchain_groq import ChatGroq
 from langchain_core.documents import Document
 from pydantic import BaseModel, Field
 
+from . import context_builder, extraction_cache, llm_clients, page_locator, pdf_engine, rule_extractor
+
 logger = logging.getLogger(__name__)
 
 # --- Pydantic Schema for Extracted Data (Step 1) ---
@@ -102,48 +107,57 @@ def load_excel_file(file_path: str) -> List[Document]:
 
 # --- ROBUST PDF LOADING ---
 
-def load_pdf_robust(pdf_path: str) -> List[Document]:
-    """Load PDF with multiple fallback methods."""
+def load_pdf_robust(pdf_path: str, page_range=None, max_pages: Optional[int] = None,
+                    workers: Optional[int] = None, locate_pages: bool = True,
+                    diagnostics: Optional[List[Dict[str, Any]]] = None) -> List[Document]:
+    """
+    Load PDF with multiple fallback methods.
+
+    page_range ("1-20,45" or (start, end)) and max_pages (default
+    PDF_MAX_PAGES) limit which pages are read; workers sets the size of
+    the OCR process pool. With locate_pages, long reports are cut down to
+    their statement pages before OCR and context building; pass a list as
+    diagnostics to receive the per-page scores.
+    """
     print("Loading PDF...")
-    documents = []
 
     # Method 1: Try PyPDFLoader first (fastest)
     try:
         loader = PyPDFLoader(pdf_path)
-        docs = loader.load()
+        budget = pdf_engine.page_budget(max_pages)
+        if page_range is None and budget is not None:
+            # Stop parsing at the page budget instead of reading the whole file
+            docs = list(itertools.islice(loader.lazy_load(), budget))
+        else:
+            docs = loader.load()
+            wanted = set(pdf_engine.select_pages(len(docs), page_range, max_pages))
+            docs = [d for i, d in enumerate(docs, 1) if i in wanted]
         total_chars = sum(len(d.page_content.strip()) for d in docs)
 
         if total_chars > 2000:
             print(f"Standard extraction successful: {len(docs)} pages, {total_chars} chars")
+            if locate_pages:
+                docs = keep_financial_documents(docs, diagnostics)
             return docs
         else:
             print(f"Standard extraction poor quality: {total_chars} chars - trying OCR")
     except Exception as e:
         print(f"Standard extraction failed: {e} - trying OCR")
 
-    # Method 2: pdfplumber with OCR fallback
+    # Method 2: pdfplumber with OCR fallback, pages spread over a process pool
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for page_num, page in enumerate(pdf.pages, 1):
-                # Try text extraction first
-                text = page.extract_text() or ""
-
-                if len(text.strip()) < 100:
-                    try:
-                        # Convert page to image for OCR
-                        pil_image = page.to_image().original
-                        ocr_text = pytesseract.image_to_string(pil_image)
-                        if len(ocr_text.strip()) > len(text.strip()):
-                            text = ocr_text
-                    except Exception as ocr_e:
-                        print(f"OCR failed on page {page_num}: {ocr_e}")
-
-                if text.strip():
-                    documents.append(Document(
-                        page_content=text,
-                        metadata={"page": page_num, "source": pdf_path}
-                    ))
-
+        if locate_pages and page_range is None:
+            # Score pages from whatever text layer exists so OCR only runs on statement pages
+            scores = page_locator.locate_financial_pages(pdf_path)
+            if scores and len(scores) >= page_locator.MIN_PAGES_TO_FILTER:
+                page_range = page_locator.kept_pages(scores)
+                print(f"Page locator kept {len(page_range)}/{len(scores)} pages for OCR")
+                if diagnostics is not None:
+                    diagnostics.extend(page_locator.format_diagnostics(scores))
+
+        documents = pdf_engine.extract_pdf_pages(
+            pdf_path, workers=workers, page_range=page_range, max_pages=max_pages
+        )
         print(f"pdfplumber extraction: {len(documents)} pages")
         return documents
 
@@ -151,65 +165,57 @@ def load_pdf_robust(pdf_path: str) -> List[Document]:
         print(f"pdfplumber failed entirely: {e}")
         return []
 
+def keep_financial_documents(docs: List[Document],
+                             diagnostics: Optional[List[Dict[str, Any]]] = None) -> List[Document]:
+    """Drop narrative pages of a long text-layer PDF before building the LLM context."""
+    if len(docs) < page_locator.MIN_PAGES_TO_FILTER:
+        return docs
+
+    scores = [
+        page_locator.score_page_text(d.page_content, d.metadata.get("page", i) + 1)
+        for i, d in enumerate(docs)
+    ]
+    page_locator.select_pages(scores)
+    if diagnostics is not None:
+        diagnostics.extend(page_locator.format_diagnostics(scores))
+
+    kept = [d for d, score in zip(docs, scores) if score.kept]
+    print(f"Page locator kept {len(kept)}/{len(docs)} pages")
+    return kept
+
 # --- SMART CONTEXT PREPARATION ---
 
-def prepare_context_smart(documents: List[Document]) -> str:
-    """Prepare context with financial focus."""
-    all_text = "\n".join([doc.page_content for doc in documents])
-    
-    # If text is too long, focus on financial sections
-    if len(all_text) > 30000:
-        # Split into lines and prioritize financial content
-        lines = all_text.split('\n')
-        financial_lines = []
-        other_lines = []
-        
-        financial_keywords = [
-            'balance sheet', 'assets', 'liabilities', 'equity', 'share capital', 
-            'reserves', 'current assets', 'non-current assets', 'profit', 'loss', 
-            'revenue', 'sales', 'income', 'expenses', 'total', 'crores', 'lakhs', 
-            'financial statements', 'consolidated', 'standalone', 'cash flow',
-            'statement', 'account', 'financial', 'fiscal year', 'auditor'
-        ]
-        
-        for line in lines:
-            line_lower = line.lower()
-            if any(keyword in line_lower for keyword in financial_keywords):
-                financial_lines.append(line)
-            elif len(line.strip()) > 10:  # Non-empty lines
-                other_lines.append(line)
-        
-        # Combine with priority to financial lines
-        if len(financial_lines) > 100:
-            context_text = "\n".join(financial_lines[:200] + other_lines[:50])
-        else:
-            context_text = "\n".join(lines[:500])  # First 500 lines as fallback
-    else:
-        context_text = all_text
+# Hard limit on the prompt document, on top of the token budget
+MAX_CONTEXT_CHARS = 50000
 
-    return context_text[:50000]  # Hard limit
+
+def prepare_context_smart(documents: List[Document]) -> str:
+    """Prepare context with financial focus, packed into the extraction model's token budget."""
+    return context_builder.build_context(
+        documents, model=GROQ_MODEL_SELECTION["extraction"], max_chars=MAX_CONTEXT_CHARS
+    )
 
 # --- GEMINI 2.5 FLASH CONFIGURATION ---
 
+# Use only the most reliable models
+GROQ_MODEL_SELECTION = {
+    "extraction": "llama-3.1-8b-instant",      # Most reliable for extraction
+    "analysis": "llama-3.1-8b-instant",        # Use same model for consistency
+    "pros_cons": "llama-3.1-8b-instant",       # Avoid 70b models that have issues
+    "ratios": "llama-3.1-8b-instant",          # Fast and reliable
+    "summary": "llama-3.1-8b-instant"          # Consistent performance
+}
+
 def create_groq_llm(api_key: str, purpose: str = "extraction"):
     """Create Groq LLM with reliable model selection."""
     
-    # Use only the most reliable models
-    model_selection = {
-        "extraction": "llama-3.1-8b-instant",      # Most reliable for extraction
-        "analysis": "llama-3.1-8b-instant",        # Use same model for consistency
-        "pros_cons": "llama-3.1-8b-instant",       # Avoid 70b models that have issues
-        "ratios": "llama-3.1-8b-instant",          # Fast and reliable
-        "summary": "llama-3.1-8b-instant"          # Consistent performance
-    }
-    
     temperature = 0.1  # Lower temperature for more consistent results
     
-    model = model_selection.get(purpose, "llama-3.1-8b-instant")
+    model = GROQ_MODEL_SELECTION.get(purpose, "llama-3.1-8b-instant")
     
-    llm = ChatGroq(
-        model=model,
-        groq_api_key=api_key,
+    # One shared client per key/model/purpose - keeps the HTTP connection warm
+    llm = llm_clients.get_groq_chat(
+        api_key, model, purpose=purpose, chat_cls=ChatGroq,
         temperature=temperature,
         max_tokens=4096,  # Reduce token usage
         timeout=60,
@@ -296,6 +302,46 @@ def extract_raw_financial_data(context_text: str, api_key: str) -> Dict[str, Any
         # Fallback to manual extraction
         return extract_financial_data_manual(context_text, api_key)
 
+def rule_min_confidence() -> float:
+    """RULE_EXTRACTION_MIN_CONFIDENCE, or the rule extractor's default when unset."""
+    value = getattr(settings, 'RULE_EXTRACTION_MIN_CONFIDENCE', None)
+    return rule_extractor.DEFAULT_MIN_CONFIDENCE if value is None else float(value)
+
+def extract_financial_data(documents: List[Document], context_text: str, api_key: str,
+                           file_path: Optional[str] = None, min_confidence: Optional[float] = None,
+                           llm_extract=None) -> Dict[str, Any]:
+    """
+    Rule-based extraction first; the LLM only runs when the rules cover too
+    few of the core line items (confidence below min_confidence).
+
+    llm_extract defaults to extract_raw_financial_data; callers may pass
+    their own so it can be patched where they import it.
+    """
+    if min_confidence is None:
+        min_confidence = rule_min_confidence()
+    llm_extract = llm_extract or extract_raw_financial_data
+
+    try:
+        if file_path:
+            rule_result = rule_extractor.extract_from_file(file_path, documents)
+        else:
+            rule_result = rule_extractor.extract_from_documents(documents)
+    except Exception as e:
+        print(f"⚠️ Rule-based extraction failed: {e}")
+        rule_result = {"success": False, "confidence": 0.0}
+
+    confidence = rule_result.get("confidence", 0.0)
+    if rule_result.get("success") and confidence >= min_confidence:
+        print(f"✅ Rule-based extraction: {len(rule_result['financial_items'])} items, confidence {confidence}")
+        return rule_result
+
+    print(f"Rule-based confidence {confidence} below {min_confidence} - using LLM extraction")
+    result = llm_extract(context_text, api_key)
+    if isinstance(result, dict) and result.get("success"):
+        result.setdefault("extraction_method", "llm")
+        result.setdefault("rule_confidence", confidence)
+    return result
+
 def extract_financial_data_manual(context_text: str, api_key: str) -> Dict[str, Any]:
     """Manual extraction fallback using Gemini 2.5 Flash."""
     try:
@@ -473,6 +519,78 @@ def generate_ratios_from_data(financial_items: List[Dict[str, Any]], api_key: st
         print(f"❌ Ratio calculation failed: {e}")
         return {"error": f"Ratio calculation failed: {str(e)}", "success": False}
 
+# --- CONCURRENT ANALYSIS (summary + ratios) ---
+
+DEFAULT_ANALYSIS_TIMEOUT = 90  # seconds, per LLM call
+
+def _timed_call(fn, financial_items: List[Dict[str, Any]], api_key: str):
+    start = time.perf_counter()
+    try:
+        result = fn(financial_items, api_key)
+    except Exception as e:
+        result = {"error": str(e), "success": False}
+    return result, round((time.perf_counter() - start) * 1000, 1)
+
+def analysis_timeout() -> float:
+    """LLM_ANALYSIS_TIMEOUT, or DEFAULT_ANALYSIS_TIMEOUT when unset."""
+    value = getattr(settings, 'LLM_ANALYSIS_TIMEOUT', None)
+    return DEFAULT_ANALYSIS_TIMEOUT if value is None else float(value)
+
+def run_analysis_stages(financial_items: List[Dict[str, Any]], api_key: str,
+                        timeout: Optional[float] = None,
+                        summary_fn=None, ratios_fn=None) -> Dict[str, Any]:
+    """
+    Run summary and ratio generation side by side.
+
+    Both calls only read financial_items, so latency is roughly
+    max(summary, ratios) instead of their sum. A call that fails or
+    exceeds the timeout comes back as {"success": False, ...} while the
+    other result is still returned.
+    """
+    summary_fn = summary_fn or generate_summary_from_data
+    ratios_fn = ratios_fn or generate_ratios_from_data
+    if timeout is None:
+        timeout = analysis_timeout()
+
+    start = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="fingenie-analysis")
+    futures = {
+        "summary": executor.submit(_timed_call, summary_fn, financial_items, api_key),
+        "ratios": executor.submit(_timed_call, ratios_fn, financial_items, api_key),
+    }
+    deadline = start + timeout
+
+    results, timings = {}, {}
+    for name, future in futures.items():
+        try:
+            results[name], timings[f"{name}_ms"] = future.result(timeout=max(0, deadline - time.perf_counter()))
+        except FuturesTimeoutError:
+            future.cancel()
+            print(f"❌ {name.title()} generation timed out after {timeout}s")
+            results[name] = {"error": f"{name.title()} generation timed out after {timeout}s", "success": False, "timed_out": True}
+            timings[f"{name}_ms"] = None
+
+    # Never block the request on a hung call; its thread ends with the LLM client timeout
+    executor.shutdown(wait=False, cancel_futures=True)
+    timings["analysis_wall_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+    return {"summary": results["summary"], "ratios": results["ratios"], "timings": timings}
+
+# --- PIPELINE VERSION (extraction cache key) ---
+
+def compute_pipeline_version() -> str:
+    """Hash of everything that shapes the extraction output; bumps invalidate cached extractions."""
+    parts = [
+        EXTRACTION_PROMPT, SUMMARY_PROMPT, RATIO_PROMPT,
+        json.dumps(GROQ_MODEL_SELECTION, sort_keys=True),
+        json.dumps(context_builder.MODEL_TOKEN_BUDGETS, sort_keys=True), str(MAX_CONTEXT_CHARS),
+        rule_extractor.RULES_VERSION, str(rule_min_confidence()),
+        page_locator.rules_fingerprint(),
+    ]
+    return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+
+PIPELINE_VERSION = compute_pipeline_version()
+
 # --- MAIN PROCESSING FUNCTION ---
 
 def process_financial_statements(file_path: str, google_api_key: str) -> Dict[str, Any]:
@@ -493,6 +611,15 @@ def process_financial_statements(file_path: str, google_api_key: str) -> Dict[st
         return {"error": f"File not found: {file_path}", "success": False}
     
     try:
+        # Step 0: Reuse a previous run of the exact same file
+        content_hash = extraction_cache.hash_file(file_path)
+        cached = extraction_cache.lookup(content_hash, PIPELINE_VERSION)
+        if cached:
+            return build_processing_result(
+                cached["extracted_data"], cached["summary"], cached["ratios"],
+                file_path, cached["content_length"], cache_hit=True
+            )
+
         # Step 1: Load document
         print("📄 Step 1: Loading document...")
         documents = load_financial_document(file_path)
@@ -509,48 +636,57 @@ def process_financial_statements(file_path: str, google_api_key: str) -> Dict[st
         
         # Step 3: Extract raw financial data
         print("💾 Step 3: Extracting financial data...")
-        extraction_result = extract_raw_financial_data(context_text, google_api_key)
+        extraction_result = extract_financial_data(documents, context_text, google_api_key, file_path=file_path)
         if not extraction_result.get("success"):
             return extraction_result
         
-        # Step 4: Generate summary
-        print("📈 Step 4: Generating financial summary...")
-        summary_result = generate_summary_from_data(
-            extraction_result["financial_items"], 
-            google_api_key
+        # Step 4: Generate summary and calculate ratios concurrently
+        print("📈 Step 4: Generating financial summary and ratios...")
+        analysis = run_analysis_stages(
+            extraction_result["financial_items"], google_api_key, timeout=analysis_timeout()
         )
+        summary_result = analysis["summary"]
+        ratio_result = analysis["ratios"]
         
-        # Step 5: Calculate ratios
-        print("🧮 Step 5: Calculating financial ratios...")
-        ratio_result = generate_ratios_from_data(
-            extraction_result["financial_items"],
-            google_api_key
+        extraction_cache.store(
+            content_hash, PIPELINE_VERSION,
+            extraction_result, summary_result, ratio_result,
+            content_length=len(context_text)
         )
-        
-        # Compile final result
-        final_result = {
-            "success": True,
-            "company_info": {
-                "company_name": extraction_result.get("company_name"),
-                "ticker_symbol": extraction_result.get("ticker_symbol")
-            },
-            "extracted_data": extraction_result,
-            "summary": summary_result,
-            "ratios": ratio_result,
-            "metadata": {
-                "file_type": detect_file_type(file_path),
-                "content_length": len(context_text),
-                "items_extracted": len(extraction_result.get("financial_items", [])),
-                "ai_model": "gemini-pro"
-            }
-        }
-        
+
         print("✅ Processing completed successfully!")
-        return final_result
+        return build_processing_result(
+            extraction_result, summary_result, ratio_result,
+            file_path, len(context_text), stage_timings=analysis["timings"]
+        )
         
     except Exception as e:
         print(f"Processing failed: {e}")
         return {"error": f"Processing failed: {str(e)}", "success": False}
+
+def build_processing_result(extraction_result: Dict[str, Any], summary_result: Dict[str, Any],
+                            ratio_result: Dict[str, Any], file_path: str, content_length: int,
+                            cache_hit: bool = False,
+                            stage_timings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Compile the final response of process_financial_statements."""
+    return {
+        "success": True,
+        "company_info": {
+            "company_name": extraction_result.get("company_name"),
+            "ticker_symbol": extraction_result.get("ticker_symbol")
+        },
+        "extracted_data": extraction_result,
+        "summary": summary_result,
+        "ratios": ratio_result,
+        "metadata": {
+            "file_type": detect_file_type(file_path),
+            "content_length": content_length,
+            "items_extracted": len(extraction_result.get("financial_items", [])),
+            "ai_model": "gemini-pro",
+            "cache_hit": cache_hit,
+            "stage_timings": stage_timings or {}
+        }
+    }
     
 # Add this to your services.py
 
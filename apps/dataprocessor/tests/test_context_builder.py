@@ -0,0 +1,57 @@
+# apps/dataprocessor/tests/test_context_builder.py
+from langchain_core.documents import Document
+
+from apps.dataprocessor import context_builder
+
+
+NARRATIVE = (
+    "Message from the Chairman\n"
+    "Dear shareholders, our vision is to grow responsibly with every stakeholder in mind.\n"
+    "The board of directors thanks all employees for a year of dedication and hard work.\n"
+)
+
+STATEMENT = "Balance Sheet as at 31 March 2024\n" + "\n".join(
+    f"Trade receivables {i} 1,234.50 2,345.60" for i in range(20)
+)
+
+
+def test_keyword_matcher_prefers_longest_keyword_in_one_pass():
+    matcher = context_builder.KeywordMatcher({"assets": 1, "current assets": 2, "cash": 1})
+    assert matcher.find_all("Total Current Assets and cash; cashew assets") == ["current assets", "cash", "assets"]
+    assert matcher.score("current assets, assets") == 3
+
+
+def test_split_blocks_keeps_table_rows_together():
+    blocks = context_builder.split_blocks(STATEMENT.split("\n") + [""] + NARRATIVE.split("\n"))
+
+    tables = [b for b in blocks if b.is_table]
+    # The dated title travels with its rows
+    assert len(tables) == 1 and len(tables[0].lines) == 21
+    assert tables[0].lines[0] == "Balance Sheet as at 31 March 2024"
+    assert not blocks[-1].is_table
+
+
+def test_build_context_packs_statements_within_budget():
+    docs = [Document(page_content=NARRATIVE * 5) for _ in range(20)]
+    docs[12] = Document(page_content=STATEMENT)
+
+    pack = context_builder.build_context_pack(docs, token_budget=400)
+
+    assert pack.tokens <= 400
+    assert "Balance Sheet as at 31 March 2024" in pack.text
+    assert "Trade receivables 19" in pack.text
+    assert pack.sections.get("balance")
+    assert pack.blocks_kept < pack.blocks_total
+
+
+def test_build_context_keeps_document_order():
+    text = STATEMENT + "\n\n" + NARRATIVE * 30 + "\nStatement of Profit and Loss\nRevenue from operations 10,000.00 9,000.00"
+
+    out = context_builder.build_context(text, token_budget=500)
+
+    assert out.index("Balance Sheet") < out.index("Statement of Profit and Loss")
+
+
+def test_token_budget_reserves_prompt_and_output():
+    assert context_builder.token_budget_for("unknown-model") == context_builder.DEFAULT_TOKEN_BUDGET
+    assert context_builder.token_budget_for("llama-3.1-8b-instant", max_output_tokens=130000) < 1100
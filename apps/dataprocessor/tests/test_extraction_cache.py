@@ -0,0 +1,169 @@
+# apps/dataprocessor/tests/test_extraction_cache.py
+from unittest.mock import patch
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.urls import reverse
+
+from apps.dataprocessor import extraction_cache, services
+from apps.dataprocessor.models import ExtractionCache
+
+
+EXTRACTED = {
+    "success": True,
+    "company_name": "Acme",
+    "ticker_symbol": "ACM",
+    "financial_items": [{"particulars": "Revenue", "current_year": 100, "previous_year": 90}],
+}
+SUMMARY = {"success": True, "pros": ["+"], "cons": ["-"], "financial_health_summary": "ok"}
+RATIOS = {"success": True, "financial_ratios": [{"ratio_name": "Current Ratio", "result": 1.5}]}
+
+
+@pytest.fixture(autouse=True)
+def _fresh_stats():
+    extraction_cache.reset_stats()
+    yield
+    extraction_cache.reset_stats()
+
+
+def test_hash_file_is_content_addressed(tmp_path):
+    a = tmp_path / "a.pdf"
+    b = tmp_path / "b.pdf"
+    a.write_bytes(b"%PDF-1.4 same bytes")
+    b.write_bytes(b"%PDF-1.4 same bytes")
+    assert extraction_cache.hash_file(str(a)) == extraction_cache.hash_file(str(b))
+
+    b.write_bytes(b"%PDF-1.4 other bytes")
+    assert extraction_cache.hash_file(str(a)) != extraction_cache.hash_file(str(b))
+
+
+@pytest.mark.django_db
+def test_store_then_lookup_counts_hits_and_misses():
+    assert extraction_cache.lookup("h1", "v1") is None
+
+    assert extraction_cache.store("h1", "v1", EXTRACTED, SUMMARY, RATIOS, content_length=500)
+    cached = extraction_cache.lookup("h1", "v1")
+
+    assert cached["extracted_data"]["company_name"] == "Acme"
+    assert cached["ratios"]["financial_ratios"][0]["result"] == 1.5
+    assert cached["content_length"] == 500
+    assert ExtractionCache.objects.get(content_hash="h1").hit_count == 1
+
+    stats = extraction_cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["stores"] == 1
+    assert stats["entries"] == 1
+
+
+@pytest.mark.django_db
+def test_pipeline_version_change_is_a_miss():
+    extraction_cache.store("h1", "v1", EXTRACTED, SUMMARY, RATIOS)
+    assert extraction_cache.lookup("h1", "v2") is None
+
+
+@pytest.mark.django_db
+def test_partial_results_are_not_cached():
+    failed_summary = {"success": False, "error": "timeout"}
+    assert extraction_cache.store("h1", "v1", EXTRACTED, failed_summary, RATIOS) is False
+    assert ExtractionCache.objects.count() == 0
+
+
+@pytest.mark.django_db
+@override_settings(EXTRACTION_CACHE_MAX_ENTRIES=2)
+def test_evicts_least_recently_used_above_limit():
+    extraction_cache.store("h1", "v1", EXTRACTED, SUMMARY, RATIOS)
+    extraction_cache.store("h2", "v1", EXTRACTED, SUMMARY, RATIOS)
+    extraction_cache.lookup("h1", "v1")  # h1 becomes most recent
+    extraction_cache.store("h3", "v1", EXTRACTED, SUMMARY, RATIOS)
+
+    remaining = set(ExtractionCache.objects.values_list("content_hash", flat=True))
+    assert remaining == {"h1", "h3"}
+    assert extraction_cache.get_stats()["evictions"] == 1
+
+
+def test_pipeline_version_covers_locator_rules_and_rule_threshold(monkeypatch):
+    base = services.compute_pipeline_version()
+
+    with override_settings(RULE_EXTRACTION_MIN_CONFIDENCE=0.9):
+        assert services.compute_pipeline_version() != base
+
+    monkeypatch.setattr(services.page_locator, "LINE_ITEMS", services.page_locator.LINE_ITEMS + ["goodwill"])
+    assert services.compute_pipeline_version() != base
+
+
+@pytest.mark.django_db
+@override_settings(EXTRACTION_CACHE_ENABLED=False)
+def test_disabled_cache_is_a_no_op():
+    assert extraction_cache.store("h1", "v1", EXTRACTED, SUMMARY, RATIOS) is False
+    assert extraction_cache.lookup("h1", "v1") is None
+
+
+def test_lookup_fails_open_without_database():
+    # No django_db mark: any DB access raises, which must count as a miss
+    assert extraction_cache.lookup("h1", "v1") is None
+    assert extraction_cache.get_stats()["errors"] == 1
+
+
+@pytest.mark.django_db
+def test_process_financial_statements_second_run_skips_llm(tmp_path):
+    f = tmp_path / "fin.pdf"
+    f.write_bytes(b"%PDF-1.4 annual report")
+
+    with patch.object(services, "load_financial_document", return_value=[services.Document(page_content="Revenue 100")]), \
+         patch.object(services, "prepare_context_smart", return_value=("Revenue 100 " * 10)), \
+         patch.object(services, "extract_raw_financial_data", return_value=EXTRACTED) as mock_extract, \
+         patch.object(services, "generate_summary_from_data", return_value=SUMMARY) as mock_summary, \
+         patch.object(services, "generate_ratios_from_data", return_value=RATIOS) as mock_ratios:
+        first = services.process_financial_statements(str(f), google_api_key="k")
+        second = services.process_financial_statements(str(f), google_api_key="k")
+
+    assert first["metadata"]["cache_hit"] is False
+    assert second["metadata"]["cache_hit"] is True
+    assert second["company_info"]["ticker_symbol"] == "ACM"
+    assert second["metadata"]["content_length"] == first["metadata"]["content_length"]
+    assert mock_extract.call_count == 1
+    assert mock_summary.call_count == 1
+    assert mock_ratios.call_count == 1
+
+
+@pytest.mark.django_db
+def test_process_api_reuploaded_file_served_from_cache(client):
+    url = reverse("process_financial_statements")
+
+    with (
+        patch("apps.dataprocessor.views.load_pdf_robust", return_value=["page1"]),
+        patch("apps.dataprocessor.views.prepare_context_smart", return_value="a" * 400),
+        patch("apps.dataprocessor.views.extract_raw_financial_data", return_value=EXTRACTED) as mock_extract,
+        patch("apps.dataprocessor.views.generate_summary_from_data", return_value=SUMMARY),
+        patch("apps.dataprocessor.views.generate_ratios_from_data", return_value=RATIOS),
+    ):
+        for _ in range(2):
+            upload = SimpleUploadedFile("report.pdf", b"%PDF-SAME%", content_type="application/pdf")
+            response = client.post(url, {"file": upload, "api_key": "ABC123"})
+            assert response.status_code == 200
+
+    data = response.json()
+    assert data["metadata"]["cache_hit"] is True
+    assert data["summary"]["pros"] == ["+"]
+    assert mock_extract.call_count == 1
+
+    status = client.get(reverse("extraction_cache_status")).json()
+    assert status["cache"]["hits"] == 1
+    assert status["cache"]["entries"] == 1
+
+
+@pytest.mark.django_db
+def test_clearing_the_cache_requires_staff(client, django_user_model):
+    extraction_cache.store("h1", "v1", EXTRACTED, SUMMARY, RATIOS)
+    url = reverse("extraction_cache_status")
+
+    assert client.post(url, {"action": "clear"}).status_code == 403
+    assert ExtractionCache.objects.count() == 1
+
+    client.force_login(django_user_model.objects.create_user("ops", password="x", is_staff=True))
+    response = client.post(url, {"action": "clear"})
+
+    assert response.json() == {"success": True, "deleted": 1}
+    assert ExtractionCache.objects.count() == 0
@@ -0,0 +1,89 @@
+# apps/dataprocessor/tests/test_llm_clients.py
+from unittest.mock import MagicMock
+
+from apps.dataprocessor import llm_clients
+
+
+def test_groq_client_is_built_once_per_key_model_and_purpose():
+    chat_cls = MagicMock(side_effect=lambda **kw: MagicMock(kwargs=kw))
+
+    a = llm_clients.get_groq_chat("key-1", "llama-3.1-8b-instant", purpose="summary", chat_cls=chat_cls)
+    b = llm_clients.get_groq_chat("key-1", "llama-3.1-8b-instant", purpose="summary", chat_cls=chat_cls)
+    c = llm_clients.get_groq_chat("key-1", "llama-3.1-8b-instant", purpose="ratios", chat_cls=chat_cls)
+    d = llm_clients.get_groq_chat("key-2", "llama-3.1-8b-instant", purpose="summary", chat_cls=chat_cls)
+
+    assert a is b
+    assert len({id(a), id(c), id(d)}) == 3
+    assert chat_cls.call_count == 3
+    assert a.kwargs["groq_api_key"] == "key-1"
+    # All Groq clients share one keep-alive pool
+    assert a.kwargs.get("http_client") is c.kwargs.get("http_client")
+
+
+def test_gemini_is_configured_once_per_key():
+    sdk = MagicMock()
+
+    llm_clients.configure_gemini("k1", sdk=sdk)
+    llm_clients.configure_gemini("k1", sdk=sdk)
+    llm_clients.configure_gemini("k2", sdk=sdk)
+
+    assert [c.kwargs["api_key"] for c in sdk.configure.call_args_list] == ["k1", "k2"]
+
+
+def test_gemini_models_are_reused():
+    sdk = MagicMock()
+    config = {"response_mime_type": "application/json"}
+
+    m1 = llm_clients.get_gemini_model("models/gemini-2.5-flash", "k", sdk=sdk, generation_config=config)
+    m2 = llm_clients.get_gemini_model("models/gemini-2.5-flash", "k", sdk=sdk, generation_config=config)
+
+    assert m1 is m2
+    sdk.GenerativeModel.assert_called_once_with(model_name="models/gemini-2.5-flash", generation_config=config)
+
+
+def test_failing_models_cool_down_and_move_to_the_back():
+    candidates = ["models/a", "models/b", "models/c"]
+
+    llm_clients.record_failure("gemini", "models/a", "404 not found", api_key="k")
+    assert llm_clients.healthy_candidates("gemini", candidates, "k") == ["models/b", "models/c", "models/a"]
+    health = llm_clients.model_health()
+    assert [v["failures"] for k, v in health.items() if k.endswith(":models/a")] == [1]
+
+    llm_clients.record_success("gemini", "models/a", api_key="k")
+    assert llm_clients.healthy_candidates("gemini", candidates, "k") == candidates
+
+
+def test_one_keys_failures_do_not_cool_models_down_for_other_keys():
+    candidates = ["models/a", "models/b"]
+
+    llm_clients.record_failure("gemini", "models/a", "API key not valid", api_key="bad-key")
+
+    assert llm_clients.healthy_candidates("gemini", candidates, "bad-key") == ["models/b", "models/a"]
+    assert llm_clients.healthy_candidates("gemini", candidates, "good-key") == candidates
+    assert "bad-key" not in str(llm_clients.model_health())
+
+
+def test_client_registry_is_bounded(settings):
+    settings.LLM_CLIENT_CACHE_SIZE = 2
+    chat_cls = MagicMock(side_effect=lambda **kw: MagicMock(kwargs=kw))
+
+    first = llm_clients.get_groq_chat("key-1", "m", chat_cls=chat_cls)
+    llm_clients.get_groq_chat("key-2", "m", chat_cls=chat_cls)
+    llm_clients.get_groq_chat("key-1", "m", chat_cls=chat_cls)  # key-1 becomes most recent
+    llm_clients.get_groq_chat("key-3", "m", chat_cls=chat_cls)
+
+    stats = llm_clients.get_stats()
+    assert stats["clients"] == 2
+    assert stats["evicted"] == 1
+    assert llm_clients.get_groq_chat("key-1", "m", chat_cls=chat_cls) is first
+    assert chat_cls.call_count == 3
+
+
+def test_failure_drops_the_cached_client():
+    sdk = MagicMock()
+    llm_clients.get_gemini_model("models/a", "k", sdk=sdk)
+
+    llm_clients.record_failure("gemini", "models/a", "connection reset", api_key="k")
+    llm_clients.get_gemini_model("models/a", "k", sdk=sdk)
+
+    assert sdk.GenerativeModel.call_count == 2
@@ -0,0 +1,116 @@
+# apps/dataprocessor/tests/test_page_locator.py
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_pdf import PdfPages
+from langchain_core.documents import Document
+
+from apps.dataprocessor import page_locator
+from apps.dataprocessor.page_locator import PageScore
+
+
+NARRATIVE = (
+    "Message from the Chairman\n"
+    "Dear shareholders, it gives me great pleasure to present the annual report of your company for the year.\n"
+    "Our vision remains to build a sustainable business that serves customers and communities across the country.\n"
+    "The board of directors thanks every employee for their dedication during a challenging and rewarding year."
+)
+
+BALANCE = "\n".join([
+    "Standalone Balance Sheet as at 31 March 2024",
+    "Particulars Note 31.03.2024 31.03.2023",
+    "Share capital 1 1,250.00 1,250.00",
+    "Other equity 2 45,678.12 40,123.45",
+    "Borrowings 3 12,345.67 11,234.56",
+    "Trade payables 4 8,765.43 7,654.32",
+    "Property, plant and equipment 5 34,567.89 33,456.78",
+    "Inventories 6 9,876.54 8,765.43",
+    "Trade receivables 7 6,543.21 5,432.10",
+    "Cash and cash equivalents 8 2,345.67 1,234.56",
+    "Total assets 67,989.22 60,262.33",
+])
+
+
+def _make_pdf(path, page_texts):
+    with PdfPages(path) as pdf:
+        for text in page_texts:
+            fig = plt.figure(figsize=(8.5, 11))
+            for i, line in enumerate(text.split("\n")):
+                fig.text(0.05, 0.95 - i * 0.03, line, fontsize=8)
+            pdf.savefig(fig)
+            plt.close(fig)
+    return str(path)
+
+
+def test_statement_page_outscores_narrative_page():
+    statement = page_locator.score_page_text(BALANCE, 1)
+    narrative = page_locator.score_page_text(NARRATIVE, 2)
+
+    assert statement.section == "balance"
+    assert statement.score >= page_locator.DEFAULT_MIN_SCORE
+    assert narrative.score < page_locator.DEFAULT_MIN_SCORE
+
+
+def test_page_without_text_layer_is_flagged():
+    score = page_locator.score_page_text("   ", 3)
+    assert score.has_text_layer is False
+    assert score.score == 0
+
+
+def test_select_pages_keeps_statement_and_continuation_pages():
+    scores = [
+        PageScore(page=1, score=-10),
+        PageScore(page=2, score=60, section="balance"),
+        PageScore(page=3, score=10),                        # spill-over page
+        PageScore(page=4, score=-20),
+        PageScore(page=5, has_text_layer=False),
+        PageScore(page=6, score=50, section="pl"),
+    ]
+
+    assert page_locator.select_pages(scores) == [2, 3, 5, 6]
+    assert "next to statement page 6" in scores[4].reasons
+
+
+def test_select_pages_keeps_everything_without_text_layer_or_anchors():
+    scanned = [PageScore(page=n, has_text_layer=False) for n in range(1, 4)]
+    assert page_locator.select_pages(scanned) == [1, 2, 3]
+
+    weak = [PageScore(page=n, score=5) for n in range(1, 4)]
+    assert page_locator.select_pages(weak) == [1, 2, 3]
+
+
+def test_locate_financial_pages_on_pdf(tmp_path):
+    texts = [NARRATIVE] * 4 + [BALANCE] + [NARRATIVE] * 4
+    path = _make_pdf(tmp_path / "annual_report.pdf", texts)
+
+    scores = page_locator.locate_financial_pages(path)
+
+    assert page_locator.kept_pages(scores) == [5, 6]
+    diagnostics = page_locator.format_diagnostics(scores)
+    assert diagnostics[4]["section"] == "balance"
+    assert diagnostics[0]["kept"] is False
+
+
+def test_locate_financial_pages_fails_open_on_unreadable_input():
+    assert page_locator.locate_financial_pages(b"%PDF fake") is None
+    assert page_locator.kept_pages(None) is None
+
+
+def test_keep_financial_documents_filters_long_reports():
+    from apps.dataprocessor.services import keep_financial_documents
+
+    docs = [Document(page_content=NARRATIVE, metadata={"page": i}) for i in range(9)]
+    docs[6] = Document(page_content=BALANCE, metadata={"page": 6})
+    diagnostics = []
+
+    kept = keep_financial_documents(docs, diagnostics)
+
+    assert [d.metadata["page"] for d in kept] == [6, 7]
+    assert len(diagnostics) == 9
+
+
+def test_keep_financial_documents_leaves_short_reports_alone():
+    from apps.dataprocessor.services import keep_financial_documents
+
+    docs = [Document(page_content=NARRATIVE, metadata={"page": i}) for i in range(3)]
+    assert keep_financial_documents(docs) == docs
@@ -0,0 +1,120 @@
+# apps/dataprocessor/tests/test_pdf_engine.py
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_pdf import PdfPages
+import pytest
+
+from apps.dataprocessor import pdf_engine
+
+
+def _make_pdf(path, page_texts):
+    """Write a text-layer PDF with one figure per page."""
+    with PdfPages(path) as pdf:
+        for text in page_texts:
+            fig = plt.figure(figsize=(8.5, 11))
+            for i, line in enumerate(text.split("\n")):
+                fig.text(0.05, 0.95 - i * 0.03, line, fontsize=8)
+            pdf.savefig(fig)
+            plt.close(fig)
+    return str(path)
+
+
+def _page_text(n):
+    return "\n".join([f"PAGE {n} Balance Sheet"] + [f"Line item {n}-{i} 1,234 5,678" for i in range(8)])
+
+
+@pytest.fixture(autouse=True)
+def _fresh_pool():
+    yield
+    pdf_engine.shutdown_pool()
+
+
+def test_parse_page_range_forms():
+    assert pdf_engine.parse_page_range(None, 4) == [1, 2, 3, 4]
+    assert pdf_engine.parse_page_range("1-3, 7, 9-", 10) == [1, 2, 3, 7, 9, 10]
+    assert pdf_engine.parse_page_range((2, 4), 10) == [2, 3, 4]
+    assert pdf_engine.parse_page_range([5, 1, 50], 10) == [1, 5]
+
+
+def test_select_pages_applies_budget_after_range():
+    assert pdf_engine.select_pages(100, "10-20", max_pages=3) == [10, 11, 12]
+    assert pdf_engine.select_pages(5, max_pages=0) == [1, 2, 3, 4, 5]
+
+
+def test_map_ordered_keeps_task_order_on_process_pool():
+    tasks = list(range(-20, 0))
+    assert pdf_engine.map_ordered(abs, tasks, workers=2) == [abs(t) for t in tasks]
+
+
+def test_pool_does_not_fork_by_default(settings):
+    assert pdf_engine._get_pool(2)._mp_context.get_start_method() in ("forkserver", "spawn")
+    pdf_engine.shutdown_pool()
+
+    settings.PDF_POOL_START_METHOD = "spawn"
+    assert pdf_engine._get_pool(2)._mp_context.get_start_method() == "spawn"
+
+
+def test_map_ordered_runs_inline_for_unpicklable_work():
+    offset = 10
+    # A lambda cannot be sent to another process; the helper must still answer
+    assert pdf_engine.map_ordered(lambda x: x + offset, [1, 2, 3, 4], workers=2) == [11, 12, 13, 14]
+
+
+def test_extract_pdf_pages_parallel_returns_documents_in_page_order(tmp_path):
+    path = _make_pdf(tmp_path / "report.pdf", [_page_text(n) for n in range(1, 7)])
+
+    docs = pdf_engine.extract_pdf_pages(path, workers=2)
+
+    assert [d.metadata["page"] for d in docs] == [1, 2, 3, 4, 5, 6]
+    assert all(d.metadata["source"] == path for d in docs)
+    assert "PAGE 4 Balance Sheet" in docs[3].page_content
+
+
+def test_extract_pdf_pages_honours_range_and_budget(tmp_path):
+    path = _make_pdf(tmp_path / "report.pdf", [_page_text(n) for n in range(1, 7)])
+
+    docs = pdf_engine.extract_pdf_pages(path, workers=1, page_range="2-6", max_pages=2)
+
+    assert [d.metadata["page"] for d in docs] == [2, 3]
+
+
+def test_short_pages_fall_back_to_ocr(tmp_path, monkeypatch):
+    path = _make_pdf(tmp_path / "scan.pdf", ["x", _page_text(2)])
+    monkeypatch.setattr(pdf_engine, "ocr_pdf_page", lambda page: "OCR RECOVERED TEXT " * 10)
+
+    docs = pdf_engine.extract_pdf_pages(path, workers=1)
+
+    assert docs[0].page_content.startswith("OCR RECOVERED TEXT")
+    assert "PAGE 2" in docs[1].page_content
+
+
+def test_imap_bounded_limits_tasks_in_flight():
+    pulled = []
+
+    def tasks():
+        for n in range(10):
+            pulled.append(n)
+            yield n
+
+    results = pdf_engine.imap_bounded(abs, tasks(), workers=2, max_in_flight=3)
+    first = next(results)
+
+    # Only max_in_flight tasks were taken from the generator before the first result
+    assert first == 0
+    assert len(pulled) == 3
+    assert [first] + list(results) == list(range(10))
+
+
+def test_imap_bounded_runs_inline_with_one_worker():
+    assert list(pdf_engine.imap_bounded(lambda x: x * 2, iter([1, 2, 3]), workers=1)) == [2, 4, 6]
+
+
+def test_spooled_pdf_copies_file_objects_and_cleans_up():
+    import io
+    import os
+
+    with pdf_engine.spooled_pdf(io.BytesIO(b"%PDF-1.4 data")) as path:
+        with open(path, "rb") as fh:
+            assert fh.read() == b"%PDF-1.4 data"
+    assert not os.path.exists(path)
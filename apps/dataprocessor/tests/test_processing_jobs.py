@@ -0,0 +1,156 @@
+# apps/dataprocessor/tests/test_processing_jobs.py
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.dataprocessor.jobs import StageTracker
+from apps.dataprocessor.models import FinancialReport, ProcessingJob
+
+
+EXTRACTED = {
+    "success": True,
+    "company_name": "TestCo",
+    "ticker_symbol": "TCO",
+    "financial_items": [{"particulars": "Revenue", "current_year": 10, "previous_year": 8}],
+}
+SUMMARY = {"success": True, "pros": ["Good"], "cons": ["Bad"], "financial_health_summary": "Fine"}
+RATIOS = {"success": True, "financial_ratios": [{"ratio_name": "Current Ratio", "result": 2}]}
+
+
+def _pipeline_patches(extract_result=EXTRACTED):
+    return (
+        patch("apps.dataprocessor.views.load_pdf_robust", return_value=["page1"]),
+        patch("apps.dataprocessor.views.prepare_context_smart", return_value="a" * 400),
+        patch("apps.dataprocessor.views.extract_raw_financial_data", return_value=extract_result),
+        patch("apps.dataprocessor.views.generate_summary_from_data", return_value=SUMMARY),
+        patch("apps.dataprocessor.views.generate_ratios_from_data", return_value=RATIOS),
+    )
+
+
+def _upload(content=b"%PDF-JOB%"):
+    return SimpleUploadedFile("annual.pdf", content, content_type="application/pdf")
+
+
+@pytest.mark.django_db
+@override_settings(PROCESSING_JOBS_EAGER=True)
+def test_async_upload_returns_job_and_poll_returns_report(client):
+    p1, p2, p3, p4, p5 = _pipeline_patches()
+    with p1, p2, p3, p4, p5:
+        response = client.post(
+            reverse("process_financial_statements"),
+            {"file": _upload(), "api_key": "KEY", "async": "1"},
+        )
+
+    assert response.status_code == 202
+    body = response.json()
+    assert body["status_url"] == reverse("processing_job_status", args=[body["job_id"]])
+
+    status = client.get(body["status_url"]).json()
+    assert status["status"] == ProcessingJob.COMPLETED
+    assert status["current_stage"] == "save"
+    assert status["stages"]["extraction"]["status"] == "completed"
+    assert "duration_ms" in status["stages"]["summary"]
+    assert status["report"]["company_name"] == "TestCo"
+    assert status["report"]["summary"]["pros"] == ["Good"]
+    assert FinancialReport.objects.count() == 1
+
+
+@pytest.mark.django_db
+@override_settings(PROCESSING_JOBS_EAGER=True)
+def test_async_job_records_stage_failure(client):
+    failed = {"success": False, "error": "LLM unavailable"}
+    p1, p2, p3, p4, p5 = _pipeline_patches(extract_result=failed)
+    with p1, p2, p3, p4, p5:
+        body = client.post(
+            reverse("process_financial_statements"),
+            {"file": _upload(b"%PDF-FAIL%"), "api_key": "KEY", "async": "true"},
+        ).json()
+
+    status = client.get(body["status_url"]).json()
+    assert status["success"] is False
+    assert status["status"] == ProcessingJob.FAILED
+    assert status["error"] == "LLM unavailable"
+    assert status["stages"]["extraction"]["status"] == "failed"
+    assert status["stages"]["summary"]["status"] == "pending"
+    assert FinancialReport.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_sync_upload_reports_stage_errors_with_status(client):
+    p1, p2, p3, p4, p5 = _pipeline_patches(extract_result={"success": False, "error": "bad json"})
+    with p1, p2, p3, p4, p5:
+        response = client.post(
+            reverse("process_financial_statements"),
+            {"file": _upload(b"%PDF-SYNC%"), "api_key": "KEY"},
+        )
+
+    assert response.status_code == 400
+    assert response.json()["error"] == "bad json"
+
+
+@pytest.mark.django_db
+def test_sync_upload_reports_stage_timings(client):
+    p1, p2, p3, p4, p5 = _pipeline_patches()
+    with p1, p2, p3, p4, p5:
+        response = client.post(
+            reverse("process_financial_statements"),
+            {"file": _upload(b"%PDF-TIMINGS%"), "api_key": "KEY"},
+        )
+
+    timings = response.json()["metadata"]["stage_timings"]
+    assert {"load", "context", "extraction", "summary", "ratios", "save"} <= set(timings)
+
+
+@pytest.mark.django_db
+def test_job_status_unknown_id_returns_404(client):
+    assert client.get(reverse("processing_job_status", args=["not-a-uuid"])).status_code == 404
+    missing = "11111111-1111-1111-1111-111111111111"
+    assert client.get(reverse("processing_job_status", args=[missing])).status_code == 404
+
+
+def test_stage_tracker_without_job_only_records_timings():
+    tracker = StageTracker(["load", "extraction", "save"])
+    with tracker.stage("load"):
+        pass
+    tracker.skip("extraction")
+
+    assert tracker.stages["load"]["status"] == "completed"
+    assert tracker.stages["extraction"]["status"] == "skipped"
+    assert tracker.stages["save"]["status"] == "pending"
+    assert set(tracker.timings()) == {"load"}
+
+
+@pytest.mark.django_db
+@override_settings(PROCESSING_JOB_TIMEOUT=60)
+def test_poll_fails_job_whose_worker_went_away(client, tmp_path):
+    upload = tmp_path / "lost.pdf"
+    upload.write_bytes(b"%PDF-LOST%")
+    job = ProcessingJob.objects.create(
+        file_name="lost.pdf", upload_path=str(upload), status=ProcessingJob.RUNNING, current_stage="extraction"
+    )
+    url = reverse("processing_job_status", args=[str(job.job_id)])
+
+    # Recent heartbeat: still running
+    assert client.get(url).json()["status"] == ProcessingJob.RUNNING
+
+    ProcessingJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(seconds=120))
+    status = client.get(url).json()
+    assert status["status"] == ProcessingJob.FAILED
+    assert status["success"] is False
+    assert status["finished_at"] is not None
+    assert not upload.exists()
+
+
+@pytest.mark.django_db
+@override_settings(PROCESSING_JOB_TIMEOUT=60)
+def test_finished_jobs_are_never_expired(client):
+    job = ProcessingJob.objects.create(status=ProcessingJob.COMPLETED)
+    ProcessingJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(days=1))
+
+    status = client.get(reverse("processing_job_status", args=[str(job.job_id)])).json()
+    assert status["status"] == ProcessingJob.COMPLETED
@@ -0,0 +1,88 @@
+# apps/dataprocessor/tests/test_rule_extractor.py
+from unittest.mock import MagicMock
+
+import pandas as pd
+from langchain_core.documents import Document
+
+from apps.dataprocessor import rule_extractor, services
+
+
+CLEAN_FILING = """ACME Industries Limited
+Standalone Balance Sheet as at 31 March 2024
+Particulars Note 2024 2023
+Equity
+Share capital 3 1,250.00 1,250.00
+Other equity 4 45,678.12 40,123.45
+Trade payables 5 8,765.43 7,654.32
+Trade receivables 6 6,543.21 5,432.10
+Cash and cash equivalents 7 2,345.67 1,234.56
+Total assets 67,989.22 60,262.33
+Total equity and liabilities 67,989.22 60,262.33
+Statement of Profit and Loss for the year ended 31 March 2024
+Revenue from operations 12 1,20,000.00 1,00,000.00
+Other income 13 5,000.00 4,000.00
+Total expenses 1,05,000.00 90,000.00
+Profit before tax 20,000.00 14,000.00
+Tax expense (5,000.00) (3,500.00)
+Profit for the year 15,000.00 10,500.00
+"""
+
+
+def test_parse_statement_line_reads_figures_from_the_right():
+    parsed = rule_extractor.parse_statement_line("(a) Trade payables 12 1,23,456.00 (2,345)")
+    assert parsed == {"label": "Trade payables", "values": [123456.0, -2345.0]}
+
+    assert rule_extractor.parse_statement_line("Borrowings - 500") == {"label": "Borrowings", "values": [None, 500.0]}
+    assert rule_extractor.parse_statement_line("No figures on this line") is None
+
+
+def test_clean_filing_is_extracted_with_high_confidence():
+    result = rule_extractor.extract_from_documents([Document(page_content=CLEAN_FILING)])
+
+    assert result["success"] is True
+    assert result["company_name"] == "ACME Industries Limited"
+    assert result["confidence"] >= rule_extractor.DEFAULT_MIN_CONFIDENCE
+    assert result["coverage"]["balance_check"] is True
+
+    items = {i["particulars"]: i for i in result["financial_items"]}
+    assert items["Revenue from operations"]["current_year"] == 120000.0
+    assert items["Tax expense"]["previous_year"] == -3500.0
+    # Year header row is not an item
+    assert "Particulars Note" not in items
+
+
+def test_sparse_text_has_low_confidence():
+    result = rule_extractor.extract_from_lines(["Revenue grew 12 percent", "Some note 1 2"])
+    assert result["confidence"] < rule_extractor.DEFAULT_MIN_CONFIDENCE
+
+
+def test_extract_from_dataframe():
+    df = pd.DataFrame({
+        "Particulars": ["Share capital", "Other equity", "Total assets", "Total equity and liabilities"],
+        "FY2024": [100.0, 900.0, 1500.0, 1500.0],
+        "FY2023": [100.0, 800.0, 1400.0, 1400.0],
+    })
+
+    result = rule_extractor.extract_from_dataframe(df)
+
+    assert [i["particulars"] for i in result["financial_items"]][:2] == ["Share capital", "Other equity"]
+    assert result["financial_items"][2]["previous_year"] == 1400.0
+    assert result["coverage"]["balance_check"] is True
+
+
+def test_extract_financial_data_skips_llm_for_clean_filings():
+    llm = MagicMock()
+
+    result = services.extract_financial_data([Document(page_content=CLEAN_FILING)], CLEAN_FILING, "key", llm_extract=llm)
+
+    llm.assert_not_called()
+    assert result["extraction_method"] == "rules"
+
+
+def test_extract_financial_data_falls_back_to_llm():
+    llm = MagicMock(return_value={"success": True, "financial_items": [], "company_name": "X"})
+
+    result = services.extract_financial_data([Document(page_content="Chairman's letter")], "ctx", "key", llm_extract=llm)
+
+    llm.assert_called_once_with("ctx", "key")
+    assert result["extraction_method"] == "llm"
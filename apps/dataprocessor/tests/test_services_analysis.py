@@ -0,0 +1,91 @@
+# apps/dataprocessor/tests/test_services_analysis.py
+import time
+from unittest.mock import patch
+
+from apps.dataprocessor import services
+
+ITEMS = [{"particulars": "Revenue", "current_year": 100, "previous_year": 90}]
+
+
+def _slow(result, delay):
+    def _fn(items, api_key):
+        time.sleep(delay)
+        return result
+    return _fn
+
+
+def test_summary_and_ratios_run_concurrently():
+    summary = {"success": True, "pros": [], "cons": [], "financial_health_summary": "ok"}
+    ratios = {"success": True, "financial_ratios": []}
+
+    start = time.perf_counter()
+    out = services.run_analysis_stages(
+        ITEMS, "k", summary_fn=_slow(summary, 0.3), ratios_fn=_slow(ratios, 0.3)
+    )
+    elapsed = time.perf_counter() - start
+
+    assert out["summary"] is summary
+    assert out["ratios"] is ratios
+    assert elapsed < 0.55  # sequential would take ~0.6s
+    assert out["timings"]["summary_ms"] >= 300
+    assert out["timings"]["ratios_ms"] >= 300
+    assert out["timings"]["analysis_wall_ms"] < 550
+
+
+def test_timeout_returns_partial_result():
+    summary = {"success": True, "pros": ["+"], "cons": [], "financial_health_summary": "ok"}
+
+    out = services.run_analysis_stages(
+        ITEMS, "k", timeout=0.2,
+        summary_fn=_slow(summary, 0.0),
+        ratios_fn=_slow({"success": True}, 1.0),
+    )
+
+    assert out["summary"]["success"] is True
+    assert out["ratios"]["success"] is False
+    assert out["ratios"]["timed_out"] is True
+    assert out["timings"]["ratios_ms"] is None
+    assert out["timings"]["analysis_wall_ms"] < 600
+
+
+def test_exception_in_one_call_is_isolated():
+    def _boom(items, api_key):
+        raise RuntimeError("rate limited")
+
+    out = services.run_analysis_stages(
+        ITEMS, "k",
+        summary_fn=_boom,
+        ratios_fn=_slow({"success": True, "financial_ratios": []}, 0.0),
+    )
+
+    assert out["summary"] == {"error": "rate limited", "success": False}
+    assert out["ratios"]["success"] is True
+
+
+def test_defaults_use_module_level_generators():
+    with patch.object(services, "generate_summary_from_data", return_value={"success": True}) as ms, \
+         patch.object(services, "generate_ratios_from_data", return_value={"success": True}) as mr:
+        services.run_analysis_stages(ITEMS, "k")
+
+    ms.assert_called_once_with(ITEMS, "k")
+    mr.assert_called_once_with(ITEMS, "k")
+
+
+def test_process_financial_statements_honours_analysis_timeout_setting(tmp_path, settings):
+    settings.LLM_ANALYSIS_TIMEOUT = 0.2
+    settings.EXTRACTION_CACHE_ENABLED = False
+    f = tmp_path / "fin.pdf"
+    f.write_bytes(b"%PDF-1.4 slow analysis")
+    extracted = {"success": True, "financial_items": ITEMS}
+
+    with patch.object(services, "load_financial_document", return_value=[services.Document(page_content="Revenue 100")]), \
+         patch.object(services, "prepare_context_smart", return_value="Revenue 100 " * 10), \
+         patch.object(services, "extract_financial_data", return_value=extracted), \
+         patch.object(services, "generate_summary_from_data", side_effect=_slow({"success": True}, 0.0)), \
+         patch.object(services, "generate_ratios_from_data", side_effect=_slow({"success": True}, 1.0)):
+        start = time.perf_counter()
+        result = services.process_financial_statements(str(f), google_api_key="k")
+        elapsed = time.perf_counter() - start
+
+    assert result["ratios"]["timed_out"] is True
+    assert elapsed < 0.8
@@ -12,3 +12,8 @@ def test_prepare_context_smart_concat_basic():
     out = services.prepare_context_smart(docs)
     assert "Balance Sheet" in out
     assert "Revenue increased" in out
+
+
+def test_prepare_context_smart_returns_short_documents_unchanged():
+    docs = [Document(page_content="Share capital 100"), Document(page_content="Other equity 200")]
+    assert services.prepare_context_smart(docs) == "Share capital 100\nOther equity 200"
@@ -127,7 +127,7 @@ def test_load_pdf_robust_pdfplumber_fallback(tmp_path):
     f.write_bytes(b"%PDF-1.4")
 
     with patch.object(services, "PyPDFLoader", side_effect=Exception("fail")), \
-         patch.object(services, "pdfplumber") as mock_pp:
+         patch.object(services.pdf_engine, "pdfplumber") as mock_pp:
 
         fake_page = SimpleNamespace(extract_text=lambda: "Hello PDF page")
         fake_pdf = SimpleNamespace(pages=[fake_page])
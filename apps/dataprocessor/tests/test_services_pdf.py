@@ -27,7 +27,7 @@ def test_load_pdf_robust_pdfplumber_fallback(tmp_path):
 
     # Force PyPDFLoader failure → fallback to pdfplumber
     with patch.object(services, "PyPDFLoader", side_effect=Exception("boom")), \
-         patch.object(services, "pdfplumber", autospec=True) as mock_pp:
+         patch.object(services.pdf_engine, "pdfplumber", autospec=True) as mock_pp:
         fake_page = SimpleNamespace(extract_text=lambda: "Hello from PDF")
         fake_pdf = SimpleNamespace(pages=[fake_page])
         mock_pp.open.return_value.__enter__.return_value = fake_pdf
@@ -36,3 +36,23 @@ def test_load_pdf_robust_pdfplumber_fallback(tmp_path):
 
     assert isinstance(docs, list) and docs
     assert "Hello from PDF" in docs[0].page_content
+
+
+def test_load_pdf_robust_text_layer_respects_pdf_max_pages(tmp_path, settings):
+    f = tmp_path / "long.pdf"
+    f.write_bytes(b"%PDF-1.4")
+    settings.PDF_MAX_PAGES = 2
+    read = []
+
+    def pages():
+        for i in range(500):
+            read.append(i)
+            yield Document(page_content="Z" * 1500, metadata={"page": i})
+
+    with patch.object(services, "PyPDFLoader", autospec=True) as m:
+        m.return_value.lazy_load.side_effect = pages
+        docs = services.load_pdf_robust(str(f), locate_pages=False)
+
+    assert [d.metadata["page"] for d in docs] == [0, 1]
+    assert len(read) == 2
+    m.return_value.load.assert_not_called()
@@ -0,0 +1,44 @@
+# apps/dataprocessor/tests/test_term_matcher.py
+from rapidfuzz import fuzz, process
+
+from apps.dataprocessor.rule_extractor import CANONICAL_TERMS
+from apps.dataprocessor.term_matcher import CanonicalMatcher, OCR_REPLACEMENTS, Replacer
+
+
+def _chained_replace(text):
+    for wrong, right in OCR_REPLACEMENTS.items():
+        text = text.replace(wrong, right)
+    return text
+
+
+def test_replacer_matches_chained_str_replace():
+    replacer = Replacer(OCR_REPLACEMENTS)
+    samples = ["curent liabilities", "dhidend paid", "come tac expense", "plain revenue line", "nor-current noe"]
+    for text in samples:
+        assert replacer.apply(text) == _chained_replace(text)
+
+
+def test_match_many_agrees_with_extract_one():
+    labels = ["share capitel", "trade payabls", "revenue from operation", "chairman's statement", "total"]
+    matcher = CanonicalMatcher(CANONICAL_TERMS, threshold=80)
+
+    expected = []
+    for label in labels:
+        best = process.extractOne(label, CANONICAL_TERMS, scorer=fuzz.token_sort_ratio)
+        expected.append(best[0] if best[1] > 80 else None)
+
+    assert matcher.match_many(labels) == expected
+    assert [matcher.match(label) for label in labels] == expected
+
+
+def test_cache_serves_repeats_and_evicts_oldest():
+    matcher = CanonicalMatcher(CANONICAL_TERMS, cache_size=2)
+
+    matcher.match_many(["inventories", "inventories", "trade receivables"])
+    assert matcher.stats() == {"cache_size": 2, "hits": 0, "misses": 2}
+
+    matcher.match("inventories")
+    matcher.match("finance costs")          # evicts "trade receivables"
+    matcher.match("trade receivables")
+    assert matcher.hits == 1
+    assert matcher.misses == 4
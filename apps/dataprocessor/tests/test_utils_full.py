@@ -130,12 +130,9 @@ def _fake_pl_text():
     )
 
 
-# Dummy executor that accepts args
-class _DummyExecutor:
-    def __init__(self, *args, **kwargs): pass
-    def __enter__(self): return self
-    def __exit__(self, exc_type, exc, tb): return False
-    def map(self, fn, iterable): return [fn(x) for x in iterable]
+# Run the page pool inline so the monkeypatched OCR is used
+def _inline_pool(monkeypatch):
+    monkeypatch.setattr(utils.pdf_engine, "get_worker_count", lambda workers=None: 1)
 
 
 def test_process_page_path_balance(monkeypatch):
@@ -153,10 +150,11 @@ def test_process_page_path_pl(monkeypatch):
 
 
 def test_process_financial_file_end_to_end_with_mocks(monkeypatch):
-    monkeypatch.setattr(utils, "convert_from_bytes", lambda data, dpi=200: [object(), object()])
+    monkeypatch.setattr(utils, "count_pdf_pages", lambda path: 2)
+    monkeypatch.setattr(utils, "render_page", lambda path, num, dpi=200: object())
     texts = [_fake_balance_text(), _fake_pl_text()]
     monkeypatch.setattr(utils, "ocr_image", lambda page: texts.pop(0))
-    monkeypatch.setattr(utils, "ThreadPoolExecutor", _DummyExecutor)
+    _inline_pool(monkeypatch)
 
     with patch("apps.dataprocessor.utils.perform_comparative_analysis", return_value={"ok": True}), \
          patch("apps.dataprocessor.utils.generate_comparative_pls", return_value={"ok": True}):
@@ -166,23 +166,15 @@ def test_process_page_detects_balance(monkeypatch):
 # SECTION: FULL PDF PIPELINE
 # ==================================================
 
-class DummyExecutor:
-    def __init__(self, *a, **k):
-        pass
-
-    def __enter__(self):
-        return self
-
-    def __exit__(self, *exc):
-        return False
-
-    def map(self, fn, iterable):
-        return [fn(i) for i in iterable]
+def _inline_pool(monkeypatch):
+    # Run the page pool inline so the monkeypatched OCR is used
+    monkeypatch.setattr(utils.pdf_engine, "get_worker_count", lambda workers=None: 1)
 
 
 def test_process_financial_file_complete(monkeypatch):
-    # Step 1: convert PDF → images
-    monkeypatch.setattr(utils, "convert_from_bytes", lambda data, dpi=200: [object(), object()])
+    # Step 1: two pages, each rendered to an image on demand
+    monkeypatch.setattr(utils, "count_pdf_pages", lambda path: 2)
+    monkeypatch.setattr(utils, "render_page", lambda path, num, dpi=200: object())
 
     # Step 2: OCR returns balance then PL
     fake_texts = [
@@ -201,7 +193,7 @@ def test_process_financial_file_complete(monkeypatch):
     ]
 
     monkeypatch.setattr(utils, "ocr_image", lambda page: fake_texts.pop(0))
-    monkeypatch.setattr(utils, "ThreadPoolExecutor", DummyExecutor)
+    _inline_pool(monkeypatch)
 
     with patch("apps.dataprocessor.utils.perform_comparative_analysis", return_value={"ok": True}), \
          patch("apps.dataprocessor.utils.generate_comparative_pls", return_value={"ok": True}):
@@ -211,3 +203,30 @@ def test_process_financial_file_complete(monkeypatch):
 
     assert out["comparative_analysis_bs"]["ok"] is True
     assert out["comparative_analysis_pl"]["ok"] is True
+
+
+def test_process_financial_file_renders_pages_one_at_a_time(monkeypatch):
+    rendered = []
+
+    def fake_render(path, num, dpi=200):
+        rendered.append(num)
+        return object()
+
+    monkeypatch.setattr(utils, "count_pdf_pages", lambda path: 3)
+    monkeypatch.setattr(utils, "render_page", fake_render)
+    monkeypatch.setattr(utils, "ocr_image", lambda page: "BALANCE SHEET\nShare Capital 1000\nReserves 500\n1 2 3 4 5 6 7 8 9 10")
+    _inline_pool(monkeypatch)
+
+    with patch("apps.dataprocessor.utils.perform_comparative_analysis", return_value={"ok": True}) as bs, \
+         patch("apps.dataprocessor.utils.generate_comparative_pls", return_value={"ok": True}):
+        utils.process_financial_file(io.BytesIO(b"%PDF fake"))
+
+    assert rendered == [1, 2, 3]
+    assert bs.call_args[0][0]
+
+
+def test_parse_lines_batches_label_matching():
+    rows = utils.parse_lines(["Share capital 100 90", "Trade payables 500 400", "no figures here"])
+
+    assert [r["Values"] for r in rows] == [[100.0, 90.0], [500.0, 400.0]]
+    assert [r["Particular"].lower() for r in rows] == ["share capital", "trade payables"]
@@ -214,3 +214,47 @@ def test_get_stock_data_no_data(mock_yf, client):
 
     assert response.status_code == 200
     assert response.json()["data"] == []
+
+
+@pytest.mark.django_db
+def test_process_financial_statements_api_rule_extraction_without_company_line(client):
+    from langchain_core.documents import Document
+
+    url = reverse("process_financial_statements")
+    statement = "\n".join([
+        "Standalone Balance Sheet as at 31 March 2024",
+        "Share capital 3 1,250.00 1,250.00",
+        "Other equity 4 45,678.12 40,123.45",
+        "Trade payables 5 8,765.43 7,654.32",
+        "Trade receivables 6 6,543.21 5,432.10",
+        "Cash and cash equivalents 7 2,345.67 1,234.56",
+        "Total assets 67,989.22 60,262.33",
+        "Total equity and liabilities 67,989.22 60,262.33",
+        "Revenue from operations 12 1,20,000.00 1,00,000.00",
+        "Other income 13 5,000.00 4,000.00",
+        "Total expenses 1,05,000.00 90,000.00",
+        "Profit before tax 20,000.00 14,000.00",
+        "Profit for the year 15,000.00 10,500.00",
+    ])
+    dummy_pdf = SimpleUploadedFile("rules.pdf", b"%PDF-RULES-NO-COMPANY%", content_type="application/pdf")
+
+    with (
+        patch("apps.dataprocessor.views.load_pdf_robust") as mock_load,
+        patch("apps.dataprocessor.views.prepare_context_smart") as mock_ctx,
+        patch("apps.dataprocessor.views.extract_raw_financial_data") as mock_extract,
+        patch("apps.dataprocessor.views.generate_summary_from_data") as mock_summary,
+        patch("apps.dataprocessor.views.generate_ratios_from_data") as mock_ratios,
+    ):
+        mock_load.return_value = [Document(page_content=statement)]
+        mock_ctx.return_value = statement
+        mock_summary.return_value = {"success": True, "pros": [], "cons": [], "financial_health_summary": ""}
+        mock_ratios.return_value = {"success": True, "financial_ratios": []}
+
+        response = client.post(url, {"file": dummy_pdf, "api_key": "ABC123"})
+
+    mock_extract.assert_not_called()
+    assert response.status_code == 200
+    data = response.json()
+    assert data["metadata"]["extraction_method"] == "rules"
+    assert data["company_name"] == "Unknown Company"
+    assert FinancialReport.objects.get().company_name == "Unknown Company"
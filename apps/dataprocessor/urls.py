@@ -7,6 +7,8 @@ urlpatterns = [
     # MAIN PROCESSING ENDPOINTS
     # ============================================
     path('api/process/', views.process_financial_statements_api, name='process_financial_statements'),
+    path('api/extraction-cache/', views.extraction_cache_status_api, name='extraction_cache_status'),
+    path('api/jobs/<str:job_id>/', views.get_processing_job_api, name='processing_job_status'),
     
     # ============================================
     # REPORT ACCESS ENDPOINTS
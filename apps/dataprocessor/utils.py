@@ -6,9 +6,9 @@ import re
 import json
 import numpy as np
 import pandas as pd
-from pdf2image import convert_from_bytes
-from concurrent.futures import ThreadPoolExecutor
-from rapidfuzz import process, fuzz
+from pdf2image import convert_from_path, pdfinfo_from_path
+from apps.dataprocessor import page_locator, pdf_engine, term_matcher
+from apps.dataprocessor.rule_extractor import CANONICAL_TERMS
 from apps.dataprocessor.services import perform_comparative_analysis,generate_comparative_pls
 
 pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
@@ -18,31 +18,7 @@ PL_KEYWORDS = ["profit and loss", "statement of profit", "revenue", "expenses",
 OTHER_KEYWORDS = ["cash flow", "fund flow"]
 KEEP_KEYWORDS = BALANCE_KEYWORDS + PL_KEYWORDS + OTHER_KEYWORDS
 
-CANONICAL_TERMS = [
-    "Share capital", "Reserves and surplus", "Money received against share warrants",
-    "Share application money pending allotment", "Long-term borrowings",
-    "Deferred tax liabilities (net)", "Other long-term liabilities", "Long-term provisions",
-    "Short-term borrowings", "Trade payables", "Other current liabilities", "Short-term provisions",
-    "Total equity and liabilities", "Total liabilities", "Total assets", "Fixed assets",
-    "Property, plant and equipment", "Tangible assets", "Intangible assets",
-    "Capital work in progress", "Non-current investments", "Deferred tax assets (net)",
-    "Long-term loans and advances", "Other non-current assets", "Inventories",
-    "Trade receivables", "Cash and cash equivalents", "Bank balances",
-    "Current investments", "Other current assets", "Revenue from operations",
-    "Other income", "Total revenue", "Cost of materials consumed",
-    "Employee benefit expense", "Finance costs", "Depreciation and amortisation expense",
-    "Other expenses", "Total expenses", "Profit before tax", "Tax expense",
-    "Profit for the period", "Earnings per equity share - Basic", "Earnings per equity share - Diluted"
-]
-
-REPLACEMENTS = {
-    "fights": "fixed", "onziais": "intangibles", "atnbutable": "attributable",
-    "owneinr": "owner", "franca": "financial", "nor-": "non-",
-    "curert": "current", "curent": "current", "come tac": "deferred tax",
-    "tac": "tax", "dhi": "dividend", "dividenddend": "dividend",
-    "purchose": "purchase", "eens ad nengie": "assets and intangible",
-    "itaogble": "intangible", "fnaneal": "financial", "noe": "non"
-}
+REPLACEMENTS = term_matcher.OCR_REPLACEMENTS
 
 STOPWORDS = [
     "cin", "registered office", "committee", "approved", "statement of",
@@ -52,6 +28,14 @@ STOPWORDS = [
 
 UNIT = "crore"
 SCALE_MAP = {"crore": 1e7, "lakh": 1e5, "million": 1e6, "unit": 1.0}
+OCR_DPI = 200
+
+LINE_NUMBER_RE = re.compile(r"\(?-?\d{1,3}(?:,\d{3})*(?:\.\d+)?\)?")
+DISALLOWED_CHARS_RE = re.compile(r"[^A-Za-z0-9.,()%\-\/ ]+")
+WHITESPACE_RE = re.compile(r"\s+")
+
+_replacer = term_matcher.Replacer(REPLACEMENTS)
+_canonical_matcher = term_matcher.CanonicalMatcher(CANONICAL_TERMS, threshold=80)
 
 # ===========================
 # UTILS FUNCTIONS
@@ -68,10 +52,9 @@ def detect_section(text):
 
 def clean_text(text):
     text = unicodedata.normalize("NFKD", text)
-    for k, v in REPLACEMENTS.items():
-        text = text.replace(k, v)
-    text = re.sub(r"[^A-Za-z0-9.,()%\-\/ ]+", " ", text)
-    text = re.sub(r"\s+", " ", text).strip()
+    text = _replacer.apply(text)
+    text = DISALLOWED_CHARS_RE.sub(" ", text)
+    text = WHITESPACE_RE.sub(" ", text).strip()
     return text
 
 def ocr_image(page):
@@ -81,22 +64,20 @@ def ocr_image(page):
     return pytesseract.image_to_string(thresh, lang="eng")
 
 def clean_particular(text):
-    text = text.lower()
-    for wrong, right in REPLACEMENTS.items():
-        if wrong in text:
-            text = text.replace(wrong, right)
-    result = process.extractOne(text, CANONICAL_TERMS, scorer=fuzz.token_sort_ratio)
-    if result:
-        match, score, _ = result
-        if score > 80:
-            return match
-    return text.title()
+    text = _replacer.apply(text.lower())
+    match = _canonical_matcher.match(text)
+    return match if match else text.title()
 
-def parse_line(line):
+def clean_particulars(labels, workers=None):
+    # Batch form of clean_particular: one cdist call for the whole page
+    texts = [_replacer.apply(label.lower()) for label in labels]
+    matches = _canonical_matcher.match_many(texts, workers=workers)
+    return [match if match else text.title() for text, match in zip(texts, matches)]
+
+def _split_line(line):
     line = clean_text(line)
-    numbers = re.findall(r"\(?-?\d{1,3}(?:,\d{3})*(?:\.\d+)?\)?", line)
     cleaned_nums = []
-    for num in numbers:
+    for num in LINE_NUMBER_RE.findall(line):
         num = num.replace(",", "")
         if num.startswith("(") and num.endswith(")"):
             num = "-" + num[1:-1]
@@ -104,9 +85,20 @@ def parse_line(line):
             cleaned_nums.append(float(num))
         except:
             continue
-    label = re.split(r"\(?-?\d{1,3}(?:,\d{3})*(?:\.\d+)?\)?", line, 1)[0].strip()
+    label = LINE_NUMBER_RE.split(line, 1)[0].strip()
+    return label, cleaned_nums
+
+def parse_line(line):
+    label, cleaned_nums = _split_line(line)
     return {"Particular": clean_particular(label), "Values": cleaned_nums}
 
+def parse_lines(lines):
+    # parse_line for many lines; only lines with figures are label-matched
+    split = [_split_line(line) for line in lines]
+    split = [(label, nums) for label, nums in split if nums]
+    particulars = clean_particulars([label for label, _ in split])
+    return [{"Particular": p, "Values": nums} for p, (_, nums) in zip(particulars, split)]
+
 def process_page(args):
     page_num, page = args
     text = ocr_image(page)
@@ -116,14 +108,27 @@ def process_page(args):
     section = detect_section(text)
     if not section:
         return None, []
-    rows = []
-    for line in text.split("\n"):
-        if line.strip():
-            parsed = parse_line(line)
-            if parsed["Values"]:
-                rows.append(parsed)
+    rows = parse_lines([line for line in text.split("\n") if line.strip()])
     return section, rows
 
+def render_page(pdf_path, page_num, dpi=OCR_DPI):
+    # Rasterize a single page - never the whole document at once
+    images = convert_from_path(pdf_path, dpi=dpi, first_page=page_num, last_page=page_num)
+    return images[0] if images else None
+
+def ocr_pdf_page(args):
+    pdf_path, page_num, dpi = args
+    page = render_page(pdf_path, page_num, dpi)
+    if page is None:
+        return None, []
+    return process_page((page_num, page))
+
+def count_pdf_pages(pdf_path):
+    try:
+        return int(pdfinfo_from_path(pdf_path)["Pages"])
+    except Exception:
+        return pdf_engine.count_pages(pdf_path)
+
 def rows_to_json(rows):
     items = []
     for r in rows:
@@ -180,26 +185,41 @@ def clean_section(section):
     return {"financial_items": cleaned}
 
 # MAIN FUNCTION
-def process_financial_file(file):
+def process_financial_file(file, diagnostics=None):
     """
     Accepts a file (PDF), processes OCR, parses financial data,
     returns cleaned JSON ready for frontend
     """
-    # Convert PDF to images in memory
-    pages = convert_from_bytes(file.read(), dpi=200)
-    
     balance_rows, pl_rows, other_rows = [], [], []
 
-    with ThreadPoolExecutor(max_workers=4) as executor:
-        results = list(executor.map(process_page, enumerate(pages, start=1)))
-
-    for section, rows in results:
-        if section == "balance":
-            balance_rows.extend(rows)
-        elif section == "pl":
-            pl_rows.extend(rows)
-        elif section == "other":
-            other_rows.extend(rows)
+    # Work from a file on disk so the upload is never held in memory as a whole
+    with pdf_engine.spooled_pdf(file) as pdf_path:
+        # Skip narrative pages before OCR when the text layer tells us where the statements are
+        scores = page_locator.locate_financial_pages(pdf_path)
+        if scores:
+            total_pages = len(scores)
+        else:
+            total_pages = count_pdf_pages(pdf_path)
+
+        wanted = None
+        if scores and len(scores) >= page_locator.MIN_PAGES_TO_FILTER:
+            wanted = set(page_locator.kept_pages(scores))
+            if diagnostics is not None:
+                diagnostics.extend(page_locator.format_diagnostics(scores))
+
+        # Each worker renders and OCRs its own page; only a few pages are in flight at once
+        tasks = (
+            (pdf_path, num, OCR_DPI)
+            for num in range(1, total_pages + 1)
+            if wanted is None or num in wanted
+        )
+        for section, rows in pdf_engine.imap_bounded(ocr_pdf_page, tasks):
+            if section == "balance":
+                balance_rows.extend(rows)
+            elif section == "pl":
+                pl_rows.extend(rows)
+            elif section == "other":
+                other_rows.extend(rows)
 
     balance_sheet = clean_section(rows_to_json(balance_rows))
     pl_sheet = clean_section(rows_to_json(pl_rows))
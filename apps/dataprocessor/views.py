@@ -9,13 +9,23 @@ import json
 import requests
 import time
 
-from .models import FinancialReport
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.urls import reverse
+
+from apps.company_search import ohlcv
+from .models import FinancialReport, ProcessingJob
+from . import extraction_cache, jobs
+from .jobs import JobError, StageTracker
 from .services import (
     load_pdf_robust,
     prepare_context_smart,
     extract_raw_financial_data,
+    extract_financial_data,
     generate_summary_from_data,
-    generate_ratios_from_data
+    generate_ratios_from_data,
+    run_analysis_stages,
+    PIPELINE_VERSION
 )
 
 import json
@@ -31,6 +41,146 @@ class CustomJSONEncoder(DjangoJSONEncoder):
             return float(obj)
         return super().default(obj)
 
+# Stages of the upload pipeline, in order (reported by the job status endpoint)
+PIPELINE_STAGES = ["cache_lookup", "load", "context", "extraction", "summary", "ratios", "save"]
+
+def run_processing_pipeline(temp_path, google_api_key, tracker, page_diagnostics=None):
+    """
+    Run the extraction stages for a saved upload.
+
+    Returns (extracted_data, summary_result, ratios_result, cache_hit).
+    Raises JobError with the HTTP status to report when a stage fails.
+    Pass a list as page_diagnostics to collect the page locator scores.
+    """
+    # Same file processed before? Serve the stored results without LLM calls
+    with tracker.stage("cache_lookup"):
+        content_hash = extraction_cache.hash_file(temp_path)
+        cached = extraction_cache.lookup(content_hash, PIPELINE_VERSION)
+
+    if cached:
+        tracker.skip("load", "context", "extraction", "summary", "ratios")
+        return cached["extracted_data"], cached["summary"], cached["ratios"], True
+
+    # Step 1: Load and prepare document context
+    with tracker.stage("load"):
+        documents = load_pdf_robust(temp_path, diagnostics=page_diagnostics)
+
+    with tracker.stage("context"):
+        context = prepare_context_smart(documents)
+        if len(context.strip()) < 100:
+            raise JobError("Insufficient financial content found", status=400)
+
+    # Step 2: Extract raw financial data
+    with tracker.stage("extraction"):
+        extracted_data = extract_financial_data(
+            documents, context, google_api_key,
+            min_confidence=getattr(settings, 'RULE_EXTRACTION_MIN_CONFIDENCE', None),
+            llm_extract=extract_raw_financial_data,
+        )
+        if not extracted_data.get("success"):
+            raise JobError(extracted_data.get("error", "Data extraction failed"), status=400)
+
+    # Step 3: Generate summary and ratios concurrently - both only read financial_items
+    tracker.mark_running("summary", "ratios")
+    analysis = run_analysis_stages(
+        extracted_data.get('financial_items', []), google_api_key,
+        timeout=getattr(settings, 'LLM_ANALYSIS_TIMEOUT', None),
+        summary_fn=generate_summary_from_data,
+        ratios_fn=generate_ratios_from_data,
+    )
+    summary_result, ratios_result = analysis["summary"], analysis["ratios"]
+    tracker.record("summary", analysis["timings"]["summary_ms"], summary_result.get("success", False), summary_result.get("error", ""))
+    tracker.record("ratios", analysis["timings"]["ratios_ms"], ratios_result.get("success", False), ratios_result.get("error", ""))
+
+    extraction_cache.store(
+        content_hash, PIPELINE_VERSION,
+        extracted_data, summary_result, ratios_result,
+        content_length=len(context)
+    )
+    return extracted_data, summary_result, ratios_result, False
+
+def save_financial_report(extracted_data, summary_result, ratios_result, pdf_file, pdf_name):
+    """Normalize the stage outputs and persist them as a FinancialReport."""
+    if not summary_result.get("success"):
+        # Don't fail entirely if summary fails, just use empty summary
+        summary_data = {"pros": [], "cons": [], "financial_health_summary": "Summary generation failed"}
+    else:
+        summary_data = {
+            "pros": summary_result.get("pros", []),
+            "cons": summary_result.get("cons", []),
+            "financial_health_summary": summary_result.get("financial_health_summary", "")
+        }
+
+    if not ratios_result.get("success"):
+        # Don't fail entirely if ratios fail, just use empty ratios
+        ratios_data = []
+    else:
+        ratios_data = ratios_result.get("financial_ratios", [])
+
+    report_id = str(uuid.uuid4())
+    
+    # Fallback ticker lookup if AI didn't find it
+    ticker = extracted_data.get("ticker_symbol", "")
+    # Rule-based extraction reports None when no company line was found
+    company_name = extracted_data.get("company_name") or "Unknown Company"
+    
+    if not ticker and company_name:
+        # Common Indian company ticker mappings
+        ticker_map = {
+            "infosys": "INFY",
+            "tcs": "TCS",
+            "reliance": "RELIANCE",
+            "wipro": "WIPRO",
+            "hcl": "HCLTECH",
+            "tech mahindra": "TECHM",
+            "hdfc bank": "HDFCBANK",
+            "icici bank": "ICICIBANK",
+            "sbi": "SBIN",
+            "bharti airtel": "BHARTIARTL"
+        }
+        company_lower = company_name.lower()
+        for key, val in ticker_map.items():
+            if key in company_lower:
+                ticker = val
+                print(f"✅ Fallback ticker lookup: {company_name} → {ticker}")
+                break
+    
+    # Remove user linkage: allow creation without authentication.
+    # If you later want optional linkage, use:
+    # user_obj = request.user if getattr(request.user, 'is_authenticated', False) else None
+    # and pass user=user_obj.
+    report = FinancialReport.objects.create(
+        report_id=report_id,
+        company_name=company_name,
+        ticker_symbol=ticker,
+        user=None,  # No user association
+        uploaded_pdf=pdf_file,
+        pdf_original_name=pdf_name,
+    )
+    
+    # Use the setter methods from your model
+    report.set_summary(summary_data)
+    report.set_ratios(ratios_data)
+    report.save()
+    return report
+
+def _process_upload_job(job, temp_path, google_api_key, file_name):
+    """Background task: run the pipeline for a saved upload and store the report."""
+    tracker = StageTracker(PIPELINE_STAGES, job=job)
+    try:
+        extracted_data, summary_result, ratios_result, _ = run_processing_pipeline(
+            temp_path, google_api_key, tracker
+        )
+        with tracker.stage("save"):
+            with open(temp_path, 'rb') as fh:
+                return save_financial_report(
+                    extracted_data, summary_result, ratios_result,
+                    File(fh, name=file_name), file_name
+                )
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
 @csrf_exempt
 def process_financial_statements_api(request):
     if request.method != 'POST':
@@ -51,108 +201,71 @@ def process_financial_statements_api(request):
     if not google_api_key:
         return JsonResponse({'error': 'Missing Google API key'}, status=500)
 
+    run_async = str(request.POST.get('async', request.GET.get('async', ''))).lower() in ('1', 'true', 'yes')
+
     try:
         # Save uploaded file temporarily
         with open(temp_path, 'wb+') as destination:
             for chunk in uploaded_file.chunks():
                 destination.write(chunk)
 
-        # Step 1: Load and prepare document context
-        documents = load_pdf_robust(temp_path)
-        context = prepare_context_smart(documents)
-        if len(context.strip()) < 100:
-            return JsonResponse({"error": "Insufficient financial content found", "success": False}, status=400)
-
-        # Step 2: Extract raw financial data
-        extracted_data = extract_raw_financial_data(context, google_api_key)
-        if not extracted_data.get("success"):
-            error_msg = extracted_data.get("error", "Data extraction failed")
-            return JsonResponse({"error": error_msg, "success": False}, status=400)
-
-        # Step 3: Generate summary
-        summary_result = generate_summary_from_data(extracted_data.get('financial_items', []), google_api_key)
-        if not summary_result.get("success"):
-            # Don't fail entirely if summary fails, just use empty summary
-            summary_data = {"pros": [], "cons": [], "financial_health_summary": "Summary generation failed"}
-        else:
-            summary_data = {
-                "pros": summary_result.get("pros", []),
-                "cons": summary_result.get("cons", []),
-                "financial_health_summary": summary_result.get("financial_health_summary", "")
-            }
-
-        # Step 4: Calculate ratios
-        ratios_result = generate_ratios_from_data(extracted_data.get('financial_items', []), google_api_key)
-        if not ratios_result.get("success"):
-            # Don't fail entirely if ratios fail, just use empty ratios
-            ratios_data = []
-        else:
-            ratios_data = ratios_result.get("financial_ratios", [])
-
-        # Step 5: Save to DB using your model's setter methods - NOW WITH USER LINK
-        report_id = str(uuid.uuid4())
-        
-        # Fallback ticker lookup if AI didn't find it
-        ticker = extracted_data.get("ticker_symbol", "")
-        company_name = extracted_data.get("company_name", "Unknown Company")
-        
-        if not ticker and company_name:
-            # Common Indian company ticker mappings
-            ticker_map = {
-                "infosys": "INFY",
-                "tcs": "TCS",
-                "reliance": "RELIANCE",
-                "wipro": "WIPRO",
-                "hcl": "HCLTECH",
-                "tech mahindra": "TECHM",
-                "hdfc bank": "HDFCBANK",
-                "icici bank": "ICICIBANK",
-                "sbi": "SBIN",
-                "bharti airtel": "BHARTIARTL"
-            }
-            company_lower = company_name.lower()
-            for key, val in ticker_map.items():
-                if key in company_lower:
-                    ticker = val
-                    print(f"✅ Fallback ticker lookup: {company_name} → {ticker}")
-                    break
-        
-        # Remove user linkage: allow creation without authentication.
-        # If you later want optional linkage, use:
-        # user_obj = request.user if getattr(request.user, 'is_authenticated', False) else None
-        # and pass user=user_obj.
-        report = FinancialReport.objects.create(
-            report_id=report_id,
-            company_name=company_name,
-            ticker_symbol=ticker,
-            user=None,  # No user association
-            uploaded_pdf=uploaded_file,
-            pdf_original_name=uploaded_file.name,
+        if run_async:
+            # Submit/poll mode: hand the saved file to the worker pool and return immediately
+            job = jobs.submit(
+                _process_upload_job, temp_path, google_api_key, uploaded_file.name,
+                file_name=uploaded_file.name, upload_path=temp_path
+            )
+            return JsonResponse({
+                'success': True,
+                'job_id': str(job.job_id),
+                'status': job.status,
+                'status_url': reverse('processing_job_status', args=[str(job.job_id)]),
+            }, status=202)
+
+        tracker = StageTracker(PIPELINE_STAGES)
+        # ?diagnostics=1 reports which pages the locator kept and why
+        want_diagnostics = str(request.POST.get('diagnostics', request.GET.get('diagnostics', ''))).lower() in ('1', 'true', 'yes')
+        page_diagnostics = [] if want_diagnostics else None
+        extracted_data, summary_result, ratios_result, cache_hit = run_processing_pipeline(
+            temp_path, google_api_key, tracker, page_diagnostics=page_diagnostics
         )
-        
-        # Use the setter methods from your model
-        report.set_summary(summary_data)
-        report.set_ratios(ratios_data)
-        report.save()
+
+        # Step 4: Save to DB using your model's setter methods
+        with tracker.stage("save"):
+            report = save_financial_report(
+                extracted_data, summary_result, ratios_result,
+                uploaded_file, uploaded_file.name
+            )
 
         # Clean up
         os.remove(temp_path)
 
+        metadata = {
+            "file_name": uploaded_file.name,
+            "size_kb": round(uploaded_file.size / 1024, 2),
+            "uploaded_pdf": True,
+            "cache_hit": cache_hit,
+            "stage_timings": tracker.timings(),
+            "extraction_method": extracted_data.get("extraction_method", "llm"),
+        }
+        if page_diagnostics is not None:
+            metadata["page_locator"] = page_diagnostics
+
         # Return the response in the format expected by frontend
         return JsonResponse({
             'success': True,
-            'report_id': report_id,
-            'company_name': extracted_data.get("company_name", "Unknown Company"),
+            'report_id': str(report.report_id),
+            'company_name': report.company_name,
             'ticker_symbol': extracted_data.get("ticker_symbol", ""),
             'summary': report.get_summary(),  # Use getter to ensure proper format
             'ratios': report.get_ratios(),    # Use getter to ensure proper format
-            'metadata': {
-                "file_name": uploaded_file.name,
-                "size_kb": round(uploaded_file.size / 1024, 2),
-                "uploaded_pdf": True,
-            }
+            'metadata': metadata
         }, encoder=CustomJSONEncoder)
 
+    except JobError as e:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return JsonResponse({"error": e.message, "success": False}, status=e.status)
     except Exception as e:
         import traceback
         print(f"Error in processing: {str(e)}")
@@ -161,6 +274,27 @@ def process_financial_statements_api(request):
             os.remove(temp_path)
         return JsonResponse({'error': f'Internal server error: {str(e)}'}, status=500)
 
+@csrf_exempt
+def get_processing_job_api(request, job_id):
+    """Poll a background upload job: per-stage progress and, once done, the report."""
+    try:
+        job = ProcessingJob.objects.select_related('report').get(job_id=job_id)
+    except (ProcessingJob.DoesNotExist, ValidationError, ValueError):
+        return JsonResponse({'error': 'Job not found'}, status=404)
+
+    job = jobs.expire_if_stale(job)
+    return JsonResponse(job.to_api_response(), encoder=CustomJSONEncoder)
+
+def extraction_cache_status_api(request):
+    """Hit/miss counters and size of the extraction cache; staff may POST action=clear."""
+    if request.method == 'POST' and request.POST.get('action') == 'clear':
+        if not request.user.is_staff:
+            return JsonResponse({'error': 'Staff access required'}, status=403)
+        deleted = extraction_cache.clear()
+        return JsonResponse({'success': True, 'deleted': deleted})
+
+    return JsonResponse({'success': True, 'cache': extraction_cache.get_stats()})
+
 @csrf_exempt
 def get_report_by_id_api(request, report_id):
     try:
@@ -372,14 +506,14 @@ def get_stock_data_api(request, ticker_symbol, period='1M'):
             print(f"📊 Added .NS suffix: {ticker_symbol} → {ticker}")
         
         # Helper with retry & fallback
-        def fetch_history():
+        def fetch_history(period=yf_period, interval=interval):
             last_exception = None
             
             # Method 1: Try yfinance download (3 attempts)
             for attempt in range(3):
                 try:
-                    print(f"🔄 Attempt {attempt+1}: Fetching {ticker} with period={yf_period}, interval={interval}")
-                    df = yf.download(ticker, period=yf_period, interval=interval, progress=False, auto_adjust=True, threads=False)
+                    print(f"🔄 Attempt {attempt+1}: Fetching {ticker} with period={period}, interval={interval}")
+                    df = yf.download(ticker, period=period, interval=interval, progress=False, auto_adjust=True, threads=False)
                     if df is not None and not df.empty:
                         print(f"✅ Successfully fetched {len(df)} data points")
                         return df
@@ -391,7 +525,7 @@ def get_stock_data_api(request, ticker_symbol, period='1M'):
                 try:
                     print(f"🔄 Trying Ticker.history fallback...")
                     tk = yf.Ticker(ticker)
-                    df2 = tk.history(period=yf_period, interval=interval, auto_adjust=True)
+                    df2 = tk.history(period=period, interval=interval, auto_adjust=True)
                     if df2 is not None and not df2.empty:
                         print(f"✅ Fallback succeeded: {len(df2)} data points")
                         return df2
@@ -415,7 +549,7 @@ def get_stock_data_api(request, ticker_symbol, period='1M'):
                         '1d': 1, '5d': 5, '1mo': 30, '3mo': 90, 
                         '6mo': 180, '1y': 365, '2y': 730, '5y': 1825
                     }
-                    days = period_days.get(yf_period, 30)
+                    days = period_days.get(period, 30)
                     start_time = end_time - (days * 24 * 60 * 60)
                     
                     url = f"https://query2.finance.yahoo.com/v8/finance/chart/{ticker}"
@@ -450,7 +584,8 @@ def get_stock_data_api(request, ticker_symbol, period='1M'):
                 print(f"❌ All attempts failed for {ticker}: {last_exception}")
             return None
 
-        df = fetch_history()
+        # Served from the local bar store; the provider is only asked for the missing tail
+        df = ohlcv.get_history(ticker, yf_period, interval, loader=fetch_history)
 
         if df is None or df.empty:
             return JsonResponse({
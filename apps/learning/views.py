@@ -6,6 +6,7 @@ from django.views.decorators.csrf import csrf_exempt
 from django.conf import settings
 import os
 
+from apps.dataprocessor import llm_clients
 from .models import DailyTopic
 
 # Schema for the AI response
@@ -54,9 +55,9 @@ def get_daily_topic_view(request):
         print("Error: GEMINI_API_KEY not found.")
         return JsonResponse({'error': 'API key not provided and GEMINI_API_KEY not set.'}, status=500)
 
-    # 3. Configure GenAI (MATCHING YOUR WORKING CODE)
+    # 3. Configure GenAI once per key (MATCHING YOUR WORKING CODE)
     try:
-        genai.configure(api_key=api_key)
+        llm_clients.configure_gemini(api_key, sdk=genai)
     except Exception as e:
         return JsonResponse({'error': f'Gemini configuration error: {e}'}, status=500)
 
@@ -91,11 +92,12 @@ def get_daily_topic_view(request):
     response_json = None
     last_error = None
     
-    for model_name in candidates:
+    # Models that failed recently are tried last
+    for model_name in llm_clients.healthy_candidates("gemini", candidates, api_key):
         try:
-            # Initialize model
-            model = genai.GenerativeModel(
-                model_name=model_name,
+            # Initialize model (shared across requests)
+            model = llm_clients.get_gemini_model(
+                model_name, api_key, sdk=genai,
                 generation_config={
                     "response_mime_type": "application/json",
                     "response_schema": TOPIC_SCHEMA
@@ -103,7 +105,12 @@ def get_daily_topic_view(request):
             )
             
             print(f"Attempting generation with: {model_name}")
-            response = model.generate_content(prompt)
+            try:
+                response = model.generate_content(prompt)
+            except Exception as api_error:
+                llm_clients.record_failure("gemini", model_name, api_error, api_key=api_key)
+                raise
+            llm_clients.record_success("gemini", model_name, api_key=api_key)
             
             if not response.text:
                 raise ValueError("Empty response")
@@ -1,3 +1,13 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import SectorHistory
+
+
+@admin.register(SectorHistory)
+class SectorHistoryAdmin(admin.ModelAdmin):
+    list_display = ('name', 'kind', 'updated_at')
+    list_filter = ('kind',)
+    search_fields = ('name',)
+    ordering = ('kind', 'name')
+    readonly_fields = ('updated_at',)
+    exclude = ('timestamps', 'values')
@@ -0,0 +1,180 @@
+"""
+Sector universe and vectorised sector aggregation.
+
+The universe (sector -> tickers, plus optional per-ticker shares
+outstanding and free-float fraction) is loaded from a JSON file,
+data/sector_universe.json by default or SECTOR_UNIVERSE_FILE:
+
+    {
+      "sectors": {"Energy": ["RELIANCE.NS", "ONGC.NS"], ...},
+      "constituents": {"RELIANCE.NS": {"shares": 13530000000, "free_float": 0.5}}
+    }
+
+aggregate() turns one set of quotes into every sector's summary in a
+single pass over a sector x ticker matrix: weighted average change,
+breadth, dispersion and top movers. Weightings:
+
+* equal       - every stock counts the same (the original behaviour);
+* market_cap  - price x shares outstanding;
+* free_float  - price x shares x free-float fraction.
+
+A stock without shares data gets no weight under the cap weightings; a
+sector where no stock has any falls back to equal weight and says so in
+its "weighting" field.
+"""
+import json
+import os
+
+import numpy as np
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+DEFAULT_UNIVERSE_FILE = os.path.join(os.path.dirname(__file__), 'data', 'sector_universe.json')
+WEIGHTINGS = ('equal', 'market_cap', 'free_float')
+DEFAULT_TOP_MOVERS = 3
+
+
+class Universe:
+    """Sectors over a de-duplicated ticker axis, with the membership matrix built once"""
+
+    def __init__(self, sectors, constituents=None, max_per_sector=None):
+        constituents = constituents or {}
+        self.sectors = {name: list(tickers)[:max_per_sector] for name, tickers in sectors.items()}
+        self.names = list(self.sectors)
+        self.tickers = []
+        self.index = {}
+        for tickers in self.sectors.values():
+            for ticker in tickers:
+                if ticker not in self.index:
+                    self.index[ticker] = len(self.tickers)
+                    self.tickers.append(ticker)
+
+        self.membership = np.zeros((len(self.names), len(self.tickers)), dtype=bool)
+        for row, tickers in enumerate(self.sectors.values()):
+            self.membership[row, [self.index[t] for t in tickers]] = True
+
+        meta = [constituents.get(ticker, {}) for ticker in self.tickers]
+        self.shares = np.array([m.get('shares', np.nan) for m in meta], dtype=float)
+        # Without a free-float figure the whole share count is assumed to trade
+        self.free_float = np.array([m.get('free_float', 1.0) for m in meta], dtype=float)
+
+    def combined(self, name):
+        """One sector holding every ticker of the universe, e.g. as a market benchmark"""
+        market = Universe({name: self.tickers})
+        market.shares, market.free_float = self.shares, self.free_float
+        return market
+
+
+def load_universe(path=None, max_per_sector=None):
+    path = path or getattr(settings, 'SECTOR_UNIVERSE_FILE', DEFAULT_UNIVERSE_FILE)
+    try:
+        with open(path, encoding='utf-8') as fh:
+            raw = json.load(fh)
+        return Universe(raw['sectors'], raw.get('constituents'), max_per_sector)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        raise ImproperlyConfigured(f"Cannot load sector universe from {path}: {e}")
+
+
+def _weights(universe, price, weighting):
+    if weighting == 'equal':
+        return np.ones(len(universe.tickers))
+    if weighting == 'market_cap':
+        return price * universe.shares
+    if weighting == 'free_float':
+        return price * universe.shares * universe.free_float
+    raise ValueError(f"Unknown weighting '{weighting}', expected one of {', '.join(WEIGHTINGS)}")
+
+
+def sector_changes(universe, changes, price, weighting='equal'):
+    """
+    Weighted average change per sector for every row of changes
+    (periods x tickers, NaN = no data): periods x sectors, NaN where a sector has no data.
+    """
+    weights = _weights(universe, price, weighting)
+    weights = np.where(np.isnan(weights) | (weights < 0), 0.0, weights)
+    valid = (~np.isnan(changes)).astype(float)
+    changes0 = np.where(np.isnan(changes), 0.0, changes)
+    members = universe.membership.astype(float)
+    W = members * weights
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        weighted = (changes0 @ W.T) / (valid @ W.T)
+        equal = (changes0 @ members.T) / (valid @ members.T)
+    # Same fallback as aggregate(): equal weight where no stock has a weight
+    return np.where(np.isfinite(weighted), weighted, equal)
+
+
+def aggregate(universe, quotes, weighting='equal', top_n=DEFAULT_TOP_MOVERS):
+    """Summaries for every sector of universe from quotes (ticker -> quote dict)"""
+    n = len(universe.tickers)
+    price = np.full(n, np.nan)
+    change = np.full(n, np.nan)
+    for ticker, quote in quotes.items():
+        col = universe.index.get(ticker)
+        if col is not None:
+            price[col] = quote['price']
+            change[col] = quote['change_pct']
+
+    valid = universe.membership & ~np.isnan(change)
+    counts = valid.sum(axis=1)
+    price0 = np.where(np.isnan(price), 0.0, price)
+    change0 = np.where(np.isnan(change), 0.0, change)
+
+    weights = _weights(universe, price, weighting)
+    weights = np.where(np.isnan(weights) | (weights < 0), 0.0, weights)
+    W = valid * weights
+    total = W.sum(axis=1)
+    # Sectors without any usable weight fall back to equal weight
+    fallback = (total == 0) & (counts > 0)
+    W[fallback] = valid[fallback]
+    total[fallback] = counts[fallback]
+
+    safe_total = np.where(total == 0, 1.0, total)
+    safe_counts = np.where(counts == 0, 1, counts)
+    avg_change = W @ change0 / safe_total
+    avg_price = valid @ price0 / safe_counts
+    variance = W @ (change0 ** 2) / safe_total - avg_change ** 2
+    dispersion = np.sqrt(np.clip(variance, 0, None))
+    coverage = (valid & (weights > 0)).sum(axis=1) / safe_counts
+
+    advancers = (valid & (change0 > 0)).sum(axis=1)
+    decliners = (valid & (change0 < 0)).sum(axis=1)
+
+    # Non-members sort last; the loop below drops them and the wrong-signed moves
+    gainers = np.argsort(np.where(valid, -change0, np.inf), axis=1, kind='stable')[:, :top_n]
+    losers = np.argsort(np.where(valid, change0, np.inf), axis=1, kind='stable')[:, :top_n]
+
+    def mover(col):
+        return {"symbol": quotes[universe.tickers[col]]['symbol'], "change_pct": float(change[col])}
+
+    results = {}
+    for row, name in enumerate(universe.names):
+        tickers = universe.sectors[name]
+        count = int(counts[row])
+        if not count:
+            results[name] = {
+                "avg_price": 0,
+                "avg_change_pct": 0,
+                "stocks": [],
+                "companies_count": 0,
+                "error": "No data available"
+            }
+            continue
+        results[name] = {
+            "avg_price": round(float(avg_price[row]), 2),
+            "avg_change_pct": round(float(avg_change[row]), 2),
+            "stocks": [quotes[t] for t in tickers if valid[row, universe.index[t]]],
+            "companies_count": count,
+            "success_rate": f"{count}/{len(tickers)}",
+            "weighting": 'equal' if fallback[row] else weighting,
+            "weight_coverage_pct": 100.0 if fallback[row] else round(float(coverage[row]) * 100, 1),
+            "breadth": {
+                "advancers": int(advancers[row]),
+                "decliners": int(decliners[row]),
+                "unchanged": count - int(advancers[row]) - int(decliners[row]),
+            },
+            "dispersion": round(float(dispersion[row]), 2),
+            "top_gainers": [mover(c) for c in gainers[row] if valid[row, c] and change[c] > 0],
+            "top_losers": [mover(c) for c in losers[row] if valid[row, c] and change[c] < 0],
+        }
+    return results
@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class SectorOverviewConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.sector_overview'
+
+    def ready(self):
+        # Off by default: with several web workers, run_sector_refresher is the better home
+        if getattr(settings, 'SECTOR_REFRESHER_AUTOSTART', False):
+            from .refresher import refresher
+            refresher.start()
@@ -0,0 +1,261 @@
+"""
+Rolling history of sector index levels and constituent prices.
+
+Every refresh used to download two days of prices and throw them away
+after computing one daily change. record() now appends each refresh to
+a per-series store (one SectorHistory row per sector / ticker holding
+packed numpy arrays), so 1W/1M/YTD performance, relative strength and
+sparklines come from local data.
+
+* Sector levels start at 100 and chain daily: a point is the level at
+  the previous session's close times (1 + today's sector change).
+* While a session is open a point is stamped with the refresh time.
+  A refresh that only sees a finished session (evening, weekend,
+  holiday) overwrites that session's close point instead.
+* Every point of the last SECTOR_HISTORY_INTRADAY_DAYS days is kept,
+  but only each day's last point beyond that, for SECTOR_HISTORY_DAYS.
+
+When a sector (or the benchmark) has no history yet, e.g. on the first
+refresh, that refresh downloads SEED_PERIOD of daily closes instead of
+two days and rebuilds every series from them.
+"""
+from datetime import datetime, time as dtime, timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import aggregation
+from .models import SectorHistory
+
+MARKET_TZ = ZoneInfo(getattr(settings, 'SECTOR_MARKET_TIMEZONE', 'Asia/Kolkata'))
+MARKET_CLOSE = dtime(15, 30)
+
+# Benchmark series over the whole universe, for relative strength
+MARKET = 'Market'
+BASE_LEVEL = 100.0
+SEED_PERIOD = '1y'
+INTRADAY_DAYS = getattr(settings, 'SECTOR_HISTORY_INTRADAY_DAYS', 5)
+MAX_DAYS = getattr(settings, 'SECTOR_HISTORY_DAYS', 400)
+SPARKLINE_DAYS = 30
+PERIODS = ('1W', '1M', 'YTD')
+
+
+def _pack(ts, values):
+    return np.asarray(ts, dtype=np.int64).tobytes(), np.asarray(values, dtype=np.float64).tobytes()
+
+
+def _unpack(row):
+    return (np.frombuffer(bytes(row.timestamps), dtype=np.int64).copy(),
+            np.frombuffer(bytes(row.values), dtype=np.float64).copy())
+
+
+def _days(ts):
+    """Market-timezone calendar day of each epoch-second timestamp, as day numbers"""
+    local = pd.to_datetime(np.asarray(ts, dtype=np.int64), unit='s', utc=True).tz_convert(MARKET_TZ)
+    return local.tz_localize(None).values.astype('datetime64[D]').astype(np.int64)
+
+
+def _session_close(day):
+    """Epoch seconds of the session close on market day number day"""
+    date = datetime(1970, 1, 1).date() + timedelta(days=int(day))
+    return int(datetime.combine(date, MARKET_CLOSE, MARKET_TZ).timestamp())
+
+
+def point_time(bar_day, now):
+    """Refresh time during the latest bar's session, that session's close once it is over"""
+    if bar_day is not None and bar_day < _days([now])[0]:
+        return min(_session_close(bar_day), int(now))
+    return int(now)
+
+
+def last_bar_day(closes):
+    """Market day of the newest bar among downloaded close series"""
+    ends = [series.index[-1] for series in closes.values() if len(series)]
+    if not ends:
+        return None
+    return int(_days([max(pd.Timestamp(t).timestamp() for t in ends)])[0])
+
+
+def _append(ts, values, t, value):
+    # A re-stamped session close (or clock skew) replaces the points it overlaps
+    keep = ts < t
+    return np.append(ts[keep], t), np.append(values[keep], value)
+
+
+def compact(ts, values, now):
+    """Keep all recent points, only each day's last one for older days, nothing past MAX_DAYS"""
+    if not len(ts):
+        return ts, values
+    days = _days(ts)
+    today = _days([now])[0]
+    last_of_day = np.append(days[1:] != days[:-1], True)
+    keep = (last_of_day | (days > today - INTRADAY_DAYS)) & (days > today - MAX_DAYS)
+    return ts[keep], values[keep]
+
+
+def _level(ts, values, t, change_pct):
+    before = _days(ts) < _days([t])[0] if len(ts) else np.zeros(0, dtype=bool)
+    base = values[before][-1] if before.any() else BASE_LEVEL
+    return base * (1 + change_pct / 100)
+
+
+def _load(kind, names):
+    rows = SectorHistory.objects.filter(kind=kind, name__in=list(names))
+    return {row.name: _unpack(row) for row in rows}
+
+
+def needs_seed(universe):
+    """Whether some sector (or the benchmark) has no history yet"""
+    names = universe.names + [MARKET]
+    stored = SectorHistory.objects.filter(kind=SectorHistory.KIND_SECTOR, name__in=names).count()
+    return stored < len(names)
+
+
+def _seed(universe, closes, weighting):
+    """Daily series for every ticker and sector from downloaded close series"""
+    frame = pd.DataFrame({t: s for t, s in closes.items() if t in universe.index and len(s)})
+    if frame.empty:
+        return {}, {}
+    frame = frame.sort_index()
+    index = frame.index if frame.index.tz is not None else frame.index.tz_localize('UTC')
+    bar_days = _days(index.values.astype('datetime64[s]').astype(np.int64))
+    ts = np.array([_session_close(day) for day in bar_days], dtype=np.int64)
+
+    tickers = {}
+    for ticker in frame.columns:
+        prices = frame[ticker].to_numpy(dtype=float)
+        present = ~np.isnan(prices)
+        tickers[ticker] = (ts[present], prices[present])
+
+    prices = np.full((len(frame), len(universe.tickers)), np.nan)
+    cols = [universe.index[t] for t in frame.columns]
+    prices[:, cols] = frame.to_numpy(dtype=float)
+    changes = np.full_like(prices, np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        changes[1:] = (prices[1:] / prices[:-1] - 1) * 100
+    latest = pd.DataFrame(prices).ffill().to_numpy()[-1]
+
+    sectors = {}
+    for target in (universe, universe.combined(MARKET)):
+        daily = aggregation.sector_changes(target, changes, latest, weighting)
+        levels = BASE_LEVEL * np.cumprod(1 + np.nan_to_num(daily) / 100, axis=0)
+        for col, name in enumerate(target.names):
+            sectors[name] = (ts, levels[:, col])
+    return sectors, tickers
+
+
+def record(universe, quotes, sector_data, market_change, closes=None, seed=False,
+           weighting='equal', now=None):
+    """
+    Append this refresh to the store (seeding it from closes first when seed is set).
+    Returns the sector series (name -> (timestamps, values)), benchmark included.
+    """
+    now = now if now is not None else timezone.now().timestamp()
+    closes = closes or {}
+    t = point_time(last_bar_day(closes), now)
+
+    sector_names = universe.names + [MARKET]
+    if seed:
+        sectors, tickers = _seed(universe, closes, weighting)
+    else:
+        sectors = _load(SectorHistory.KIND_SECTOR, sector_names)
+        tickers = _load(SectorHistory.KIND_TICKER, quotes)
+
+    changes = {name: data['avg_change_pct'] for name, data in sector_data.items()
+               if name in universe.sectors and data.get('companies_count') and not data.get('is_stale')}
+    if market_change is not None:
+        changes[MARKET] = market_change
+
+    empty = (np.zeros(0, dtype=np.int64), np.zeros(0))
+    for name, change in changes.items():
+        ts, values = sectors.get(name, empty)
+        sectors[name] = compact(*_append(ts, values, t, _level(ts, values, t, change)), now)
+    for ticker, quote in quotes.items():
+        ts, values = tickers.get(ticker, empty)
+        tickers[ticker] = compact(*_append(ts, values, t, quote['price']), now)
+
+    updated_at = timezone.now()
+    rows = []
+    for kind, series in ((SectorHistory.KIND_SECTOR, sectors), (SectorHistory.KIND_TICKER, tickers)):
+        for name, arrays in series.items():
+            timestamps, values = _pack(*arrays)
+            rows.append(SectorHistory(kind=kind, name=name, timestamps=timestamps, values=values,
+                                      updated_at=updated_at))
+    with transaction.atomic():
+        SectorHistory.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=['kind', 'name'],
+            update_fields=['timestamps', 'values', 'updated_at'],
+        )
+    return sectors
+
+
+def _value_at(ts, values, t):
+    i = np.searchsorted(ts, t, side='right') - 1
+    return values[i] if i >= 0 else None
+
+
+def period_starts(now):
+    local = datetime.fromtimestamp(now, MARKET_TZ)
+    return {
+        '1W': now - 7 * 86400,
+        '1M': (pd.Timestamp(local) - pd.DateOffset(months=1)).timestamp(),
+        # Last point before Jan 1 is the previous year's close
+        'YTD': datetime(local.year, 1, 1, tzinfo=MARKET_TZ).timestamp() - 1,
+    }
+
+
+def performance(ts, values, now):
+    """Percent change over each period; None where the history does not reach back that far"""
+    if not len(ts):
+        return {period: None for period in PERIODS}
+    result = {}
+    for period, start in period_starts(now).items():
+        base = _value_at(ts, values, start)
+        result[period] = round(float((values[-1] / base - 1) * 100), 2) if base else None
+    return result
+
+
+def sparklines(ts, values, now):
+    """Daily closes for the last SPARKLINE_DAYS days and every point of the latest day"""
+    if not len(ts):
+        return [], []
+    days = _days(ts)
+    last_of_day = np.append(days[1:] != days[:-1], True)
+    daily = values[last_of_day & (days > _days([now])[0] - SPARKLINE_DAYS)]
+    intraday = values[days == days[-1]]
+    return [round(float(v), 2) for v in daily], [round(float(v), 2) for v in intraday]
+
+
+def summarize(series, now=None):
+    """Performance, relative strength vs the benchmark and sparklines for each sector series"""
+    now = now if now is not None else timezone.now().timestamp()
+    market = performance(*series.get(MARKET, (np.zeros(0), np.zeros(0))), now)
+    summaries = {}
+    for name, (ts, values) in series.items():
+        perf = performance(ts, values, now)
+        daily, intraday = sparklines(ts, values, now)
+        summaries[name] = {
+            "level": round(float(values[-1]), 2) if len(values) else None,
+            "performance": perf,
+            # Outperformance of the whole universe over the same period, in percent
+            "relative_strength": {
+                period: round(((1 + perf[period] / 100) / (1 + market[period] / 100) - 1) * 100, 2)
+                if perf[period] is not None and market[period] is not None else None
+                for period in PERIODS
+            },
+            "sparkline": daily,
+            "intraday": intraday,
+        }
+    return summaries
+
+
+def read(names, since=None):
+    """Stored series for names (benchmark included) in one query: name -> (timestamps, values)"""
+    series = _load(SectorHistory.KIND_SECTOR, list(names) + [MARKET])
+    if since is not None:
+        series = {name: (ts[ts >= since], values[ts >= since]) for name, (ts, values) in series.items()}
+    return series
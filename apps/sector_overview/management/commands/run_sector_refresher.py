@@ -0,0 +1,31 @@
+"""
+Keep the sector overview snapshot fresh from a long-lived worker.
+
+    python manage.py run_sector_refresher
+    python manage.py run_sector_refresher --once   # e.g. from cron
+
+The web processes must share this worker's cache backend to see its snapshots.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.sector_overview import refresher
+
+
+class Command(BaseCommand):
+    help = "Refresh the sector overview snapshot on a market-hours-aware schedule"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Refresh once and exit")
+
+    def handle(self, *args, **options):
+        if options["once"]:
+            if not refresher.refresh_once():
+                raise CommandError("Sector refresh failed or is already running")
+            self.stdout.write(self.style.SUCCESS("✅ Sector snapshot refreshed"))
+            return
+
+        self.stdout.write(f"🔄 Sector refresher started (market {refresher.market_phase()})")
+        try:
+            refresher.refresher.run()
+        except KeyboardInterrupt:
+            self.stdout.write("🛑 Sector refresher stopped")
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.2 on 2026-10-17 05:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SectorHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('sector', 'Sector index'), ('ticker', 'Constituent price')], max_length=10)),
+                ('name', models.CharField(help_text='Sector name or ticker symbol', max_length=100)),
+                ('timestamps', models.BinaryField(help_text='Point times as int64 epoch seconds')),
+                ('values', models.BinaryField(help_text='Point values as float64')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Sector History',
+                'verbose_name_plural': 'Sector History',
+                'db_table': 'sector_history',
+                'unique_together': {('kind', 'name')},
+            },
+        ),
+    ]
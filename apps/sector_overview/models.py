@@ -1,3 +1,33 @@
 from django.db import models
 
-# Create your models here.
+
+class SectorHistory(models.Model):
+    """
+    Rolling time series of one sector index or constituent price.
+    Points are packed numpy arrays, so a refresh rewrites one row per series.
+    """
+    KIND_SECTOR = 'sector'
+    KIND_TICKER = 'ticker'
+    KIND_CHOICES = [
+        (KIND_SECTOR, 'Sector index'),
+        (KIND_TICKER, 'Constituent price'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+
+    name = models.CharField(max_length=100, help_text="Sector name or ticker symbol")
+
+    timestamps = models.BinaryField(help_text="Point times as int64 epoch seconds")
+
+    values = models.BinaryField(help_text="Point values as float64")
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'sector_history'
+        unique_together = ['kind', 'name']
+        verbose_name = 'Sector History'
+        verbose_name_plural = 'Sector History'
+
+    def __str__(self):
+        return f"{self.kind} - {self.name}"
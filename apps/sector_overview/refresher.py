@@ -0,0 +1,147 @@
+"""
+Scheduled refresh of the sector overview snapshot.
+
+Without this the snapshot is only refreshed when a request finds it
+expired. SectorRefresher refreshes it on a cadence that follows NSE
+trading hours instead (often while the market is open, rarely at night
+and over the weekend), so requests are answered from the cache.
+
+Run it either in-process (SECTOR_REFRESHER_AUTOSTART = True starts a
+daemon thread from AppConfig.ready) or as a long-lived worker:
+
+    python manage.py run_sector_refresher
+
+The worker only helps the web processes if they share its cache backend
+(Redis/Memcached, not LocMemCache).
+"""
+import threading
+import time
+from datetime import datetime, time as dtime
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+
+from apps.company_search import single_flight
+
+from . import views
+
+MARKET_TZ = ZoneInfo(getattr(settings, 'SECTOR_MARKET_TIMEZONE', 'Asia/Kolkata'))
+MARKET_OPEN = dtime(9, 15)
+MARKET_CLOSE = dtime(15, 30)
+
+# Seconds between refreshes per market phase; override entries with SECTOR_REFRESH_SECONDS
+DEFAULT_REFRESH_SECONDS = {
+    'open': 5 * 60,
+    'closed': 30 * 60,
+    'weekend': 2 * 3600,
+}
+# After a failed refresh, try again sooner than the normal cadence
+RETRY_SECONDS = 60
+
+
+def market_phase(now=None):
+    """'open', 'closed' (weekday outside trading hours) or 'weekend'"""
+    now = (now or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    if now.weekday() >= 5:
+        return 'weekend'
+    if MARKET_OPEN <= now.time() <= MARKET_CLOSE:
+        return 'open'
+    return 'closed'
+
+
+def refresh_interval(now=None):
+    """Seconds until the next refresh, never sleeping past the market open"""
+    now = (now or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    phase = market_phase(now)
+    intervals = {**DEFAULT_REFRESH_SECONDS, **getattr(settings, 'SECTOR_REFRESH_SECONDS', {})}
+    interval = intervals[phase]
+    if phase == 'closed' and now.time() < MARKET_OPEN:
+        until_open = (datetime.combine(now.date(), MARKET_OPEN, MARKET_TZ) - now).total_seconds()
+        interval = min(interval, max(until_open, 1))
+    return interval
+
+
+def refresh_once():
+    """
+    Refresh the snapshot unless a refresh already runs somewhere (request,
+    admin endpoint or another worker). Returns True when the snapshot was written.
+    """
+    # The loop outlives the server's idle timeout: drop connections that are
+    # broken or past CONN_MAX_AGE before and after touching SectorHistory
+    close_old_connections()
+    try:
+        return _refresh()
+    finally:
+        close_old_connections()
+
+
+def _refresh():
+    lock = single_flight.lock_key(views.REFRESH_FLIGHT_KEY)
+    if not cache.add(lock, 1, views.REFRESH_LOCK_TIMEOUT):
+        print(" Sector refresh already in progress, skipping")
+        return False
+    try:
+        data = views.refresh_sector_data()
+    except Exception as e:
+        print(f" Scheduled sector refresh failed: {e}")
+        return False
+    finally:
+        cache.delete(lock)
+    return bool(data) and 'error' not in data
+
+
+def seconds_until_due():
+    """How long the current snapshot stays fresh on the market-hours cadence (0 = refresh now)"""
+    snapshot = cache.get(views.CACHE_KEYS['SNAPSHOT'])
+    if not snapshot:
+        return 0
+    return max(0, snapshot['timestamp'] + refresh_interval() - time.time())
+
+
+class SectorRefresher:
+    """Refreshes the sector snapshot in a loop until stopped"""
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run(self, iterations=None):
+        """Refresh whenever the snapshot is due; iterations bounds the number of refreshes"""
+        runs = 0
+        while not self._stop.is_set():
+            delay = seconds_until_due()
+            if delay <= 0:
+                ok = refresh_once()
+                runs += 1
+                if iterations is not None and runs >= iterations:
+                    break
+                delay = refresh_interval() if ok else min(RETRY_SECONDS, refresh_interval())
+            views.update_refresh_stats(
+                scheduler='running', market_phase=market_phase(),
+                next_run_at=time.time() + delay, interval_seconds=round(delay)
+            )
+            self._stop.wait(delay)
+        views.update_refresh_stats(scheduler='stopped', next_run_at=None)
+
+    def start(self):
+        """Run in a daemon thread; does nothing if already running"""
+        if self._thread and self._thread.is_alive():
+            return False
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name='sector-refresher', daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    @property
+    def running(self):
+        return bool(self._thread and self._thread.is_alive())
+
+
+refresher = SectorRefresher()
@@ -0,0 +1,109 @@
+import json
+import time
+
+import numpy as np
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+
+from apps.sector_overview import aggregation
+from apps.sector_overview.aggregation import Universe, aggregate
+
+
+def quote(ticker, price, change_pct):
+    return {"symbol": ticker.replace('.NS', ''), "price": price, "change_pct": change_pct, "method": "bulk"}
+
+
+SECTORS = {
+    "Energy": ["RELIANCE.NS", "ONGC.NS", "IOC.NS"],
+    "Telecom": ["BHARTIARTL.NS", "RELIANCE.NS"],
+    "Empty": ["MISSING.NS"],
+}
+CONSTITUENTS = {
+    "RELIANCE.NS": {"shares": 300, "free_float": 0.5},
+    "ONGC.NS": {"shares": 100},
+    "BHARTIARTL.NS": {"shares": 100, "free_float": 0.5},
+}
+QUOTES = {
+    "RELIANCE.NS": quote("RELIANCE.NS", 10.0, 2.0),
+    "ONGC.NS": quote("ONGC.NS", 10.0, -1.0),
+    "IOC.NS": quote("IOC.NS", 40.0, 0.0),
+    "BHARTIARTL.NS": quote("BHARTIARTL.NS", 30.0, 4.0),
+}
+
+
+def test_equal_weight_matches_plain_mean():
+    result = aggregate(Universe(SECTORS, CONSTITUENTS), QUOTES)
+    energy = result["Energy"]
+
+    assert energy["avg_price"] == 20.0
+    assert energy["avg_change_pct"] == round((2.0 - 1.0 + 0.0) / 3, 2)
+    assert energy["companies_count"] == 3
+    assert [s["symbol"] for s in energy["stocks"]] == ["RELIANCE", "ONGC", "IOC"]
+    assert energy["breadth"] == {"advancers": 1, "decliners": 1, "unchanged": 1}
+    assert energy["dispersion"] == round(float(np.std([2.0, -1.0, 0.0])), 2)
+    assert energy["top_gainers"] == [{"symbol": "RELIANCE", "change_pct": 2.0}]
+    assert energy["top_losers"] == [{"symbol": "ONGC", "change_pct": -1.0}]
+    assert result["Empty"]["error"] == "No data available"
+
+
+def test_market_cap_and_free_float_weights():
+    universe = Universe(SECTORS, CONSTITUENTS)
+
+    cap = aggregate(universe, QUOTES, 'market_cap')
+    # RELIANCE 3000, ONGC 1000, IOC has no shares and no weight
+    assert cap["Energy"]["avg_change_pct"] == round((3000 * 2.0 - 1000 * 1.0) / 4000, 2)
+    assert cap["Energy"]["weight_coverage_pct"] == round(2 / 3 * 100, 1)
+
+    free = aggregate(universe, QUOTES, 'free_float')
+    # RELIANCE 1500, BHARTIARTL 1500
+    assert free["Telecom"]["avg_change_pct"] == 3.0
+    assert free["Telecom"]["weighting"] == 'free_float'
+
+
+def test_sector_without_weights_falls_back_to_equal():
+    universe = Universe({"Other": ["IOC.NS", "ONGC.NS"]}, {})
+    result = aggregate(universe, QUOTES, 'market_cap')["Other"]
+
+    assert result["weighting"] == 'equal'
+    assert result["avg_change_pct"] == -0.5
+
+
+def test_unknown_weighting_is_rejected():
+    with pytest.raises(ValueError):
+        aggregate(Universe(SECTORS), QUOTES, 'price')
+
+
+def test_universe_file_loading(tmp_path):
+    path = tmp_path / "universe.json"
+    path.write_text(json.dumps({"sectors": SECTORS, "constituents": CONSTITUENTS}))
+
+    universe = aggregation.load_universe(str(path), max_per_sector=2)
+    assert universe.sectors["Energy"] == ["RELIANCE.NS", "ONGC.NS"]
+    assert universe.membership.shape == (3, 4)
+    assert universe.shares[universe.index["ONGC.NS"]] == 100
+
+    with pytest.raises(ImproperlyConfigured):
+        aggregation.load_universe(str(tmp_path / "missing.json"))
+
+
+def test_bundled_universe_loads():
+    universe = aggregation.load_universe()
+    assert "Technology" in universe.sectors
+    assert len(universe.tickers) < sum(len(t) for t in universe.sectors.values())
+
+
+def test_large_universe_stays_fast():
+    rng = np.random.default_rng(0)
+    tickers = [f"T{i}.NS" for i in range(5000)]
+    sectors = {f"S{s}": tickers[s * 400:(s + 1) * 400] + tickers[:50] for s in range(12)}
+    constituents = {t: {"shares": int(rng.integers(1e6, 1e9))} for t in tickers}
+    quotes = {t: quote(t, float(rng.uniform(10, 1000)), float(rng.normal())) for t in tickers}
+    universe = Universe(sectors, constituents)
+
+    aggregate(universe, quotes, 'market_cap')
+    started = time.perf_counter()
+    result = aggregate(universe, quotes, 'market_cap')
+    elapsed = time.perf_counter() - started
+
+    assert result["S0"]["companies_count"] == 400
+    assert elapsed < 0.5
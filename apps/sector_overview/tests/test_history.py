@@ -0,0 +1,146 @@
+import json
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+from django.test import RequestFactory
+
+from apps.sector_overview import aggregation, history, views
+from apps.sector_overview.models import SectorHistory
+
+pytestmark = pytest.mark.django_db
+
+IST = history.MARKET_TZ
+SECTORS = {"Energy": ["RELIANCE.NS"], "Telecom": ["BHARTIARTL.NS"]}
+
+
+def at(*args):
+    return datetime(*args, tzinfo=IST).timestamp()
+
+
+def closes_until(end, days=120):
+    index = pd.bdate_range(end=end, periods=days, tz=IST)
+    return {
+        "RELIANCE.NS": pd.Series(np.linspace(100, 200, days), index=index),
+        "BHARTIARTL.NS": pd.Series(np.full(days, 50.0), index=index),
+    }
+
+
+def quote(ticker, price, change_pct):
+    return {"symbol": ticker.replace('.NS', ''), "price": price, "change_pct": change_pct, "method": "bulk"}
+
+
+def refresh(universe, quotes, closes, seed=False, now=None):
+    sector_data = aggregation.aggregate(universe, quotes)
+    market = aggregation.aggregate(universe.combined(history.MARKET), quotes)[history.MARKET]
+    return history.record(universe, quotes, sector_data, market['avg_change_pct'], closes, seed, now=now)
+
+
+def test_seed_builds_levels_from_closes():
+    universe = aggregation.Universe(SECTORS)
+    closes = closes_until('2024-06-14')  # includes today's bar, still in progress
+    quotes = {"RELIANCE.NS": quote("RELIANCE.NS", 201.0, 0.5), "BHARTIARTL.NS": quote("BHARTIARTL.NS", 50.0, 0.0)}
+    now = at(2024, 6, 14, 11, 0)
+
+    assert history.needs_seed(universe)
+    series = refresh(universe, quotes, closes, seed=True, now=now)
+    assert not history.needs_seed(universe)
+
+    ts, levels = series["Energy"]
+    reliance = closes["RELIANCE.NS"]
+    # Seeded levels track the constituent, then today's point chains off yesterday's close
+    assert levels[-2] / levels[0] == pytest.approx(reliance.iloc[-2] / reliance.iloc[0])
+    assert levels[-1] == pytest.approx(levels[-2] * 1.005)
+    assert ts[-1] == int(now)
+
+    summary = history.summarize(series, now=now)
+    # Points sit at the session close, so a week ago (Friday 11:00) the last close was Thursday's
+    closed = reliance.index + pd.Timedelta(hours=15, minutes=30)
+    week_ago = reliance[closed <= pd.Timestamp(now - 7 * 86400, unit='s', tz='UTC')].iloc[-1]
+    expected = (reliance.iloc[-2] * 1.005 / week_ago - 1) * 100
+    assert summary["Energy"]["performance"]["1W"] == pytest.approx(expected, abs=0.01)
+    assert summary["Telecom"]["performance"]["1M"] == 0.0
+    assert summary["Energy"]["relative_strength"]["1M"] > 0 > summary["Telecom"]["relative_strength"]["1M"]
+    assert len(summary["Energy"]["sparkline"]) > 15
+    assert summary["Energy"]["intraday"] == [round(float(levels[-1]), 2)]
+
+    stored = SectorHistory.objects.get(kind=SectorHistory.KIND_TICKER, name="RELIANCE.NS")
+    assert len(bytes(stored.values)) == 8 * len(reliance)
+
+
+def test_intraday_points_chain_off_previous_close():
+    universe = aggregation.Universe(SECTORS)
+    refresh(universe, {"RELIANCE.NS": quote("RELIANCE.NS", 100.0, 0.0)}, {}, now=at(2024, 6, 13, 15, 0))
+    today = closes_until('2024-06-14', days=2)
+
+    refresh(universe, {"RELIANCE.NS": quote("RELIANCE.NS", 101.0, 1.0)}, today, now=at(2024, 6, 14, 10, 0))
+    series = refresh(universe, {"RELIANCE.NS": quote("RELIANCE.NS", 102.0, 2.0)}, today,
+                     now=at(2024, 6, 14, 11, 0))
+
+    ts, levels = series["Energy"]
+    assert list(np.round(levels, 4)) == [100.0, 101.0, 102.0]
+
+    # After the close (and over the weekend) the session close point is overwritten, not chained again
+    series = refresh(universe, {"RELIANCE.NS": quote("RELIANCE.NS", 103.0, 3.0)}, today,
+                     now=at(2024, 6, 15, 12, 0))
+    ts, levels = series["Energy"]
+    assert list(np.round(levels, 4)) == [100.0, 101.0, 102.0, 103.0]
+    assert ts[-1] == history._session_close(history._days([at(2024, 6, 14, 12, 0)])[0])
+
+    series = refresh(universe, {"RELIANCE.NS": quote("RELIANCE.NS", 103.5, 3.5)}, today,
+                     now=at(2024, 6, 16, 12, 0))
+    assert list(np.round(series["Energy"][1], 4)) == [100.0, 101.0, 102.0, 103.5]
+
+
+def test_old_intraday_points_are_compacted():
+    day = 86400
+    now = at(2024, 6, 14, 12, 0)
+    ts = np.array([now - 10 * day, now - 10 * day + 600, now - 2 * day, now - 2 * day + 600, now - 500 * day + 3],
+                  dtype=np.int64)
+    ts.sort()
+    values = np.arange(len(ts), dtype=float)
+
+    kept_ts, kept = history.compact(ts, values, now)
+
+    # The 500-day-old point is dropped, the 10-day-old day keeps its last point, recent days keep all
+    assert list(kept) == [2.0, 3.0, 4.0]
+
+
+def test_history_api_serves_stored_series():
+    universe = views.UNIVERSE
+    energy = universe.sectors["Energy"][0]
+    refresh(universe, {energy: quote(energy, 100.0, 1.0)}, {})
+
+    factory = RequestFactory()
+    response = views.sector_history_api(factory.get('/sector/api/sector-history/', {'sectors': 'Energy',
+                                                                                    'period': '1w'}))
+    body = json.loads(response.content)
+    assert body["period"] == '1W'
+    assert set(body["series"]) == {"Energy", history.MARKET}
+    assert body["series"]["Energy"]["values"] == [101.0]
+
+    bad = views.sector_history_api(factory.get('/sector/api/sector-history/', {'period': '2d'}))
+    assert bad.status_code == 400
+    unknown = views.sector_history_api(factory.get('/sector/api/sector-history/', {'sectors': 'Nope'}))
+    assert unknown.status_code == 400
+
+
+def test_first_refresh_seeds_and_attaches_history(mocker):
+    universe = aggregation.Universe(SECTORS)
+    mocker.patch.object(views, 'UNIVERSE', universe)
+    mocker.patch.object(views, 'MARKET_UNIVERSE', universe.combined(history.MARKET))
+
+    def bulk(tickers, method="bulk", period="2d", closes=None):
+        downloaded = closes_until(pd.Timestamp.now(tz=IST).normalize())
+        closes.update(downloaded)
+        return {t: quote(t, float(downloaded[t].iloc[-1]), 1.0) for t in tickers}
+
+    download = mocker.patch.object(views, 'get_stock_data_bulk', side_effect=bulk)
+    data = views.fetch_fresh_sector_data()
+    assert download.call_args.kwargs["period"] == history.SEED_PERIOD
+    assert data["Energy"]["history"]["performance"]["1M"] > 0
+    assert data["_metadata"]["market"]["level"] is not None
+
+    views.fetch_fresh_sector_data()
+    assert download.call_args.kwargs["period"] == "2d"
@@ -0,0 +1,77 @@
+from datetime import datetime
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.company_search import single_flight
+from apps.sector_overview import refresher, views
+from apps.sector_overview.views import CACHE_KEYS
+
+IST = refresher.MARKET_TZ
+
+
+def sample_data():
+    return {
+        "Technology": {"avg_price": 100.0, "avg_change_pct": 1.0, "stocks": [], "companies_count": 1},
+        "_metadata": {"total_stocks_fetched": 1, "total_sectors": 1, "from_cache": False},
+    }
+
+
+class TestCadence(TestCase):
+    def test_market_phases(self):
+        self.assertEqual(refresher.market_phase(datetime(2024, 6, 14, 11, 0, tzinfo=IST)), 'open')
+        self.assertEqual(refresher.market_phase(datetime(2024, 6, 14, 18, 0, tzinfo=IST)), 'closed')
+        self.assertEqual(refresher.market_phase(datetime(2024, 6, 15, 11, 0, tzinfo=IST)), 'weekend')
+
+    def test_interval_follows_market_hours(self):
+        self.assertEqual(refresher.refresh_interval(datetime(2024, 6, 14, 11, 0, tzinfo=IST)), 300)
+        self.assertEqual(refresher.refresh_interval(datetime(2024, 6, 14, 18, 0, tzinfo=IST)), 1800)
+        self.assertEqual(refresher.refresh_interval(datetime(2024, 6, 15, 11, 0, tzinfo=IST)), 7200)
+        # Does not sleep through the open
+        self.assertEqual(refresher.refresh_interval(datetime(2024, 6, 14, 9, 5, tzinfo=IST)), 600)
+
+
+class TestRefresher(TestCase):
+    def setUp(self):
+        cache.delete_many(list(CACHE_KEYS.values()))
+
+    def tearDown(self):
+        cache.delete(single_flight.lock_key(views.REFRESH_FLIGHT_KEY))
+        cache.delete_many(list(CACHE_KEYS.values()))
+
+    def test_refresh_once_writes_snapshot(self):
+        with patch.object(views, 'fetch_fresh_sector_data', return_value=sample_data()):
+            self.assertTrue(refresher.refresh_once())
+        self.assertEqual(views.get_cached_sector_data()["Technology"]["avg_price"], 100.0)
+        self.assertGreater(refresher.seconds_until_due(), 0)
+
+    def test_refresh_once_recycles_db_connections(self):
+        calls = []
+        with patch.object(refresher, 'close_old_connections', side_effect=lambda: calls.append('recycle')), \
+                patch.object(views, 'refresh_sector_data', side_effect=lambda: calls.append('refresh') or sample_data()):
+            self.assertTrue(refresher.refresh_once())
+        self.assertEqual(calls, ['recycle', 'refresh', 'recycle'])
+
+    def test_refresh_once_skips_while_another_refresh_runs(self):
+        cache.add(single_flight.lock_key(views.REFRESH_FLIGHT_KEY), 1, 60)
+        with patch.object(views, 'fetch_fresh_sector_data') as fetch:
+            self.assertFalse(refresher.refresh_once())
+        fetch.assert_not_called()
+
+    def test_loop_refreshes_when_due_and_records_schedule(self):
+        loop = refresher.SectorRefresher()
+        with patch.object(views, 'fetch_fresh_sector_data', return_value=sample_data()) as fetch:
+            loop.run(iterations=1)
+        fetch.assert_called_once()
+        self.assertEqual(views.get_refresh_stats()["scheduler"], 'stopped')
+
+    def test_background_thread_stops(self):
+        loop = refresher.SectorRefresher()
+        views.set_cached_sector_data(sample_data())  # fresh, so the loop just waits
+        with patch.object(views, 'fetch_fresh_sector_data') as fetch:
+            self.assertTrue(loop.start())
+            self.assertFalse(loop.start())
+            loop.stop(timeout=5)
+        self.assertFalse(loop.running)
+        fetch.assert_not_called()
@@ -0,0 +1,188 @@
+import json
+import time
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, RequestFactory
+
+from apps.company_search import single_flight
+from apps.sector_overview import aggregation, history, views
+from apps.sector_overview.views import CACHE_KEYS, CACHE_DURATION
+
+
+def sample_data():
+    return {
+        "Technology": {"avg_price": 100.0, "avg_change_pct": 1.0, "stocks": [], "companies_count": 1},
+        "_metadata": {"total_stocks_fetched": 1, "total_sectors": 1, "from_cache": False},
+    }
+
+
+def age_snapshot(seconds):
+    snapshot = cache.get(CACHE_KEYS['SNAPSHOT'])
+    snapshot['timestamp'] = time.time() - seconds
+    cache.set(CACHE_KEYS['SNAPSHOT'], snapshot, 3600)
+
+
+class TestStaleWhileRevalidate(TestCase):
+    def setUp(self):
+        cache.delete_many(list(CACHE_KEYS.values()))
+        self.factory = RequestFactory()
+
+    def tearDown(self):
+        single_flight.wait_for_refreshes(timeout=5)
+        cache.delete_many(list(CACHE_KEYS.values()))
+
+    def get(self):
+        response = views.sector_overview_api(self.factory.get('/sector/api/sector-overview/'))
+        return json.loads(response.content)
+
+    def test_fresh_cache_is_served_without_fetching(self):
+        views.set_cached_sector_data(sample_data())
+        with patch.object(views, 'fetch_fresh_sector_data') as fetch:
+            body = self.get()
+        fetch.assert_not_called()
+        self.assertFalse(body['_metadata']['is_stale'])
+
+    def test_expired_cache_is_served_stale_and_refreshed(self):
+        views.set_cached_sector_data(sample_data())
+        age_snapshot(CACHE_DURATION + 60)
+
+        refreshed = sample_data()
+        refreshed["Technology"]["avg_price"] = 200.0
+        with patch.object(views, 'fetch_fresh_sector_data', return_value=refreshed) as fetch:
+            body = self.get()
+            self.assertTrue(body['_metadata']['is_stale'])
+            self.assertEqual(body['_metadata']['cache_status'], 'stale_revalidating')
+            self.assertEqual(body['Technology']['avg_price'], 100.0)
+            single_flight.wait_for_refreshes(timeout=5)
+
+        fetch.assert_called_once()
+        self.assertEqual(views.get_cached_sector_data()['Technology']['avg_price'], 200.0)
+
+    def test_empty_cache_fetches_synchronously(self):
+        with patch.object(views, 'fetch_fresh_sector_data', return_value=sample_data()) as fetch:
+            body = self.get()
+        fetch.assert_called_once()
+        self.assertIn('Technology', body)
+        self.assertIsNotNone(views.get_cached_sector_data())
+
+
+def quote(ticker, price=100.0, method="bulk"):
+    return {"symbol": ticker.replace('.NS', ''), "price": price, "change_pct": 1.0, "method": method}
+
+
+class TestUniverseFetch(TestCase):
+    SECTORS = {
+        "Energy": ["RELIANCE.NS", "ONGC.NS"],
+        "Telecom": ["BHARTIARTL.NS", "RELIANCE.NS"],
+    }
+
+    def test_universe_is_deduplicated_in_order(self):
+        universe = aggregation.Universe(self.SECTORS)
+        self.assertEqual(universe.tickers, ["RELIANCE.NS", "ONGC.NS", "BHARTIARTL.NS"])
+
+    def test_misses_are_retried_as_one_batch_and_bounded(self):
+        calls = []
+        # RELIANCE comes back first time, ONGC on the first retry, BHARTIARTL never
+        available = {"bulk": "RELIANCE.NS", "retry_1": "ONGC.NS"}
+
+        def bulk(tickers, method="bulk", **kwargs):
+            calls.append(list(tickers))
+            return {t: quote(t, method=method) for t in tickers if available.get(method) == t}
+
+        with patch.object(views, 'get_stock_data_bulk', side_effect=bulk):
+            quotes, upstream = views.fetch_universe_quotes(
+                ["RELIANCE.NS", "ONGC.NS", "BHARTIARTL.NS"], max_retries=2, backoff=0)
+
+        self.assertEqual(calls, [
+            ["RELIANCE.NS", "ONGC.NS", "BHARTIARTL.NS"],
+            ["ONGC.NS", "BHARTIARTL.NS"],
+            ["BHARTIARTL.NS"],
+        ])
+        self.assertEqual(upstream, 3)
+        self.assertEqual(quotes["ONGC.NS"]["method"], "retry_1")
+        self.assertNotIn("BHARTIARTL.NS", quotes)
+
+    def test_refresh_downloads_once_and_fans_out_to_sectors(self):
+        def bulk(tickers, method="bulk", **kwargs):
+            return {t: quote(t, price=float(len(t))) for t in tickers}
+
+        universe = aggregation.Universe(self.SECTORS)
+        with patch.object(views, 'UNIVERSE', universe), \
+                patch.object(views, 'MARKET_UNIVERSE', universe.combined(history.MARKET)), \
+                patch.object(views, 'get_stock_data_bulk', side_effect=bulk) as download, \
+                patch.object(views, 'test_yfinance_connection') as probe:
+            data = views.fetch_fresh_sector_data()
+
+        download.assert_called_once()
+        self.assertEqual(download.call_args.args[0], ["RELIANCE.NS", "ONGC.NS", "BHARTIARTL.NS"])
+        probe.assert_not_called()
+        self.assertEqual(data["Energy"]["companies_count"], 2)
+        self.assertEqual(data["Telecom"]["stocks"][1]["symbol"], "RELIANCE")
+        self.assertEqual(data["_metadata"]["total_stocks_fetched"], 4)
+        self.assertEqual(data["_metadata"]["unique_stocks_fetched"], 3)
+        self.assertEqual(data["_metadata"]["upstream_requests"], 1)
+
+
+class TestSnapshots(TestCase):
+    def setUp(self):
+        cache.delete_many(list(CACHE_KEYS.values()))
+        self.factory = RequestFactory()
+
+    def tearDown(self):
+        single_flight.wait_for_refreshes(timeout=5)
+        cache.delete_many(list(CACHE_KEYS.values()))
+
+    def test_previous_snapshots_are_kept_and_used_as_fallback(self):
+        for price in (1.0, 2.0, 3.0):
+            data = sample_data()
+            data["Technology"]["avg_price"] = price
+            views.set_cached_sector_data(data)
+
+        history = views.get_snapshot_history()
+        self.assertEqual([s["data"]["Technology"]["avg_price"] for s in history], [2.0, 1.0])
+
+        cache.delete(CACHE_KEYS['SNAPSHOT'])
+        data, age = views.get_stale_sector_data()
+        self.assertEqual(data["Technology"]["avg_price"], 2.0)
+
+    def test_failed_sector_keeps_its_previous_values(self):
+        views.set_cached_sector_data(sample_data())
+        fresh = sample_data()
+        fresh["Technology"] = {"avg_price": 0, "avg_change_pct": 0, "stocks": [], "companies_count": 0,
+                               "error": "No data available"}
+
+        with patch.object(views, 'fetch_fresh_sector_data', return_value=fresh):
+            views.refresh_sector_data()
+
+        technology = views.get_cached_sector_data()["Technology"]
+        self.assertEqual(technology["avg_price"], 100.0)
+        self.assertTrue(technology["is_stale"])
+        self.assertIn("as_of", technology)
+
+    def test_refresh_timing_is_reported_in_cache_status(self):
+        with patch.object(views, 'fetch_fresh_sector_data', return_value=sample_data()):
+            views.refresh_sector_data()
+        with patch.object(views, 'fetch_fresh_sector_data', side_effect=RuntimeError("boom")):
+            with self.assertRaises(RuntimeError):
+                views.refresh_sector_data()
+
+        body = json.loads(views.cache_status_api(self.factory.get('/sector/api/cache-status/')).content)
+        self.assertTrue(body["has_cached_data"])
+        self.assertEqual(body["refresher"]["runs"], 2)
+        self.assertEqual(body["refresher"]["failures"], 1)
+        self.assertEqual(body["refresher"]["last_error"], "boom")
+        self.assertIn("last_duration_seconds", body["refresher"])
+
+    def test_force_refresh_returns_without_waiting(self):
+        views.set_cached_sector_data(sample_data())
+        with patch.object(views, 'schedule_sector_refresh', return_value=True) as schedule, \
+                patch.object(views, 'fetch_fresh_sector_data') as fetch:
+            response = views.force_refresh_api(self.factory.post('/sector/api/force-refresh/'))
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(json.loads(response.content)["status"], "scheduled")
+        schedule.assert_called_once()
+        fetch.assert_not_called()
+        # The current snapshot is still there while the refresh runs
+        self.assertIsNotNone(views.get_cached_sector_data())
@@ -5,4 +5,7 @@ urlpatterns = [
     path('api/sector-overview/', views.sector_overview_api, name='sector-overview'),
     path('api/health/', views.health_check, name='health-check'),
     path('api/available-sectors/', views.available_sectors_api, name='available-sectors'),
+    path('api/force-refresh/', views.force_refresh_api, name='force-refresh'),
+    path('api/cache-status/', views.cache_status_api, name='cache-status'),
+    path('api/sector-history/', views.sector_history_api, name='sector-history'),
 ]
\ No newline at end of file
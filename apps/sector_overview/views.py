@@ -1,6 +1,7 @@
 from django.http import JsonResponse
 from django.shortcuts import render
 from django.views.decorators.csrf import csrf_exempt
+from django.conf import settings
 from django.core.cache import cache
 import yfinance as yf
 import pandas as pd
@@ -12,79 +13,162 @@ import concurrent.futures
 from threading import Lock
 import json
 
+from apps.company_search import single_flight
+
+from . import aggregation, history
+
 logger = logging.getLogger(__name__)
 
-# Your complete sectors
-SECTORS = {
-    "Technology": [
-        "TCS.NS", "INFY.NS", "WIPRO.NS", "HCLTECH.NS", "LT.NS"
-    ],
-    "Banking": [
-        "HDFCBANK.NS", "ICICIBANK.NS", "KOTAKBANK.NS", "AXISBANK.NS", "SBIN.NS"
-    ],
-    "Pharma": [
-        "DRREDDY.NS", "SUNPHARMA.NS", "CIPLA.NS", "DIVISLAB.NS", "BIOCON.NS"
-    ],
-    "Energy": [
-        "RELIANCE.NS", "IOC.NS", "ONGC.NS", "NTPC.NS", "POWERGRID.NS"
-    ],
-    "Consumer Goods": [
-        "HINDUNILVR.NS", "ITC.NS", "NESTLEIND.NS", "BRITANNIA.NS", "TITAN.NS"
-    ],
-    "Automobile": [
-        "MARUTI.NS", "TATAMOTORS.NS", "M&M.NS", "BAJAJ-AUTO.NS", "HEROMOTOCO.NS"
-    ],
-    "Infrastructure": [
-        "LARSEN.NS", "ADANIPORTS.NS", "ADANIENT.NS", "ULTRACEMCO.NS", "ACC.NS"
-    ],
-    "Financial Services": [
-        "HDFC.NS", "ICICIPRULI.NS", "SBILIFE.NS", "HDFCLIFE.NS", "BAJFINANCE.NS"
-    ],
-    "Real Estate": [
-        "DLF.NS", "PRESTIGE.NS", "SOBHA.NS", "BRIGADE.NS", "GODREJPROP.NS"
-    ],
-    "Telecom": [
-        "BHARTIARTL.NS", "RELIANCE.NS", "IDEA.NS", "MTNL.NS", "TATACOMM.NS"
-    ],
-    "Metals & Mining": [
-        "TATASTEEL.NS", "HINDALCO.NS", "VEDL.NS", "JSWSTEEL.NS", "NATIONALUM.NS"
-    ],
-    "Chemicals": [
-        "PIDILITIND.NS", "BASF.NS", "PIIND.NS", "SRF.NS", "TATACHEM.NS"
-    ]
-}
+# Sector universe (sector -> tickers, shares and free float) lives in data/sector_universe.json
+MAX_STOCKS_PER_SECTOR = getattr(settings, 'SECTOR_MAX_STOCKS', None)
+UNIVERSE = aggregation.load_universe(max_per_sector=MAX_STOCKS_PER_SECTOR)
+SECTORS = UNIVERSE.sectors
+# Every ticker in one sector, the benchmark for relative strength
+MARKET_UNIVERSE = UNIVERSE.combined(history.MARKET)
+# 'equal', 'market_cap' or 'free_float'
+WEIGHTING = getattr(settings, 'SECTOR_WEIGHTING', 'equal')
 
 # Cache configuration
 CACHE_KEYS = {
-    'SECTOR_DATA': 'sector_overview_data',
-    'CACHE_TIMESTAMP': 'sector_data_timestamp',
+    # data and timestamp live in one entry so a reader never sees one without the other
+    'SNAPSHOT': 'sector_overview_snapshot',
+    'HISTORY': 'sector_overview_history',
+    'REFRESH_STATS': 'sector_refresh_stats',
     'HEALTH_CHECK': 'health_check_data'
 }
 
 CACHE_DURATION = 100 * 60  # 30 minutes in seconds
 
+# Previous snapshots kept to fall back on when the latest one is missing or a sector fails
+SNAPSHOT_HISTORY = getattr(settings, 'SECTOR_SNAPSHOT_HISTORY', 3)
+SNAPSHOT_HISTORY_TTL = 7 * 24 * 3600
+
+REFRESH_FLIGHT_KEY = 'sector_overview_refresh'
+REFRESH_LOCK_TIMEOUT = 300
+
+# Universe fetch: one batched download, then bounded batched retries for the misses
+FETCH_RETRIES = getattr(settings, 'SECTOR_FETCH_RETRIES', 2)
+RETRY_BACKOFF_SECONDS = getattr(settings, 'SECTOR_RETRY_BACKOFF_SECONDS', 1.0)
+
+def get_snapshot_history():
+    """Previous snapshots, newest first"""
+    return cache.get(CACHE_KEYS['HISTORY']) or []
+
+def get_snapshot():
+    """Latest snapshot as (data, timestamp), falling back to the newest previous one"""
+    snapshot = cache.get(CACHE_KEYS['SNAPSHOT'])
+    if not snapshot:
+        history = get_snapshot_history()
+        snapshot = history[0] if history else None
+    if snapshot:
+        return snapshot['data'], snapshot['timestamp']
+    return None, None
+
 def get_cached_sector_data():
     """Get cached sector data if it exists and is fresh"""
-    cached_data = cache.get(CACHE_KEYS['SECTOR_DATA'])
-    cache_timestamp = cache.get(CACHE_KEYS['CACHE_TIMESTAMP'])
+    snapshot = cache.get(CACHE_KEYS['SNAPSHOT'])
     
-    if cached_data and cache_timestamp:
+    if snapshot:
         # Check if cache is still valid (less than 30 minutes old)
-        cache_age = time.time() - cache_timestamp
+        cache_age = time.time() - snapshot['timestamp']
         if cache_age < CACHE_DURATION:
             print(f" Returning cached data (age: {cache_age:.1f}s)")
-            return cached_data
+            return snapshot['data']
     
     print(" Cache expired or not available")
     return None
 
+def get_stale_sector_data():
+    """Cached sector data past CACHE_DURATION (or a previous snapshot), with its age"""
+    cached_data, cache_timestamp = get_snapshot()
+    if cached_data and cache_timestamp:
+        return cached_data, time.time() - cache_timestamp
+    return None, None
+
 def set_cached_sector_data(data):
-    """Cache sector data with timestamp"""
+    """Cache sector data with timestamp, moving the current snapshot into the history"""
     current_time = time.time()
-    cache.set(CACHE_KEYS['SECTOR_DATA'], data, CACHE_DURATION + 300)  # Extra 5 minutes buffer
-    cache.set(CACHE_KEYS['CACHE_TIMESTAMP'], current_time, CACHE_DURATION + 300)
+    # Kept until the hard TTL so it can still be served stale while refreshing
+    _, hard_ttl = single_flight.swr_ttls('sector_overview')
+    keep_for = max(hard_ttl, CACHE_DURATION + 300)
+    previous = cache.get(CACHE_KEYS['SNAPSHOT'])
+    if previous and SNAPSHOT_HISTORY > 0:
+        history = [previous] + get_snapshot_history()
+        cache.set(CACHE_KEYS['HISTORY'], history[:SNAPSHOT_HISTORY], SNAPSHOT_HISTORY_TTL)
+    cache.set(CACHE_KEYS['SNAPSHOT'], {'data': data, 'timestamp': current_time}, keep_for)
     print(f" Data cached at {datetime.fromtimestamp(current_time).strftime('%H:%M:%S')}")
 
+def carry_forward_sectors(fresh_data, previous_data, previous_timestamp):
+    """Fill sectors that came back empty with their last good values, flagged as stale"""
+    if not previous_data:
+        return fresh_data
+    for sector_name in SECTORS:
+        sector = fresh_data.get(sector_name)
+        previous = previous_data.get(sector_name)
+        if sector and sector['companies_count'] == 0 and previous and previous.get('companies_count'):
+            fresh_data[sector_name] = dict(
+                previous, is_stale=True,
+                as_of=previous.get('as_of') or datetime.fromtimestamp(previous_timestamp).isoformat()
+            )
+            print(f" {sector_name}: no fresh data, keeping previous snapshot")
+    return fresh_data
+
+def get_refresh_stats():
+    return cache.get(CACHE_KEYS['REFRESH_STATS']) or {}
+
+def update_refresh_stats(**fields):
+    stats = get_refresh_stats()
+    stats.update(fields)
+    cache.set(CACHE_KEYS['REFRESH_STATS'], stats, None)
+    return stats
+
+def record_refresh(started, success, error=None):
+    """Keep timing stats for refreshes, whoever ran them (request, worker or admin)"""
+    finished = time.time()
+    duration = finished - started
+    stats = get_refresh_stats()
+    runs = stats.get('runs', 0) + 1
+    fields = {
+        'runs': runs,
+        'failures': stats.get('failures', 0) + (0 if success else 1),
+        'last_started_at': started,
+        'last_finished_at': finished,
+        'last_duration_seconds': round(duration, 2),
+        'avg_duration_seconds': round((stats.get('avg_duration_seconds', 0) * (runs - 1) + duration) / runs, 2),
+        'max_duration_seconds': round(max(stats.get('max_duration_seconds', 0), duration), 2),
+        'last_error': error,
+    }
+    if success:
+        fields['last_success_at'] = finished
+    return update_refresh_stats(**fields)
+
+def refresh_sector_data():
+    """Fetch and cache fresh sector data; returns it (or the error payload)"""
+    started = time.time()
+    try:
+        fresh_data = fetch_fresh_sector_data()
+    except Exception as e:
+        record_refresh(started, False, str(e))
+        raise
+    if fresh_data and 'error' not in fresh_data:
+        previous_data, previous_timestamp = get_snapshot()
+        set_cached_sector_data(carry_forward_sectors(fresh_data, previous_data, previous_timestamp))
+        record_refresh(started, True)
+        print(" Fresh data cached successfully")
+    else:
+        record_refresh(started, False, (fresh_data or {}).get('error', 'Unknown error'))
+        print(" Could not cache data due to errors")
+    return fresh_data
+
+def schedule_sector_refresh():
+    """Refresh in a background worker; at most one refresh runs at a time"""
+    soft_ttl, hard_ttl = single_flight.swr_ttls('sector_overview')
+    # refresh_sector_data writes the sector keys itself, so nothing is stored under the flight key
+    return single_flight.schedule_refresh(
+        REFRESH_FLIGHT_KEY, refresh_sector_data, soft_ttl, hard_ttl,
+        cacheable=lambda value: False, lock_timeout=REFRESH_LOCK_TIMEOUT,
+    )
+
 # Test if yfinance is working
 def test_yfinance_connection():
     """Test if yfinance can fetch data"""
@@ -100,10 +184,11 @@ def test_yfinance_connection():
         print(f" yfinance test failed: {e}")
         return False
 
-def get_stock_data_bulk(tickers):
+def get_stock_data_bulk(tickers, method="bulk", period="2d", closes=None):
     """
     Fetch multiple stocks in bulk using yfinance's batch download
-    This is much faster than individual requests
+    This is much faster than individual requests.
+    When closes is given, each ticker's downloaded close series is stored in it.
     """
     try:
         if not tickers:
@@ -114,7 +199,7 @@ def get_stock_data_bulk(tickers):
         # Download all tickers at once
         data = yf.download(
             tickers=tickers,
-            period="2d",
+            period=period,
             interval="1d",
             group_by='ticker',
             progress=False,
@@ -137,6 +222,9 @@ def get_stock_data_bulk(tickers):
                 if stock_df.empty or len(stock_df) < 2:
                     continue
                 
+                if closes is not None:
+                    closes[ticker] = stock_df['Close'].dropna()
+                
                 current_price = stock_df['Close'].iloc[-1]
                 prev_close = stock_df['Close'].iloc[-2]
                 
@@ -149,7 +237,7 @@ def get_stock_data_bulk(tickers):
                     "symbol": ticker.replace('.NS', ''),
                     "price": round(float(current_price), 2),
                     "change_pct": round(float(change_pct), 2),
-                    "method": "bulk"
+                    "method": method
                 }
                 
             except Exception as e:
@@ -197,128 +285,84 @@ def get_stock_data_individual(ticker):
     
     return None
 
+def fetch_universe_quotes(tickers, max_retries=None, backoff=None, period="2d", closes=None):
+    """
+    Fetch quotes for the whole universe with one batched download,
+    then re-download only the misses (as one batch) a bounded number of times.
+    Returns (quotes by ticker, number of upstream download calls).
+    """
+    max_retries = FETCH_RETRIES if max_retries is None else max_retries
+    backoff = RETRY_BACKOFF_SECONDS if backoff is None else backoff
+
+    quotes = get_stock_data_bulk(list(tickers), period=period, closes=closes)
+    calls = 1 if tickers else 0
+    missing = [ticker for ticker in tickers if ticker not in quotes]
+
+    for attempt in range(1, max_retries + 1):
+        if not missing:
+            break
+        print(f" Retrying {len(missing)} missing stocks (attempt {attempt}/{max_retries})")
+        if backoff:
+            time.sleep(backoff * attempt)
+        quotes.update(get_stock_data_bulk(missing, method=f"retry_{attempt}", period=period, closes=closes))
+        calls += 1
+        missing = [ticker for ticker in missing if ticker not in quotes]
+
+    if missing:
+        print(f" No data after {max_retries} retries: {', '.join(missing)}")
+    return quotes, calls
+
+def record_sector_history(sector_data, quotes, market_change, closes, seed):
+    """Append this refresh to the sector history and attach performance and sparklines to each sector"""
+    try:
+        series = history.record(UNIVERSE, quotes, sector_data, market_change, closes, seed, WEIGHTING)
+        summaries = history.summarize(series)
+    except Exception as e:
+        print(f" Could not update sector history: {e}")
+        return None
+    for sector_name, summary in summaries.items():
+        if sector_name in sector_data:
+            sector_data[sector_name]['history'] = summary
+    return summaries.get(history.MARKET)
+
 def process_sector_parallel(sector_name, tickers):
-    """Process a single sector in parallel"""
+    """Fetch and aggregate a single sector on its own (full refreshes use the universe fetch)"""
     print(f" Processing sector: {sector_name} with {len(tickers)} stocks")
-    
-    # First try bulk download for the entire sector
-    bulk_data = get_stock_data_bulk(tickers)
-    
-    stocks_data = []
-    missing_tickers = []
-    
-    # Collect data from bulk download
-    for ticker in tickers:
-        if ticker in bulk_data:
-            stocks_data.append(bulk_data[ticker])
-        else:
-            missing_tickers.append(ticker)
-    
-    # Process missing tickers in parallel
-    if missing_tickers:
-        print(f"Processing {len(missing_tickers)} missing stocks individually for {sector_name}")
-        
-        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-            future_to_ticker = {
-                executor.submit(get_stock_data_individual, ticker): ticker 
-                for ticker in missing_tickers
-            }
-            
-            for future in concurrent.futures.as_completed(future_to_ticker):
-                ticker = future_to_ticker[future]
-                try:
-                    stock_data = future.result(timeout=10)
-                    if stock_data:
-                        stocks_data.append(stock_data)
-                        print(f"Individual fetch: {ticker}")
-                    else:
-                        print(f" Individual failed: {ticker}")
-                except concurrent.futures.TimeoutError:
-                    print(f"Timeout: {ticker}")
-                except Exception as e:
-                    print(f" Error processing {ticker}: {e}")
-    
-    # Calculate sector averages
-    if stocks_data:
-        total_price = sum(stock['price'] for stock in stocks_data)
-        total_change = sum(stock['change_pct'] for stock in stocks_data)
-        avg_price = total_price / len(stocks_data)
-        avg_change = total_change / len(stocks_data)
-        
-        result = {
-            "avg_price": round(avg_price, 2),
-            "avg_change_pct": round(avg_change, 2),
-            "stocks": stocks_data,
-            "companies_count": len(stocks_data),
-            "success_rate": f"{len(stocks_data)}/{len(tickers)}"
-        }
-    else:
-        result = {
-            "avg_price": 0,
-            "avg_change_pct": 0,
-            "stocks": [],
-            "companies_count": 0,
-            "error": "No data available"
-        }
-    
-    print(f"Completed {sector_name}: {len(stocks_data)}/{len(tickers)} stocks")
-    return sector_name, result
+    quotes, _ = fetch_universe_quotes(tickers)
+    universe = aggregation.Universe({sector_name: tickers})
+    return sector_name, aggregation.aggregate(universe, quotes, WEIGHTING)[sector_name]
 
 def fetch_fresh_sector_data():
     """
-    Fetch fresh sector data from yfinance (called when cache is expired)
+    Fetch fresh sector data from yfinance (called when cache is expired).
+    All sectors share one de-duplicated download; results are fanned back out per sector.
     """
     start_time = time.time()
     
-    # Test connection first
-    if not test_yfinance_connection():
-        return {
-            "error": "yfinance connection failed. Please check your network connection.",
-            "sectors": {},
-            "from_cache": False
-        }
+    total_stocks = sum(len(tickers) for tickers in UNIVERSE.sectors.values())
+    print(f" Fetching fresh data for {len(UNIVERSE.names)} sectors, {len(UNIVERSE.tickers)} unique stocks...")
     
-    total_stocks = sum(len(tickers) for tickers in SECTORS.values())
-    print(f" Fetching fresh data for {len(SECTORS)} sectors, {total_stocks} stocks...")
+    # An empty history store is seeded from a longer download in the same single call
+    try:
+        seed_history = history.needs_seed(UNIVERSE)
+    except Exception as e:
+        print(f" Could not read sector history: {e}")
+        seed_history = False
+    closes = {}
     
-    sector_data = {}
-    successful_sectors = 0
+    try:
+        quotes, upstream_calls = fetch_universe_quotes(
+            UNIVERSE.tickers, period=history.SEED_PERIOD if seed_history else "2d", closes=closes
+        )
+    except Exception as e:
+        print(f" Universe fetch failed: {e}")
+        quotes, upstream_calls = {}, 0
     
-    # Process all sectors in parallel
-    with concurrent.futures.ThreadPoolExecutor(max_workers=6) as executor:
-        # Submit all sectors for processing
-        future_to_sector = {
-            executor.submit(process_sector_parallel, sector_name, tickers[:10]): sector_name 
-            for sector_name, tickers in SECTORS.items()
-        }
-        
-        # Collect results as they complete
-        for future in concurrent.futures.as_completed(future_to_sector):
-            sector_name = future_to_sector[future]
-            try:
-                sector_name, result = future.result(timeout=60)  # 60 second timeout per sector
-                sector_data[sector_name] = result
-                if result['companies_count'] > 0:
-                    successful_sectors += 1
-                print(f"Sector completed: {sector_name}")
-            except concurrent.futures.TimeoutError:
-                print(f" Timeout processing sector: {sector_name}")
-                sector_data[sector_name] = {
-                    "avg_price": 0,
-                    "avg_change_pct": 0,
-                    "stocks": [],
-                    "companies_count": 0,
-                    "error": "Processing timeout"
-                }
-            except Exception as e:
-                print(f" Error processing sector {sector_name}: {e}")
-                sector_data[sector_name] = {
-                    "avg_price": 0,
-                    "avg_change_pct": 0,
-                    "stocks": [],
-                    "companies_count": 0,
-                    "error": str(e)
-                }
+    aggregation_start = time.perf_counter()
+    sector_data = aggregation.aggregate(UNIVERSE, quotes, WEIGHTING)
+    market = aggregation.aggregate(MARKET_UNIVERSE, quotes, WEIGHTING)[history.MARKET]
+    aggregation_ms = (time.perf_counter() - aggregation_start) * 1000
+    successful_sectors = sum(1 for result in sector_data.values() if result['companies_count'] > 0)
     
     # Calculate overall statistics
     total_fetched_stocks = sum(sector['companies_count'] for sector in sector_data.values())
@@ -329,9 +373,10 @@ def fetch_fresh_sector_data():
     
     print(f"\n FRESH DATA FETCH COMPLETE")
     print(f" Total time: {processing_time:.2f} seconds")
-    print(f" Successful sectors: {successful_sectors}/{len(SECTORS)}")
+    print(f" Successful sectors: {successful_sectors}/{len(UNIVERSE.names)}")
     print(f" Stocks fetched: {total_fetched_stocks}/{total_stocks} ({success_rate:.1f}%)")
-    print(f" Performance: {total_stocks/processing_time:.2f} stocks/second")
+    print(f" Unique stocks fetched: {len(quotes)}/{len(UNIVERSE.tickers)} in {upstream_calls} download(s)")
+    print(f" Aggregation ({WEIGHTING}): {aggregation_ms:.2f} ms")
     
     if total_fetched_stocks == 0:
         return {
@@ -340,13 +385,24 @@ def fetch_fresh_sector_data():
             "from_cache": False
         }
     
+    market_history = record_sector_history(
+        sector_data, quotes, market.get('avg_change_pct') if market['companies_count'] else None,
+        closes, seed_history
+    )
+    
     # Add performance metrics to response
     response_data = sector_data.copy()
     response_data["_metadata"] = {
         "processing_time_seconds": round(processing_time, 2),
-        "total_sectors": len(SECTORS),
+        "total_sectors": len(UNIVERSE.names),
         "total_stocks_requested": total_stocks,
         "total_stocks_fetched": total_fetched_stocks,
+        "unique_stocks_requested": len(UNIVERSE.tickers),
+        "unique_stocks_fetched": len(quotes),
+        "upstream_requests": upstream_calls,
+        "weighting": WEIGHTING,
+        "aggregation_ms": round(aggregation_ms, 2),
+        "market": market_history,
         "success_rate_percent": round(success_rate, 1),
         "timestamp": datetime.now().isoformat(),
         "data_source": "yfinance",
@@ -368,33 +424,37 @@ def sector_overview_api(request):
         if cached_data:
             print(" Serving from cache")
             # Add cache info to response
-            cache_timestamp = cache.get(CACHE_KEYS['CACHE_TIMESTAMP'])
+            _, cache_timestamp = get_snapshot()
             if cache_timestamp:
                 cache_age = time.time() - cache_timestamp
                 cached_data['_metadata']['cache_age_seconds'] = round(cache_age, 2)
                 cached_data['_metadata']['cache_status'] = f"cached_{round(cache_age/60, 1)}min_old"
+                cached_data['_metadata']['is_stale'] = False
             
             return JsonResponse(cached_data)
         
-        # Cache is expired or not available, fetch fresh data
-        print(" Cache miss, fetching fresh data...")
-        fresh_data = fetch_fresh_sector_data()
+        # Expired but within the hard TTL: serve it and refresh in the background
+        stale_data, cache_age = get_stale_sector_data()
+        if stale_data and '_metadata' in stale_data:
+            print(f" Serving stale data (age: {cache_age:.1f}s), refreshing in background")
+            schedule_sector_refresh()
+            stale_data['_metadata']['cache_age_seconds'] = round(cache_age, 2)
+            stale_data['_metadata']['cache_status'] = "stale_revalidating"
+            stale_data['_metadata']['is_stale'] = True
+            return JsonResponse(stale_data)
         
-        # Cache the fresh data
-        if fresh_data and 'error' not in fresh_data:
-            set_cached_sector_data(fresh_data)
-            print(" Fresh data cached successfully")
-        else:
-            print(" Could not cache data due to errors")
+        # Nothing cached at all, fetch fresh data
+        print(" Cache miss, fetching fresh data...")
+        fresh_data = refresh_sector_data()
         
         return JsonResponse(fresh_data)
         
     except Exception as e:
         logger.error(f"Critical error in sector_overview_api: {str(e)}")
         
-        # Even on error, try to return cached data if available
-        cached_data = get_cached_sector_data()
-        if cached_data:
+        # Even on error, try to return cached data if available (stale is better than nothing)
+        cached_data, _ = get_stale_sector_data()
+        if cached_data and '_metadata' in cached_data:
             print(" Error occurred, but returning cached data as fallback")
             cached_data['_metadata']['error_fallback'] = True
             cached_data['_metadata']['error_message'] = str(e)
@@ -414,7 +474,7 @@ def health_check(request):
         test_result = test_yfinance_connection()
         
         # Check cache status
-        cache_timestamp = cache.get(CACHE_KEYS['CACHE_TIMESTAMP'])
+        _, cache_timestamp = get_snapshot()
         cache_status = "empty"
         cache_age = None
         
@@ -461,7 +521,8 @@ def available_sectors_api(request):
 @csrf_exempt
 def force_refresh_api(request):
     """
-    Force refresh the cache (admin/development endpoint)
+    Force refresh the cache (admin/development endpoint).
+    The refresh runs in the background; the current snapshot keeps being served meanwhile.
     """
     # Optional: Add authentication here if needed
     if request.method != 'POST':
@@ -469,40 +530,29 @@ def force_refresh_api(request):
     
     print(" Manual cache refresh requested")
     
-    # Clear existing cache
-    cache.delete(CACHE_KEYS['SECTOR_DATA'])
-    cache.delete(CACHE_KEYS['CACHE_TIMESTAMP'])
-    
-    # Fetch fresh data
-    fresh_data = fetch_fresh_sector_data()
+    scheduled = schedule_sector_refresh()
     
-    if fresh_data and 'error' not in fresh_data:
-        set_cached_sector_data(fresh_data)
-        return JsonResponse({
-            "status": "success",
-            "message": "Cache refreshed successfully",
-            "data": fresh_data
-        })
-    else:
-        return JsonResponse({
-            "status": "error",
-            "message": "Failed to refresh cache",
-            "error": fresh_data.get('error', 'Unknown error')
-        }, status=500)
+    return JsonResponse({
+        "status": "scheduled" if scheduled else "already_running",
+        "message": "Cache refresh started" if scheduled else "A refresh is already in progress",
+        "refresher": get_refresh_stats()
+    }, status=202)
 
 @csrf_exempt
 def cache_status_api(request):
     """Get current cache status"""
-    cache_timestamp = cache.get(CACHE_KEYS['CACHE_TIMESTAMP'])
-    cached_data = cache.get(CACHE_KEYS['SECTOR_DATA'])
+    cached_data, cache_timestamp = get_snapshot()
+    cache_age = time.time() - cache_timestamp if cache_timestamp else None
     
     status = {
         "cache_enabled": True,
         "cache_duration_minutes": CACHE_DURATION // 60,
         "has_cached_data": cached_data is not None,
         "cache_timestamp": cache_timestamp,
-        "cache_age_seconds": round(time.time() - cache_timestamp, 2) if cache_timestamp else None,
-        "cache_status": "fresh" if cache_timestamp and (time.time() - cache_timestamp) < CACHE_DURATION else "expired" if cache_timestamp else "empty",
+        "cache_age_seconds": round(cache_age, 2) if cache_timestamp else None,
+        "cache_status": "fresh" if cache_timestamp and cache_age < CACHE_DURATION else "expired" if cache_timestamp else "empty",
+        "snapshots_kept": len(get_snapshot_history()),
+        "refresher": get_refresh_stats(),
         "current_time": time.time()
     }
     
@@ -515,6 +565,44 @@ def cache_status_api(request):
     
     return JsonResponse(status)
 
+# Lookback of sector_history_api periods, in days (YTD is handled separately)
+HISTORY_PERIODS = {'1W': 7, '1M': 31, '3M': 92, '6M': 183, '1Y': 366}
+
+@csrf_exempt
+def sector_history_api(request):
+    """
+    Sector index levels and the market benchmark over a period, served from the
+    local history store (no upstream download). ?sectors=A,B&period=1W|1M|3M|6M|1Y|YTD
+    """
+    period = request.GET.get('period', '1M').upper()
+    names = [name for name in request.GET.get('sectors', '').split(',') if name] or UNIVERSE.names
+    unknown = [name for name in names if name not in UNIVERSE.sectors]
+    if unknown:
+        return JsonResponse({"error": f"Unknown sectors: {', '.join(unknown)}"}, status=400)
+    
+    now = time.time()
+    if period == 'YTD':
+        since = history.period_starts(now)['YTD']
+    elif period in HISTORY_PERIODS:
+        since = now - HISTORY_PERIODS[period] * 86400
+    else:
+        return JsonResponse({
+            "error": f"Invalid period '{period}', expected YTD or one of {', '.join(HISTORY_PERIODS)}"
+        }, status=400)
+    
+    series = history.read(names, since)
+    return JsonResponse({
+        "period": period,
+        "timestamp_unit": "ms",
+        "series": {
+            name: {
+                "timestamps": [int(t) * 1000 for t in ts],
+                "values": [round(float(v), 2) for v in values],
+            }
+            for name, (ts, values) in series.items()
+        }
+    })
+
 # CORS middleware
 def cors_middleware(get_response):
     def middleware(request):
@@ -530,4 +618,5 @@ sector_overview_api = cors_middleware(sector_overview_api)
 health_check = cors_middleware(health_check)
 available_sectors_api = cors_middleware(available_sectors_api)
 force_refresh_api = cors_middleware(force_refresh_api)
-cache_status_api = cors_middleware(cache_status_api)
\ No newline at end of file
+cache_status_api = cors_middleware(cache_status_api)
+sector_history_api = cors_middleware(sector_history_api)
\ No newline at end of file
@@ -217,4 +217,17 @@ class TestStockGraphViews:
         assert resp.status_code == 404
         err = resp.json()['error']
         assert 'No historical data found' in err
-        assert 'Ticker information also failed to load' not in err
\ No newline at end of file
+        assert 'Ticker information also failed to load' not in err
+
+    def test_15_columnar_format(self, client, mock_ticker):
+        """?format=columnar returns parallel OHLCV arrays instead of x/y points."""
+        mock_ticker.history.return_value = self.get_mock_dataframe()
+        mock_ticker.info = {'currency': 'USD', 'currentPrice': 150.0, 'previousClose': 145.0}
+        url = reverse('get_stock_data_api', kwargs={'ticker': 'AAPL', 'period': '1M'})
+        resp = client.get(url, {'format': 'columnar'})
+        assert resp.status_code == 200
+        chart = resp.json()['chartData']
+        assert chart['open'] == [100.0, 101.0, 102.0, 103.0, 104.0]
+        assert chart['close'][0] == 102.0
+        assert len(chart['timestamps']) == 5
+
@@ -2,6 +2,9 @@ from django.http import JsonResponse
 import yfinance as yf
 from datetime import datetime, timedelta
 
+from apps.company_search import ohlcv
+from apps.company_search.utils import frame_to_columns
+
 def get_stock_data_api(request, ticker, period):
     """
     API view to fetch stock data for a given ticker and period.
@@ -27,8 +30,8 @@ def get_stock_data_api(request, ticker, period):
         else:
             return JsonResponse({'error': 'Invalid period specified'}, status=400)
 
-        # 2. Fetch historical data
-        hist = stock.history(**params)
+        # 2. Fetch historical data (from the local bar store; only the missing tail is downloaded)
+        hist = ohlcv.get_history(ticker, params['period'], params['interval'], loader=stock.history)
         
         # --- MODIFICATION 1: Check for historical data immediately ---
         if hist.empty:
@@ -40,13 +43,17 @@ def get_stock_data_api(request, ticker, period):
             # Use 404 for 'No data found'
             return JsonResponse({'error': error_msg}, status=404)
 
-        # 3. Format historical data for candlestick/bar charts (OHLC format)
-        chart_data = []
-        for index, row in hist.iterrows():
-            chart_data.append({
-                'x': int(index.timestamp() * 1000), # Timestamp in milliseconds
-                'y': [row['Open'], row['High'], row['Low'], row['Close']]
-            })
+        # 3. Format historical data for candlestick/bar charts (OHLC format),
+        # or as parallel arrays with ?format=columnar (&timestamps=delta)
+        if request.GET.get('format') == 'columnar':
+            chart_data = frame_to_columns(hist, delta_timestamps=request.GET.get('timestamps') == 'delta')
+        else:
+            chart_data = []
+            for index, row in hist.iterrows():
+                chart_data.append({
+                    'x': int(index.timestamp() * 1000), # Timestamp in milliseconds
+                    'y': [row['Open'], row['High'], row['Low'], row['Close']]
+                })
 
         # 4. Fetch current price information
         info = stock.info
@@ -0,0 +1,96 @@
+import json
+import tempfile
+from unittest.mock import patch
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, TestCase, override_settings
+
+from apps.dataprocessor.models import ExtractionCache
+from apps.trends import views
+from apps.trends.models import FinancialAnalysis
+
+
+def statement(year):
+    return SimpleUploadedFile(f"report_{year}.pdf", f"annual report {year}".encode(), "application/pdf")
+
+
+def read_document(path):
+    with open(path) as fh:
+        return [fh.read()]
+
+
+def fake_extraction(context_text, api_key):
+    year = int(context_text.split()[-1])
+    return {
+        "success": True,
+        "company_name": "Test Corp",
+        "ticker_symbol": "TEST",
+        "financial_items": [{"particulars": "Revenue", "current_year": year * 10.0, "previous_year": None}],
+    }
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class TestIncrementalTrends(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        patches = [
+            patch.object(views, 'load_financial_document', side_effect=read_document),
+            patch.object(views, 'prepare_context_smart', side_effect=lambda docs: ("context " * 20) + docs[0]),
+            patch.object(views, 'extract_raw_financial_data', side_effect=fake_extraction),
+            patch.object(views, 'generate_trends_from_data', side_effect=self.trends),
+        ]
+        self.mocks = [p.start() for p in patches]
+        self.extract = self.mocks[2]
+        for p in patches:
+            self.addCleanup(p.stop)
+
+    def trends(self, items, api_key):
+        self.analysed = items
+        return {"financial_trends": [], "success": True, "source": "test"}
+
+    def post(self, files, **data):
+        request = self.factory.post('/trends/api/process-financial-statements/', {'files': files, **data})
+        response = views.process_financial_statements_api(request)
+        return response.status_code, json.loads(response.content)
+
+    def test_adding_a_year_extracts_only_the_new_file(self):
+        status, body = self.post([statement(2021), statement(2022), statement(2023)])
+        self.assertEqual(status, 200)
+        self.assertEqual(self.extract.call_count, 3)
+        self.assertEqual(body["summary"]["files_extracted"], 3)
+        session_id = body["session_id"]
+
+        status, body = self.post([statement(2024)], session_id=session_id)
+        self.assertEqual(status, 200)
+        self.assertEqual(self.extract.call_count, 4)
+        self.assertEqual(body["session_id"], session_id)
+        self.assertEqual(body["summary"]["files_processed"], 4)
+        revenue = dict((item["metric"], item["yearly_values"]) for item in self.analysed)["Revenue"]
+        self.assertEqual(revenue, {"2021": 20210.0, "2022": 20220.0, "2023": 20230.0, "2024": 20240.0})
+
+        stored = FinancialAnalysis.objects.get(pk=session_id).analysis_result
+        self.assertEqual(len(stored["files"]), 4)
+
+    def test_same_files_come_from_cache_and_are_not_added_twice(self):
+        status, body = self.post([statement(2021), statement(2022), statement(2023)])
+        self.assertEqual(ExtractionCache.objects.count(), 3)
+
+        # A new analysis of the same reports needs no extraction
+        status, fresh = self.post([statement(2021), statement(2022), statement(2023)])
+        self.assertEqual(status, 200)
+        self.assertEqual(self.extract.call_count, 3)
+        self.assertEqual(fresh["summary"]["files_from_cache"], 3)
+        self.assertNotEqual(fresh["session_id"], body["session_id"])
+
+        # Re-uploading a file already in the session is skipped
+        status, again = self.post([statement(2023)], session_id=body["session_id"])
+        self.assertEqual(again["summary"]["files_already_in_session"], 1)
+        self.assertEqual(again["summary"]["files_processed"], 3)
+
+    def test_session_rules(self):
+        status, body = self.post([statement(2024)], session_id="not-a-session")
+        self.assertEqual(status, 404)
+
+        status, body = self.post([statement(2021), statement(2022)])
+        self.assertEqual(status, 400)
+        self.assertIn("3 or more", body["error"])
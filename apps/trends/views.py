@@ -1,6 +1,7 @@
 import os
 import json
 import re
+import hashlib
 import uuid
 import traceback
 import concurrent.futures
@@ -11,6 +12,7 @@ from django.shortcuts import render
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.conf import settings
+from django.core.exceptions import ValidationError
 
 from pydantic import BaseModel, Field
 
@@ -18,13 +20,20 @@ from langchain_core.documents import Document
 from langchain_groq import ChatGroq
 
 # FIXED: Import from services instead of views
+from apps.dataprocessor import extraction_cache
 from apps.dataprocessor.services import (
+    PIPELINE_VERSION,
     extract_raw_financial_data,
     load_financial_document,
     prepare_context_smart,
     create_groq_llm
 )
 
+from .models import FinancialAnalysis
+
+# Trend extractions are cached apart from the full dataprocessor pipeline runs
+TRENDS_EXTRACTION_VERSION = hashlib.sha256(f"trends\x00{PIPELINE_VERSION}".encode("utf-8")).hexdigest()
+
 # ------------------------------
 # 🔹 Pydantic Models
 # ------------------------------
@@ -56,15 +65,15 @@ def process_single_file(uploaded_file, api_key, media_root):
         if ext not in ['.pdf', '.xlsx', '.xls']:
             return None
 
-        # Extract year from filename
-        year_match = re.search(r'(20\d{2})', file_name)
-        year = year_match.group(1) if year_match else f"Year_{uuid.uuid4().hex[:4]}"
+        year = year_from_filename(file_name)
 
         file_path = os.path.join(media_root, f"{unique_name}{ext}")
         
-        # Save file
+        # Save file, hashing it on the way for the extraction cache
+        digest = hashlib.sha256()
         with open(file_path, 'wb+') as dest:
             for chunk in uploaded_file.chunks():
+                digest.update(chunk)
                 dest.write(chunk)
 
         print(f"Processing {file_name} (year: {year}) in parallel...")
@@ -91,18 +100,7 @@ def process_single_file(uploaded_file, api_key, media_root):
                 os.remove(file_path)
             return None
 
-        # Extract ALL years data
-        yearly_data = extract_all_years_data(extraction, year)
-        
-        result = {
-            "filename": file_name,
-            "year": year,
-            "company_name": extraction.get("company_name"),
-            "ticker_symbol": extraction.get("ticker_symbol"),
-            "items_extracted": len(extraction.get("financial_items", [])),
-            "years_found": len(yearly_data),
-            "yearly_data": yearly_data
-        }
+        result = build_file_result(file_name, year, extraction, digest.hexdigest())
 
         # Cleanup
         if os.path.exists(file_path):
@@ -118,6 +116,32 @@ def process_single_file(uploaded_file, api_key, media_root):
             os.remove(file_path)
         return None
 
+def year_from_filename(file_name):
+    year_match = re.search(r'(20\d{2})', file_name)
+    return year_match.group(1) if year_match else f"Year_{uuid.uuid4().hex[:4]}"
+
+def build_file_result(file_name, year, extraction, content_hash=None):
+    """Per-file result from an extraction; the raw extraction is kept for the cache."""
+    # Extract ALL years data
+    yearly_data = extract_all_years_data(extraction, year)
+    return {
+        "filename": file_name,
+        "year": year,
+        "company_name": extraction.get("company_name"),
+        "ticker_symbol": extraction.get("ticker_symbol"),
+        "items_extracted": len(extraction.get("financial_items", [])),
+        "years_found": len(yearly_data),
+        "yearly_data": yearly_data,
+        "content_hash": content_hash,
+        "extraction": extraction
+    }
+
+def hash_upload(uploaded_file):
+    digest = hashlib.sha256()
+    for chunk in uploaded_file.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
 def process_files_parallel(uploaded_files, api_keys, media_root, max_workers=None):
     """Process multiple files in parallel using ThreadPoolExecutor with multiple API keys."""
     if max_workers is None:
@@ -222,6 +246,90 @@ CRITICAL_METRICS = {
         'category': 'liquidity'
     }
 }
+def extract_files_incremental(uploaded_files, api_keys, media_root, known_hashes=()):
+    """
+    Per-file results for the uploads, extracting only what has not been seen:
+    files already in the analysis session are skipped, files extracted before
+    (same bytes) come from the extraction cache, and only the rest go to the LLM.
+    """
+    results = []
+    pending = []
+    counts = {"extracted": 0, "from_cache": 0, "already_in_session": 0}
+    seen = set(known_hashes)
+
+    for uploaded_file in uploaded_files:
+        content_hash = hash_upload(uploaded_file)
+        if content_hash in seen:
+            counts["already_in_session"] += 1
+            continue
+        seen.add(content_hash)
+
+        cached = extraction_cache.lookup(content_hash, TRENDS_EXTRACTION_VERSION)
+        if cached:
+            result = build_file_result(
+                uploaded_file.name, year_from_filename(uploaded_file.name),
+                cached["extracted_data"], content_hash
+            )
+            result["from_cache"] = True
+            results.append(result)
+            counts["from_cache"] += 1
+        else:
+            pending.append(uploaded_file)
+
+    if pending:
+        for result in process_files_parallel(pending, api_keys, media_root):
+            if result.get("content_hash") and result.get("extraction"):
+                extraction_cache.store_extraction(
+                    result["content_hash"], TRENDS_EXTRACTION_VERSION, result["extraction"]
+                )
+            results.append(result)
+            counts["extracted"] += 1
+
+    print(f"Files: {counts['extracted']} extracted, {counts['from_cache']} from cache, "
+          f"{counts['already_in_session']} already in session")
+    return results, counts
+
+def merge_yearly_data(combined_data, file_results):
+    """Merge each file's per-metric yearly values into combined_data (later files win)."""
+    for result in file_results:
+        for metric, year_values in result["yearly_data"].items():
+            if metric not in combined_data:
+                combined_data[metric] = {}
+            combined_data[metric].update(year_values)
+    return combined_data
+
+def file_summary(result):
+    return {
+        "filename": result["filename"],
+        "year": result["year"],
+        "company_name": result.get("company_name"),
+        "ticker_symbol": result.get("ticker_symbol"),
+        "items_extracted": result["items_extracted"],
+        "years_found": result["years_found"],
+        "content_hash": result.get("content_hash"),
+        "from_cache": result.get("from_cache", False)
+    }
+
+def load_trend_session(session_id):
+    """The stored analysis for session_id, or None if it does not exist."""
+    try:
+        return FinancialAnalysis.objects.get(pk=session_id)
+    except (FinancialAnalysis.DoesNotExist, ValidationError, ValueError):
+        return None
+
+def save_trend_session(session, combined_data, file_metadata, company_name, ticker_symbol):
+    """Store the merged yearly series so the next upload only extracts its new files."""
+    try:
+        session = session or FinancialAnalysis()
+        session.company_name = company_name
+        session.ticker_symbol = ticker_symbol
+        session.analysis_result = {"yearly_data": combined_data, "files": file_metadata}
+        session.save()
+        return str(session.pk)
+    except Exception as e:
+        print(f"Could not save trend session: {e}")
+        return None
+
 API_KEYS = os.environ.get('API_KEYS', '').split(',')
 def extract_all_years_data(extraction: Dict[str, Any], year: str) -> Dict[str, Dict[str, float]]:
     """
@@ -1161,7 +1269,10 @@ def generate_detailed_executive_summary(trends_data: Dict[str, Any], company_nam
 
 @csrf_exempt
 def process_financial_statements_api(request):
-    """API endpoint to process 3+ years of financial statements - PARALLEL VERSION."""
+    """
+    API endpoint to process 3+ years of financial statements - PARALLEL VERSION.
+    Pass the returned session_id with later uploads to add years to the same analysis.
+    """
     if request.method != 'POST':
         return JsonResponse({'error': 'Invalid request method.'}, status=405)
 
@@ -1169,7 +1280,17 @@ def process_financial_statements_api(request):
     if not uploaded_files:
         return JsonResponse({'error': 'No files uploaded.'}, status=400)
 
-    if len(uploaded_files) < 3:
+    # Adding years to an earlier analysis: only the new files are extracted
+    session = None
+    session_id = request.POST.get('session_id')
+    if session_id:
+        session = load_trend_session(session_id)
+        if session is None:
+            return JsonResponse({'error': 'Unknown analysis session.'}, status=404)
+    stored = session.analysis_result if session else {}
+    stored_files = stored.get("files", [])
+
+    if len(stored_files) + len(uploaded_files) < 3:
         return JsonResponse({'error': 'Please upload 3 or more financial statements.'}, status=400)
 
     # Get API key with better validation
@@ -1182,32 +1303,22 @@ def process_financial_statements_api(request):
     os.makedirs(settings.MEDIA_ROOT, exist_ok=True)
 
     try:
-        file_results = process_files_parallel(uploaded_files, API_KEYS, settings.MEDIA_ROOT)
+        file_results, file_counts = extract_files_incremental(
+            uploaded_files, API_KEYS, settings.MEDIA_ROOT,
+            known_hashes=[f.get("content_hash") for f in stored_files if f.get("content_hash")]
+        )
         
-        if not file_results:
+        if not file_results and not stored_files:
             return JsonResponse({"error": "No data extracted from files."}, status=400)
 
-        # Combine data from all processed files
-        combined_data = {}
-        file_metadata = []
-        
-        for result in file_results:
-            file_metadata.append({
-                "filename": result["filename"],
-                "year": result["year"],
-                "company_name": result.get("company_name"),
-                "ticker_symbol": result.get("ticker_symbol"),
-                "items_extracted": result["items_extracted"],
-                "years_found": result["years_found"]
-            })
-            
-            # Merge yearly data
-            for metric, year_values in result["yearly_data"].items():
-                if metric not in combined_data:
-                    combined_data[metric] = {}
-                combined_data[metric].update(year_values)
+        # Merge the new files into the session's stored yearly series
+        file_metadata = stored_files + [file_summary(result) for result in file_results]
+        combined_data = merge_yearly_data(
+            {metric: dict(values) for metric, values in stored.get("yearly_data", {}).items()},
+            file_results
+        )
 
-        print(f" Combined data from {len(file_results)} files: {len(combined_data)} metrics")
+        print(f" Combined data from {len(file_metadata)} files: {len(combined_data)} metrics")
 
         # Format data for trend analysis
         formatted_items = [
@@ -1231,6 +1342,11 @@ def process_financial_statements_api(request):
         if file_metadata and file_metadata[0].get('company_name'):
             company_name = file_metadata[0]['company_name']
 
+        session_id = save_trend_session(
+            session, combined_data, file_metadata,
+            company_name, file_metadata[0].get('ticker_symbol') if file_metadata else None
+        )
+
         # Generate comprehensive summaries
         brief_summary = generate_overall_summary(trend_result, company_name)
         executive_summary = generate_detailed_executive_summary(trend_result, company_name)
@@ -1247,8 +1363,12 @@ def process_financial_statements_api(request):
                 "overall_assessment": brief_summary,
                 "executive_summary": executive_summary,
                 "processing_method": "parallel_threading",
-                "performance_note": f"Processed {len(uploaded_files)} files in parallel for faster results"
+                "performance_note": f"Processed {len(uploaded_files)} files in parallel for faster results",
+                "files_extracted": file_counts["extracted"],
+                "files_from_cache": file_counts["from_cache"],
+                "files_already_in_session": file_counts["already_in_session"]
             },
+            "session_id": session_id,
             "trends": trend_result,
             "metadata": {
                 "ai_model": "gemini-2.5-flash",
@@ -0,0 +1,11 @@
+# conftest.py
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _fresh_llm_clients():
+    """LLM clients and model health are process-wide; start every test clean."""
+    from apps.dataprocessor import llm_clients
+    llm_clients.reset()
+    yield
+    llm_clients.reset()